@@ -1,6 +1,8 @@
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
 from django.db import models
 
+from audit.tracking import AuditedModel
+
 class UserManager(BaseUserManager):
     def create_user(self, email, password=None, role='viewer', **extra_fields):
         if not email:
@@ -19,7 +21,7 @@ class UserManager(BaseUserManager):
         return user
 
 
-class User(AbstractBaseUser, PermissionsMixin):
+class User(AuditedModel, AbstractBaseUser, PermissionsMixin):
     ROLE_CHOICES = (
         ('admin', 'Admin'),
         ('viewer', 'Viewer'),
@@ -34,6 +36,10 @@ class User(AbstractBaseUser, PermissionsMixin):
 
     objects = UserManager()
 
+    # Field-level history in audit.AuditEvent; logins aren't changes
+    audit_exclude = ('last_login',)
+    audit_redact = ('password',)
+
     USERNAME_FIELD = 'email'
 
     def __str__(self):
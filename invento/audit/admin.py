@@ -0,0 +1,20 @@
+from django.contrib import admin
+
+from .models import AuditEvent
+
+
+@admin.register(AuditEvent)
+class AuditEventAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'action', 'object_type', 'object_id', 'object_repr', 'user_email')
+    list_filter = ('action', 'object_type')
+    search_fields = ('object_repr', 'user_email')
+
+    # Append-only
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,23 @@
+"""
+Periodic jobs for the audit app.
+Discovered and scheduled by ``python manage.py runapscheduler``.
+"""
+import logging
+
+from apscheduler.triggers.cron import CronTrigger
+
+from audit.partitions import ensure_partitions, prune
+from core.scheduler import periodic_job
+
+logger = logging.getLogger(__name__)
+
+
+@periodic_job('maintain_audit_partitions', CronTrigger(hour=3, minute=15))
+def maintain_audit_partitions():
+    """Create the coming months' audit partitions and prune events past AUDIT['RETENTION_DAYS']"""
+    created = ensure_partitions()
+    if created:
+        logger.info(f'Created audit partition(s): {", ".join(created)}')
+    dropped, deleted = prune()
+    if dropped or deleted:
+        logger.info(f'Pruned the audit trail: {dropped} partition(s) dropped, {deleted} event(s) deleted')
@@ -0,0 +1,40 @@
+"""
+Makes the request being served available to audit/recorder.py, which
+records its user as the actor of the changes it makes.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+from . import recorder
+
+
+class AuditMiddleware:
+    """
+    Sets the current request for the audit trail. The user is read when a
+    change is recorded, so it may sit anywhere in ``MIDDLEWARE``: DRF's
+    token authentication happens later, in the view. Runs in sync (WSGI)
+    and async (ASGI) mode.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = recorder.activate(request)
+        try:
+            return self.get_response(request)
+        finally:
+            recorder.deactivate(token)
+
+    async def __acall__(self, request):
+        token = recorder.activate(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            recorder.deactivate(token)
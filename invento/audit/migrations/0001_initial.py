@@ -0,0 +1,54 @@
+# Generated by Django 6.0 on 2026-10-19 09:00
+
+import django.core.serializers.json
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def create_event_table(apps, schema_editor):
+    from audit.partitions import create_table
+
+    create_table(schema_editor, apps.get_model('audit', 'AuditEvent'))
+
+
+def drop_event_table(apps, schema_editor):
+    # Dropping a partitioned table drops its partitions
+    schema_editor.delete_model(apps.get_model('audit', 'AuditEvent'))
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        # The table is created by create_event_table: partitioned by month on PostgreSQL
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='AuditEvent',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                        ('action', models.CharField(choices=[('create', 'Create'), ('update', 'Update'), ('delete', 'Delete')], max_length=10)),
+                        ('object_type', models.CharField(max_length=100)),
+                        ('object_id', models.BigIntegerField()),
+                        ('object_repr', models.CharField(blank=True, max_length=255)),
+                        ('user_id', models.BigIntegerField(blank=True, null=True)),
+                        ('user_email', models.CharField(blank=True, max_length=254)),
+                        ('changes', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder)),
+                    ],
+                    options={
+                        'ordering': ['-created_at', '-id'],
+                        'indexes': [
+                            models.Index(fields=['object_type', 'object_id', 'created_at'], name='audit_event_object_idx'),
+                            models.Index(fields=['user_id', 'created_at'], name='audit_event_user_idx'),
+                            models.Index(fields=['created_at'], name='audit_event_created_idx'),
+                        ],
+                    },
+                ),
+            ],
+        ),
+        migrations.RunPython(create_event_table, drop_event_table),
+    ]
@@ -0,0 +1,47 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+
+class AuditEvent(models.Model):
+    """
+    One create, update or delete of an audited model (audit/tracking.py):
+    who made it and the fields it changed, as ``{field: [old, new]}``.
+
+    Append-only: rows are never updated, and the actor and object are plain
+    values rather than foreign keys, so deleting a user or an item leaves
+    its history intact. On PostgreSQL the table is partitioned by month of
+    ``created_at`` (audit/partitions.py), which is also how old events are
+    pruned.
+    """
+    ACTION_CREATE = 'create'
+    ACTION_UPDATE = 'update'
+    ACTION_DELETE = 'delete'
+    ACTION_CHOICES = [
+        (ACTION_CREATE, 'Create'),
+        (ACTION_UPDATE, 'Update'),
+        (ACTION_DELETE, 'Delete'),
+    ]
+
+    # When the change was made (not when the buffered row was written)
+    created_at = models.DateTimeField(default=timezone.now)
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    # Model label, e.g. 'inventory.inventory'
+    object_type = models.CharField(max_length=100)
+    object_id = models.BigIntegerField()
+    object_repr = models.CharField(max_length=255, blank=True)
+    # Empty for changes made outside a request (jobs, management commands)
+    user_id = models.BigIntegerField(null=True, blank=True)
+    user_email = models.CharField(max_length=254, blank=True)
+    changes = models.JSONField(default=dict, encoder=DjangoJSONEncoder)
+
+    class Meta:
+        ordering = ['-created_at', '-id']
+        indexes = [
+            models.Index(fields=['object_type', 'object_id', 'created_at'], name='audit_event_object_idx'),
+            models.Index(fields=['user_id', 'created_at'], name='audit_event_user_idx'),
+            models.Index(fields=['created_at'], name='audit_event_created_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.action} {self.object_type} {self.object_id}'
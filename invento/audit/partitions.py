@@ -0,0 +1,132 @@
+"""
+Date partitioning and retention of the audit table.
+
+On PostgreSQL ``audit_auditevent`` is a table partitioned by range of
+``created_at``, one partition per month (``audit_auditevent_p202610``) plus a
+default partition for rows outside them. Queries bounded by time only scan
+the months they cover, and retention drops whole months, which takes no
+time and leaves nothing to vacuum, instead of deleting rows one by one.
+Partitions are created ``AUDIT['PARTITIONS_AHEAD']`` months ahead by the
+daily job in audit/jobs.py, so new rows never land in the default partition.
+
+Other databases get a plain table (the same columns and indexes) and
+retention deletes the old rows.
+"""
+import re
+from datetime import date, datetime, time, timedelta
+
+from django.db import connections
+from django.utils import timezone
+
+from .recorder import audit_settings
+
+TABLE = 'audit_auditevent'
+PARTITION_NAME = re.compile(rf'^{TABLE}_p(\d{{4}})(\d{{2}})$')
+
+# PostgreSQL: the primary key of a partitioned table must include the partition key
+CREATE_PARTITIONED_TABLE = f'''
+CREATE TABLE "{TABLE}" (
+    "id" bigint GENERATED BY DEFAULT AS IDENTITY,
+    "created_at" timestamp with time zone NOT NULL,
+    "action" varchar(10) NOT NULL,
+    "object_type" varchar(100) NOT NULL,
+    "object_id" bigint NOT NULL,
+    "object_repr" varchar(255) NOT NULL,
+    "user_id" bigint NULL,
+    "user_email" varchar(254) NOT NULL,
+    "changes" jsonb NOT NULL,
+    PRIMARY KEY ("id", "created_at")
+) PARTITION BY RANGE ("created_at")
+'''
+
+
+def is_partitioned(connection):
+    return connection.vendor == 'postgresql'
+
+
+def create_table(schema_editor, model):
+    """Create the audit table: partitioned on PostgreSQL, plain elsewhere."""
+    if not is_partitioned(schema_editor.connection):
+        schema_editor.create_model(model)
+        return
+    schema_editor.execute(CREATE_PARTITIONED_TABLE)
+    schema_editor.execute(f'CREATE TABLE "{TABLE}_default" PARTITION OF "{TABLE}" DEFAULT')
+    # Indexes on the parent are created on every partition, present and future
+    for index in model._meta.indexes:
+        schema_editor.add_index(model, index)
+    ensure_partitions(connection=schema_editor.connection)
+
+
+def _month(day, offset=0):
+    index = day.year * 12 + day.month - 1 + offset
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partitions(connection):
+    """``{name: first day of its month}`` of the monthly partitions that exist."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class parent ON pg_inherits.inhparent = parent.oid "
+            "JOIN pg_class child ON pg_inherits.inhrelid = child.oid "
+            "WHERE parent.relname = %s",
+            [TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    months = {}
+    for name in names:
+        match = PARTITION_NAME.match(name)
+        if match:
+            months[name] = date(int(match[1]), int(match[2]), 1)
+    return months
+
+
+def ensure_partitions(ahead=None, today=None, connection=None):
+    """Create the partitions of this month and ``ahead`` months after it; returns the new ones."""
+    connection = connection or connections['default']
+    if not is_partitioned(connection):
+        return []
+    ahead = audit_settings()['PARTITIONS_AHEAD'] if ahead is None else ahead
+    today = today or timezone.localdate()
+    existing = partitions(connection)
+    created = []
+    with connection.cursor() as cursor:
+        for offset in range(ahead + 1):
+            start, end = _month(today, offset), _month(today, offset + 1)
+            name = f'{TABLE}_p{start:%Y%m}'
+            if name in existing:
+                continue
+            # Bounds in UTC, the time zone timestamps are stored in
+            cursor.execute(
+                f'CREATE TABLE "{name}" PARTITION OF "{TABLE}" '
+                f"FOR VALUES FROM ('{start.isoformat()} 00:00:00+00') TO ('{end.isoformat()} 00:00:00+00')"
+            )
+            created.append(name)
+    return created
+
+
+def prune(retention_days=None, today=None, connection=None):
+    """
+    Remove events older than ``retention_days``; returns ``(partitions
+    dropped, rows deleted)``. A monthly partition goes once all of its month
+    is past the cutoff, so events are kept up to a month longer than asked.
+    """
+    from .models import AuditEvent
+
+    connection = connection or connections['default']
+    retention_days = audit_settings()['RETENTION_DAYS'] if retention_days is None else retention_days
+    today = today or timezone.localdate()
+    cutoff_day = today - timedelta(days=retention_days)
+    cutoff = timezone.make_aware(datetime.combine(cutoff_day, time.min))
+    if not is_partitioned(connection):
+        deleted, _ = AuditEvent.objects.using(connection.alias).filter(created_at__lt=cutoff).delete()
+        return 0, deleted
+
+    dropped = [name for name, month in partitions(connection).items() if _month(month, 1) <= cutoff_day]
+    with connection.cursor() as cursor:
+        for name in dropped:
+            cursor.execute(f'DROP TABLE "{name}"')
+        # Only what missed the monthly partitions
+        cursor.execute(f'DELETE FROM "{TABLE}_default" WHERE "created_at" < %s', [cutoff])
+        deleted = cursor.rowcount
+    return len(dropped), deleted
@@ -0,0 +1,159 @@
+"""
+Buffered writes of audit events.
+
+Recording an event costs no query. ``record`` holds the event until the
+transaction that made the change commits (the events of a rolled back
+transaction are dropped with it) and then adds it to this process's buffer.
+A daemon thread writes the buffer with one ``bulk_create`` every
+``AUDIT['FLUSH_INTERVAL']`` seconds, or as soon as it holds
+``AUDIT['BUFFER_SIZE']`` events, so requests never wait on the audit table;
+whatever is left is written at exit. A process killed without running its
+exit handlers (SIGKILL, out of memory) loses at most the last interval.
+
+Buffers are per process: a forked worker starts with an empty one.
+"""
+import atexit
+import logging
+import os
+import threading
+from contextlib import nullcontext
+from contextvars import ContextVar
+from functools import partial
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from core.sqlite import serialized_write
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_AUDIT_SETTINGS = {
+    'ENABLED': True,
+    'BUFFER_SIZE': 500,
+    'FLUSH_INTERVAL': 2.0,
+    # Events kept for retry while the database refuses them; the oldest are dropped beyond this
+    'MAX_PENDING': 50_000,
+    # Events older than this are pruned (on PostgreSQL: whole monthly partitions)
+    'RETENTION_DAYS': 365,
+    # Monthly partitions created ahead of time on PostgreSQL
+    'PARTITIONS_AHEAD': 3,
+}
+
+# The request being served, for the actor of its changes (audit/middleware.py)
+_current_request = ContextVar('audit_request', default=None)
+
+
+def audit_settings():
+    """Return ``settings.AUDIT`` merged over the defaults."""
+    return {**DEFAULT_AUDIT_SETTINGS, **getattr(settings, 'AUDIT', {})}
+
+
+def activate(request):
+    return _current_request.set(request)
+
+
+def deactivate(token):
+    _current_request.reset(token)
+
+
+def current_actor():
+    """``(user_id, email)`` of the user behind the current request, or ``(None, '')``."""
+    user = getattr(_current_request.get(), 'user', None)
+    if user is None or not user.is_authenticated:
+        return None, ''
+    return user.pk, user.email
+
+
+def event_for(instance, action, changes):
+    """An unsaved ``AuditEvent`` for ``action`` on ``instance`` by the current actor."""
+    from .models import AuditEvent
+
+    user_id, user_email = current_actor()
+    return AuditEvent(
+        action=action,
+        object_type=instance._meta.label_lower,
+        object_id=instance.pk,
+        object_repr=str(instance)[:255],
+        user_id=user_id,
+        user_email=user_email,
+        changes=changes,
+    )
+
+
+def _write_lock():
+    # Same queue as SerializedWriteMiddleware, when it is active
+    if getattr(settings, 'SQLITE_WRITE_QUEUE', False) and connections['default'].vendor == 'sqlite':
+        return serialized_write()
+    return nullcontext()
+
+
+class AuditBuffer:
+    """Thread-safe buffer of unsaved ``AuditEvent`` rows and the thread that writes them."""
+
+    def __init__(self):
+        self._reset()
+
+    def _reset(self):
+        self._lock = threading.Lock()
+        self._events = []
+        self._wake = threading.Event()
+        self._thread = None
+
+    def __len__(self):
+        return len(self._events)
+
+    def add(self, event):
+        config = audit_settings()
+        with self._lock:
+            self._events.append(event)
+            full = len(self._events) >= config['BUFFER_SIZE']
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='audit-flush', daemon=True)
+                self._thread.start()
+        if full:
+            self._wake.set()
+
+    def flush(self):
+        """Write the buffered events now; returns how many were written."""
+        from .models import AuditEvent
+
+        with self._lock:
+            events, self._events = self._events, []
+        if not events:
+            return 0
+        config = audit_settings()
+        try:
+            with _write_lock():
+                AuditEvent.objects.bulk_create(events, batch_size=config['BUFFER_SIZE'])
+        except Exception:
+            logger.exception(f'Could not write {len(events)} audit event(s); will retry')
+            with self._lock:
+                self._events[:0] = events
+                overflow = len(self._events) - config['MAX_PENDING']
+                if overflow > 0:
+                    del self._events[:overflow]
+                    logger.error(f'Dropped {overflow} audit event(s): more than MAX_PENDING waiting')
+            return 0
+        return len(events)
+
+    def _run(self):
+        while True:
+            self._wake.wait(audit_settings()['FLUSH_INTERVAL'])
+            self._wake.clear()
+            try:
+                self.flush()
+            finally:
+                # Like the end of a request: drop broken or expired connections
+                for connection in connections.all(initialized_only=True):
+                    connection.close_if_unusable_or_obsolete()
+
+
+shared = AuditBuffer()
+atexit.register(shared.flush)
+# The flush thread doesn't survive a fork, and the parent's events are its own to write
+os.register_at_fork(after_in_child=shared._reset)
+
+
+def record(event, using=None):
+    """Buffer ``event`` once the current transaction on ``using`` commits (right away in autocommit)."""
+    transaction.on_commit(partial(shared.add, event), using=using)
@@ -0,0 +1,12 @@
+from rest_framework import serializers
+
+from .models import AuditEvent
+
+
+class AuditEventSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AuditEvent
+        fields = [
+            'id', 'created_at', 'action', 'object_type', 'object_id', 'object_repr',
+            'user_id', 'user_email', 'changes',
+        ]
@@ -0,0 +1,34 @@
+"""
+Receivers recording an ``AuditEvent`` for every save and delete of the
+models that use ``AuditedModel`` (audit/tracking.py). Connected by
+``AuditConfig.ready()`` once all models are loaded.
+"""
+from django.apps import apps
+from django.db.models.signals import post_delete, post_save
+
+from . import recorder, tracking
+from .models import AuditEvent
+
+
+def record_save(sender, instance, created, update_fields=None, raw=False, using=None, **kwargs):
+    # raw: fixtures being loaded
+    if raw or not recorder.audit_settings()['ENABLED']:
+        return
+    changes = tracking.take_changes(instance, created, update_fields)
+    if changes:
+        action = AuditEvent.ACTION_CREATE if created else AuditEvent.ACTION_UPDATE
+        recorder.record(recorder.event_for(instance, action, changes), using)
+
+
+def record_delete(sender, instance, using=None, **kwargs):
+    if not recorder.audit_settings()['ENABLED']:
+        return
+    event = recorder.event_for(instance, AuditEvent.ACTION_DELETE, tracking.deleted_values(instance))
+    recorder.record(event, using)
+
+
+def connect():
+    for model in apps.get_models():
+        if issubclass(model, tracking.AuditedModel):
+            post_save.connect(record_save, sender=model, dispatch_uid=f'audit-save-{model._meta.label_lower}')
+            post_delete.connect(record_delete, sender=model, dispatch_uid=f'audit-delete-{model._meta.label_lower}')
@@ -0,0 +1,316 @@
+import asyncio
+import time
+from datetime import timedelta
+from unittest import mock
+
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
+from django.db import transaction
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import User
+from inventory.models import Inventory
+from . import recorder
+from .middleware import AuditMiddleware
+from .models import AuditEvent
+from .partitions import prune
+from .tracking import REDACTED
+
+
+class QuietBuffer(recorder.AuditBuffer):
+    """A buffer without the flush thread: the test flushes it."""
+
+    def _run(self):
+        pass
+
+
+def _event(**fields):
+    return AuditEvent(
+        action=AuditEvent.ACTION_UPDATE, object_type='inventory.inventory', object_id=1, **fields
+    )
+
+
+def _client(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+    return client
+
+
+FAST_HASHER = override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+
+
+@FAST_HASHER
+class AuditTestCase(TestCase):
+    def setUp(self):
+        self.buffer = QuietBuffer()
+        patcher = mock.patch.object(recorder, 'shared', self.buffer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def events(self):
+        """Write what the buffer holds; returns every event, oldest first."""
+        self.buffer.flush()
+        return list(AuditEvent.objects.order_by('created_at', 'id'))
+
+
+class ChangeTrackingTests(AuditTestCase):
+    def test_create_update_and_delete_record_field_diffs(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            item = Inventory.objects.create(name='Widget', sku='WID-1', quantity=5, unit_price='2.50')
+        item = Inventory.objects.get(pk=item.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            item.quantity = 7
+            item.name = 'Widget XL'
+            item.save()
+            # Nothing changed: no event
+            item.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            item.delete()
+
+        created, updated, deleted = self.events()
+        self.assertEqual(
+            [event.action for event in (created, updated, deleted)],
+            [AuditEvent.ACTION_CREATE, AuditEvent.ACTION_UPDATE, AuditEvent.ACTION_DELETE],
+        )
+        self.assertEqual(created.changes['quantity'], [None, 5])
+        self.assertNotIn('created_at', created.changes)
+        self.assertEqual(updated.changes, {'name': ['Widget', 'Widget XL'], 'quantity': [5, 7]})
+        self.assertEqual(deleted.changes['quantity'], [7, None])
+        self.assertEqual((updated.object_type, updated.object_repr), ('inventory.inventory', str(item)))
+
+    def test_update_fields_limit_the_diff(self):
+        item = Inventory.objects.create(name='Widget', sku='WID-1', quantity=5, unit_price='2.50')
+        item = Inventory.objects.get(pk=item.pk)
+        item.name = 'Not saved'
+        item.quantity = 9
+        with self.captureOnCommitCallbacks(execute=True):
+            item.save(update_fields=['quantity'])
+
+        [event] = self.events()
+        self.assertEqual(event.changes, {'quantity': [5, 9]})
+
+    def test_redacted_fields_record_the_change_but_not_the_values(self):
+        user = User.objects.create_user(email='clerk@example.com', password='old-secret')
+        user = User.objects.get(pk=user.pk)
+        user.set_password('new-secret')
+        user.last_login = timezone.now()
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+
+        [event] = self.events()
+        self.assertEqual(event.changes, {'password': [REDACTED, REDACTED]})
+
+    def test_rolled_back_changes_are_not_recorded(self):
+        item = Inventory.objects.create(name='Widget', sku='WID-1', quantity=5, unit_price='2.50')
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    item.quantity = 0
+                    item.save()
+                    raise ValueError('rolled back')
+            except ValueError:
+                pass
+
+        self.assertEqual(callbacks, [])
+        self.assertEqual(len(self.buffer), 0)
+
+    @override_settings(AUDIT={'ENABLED': False})
+    def test_disabled_audit_records_nothing(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Inventory.objects.create(name='Widget', sku='WID-1', quantity=5, unit_price='2.50')
+
+        self.assertEqual(self.events(), [])
+
+
+class ActorTests(AuditTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_superuser(email='admin@example.com', password='pw')
+        self.clerk = User.objects.create_user(email='clerk@example.com', password='pw')
+
+    def request(self, user):
+        request = RequestFactory().get('/')
+        request.user = user
+        return request
+
+    def test_api_change_is_attributed_to_the_authenticated_user(self):
+        item = Inventory.objects.create(name='Widget', sku='WID-1', quantity=5, unit_price='2.50')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = _client(self.admin).patch(f'/api/inventory/{item.pk}/', {'quantity': 3}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        [event] = self.events()
+        self.assertEqual((event.user_id, event.user_email), (self.admin.pk, 'admin@example.com'))
+
+    def test_change_outside_a_request_has_no_actor(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Inventory.objects.create(name='Widget', sku='WID-1', quantity=5, unit_price='2.50')
+
+        [event] = self.events()
+        self.assertEqual((event.user_id, event.user_email), (None, ''))
+
+    def test_sync_middleware_sets_the_actor_for_the_request_only(self):
+        middleware = AuditMiddleware(lambda request: recorder.current_actor())
+
+        self.assertEqual(middleware(self.request(self.clerk)), (self.clerk.pk, 'clerk@example.com'))
+        self.assertEqual(recorder.current_actor(), (None, ''))
+
+    def test_concurrent_async_requests_keep_their_own_actor(self):
+        async def view(request):
+            # Both requests are in flight here
+            await asyncio.sleep(0.01)
+            return recorder.current_actor()
+
+        middleware = AuditMiddleware(view)
+
+        async def both():
+            return await asyncio.gather(middleware(self.request(self.admin)), middleware(self.request(self.clerk)))
+
+        self.assertTrue(iscoroutinefunction(middleware))
+        self.assertEqual(
+            async_to_sync(both)(),
+            [(self.admin.pk, 'admin@example.com'), (self.clerk.pk, 'clerk@example.com')],
+        )
+
+    def test_async_request_actor_reaches_sync_code(self):
+        async def view(request):
+            return await sync_to_async(recorder.current_actor)()
+
+        actor = async_to_sync(AuditMiddleware(view))(self.request(self.clerk))
+
+        self.assertEqual(actor, (self.clerk.pk, 'clerk@example.com'))
+
+
+@override_settings(AUDIT={'BUFFER_SIZE': 3, 'MAX_PENDING': 4})
+class AuditBufferTests(AuditTestCase):
+    def test_full_buffer_wakes_the_flush_thread(self):
+        self.buffer.add(_event())
+        self.buffer.add(_event())
+        self.assertFalse(self.buffer._wake.is_set())
+
+        self.buffer.add(_event())
+
+        self.assertTrue(self.buffer._wake.is_set())
+
+    def test_failed_write_is_retried(self):
+        for _ in range(3):
+            self.buffer.add(_event())
+
+        with mock.patch.object(AuditEvent.objects, 'bulk_create', side_effect=RuntimeError('database down')):
+            with self.assertLogs('audit.recorder', 'ERROR'):
+                self.assertEqual(self.buffer.flush(), 0)
+        self.assertEqual(len(self.buffer), 3)
+
+        self.assertEqual(self.buffer.flush(), 3)
+        self.assertEqual(AuditEvent.objects.count(), 3)
+
+    def test_events_beyond_max_pending_are_dropped_oldest_first(self):
+        for object_id in range(1, 4):
+            self.buffer.add(_event())
+            self.buffer._events[-1].object_id = object_id
+        with mock.patch.object(AuditEvent.objects, 'bulk_create', side_effect=RuntimeError('database down')):
+            with self.assertLogs('audit.recorder', 'ERROR'):
+                self.buffer.flush()
+            self.buffer.add(_event(object_repr='newest'))
+            self.buffer.add(_event(object_repr='newer'))
+            with self.assertLogs('audit.recorder', 'ERROR') as logs:
+                self.buffer.flush()
+
+        self.assertIn('Dropped 1 audit event(s)', logs.output[-1])
+        self.assertEqual([event.object_id for event in self.buffer._events[:2]], [2, 3])
+        self.assertEqual(len(self.buffer), 4)
+
+
+class AuditFlushThreadTests(TransactionTestCase):
+    def wait_for_events(self, count, timeout=5):
+        deadline = time.monotonic() + timeout
+        while AuditEvent.objects.count() < count and time.monotonic() < deadline:
+            time.sleep(0.02)
+        return AuditEvent.objects.count()
+
+    @override_settings(AUDIT={'BUFFER_SIZE': 2, 'FLUSH_INTERVAL': 60})
+    def test_thread_writes_a_full_buffer_right_away(self):
+        buffer = recorder.AuditBuffer()
+        buffer.add(_event())
+        buffer.add(_event())
+
+        self.assertEqual(self.wait_for_events(2), 2)
+
+    @override_settings(AUDIT={'BUFFER_SIZE': 500, 'FLUSH_INTERVAL': 0.05})
+    def test_thread_writes_every_flush_interval(self):
+        buffer = recorder.AuditBuffer()
+        buffer.add(_event())
+
+        self.assertEqual(self.wait_for_events(1), 1)
+        self.assertEqual(len(buffer), 0)
+
+
+class PruneTests(TestCase):
+    def test_events_older_than_the_retention_are_deleted(self):
+        now = timezone.now()
+        AuditEvent.objects.bulk_create([
+            _event(created_at=now - timedelta(days=40)),
+            _event(created_at=now - timedelta(days=31)),
+            _event(created_at=now - timedelta(days=5)),
+        ])
+
+        self.assertEqual(prune(retention_days=30), (0, 2))
+        self.assertEqual(AuditEvent.objects.count(), 1)
+
+
+@FAST_HASHER
+class AuditEventApiTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(email='admin@example.com', password='pw')
+        self.clerk = User.objects.create_user(email='clerk@example.com', password='pw')
+        now = timezone.now()
+        self.events = AuditEvent.objects.bulk_create([
+            AuditEvent(action=AuditEvent.ACTION_CREATE, object_type='inventory.inventory', object_id=1,
+                       user_id=self.admin.pk, created_at=now - timedelta(days=3)),
+            AuditEvent(action=AuditEvent.ACTION_UPDATE, object_type='inventory.inventory', object_id=1,
+                       user_id=self.clerk.pk, created_at=now - timedelta(days=2)),
+            AuditEvent(action=AuditEvent.ACTION_UPDATE, object_type='inventory.inventory', object_id=2,
+                       user_id=self.clerk.pk, created_at=now - timedelta(days=1)),
+            AuditEvent(action=AuditEvent.ACTION_UPDATE, object_type='accounts.user', object_id=1,
+                       user_id=self.admin.pk, created_at=now),
+        ])
+        self.client = _client(self.admin)
+
+    def ids(self, query):
+        response = self.client.get(f'/api/audit/events/{query}')
+        self.assertEqual(response.status_code, 200)
+        return [event['id'] for event in response.data['results']]
+
+    def test_filters(self):
+        first, second, third, fourth = (event.pk for event in self.events)
+        since = (timezone.localdate() - timedelta(days=2)).isoformat()
+        until = (timezone.localdate() - timedelta(days=1)).isoformat()
+
+        self.assertEqual(self.ids(''), [fourth, third, second, first])
+        self.assertEqual(self.ids('?object_type=inventory&object_id=1'), [second, first])
+        self.assertEqual(self.ids('?object_type=user'), [fourth])
+        self.assertEqual(self.ids(f'?user_id={self.clerk.pk}'), [third, second])
+        self.assertEqual(self.ids('?action=create'), [first])
+        self.assertEqual(self.ids(f'?since={since}&until={until}'), [third, second])
+
+    def test_invalid_filters_are_rejected(self):
+        for query in ('?object_type=order', '?object_id=1', '?object_type=inventory&object_id=x',
+                      '?user_id=me', '?action=rename', '?since=yesterday'):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(f'/api/audit/events/{query}').status_code, 400)
+
+    def test_cursor_pagination_walks_every_event_once(self):
+        seen = []
+        url = '/api/audit/events/?page_size=3'
+        while url:
+            response = self.client.get(url)
+            seen += [event['id'] for event in response.data['results']]
+            url = response.data['next']
+
+        self.assertEqual(seen, [event.pk for event in reversed(self.events)])
+        self.assertNotIn('count', response.data)
+
+    def test_admins_only(self):
+        self.assertEqual(_client(self.clerk).get('/api/audit/events/').status_code, 403)
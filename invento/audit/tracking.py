@@ -0,0 +1,104 @@
+"""
+Field-level change tracking for audited models.
+
+A model opts in by putting ``AuditedModel`` before ``models.Model`` in its
+bases; audit/signals.py then records an ``AuditEvent`` for every save that
+changes a tracked field, and for every delete::
+
+    class Inventory(AuditedModel, models.Model):
+        audit_exclude = ('created_at', 'updated_at')
+
+Instances loaded from the database remember the values they were loaded
+with (``from_db``), so a save is diffed against them in Python instead of
+re-reading the row first. Instances saved without having been loaded (built
+with a pk and saved) have no old values: their changed fields are recorded
+with ``None`` as the old value. Queryset ``update()``, ``bulk_create()`` and
+``bulk_update()`` send no signals and are not audited.
+"""
+from django.db.models import DEFERRED
+
+# Stands in for the values of ``audit_redact`` fields
+REDACTED = '***'
+
+_tracked_fields = {}
+
+
+class AuditedModel:
+    """Model mixin: audit saves and deletes (see the module docstring)."""
+
+    # Fields (names) left out of the audit trail
+    audit_exclude = ()
+    # Fields whose changes are recorded without their values (password hashes)
+    audit_redact = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._audit_loaded = dict(zip(field_names, values))
+        return instance
+
+
+def loaded_values(instance):
+    """``{attname: value}`` as of the last load or save of ``instance``, or ``None`` if it has neither."""
+    return getattr(instance, '_audit_loaded', None)
+
+
+def tracked_fields(model):
+    """The concrete fields of ``model`` that are audited (all but the pk and ``audit_exclude``)."""
+    fields = _tracked_fields.get(model)
+    if fields is None:
+        fields = _tracked_fields[model] = [
+            field for field in model._meta.concrete_fields
+            if not field.primary_key and field.name not in model.audit_exclude
+        ]
+    return fields
+
+
+def _redacted(model, name, value):
+    if name in model.audit_redact and value is not None:
+        return REDACTED
+    return value
+
+
+def take_changes(instance, created, update_fields=None):
+    """
+    ``{field: [old, new]}`` for the tracked fields this save of ``instance``
+    changed (all of them, with ``None`` as the old value, when it was
+    created), and make the saved values the new baseline for its next save.
+    Only ``update_fields`` are compared when the save was limited to them.
+    """
+    model = type(instance)
+    loaded = None if created else getattr(instance, '_audit_loaded', None)
+    deferred = instance.get_deferred_fields()
+    baseline = instance.__dict__.setdefault('_audit_loaded', {})
+    changes = {}
+    for field in tracked_fields(model):
+        if field.attname in deferred:
+            continue
+        if update_fields is not None and field.name not in update_fields and field.attname not in update_fields:
+            continue
+        new = field.to_python(getattr(instance, field.attname))
+        # DEFERRED: the old value is unknown
+        old = DEFERRED if loaded is None else loaded.get(field.attname, DEFERRED)
+        baseline[field.attname] = new
+        if created:
+            if new is not None:
+                changes[field.name] = [None, _redacted(model, field.name, new)]
+            continue
+        if old is DEFERRED:
+            old = None
+        elif old == new:
+            continue
+        changes[field.name] = [_redacted(model, field.name, old), _redacted(model, field.name, new)]
+    return changes
+
+
+def deleted_values(instance):
+    """``{field: [value, None]}`` for the tracked fields of a deleted ``instance``."""
+    model = type(instance)
+    deferred = instance.get_deferred_fields()
+    return {
+        field.name: [_redacted(model, field.name, getattr(instance, field.attname)), None]
+        for field in tracked_fields(model)
+        if field.attname not in deferred and getattr(instance, field.attname) is not None
+    }
@@ -0,0 +1,14 @@
+"""
+Audit API URL Configuration
+
+Endpoints:
+    GET /api/audit/events/       - Audit events (filters: object_type, object_id, user_id, action, since, until)
+    GET /api/audit/events/<id>/  - One audit event
+"""
+from rest_framework.routers import DefaultRouter
+from .views import AuditEventViewSet
+
+router = DefaultRouter()
+router.register(r'events', AuditEventViewSet, basename='audit-event')
+
+urlpatterns = router.urls
@@ -0,0 +1,116 @@
+"""
+Audit trail API: the change history of an item or a user, or of everything
+in a time range. Admins only.
+"""
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework.pagination import CursorPagination
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.viewsets import ReadOnlyModelViewSet
+
+from accounts.permissions import IsAdmin
+from . import recorder
+from .models import AuditEvent
+from .serializers import AuditEventSerializer
+from .tracking import AuditedModel
+
+INVALID_TIME = {'error': 'Invalid since/until. Use YYYY-MM-DD or an ISO 8601 date and time.'}
+
+
+class AuditEventPagination(CursorPagination):
+    """Newest first; a cursor instead of a page number, so no COUNT(*) over the table."""
+    ordering = ('-created_at', '-id')
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+
+
+def object_types():
+    """``{model name: model label}`` of the audited models, e.g. ``{'inventory': 'inventory.inventory'}``."""
+    from django.apps import apps
+
+    return {
+        model._meta.model_name: model._meta.label_lower
+        for model in apps.get_models() if issubclass(model, AuditedModel)
+    }
+
+
+def parse_time(value, end=False):
+    """A datetime from ``value``; a bare date means the start of that day (of the next one for ``end``)."""
+    # Date first: parse_datetime also takes a bare date (as midnight)
+    day = parse_date(value)
+    if day is not None:
+        moment = datetime.combine(day + timedelta(days=1) if end else day, time.min)
+    else:
+        moment = parse_datetime(value)
+        if moment is None:
+            raise ValueError(value)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+class AuditEventViewSet(ReadOnlyModelViewSet):
+    """
+    Audit events, newest first.
+
+    Query Parameters:
+        object_type: inventory or user (required with object_id)
+        object_id: History of one object
+        user_id: Changes made by one user
+        action: create, update or delete
+        since / until: Time range (YYYY-MM-DD or ISO 8601; until is exclusive)
+
+    Events are written in batches (audit/recorder.py): this process's
+    pending ones are written before listing, other workers' within
+    ``AUDIT['FLUSH_INTERVAL']`` seconds.
+    """
+    queryset = AuditEvent.objects.all()
+    serializer_class = AuditEventSerializer
+    permission_classes = [IsAuthenticated, IsAdmin]
+    pagination_class = AuditEventPagination
+
+    def list(self, request, *args, **kwargs):
+        params = request.query_params
+        queryset = self.get_queryset()
+
+        object_type, object_id = params.get('object_type'), params.get('object_id')
+        if object_type:
+            types = object_types()
+            if object_type not in types:
+                return Response({'error': f'Invalid object_type. Choose from: {", ".join(sorted(types))}.'},
+                                status=400)
+            queryset = queryset.filter(object_type=types[object_type])
+        if object_id:
+            if not object_type:
+                return Response({'error': 'object_id needs an object_type.'}, status=400)
+            if not object_id.isdigit():
+                return Response({'error': 'object_id must be an integer.'}, status=400)
+            queryset = queryset.filter(object_id=int(object_id))
+
+        user_id = params.get('user_id')
+        if user_id:
+            if not user_id.isdigit():
+                return Response({'error': 'user_id must be an integer.'}, status=400)
+            queryset = queryset.filter(user_id=int(user_id))
+
+        action = params.get('action')
+        if action:
+            if action not in dict(AuditEvent.ACTION_CHOICES):
+                return Response({'error': 'Invalid action. Choose from: create, update, delete.'}, status=400)
+            queryset = queryset.filter(action=action)
+
+        try:
+            if params.get('since'):
+                queryset = queryset.filter(created_at__gte=parse_time(params['since']))
+            if params.get('until'):
+                queryset = queryset.filter(created_at__lt=parse_time(params['until'], end=True))
+        except ValueError:
+            return Response(INVALID_TIME, status=400)
+
+        recorder.shared.flush()
+        page = self.paginate_queryset(queryset)
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
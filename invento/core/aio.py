@@ -0,0 +1,142 @@
+"""
+Async API views.
+
+``AsyncAPIView`` is a small async counterpart of DRF's ``APIView`` for
+read-only endpoints served through the ASGI entry point (core/asgi.py): the
+same authentication and permission classes and the same JSON bytes
+(``FastJSONRenderer``), without tying up a thread while the request waits on
+the database.
+
+``gather_queries`` runs independent ORM queries concurrently. Django's async
+ORM methods (``acount``, ``aaggregate``...) send every query of a request
+through one thread-sensitive executor, so ``asyncio.gather`` over them still
+runs the queries one after another. Here each query gets a thread of a small
+pool (``ASYNC_QUERIES['MAX_WORKERS']``) and that thread's own database
+connection, so they overlap in the database. Pool connections are kept or
+closed by ``CONN_MAX_AGE`` like request connections.
+
+With ``ASYNC_QUERIES['CONCURRENT']`` off the queries run one after another on
+the request's connection, which is what code inside a transaction (tests)
+needs: other connections can't see its uncommitted rows.
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from . import metrics
+from .renderers import FastJSONRenderer
+
+DEFAULT_ASYNC_QUERY_SETTINGS = {
+    'CONCURRENT': True,
+    # Threads (and so database connections) per process for concurrent queries
+    'MAX_WORKERS': 4,
+}
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def async_query_settings():
+    """Return ``settings.ASYNC_QUERIES`` merged over the defaults."""
+    return {**DEFAULT_ASYNC_QUERY_SETTINGS, **getattr(settings, 'ASYNC_QUERIES', {})}
+
+
+def _query_executor(max_workers):
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='async-query')
+    return _executor
+
+
+def _run_query(query, record):
+    """Run ``query`` in a pool thread; returns ``(result, RequestMetrics or None)``."""
+    query_metrics = metrics.RequestMetrics() if record else None
+    try:
+        with ExitStack() as stack:
+            if query_metrics is not None:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(query_metrics.record_query))
+            return query(), query_metrics
+    finally:
+        # Pool threads never see request_finished
+        for connection in connections.all(initialized_only=True):
+            connection.close_if_unusable_or_obsolete()
+
+
+def _run_all(queries):
+    return [query() for query in queries]
+
+
+async def gather_queries(*queries):
+    """
+    Run ``queries`` (callables doing independent ORM work) concurrently and
+    return their results in order. Their queries are counted in the
+    request's metrics like the request's own.
+    """
+    config = async_query_settings()
+    if not config['CONCURRENT'] or len(queries) < 2:
+        return await sync_to_async(_run_all)(queries)
+
+    request_metrics = metrics.current_metrics()
+    run = sync_to_async(_run_query, thread_sensitive=False, executor=_query_executor(config['MAX_WORKERS']))
+    outcomes = await asyncio.gather(*(run(query, request_metrics is not None) for query in queries))
+    results = []
+    for result, query_metrics in outcomes:
+        if query_metrics is not None:
+            request_metrics.merge(query_metrics)
+        results.append(result)
+    return results
+
+
+class AsyncAPIView(View):
+    """
+    Async view with DRF's authentication and permission checks. Handlers
+    (``async def get``) receive the DRF ``Request`` and return
+    ``self.render(data)``.
+    """
+    authentication_classes = api_settings.DEFAULT_AUTHENTICATION_CLASSES
+    permission_classes = api_settings.DEFAULT_PERMISSION_CLASSES
+    renderer = FastJSONRenderer()
+
+    async def dispatch(self, request, *args, **kwargs):
+        request = Request(request, authenticators=[auth() for auth in self.authentication_classes])
+        # Authentication may read the user (and session) from the database
+        denied = await sync_to_async(self.check_permissions)(request)
+        if denied is not None:
+            return denied
+        return await super().dispatch(request, *args, **kwargs)
+
+    def check_permissions(self, request):
+        """The error response if ``request`` may not use this view, else None."""
+        try:
+            for permission in (permission_class() for permission_class in self.permission_classes):
+                if not permission.has_permission(request, self):
+                    if request.authenticators and not request.successful_authenticator:
+                        raise exceptions.NotAuthenticated()
+                    raise exceptions.PermissionDenied(getattr(permission, 'message', None))
+        except exceptions.APIException as exc:
+            response = self.render({'detail': str(exc.detail)}, status=exc.status_code)
+            if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+                # Like DRF: 401 with a challenge when the first authenticator has one
+                authenticate_header = request.authenticators[0].authenticate_header(request)
+                if authenticate_header:
+                    response.status_code = 401
+                    response['WWW-Authenticate'] = authenticate_header
+                else:
+                    response.status_code = 403
+            return response
+        return None
+
+    def render(self, data, status=200):
+        return HttpResponse(self.renderer.render(data), content_type=self.renderer.media_type, status=status)
@@ -0,0 +1,184 @@
+"""
+Endpoint benchmark harness.
+
+Drives the main API endpoints through the Django test client against the
+configured database and reports latency percentiles, throughput, query counts
+and peak Python memory per scenario. Results are plain dicts so they can be
+dumped as JSON and compared with a saved baseline (``compare_results``).
+
+Run it through ``python manage.py benchmark_endpoints``.
+"""
+import gc
+import itertools
+import math
+import platform
+import statistics
+import tracemalloc
+from contextlib import ExitStack
+from time import perf_counter
+
+import django
+from django.db import connection, connections
+from django.test import Client
+from django.utils import timezone
+
+SEARCH_TERMS = ['rice', 'premium', 'supplier 001', 'seed-0000', 'cable', 'zzz-no-match']
+
+# (name, method, path builder, payload builder); builders get the iteration number
+SCENARIOS = [
+    ('inventory_list', 'get', lambda i: f'/api/inventory/?page={i % 5 + 1}', None),
+    ('inventory_search', 'get', lambda i: f'/api/inventory/?search={SEARCH_TERMS[i % len(SEARCH_TERMS)]}', None),
+    ('inventory_create', 'post', lambda i: '/api/inventory/', lambda i: {
+        'name': f'Benchmark item {i}',
+        'sku': f'BENCH-{timezone.now():%H%M%S%f}-{i}',
+        'quantity': 100,
+        'unit_price': '9.99',
+        'category': 'Benchmark',
+        'reorder_level': 10,
+    }),
+    ('dashboard_stats', 'get', lambda i: '/api/dashboard/stats/', None),
+    ('report_summary', 'get', lambda i: '/api/reports/summary/', None),
+    ('report_csv', 'get', lambda i: '/api/reports/download/?file_format=csv', None),
+    ('report_xlsx', 'get', lambda i: '/api/reports/download/?file_format=xlsx', None),
+]
+
+
+class QueryCounter:
+    """Cheap ``execute_wrapper`` that only counts queries."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def _send(client, method, path, payload, headers):
+    if method == 'post':
+        return client.post(path, payload, content_type='application/json', headers=headers)
+    return client.get(path, headers=headers)
+
+
+def run_scenario(client, headers, method, path_for, payload_for, iterations, warmup):
+    """Run one scenario and return its statistics dict."""
+    counter = itertools.count()
+
+    def request():
+        i = next(counter)
+        payload = payload_for(i) if payload_for else None
+        return _send(client, method, path_for(i), payload, headers)
+
+    for _ in range(warmup):
+        request()
+
+    timings = []
+    query_counts = []
+    statuses = {}
+    started = perf_counter()
+    for _ in range(iterations):
+        query_counter = QueryCounter()
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(query_counter))
+            start = perf_counter()
+            response = request()
+            timings.append(perf_counter() - start)
+        query_counts.append(query_counter.count)
+        statuses[str(response.status_code)] = statuses.get(str(response.status_code), 0) + 1
+    elapsed = perf_counter() - started
+
+    # Memory is measured in a separate request: tracemalloc slows everything down
+    gc.collect()
+    tracemalloc.start()
+    try:
+        request()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    timings.sort()
+    ms = [value * 1000 for value in timings]
+    return {
+        'iterations': iterations,
+        'p50_ms': round(percentile(ms, 0.50), 3),
+        'p90_ms': round(percentile(ms, 0.90), 3),
+        'p95_ms': round(percentile(ms, 0.95), 3),
+        'p99_ms': round(percentile(ms, 0.99), 3),
+        'mean_ms': round(statistics.fmean(ms), 3),
+        'max_ms': round(ms[-1], 3),
+        'throughput_rps': round(iterations / elapsed, 2) if elapsed else None,
+        'queries_per_request': round(statistics.fmean(query_counts), 2),
+        'max_queries': max(query_counts),
+        'peak_memory_kb': round(peak / 1024, 1),
+        'status_codes': statuses,
+    }
+
+
+def run_benchmark(user, iterations=50, warmup=5, scenarios=None):
+    """
+    Benchmark every scenario (or only the names in ``scenarios``) as ``user``
+    using a JWT access token, like the frontend does. Items created by the
+    ``inventory_create`` scenario are deleted afterwards.
+    """
+    from rest_framework_simplejwt.tokens import RefreshToken
+    from inventory.models import Inventory
+
+    client = Client()
+    headers = {'Authorization': f'Bearer {RefreshToken.for_user(user).access_token}'}
+
+    results = {}
+    try:
+        for name, method, path_for, payload_for in SCENARIOS:
+            if scenarios and name not in scenarios:
+                continue
+            results[name] = run_scenario(
+                client, headers, method, path_for, payload_for, iterations, warmup
+            )
+    finally:
+        Inventory.objects.filter(sku__startswith='BENCH-').delete()
+
+    return {
+        'meta': {
+            'timestamp': timezone.now().isoformat(),
+            'items': Inventory.objects.count(),
+            'iterations': iterations,
+            'warmup': warmup,
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+        },
+        'results': results,
+    }
+
+
+COMPARED_METRICS = ('p50_ms', 'p95_ms', 'throughput_rps', 'queries_per_request', 'peak_memory_kb')
+
+
+def compare_results(current, baseline):
+    """
+    Percentage change of the main metrics per scenario against ``baseline``.
+    Positive means bigger (slower/more) except for throughput, where it is better.
+    """
+    comparison = {}
+    for name, stats in current['results'].items():
+        base = baseline.get('results', {}).get(name)
+        if not base:
+            continue
+        comparison[name] = {}
+        for metric in COMPARED_METRICS:
+            old, new = base.get(metric), stats.get(metric)
+            if old in (None, 0) or new is None:
+                change = None
+            else:
+                change = round((new - old) / old * 100, 1)
+            comparison[name][metric] = {'baseline': old, 'current': new, 'change_pct': change}
+    return comparison
@@ -0,0 +1,151 @@
+"""
+Response compression.
+
+``compress`` encodes a response body for the client's ``Accept-Encoding``
+(brotli when the ``brotli`` package is installed and accepted, else gzip);
+``core.middleware.CompressionMiddleware`` applies it to API responses above
+``RESPONSE_COMPRESSION['MIN_SIZE']`` bytes, except responses that may hold a
+secret (``carries_secrets``): with attacker-chosen input reflected next to a
+secret, compressed sizes leak the secret byte by byte (BREACH).
+
+``gzip_stream`` and ``zip_stream`` compress an iterable of byte chunks on
+the fly for ``StreamingHttpResponse`` downloads: every chunk is compressed
+and sent as it is produced, so memory stays flat however large the file.
+"""
+import gzip
+import io
+import zipfile
+import zlib
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_COMPRESSION_SETTINGS = {
+    'ENABLED': True,
+    # Smaller bodies gain little and cost a round of CPU
+    'MIN_SIZE': 1024,
+    'GZIP_LEVEL': 6,
+    # 0-11; above ~5 the extra ratio costs more CPU than the bytes are worth
+    'BROTLI_QUALITY': 5,
+    'CONTENT_TYPES': (
+        'application/json',
+        'application/msgpack',
+        'text/csv',
+        'text/plain',
+    ),
+    # Responses holding tokens, never compressed
+    'SECRET_PATHS': (
+        '/api/accounts/login/',
+        '/api/accounts/register/',
+        '/api/accounts/token/refresh/',
+    ),
+}
+
+
+def compression_settings():
+    """Return ``settings.RESPONSE_COMPRESSION`` merged over the defaults."""
+    return {**DEFAULT_COMPRESSION_SETTINGS, **getattr(settings, 'RESPONSE_COMPRESSION', {})}
+
+
+def _accepted(accept_encoding):
+    """``{coding: q}`` from an ``Accept-Encoding`` header."""
+    codings = {}
+    for part in accept_encoding.lower().split(','):
+        coding, _, params = part.strip().partition(';')
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        codings[coding.strip()] = q
+    return codings
+
+
+def carries_secrets(request, config=None):
+    """
+    Whether the response to ``request`` may hold a secret: cookie-authenticated
+    requests (session or CSRF cookie, CSRF header), requests that were handed
+    a CSRF token, and the token endpoints (``SECRET_PATHS``). Bearer-token API
+    requests don't echo their token, so they are still compressed.
+    """
+    config = config or compression_settings()
+    if request.path in config['SECRET_PATHS']:
+        return True
+    if 'CSRF_COOKIE' in request.META or settings.CSRF_HEADER_NAME in request.META:
+        return True
+    return settings.CSRF_COOKIE_NAME in request.COOKIES or settings.SESSION_COOKIE_NAME in request.COOKIES
+
+
+def negotiate(accept_encoding):
+    """The encoding to use for ``accept_encoding`` ('br', 'gzip' or None)."""
+    codings = _accepted(accept_encoding)
+    wildcard = codings.get('*', 0.0)
+    preferred = [coding for coding in ('br', 'gzip') if coding != 'br' or brotli is not None]
+    best = max(preferred, key=lambda coding: codings.get(coding, wildcard), default=None)
+    return best if best and codings.get(best, wildcard) > 0 else None
+
+
+def compress(data, encoding, config=None):
+    config = config or compression_settings()
+    if encoding == 'br':
+        return brotli.compress(data, quality=config['BROTLI_QUALITY'])
+    # mtime=0: the same body always compresses to the same bytes
+    return gzip.compress(data, compresslevel=config['GZIP_LEVEL'], mtime=0)
+
+
+def gzip_stream(chunks, level=None):
+    """Compress ``chunks`` into one gzip file, yielding compressed bytes as they are ready."""
+    level = compression_settings()['GZIP_LEVEL'] if level is None else level
+    # wbits 31: gzip header and trailer
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+class _Sink(io.RawIOBase):
+    """Non-seekable output that hands back what was written since the last ``drain``."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def zip_stream(name, chunks, level=None):
+    """
+    Compress ``chunks`` into a zip archive holding one file ``name``,
+    yielding bytes as they are ready. The output isn't seekable, so sizes go
+    in a data descriptor after the file (ZIP64, any size).
+    """
+    level = compression_settings()['GZIP_LEVEL'] if level is None else level
+    sink = _Sink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=level) as archive:
+        with archive.open(name, 'w', force_zip64=True) as member:
+            for chunk in chunks:
+                member.write(chunk)
+                data = sink.drain()
+                if data:
+                    yield data
+    yield sink.drain()
@@ -0,0 +1,27 @@
+"""
+Database connection reuse.
+
+``configure_reuse`` applies ``DB_CONN_MODE`` to the ``DATABASES`` entries:
+
+* ``persistent``: each worker thread keeps its connection for ``max_age``
+  seconds and health-checks it before reusing it in the next request.
+* ``pool``: a psycopg 3 pool per process (PostgreSQL only; other engines fall
+  back to persistent connections).
+* ``none``: a new connection for every request.
+
+This module is imported by ``core/settings.py``, so it must not import models.
+"""
+POSTGRESQL_ENGINE = 'django.db.backends.postgresql'
+
+
+def configure_reuse(databases, mode, max_age=60, pool=None):
+    """Set the connection reuse options of every entry of ``databases`` in place."""
+    for database in databases.values():
+        if mode == 'pool' and database['ENGINE'] == POSTGRESQL_ENGINE:
+            # Django requires CONN_MAX_AGE = 0 with a pool; connections go back to the pool instead
+            database['CONN_MAX_AGE'] = 0
+            database['OPTIONS'] = {**database.get('OPTIONS', {}), 'pool': dict(pool or {})}
+        elif mode != 'none':
+            database['CONN_MAX_AGE'] = max_age
+            database['CONN_HEALTH_CHECKS'] = True
+    return databases
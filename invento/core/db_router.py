@@ -0,0 +1,72 @@
+"""
+Read-replica database routing.
+
+Reads go to a replica only inside a request that
+``core.middleware.ReplicaRoutingMiddleware`` has marked as replica-safe: a
+safe-method request to a view with ``read_from_replica = True`` (and the
+action not listed in its ``primary_actions``) whose client hasn't written
+recently. Everything else (writes, other views, management
+commands, the scheduler) uses ``default``.
+
+Replicas are the ``DATABASES`` entries whose alias starts with ``replica``.
+"""
+import random
+from contextvars import ContextVar
+
+from django.conf import settings
+
+_state = ContextVar('replica_routing', default=None)
+
+
+class RoutingState:
+    """Per-request routing decision plus whether the request has written."""
+
+    def __init__(self, use_replica):
+        self.use_replica = use_replica
+        self.wrote = False
+
+
+def replica_aliases():
+    return [alias for alias in settings.DATABASES if alias.startswith('replica')]
+
+
+def activate(use_replica):
+    return _state.set(RoutingState(use_replica))
+
+
+def current_state():
+    return _state.get()
+
+
+def deactivate(token):
+    _state.reset(token)
+
+
+class ReplicaRouter:
+    """Send replica-safe reads to a random replica, everything else to the primary."""
+
+    def __init__(self):
+        self.replicas = replica_aliases()
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.use_replica or state.wrote or not self.replicas:
+            return 'default'
+        return random.choice(self.replicas)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            # Read-your-writes: the rest of this request and the pin window use the primary
+            state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {'default', *self.replicas}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive schema changes through replication
+        return db == 'default'
@@ -0,0 +1,166 @@
+"""
+Query-count, allocation and latency guardrails for URL routes.
+
+Tests describe each route with a ``RouteBudget`` and call ``measure`` to run
+the request; ``assert_within_budget`` and ``assert_constant`` produce failure
+messages that include the offending SQL. ``named_routes`` lists every named
+route in ``core/urls.py`` so a test can insist that each one is pinned.
+
+Query counts and allocations are deterministic and always asserted. Wall
+time depends on how busy the machine is, so ``max_ms`` is only asserted with
+``GUARDRAILS_CHECK_LATENCY`` on (a quiet benchmark box, not shared CI).
+"""
+import gc
+import tracemalloc
+from time import perf_counter
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLResolver, get_resolver
+
+
+class RouteBudget:
+    """
+    Expected cost of one request to a named route.
+
+    ``path`` and ``data`` may be callables taking the test case, for routes
+    that need an object (or token) created first. ``scales_with_data`` marks
+    routes whose allocations legitimately grow with the dataset (full exports);
+    their query count must still stay constant. ``max_ms`` is only checked
+    with ``GUARDRAILS_CHECK_LATENCY`` on.
+    """
+
+    def __init__(self, name, method, path, max_queries, max_ms=500, max_alloc_kb=1024,
+                 data=None, status=200, authenticated=True, scales_with_data=False):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.max_queries = max_queries
+        self.max_ms = max_ms
+        self.max_alloc_kb = max_alloc_kb
+        self.data = data
+        self.status = status
+        self.authenticated = authenticated
+        self.scales_with_data = scales_with_data
+
+    def __str__(self):
+        return f'{self.name} {self.method.upper()}'
+
+
+class Measurement:
+    def __init__(self, status, queries, duration_ms, alloc_kb):
+        self.status = status
+        self.queries = queries
+        self.duration_ms = duration_ms
+        self.alloc_kb = alloc_kb
+
+    @property
+    def query_count(self):
+        return len(self.queries)
+
+
+def named_routes(patterns=None, namespace=None):
+    """Yield the fully qualified name of every named URL pattern (duplicates included)."""
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            nested = ':'.join(part for part in (namespace, pattern.namespace) if part) or None
+            yield from named_routes(pattern.url_patterns, nested)
+        elif pattern.name:
+            yield f'{namespace}:{pattern.name}' if namespace else pattern.name
+
+
+def measure(test, client, budget):
+    """
+    Send the budget's request twice: once for its SQL and wall time, once
+    under tracemalloc for the peak allocation (tracing distorts the timing).
+    Path and payload are built before each request so any setup they do
+    isn't counted.
+    """
+    def prepare():
+        path = budget.path(test) if callable(budget.path) else budget.path
+        data = budget.data(test) if callable(budget.data) else budget.data
+        method = getattr(client, budget.method)
+        if data is None:
+            return lambda: method(path)
+        return lambda: method(path, data, content_type='application/json')
+
+    send = prepare()
+    with CaptureQueriesContext(connection) as captured:
+        start = perf_counter()
+        response = send()
+        # Streaming bodies do their work (and queries) as they are read
+        _consume(response)
+        duration_ms = (perf_counter() - start) * 1000
+    # Read now: the next request clears connection.queries
+    queries = [query['sql'] for query in captured.captured_queries]
+
+    send = prepare()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        _consume(send())
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return Measurement(response.status_code, queries, duration_ms, peak / 1024)
+
+
+def _consume(response):
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+        response.close()
+
+
+def format_queries(queries):
+    return '\n'.join(f'  {index}. {sql}' for index, sql in enumerate(queries, 1))
+
+
+def latency_checks_enabled():
+    return getattr(settings, 'GUARDRAILS_CHECK_LATENCY', False)
+
+
+def assert_within_budget(test, budget, measurement):
+    test.assertEqual(
+        measurement.status, budget.status,
+        f'{budget} returned {measurement.status}, expected {budget.status}'
+    )
+    test.assertLessEqual(
+        measurement.query_count, budget.max_queries,
+        f'{budget} ran {measurement.query_count} queries (budget {budget.max_queries}):\n'
+        f'{format_queries(measurement.queries)}'
+    )
+    if latency_checks_enabled():
+        test.assertLessEqual(
+            measurement.duration_ms, budget.max_ms,
+            f'{budget} took {measurement.duration_ms:.1f}ms (budget {budget.max_ms}ms)'
+        )
+    test.assertLessEqual(
+        measurement.alloc_kb, budget.max_alloc_kb,
+        f'{budget} allocated {measurement.alloc_kb:.0f}KB at peak (budget {budget.max_alloc_kb}KB)'
+    )
+
+
+def assert_constant(test, budget, small, large, growth, alloc_tolerance=1.5, alloc_slack_kb=64):
+    """
+    Fail if the query count changed, or (unless the route scales with data)
+    the peak allocation grew, between the small and the ``growth``x dataset.
+    """
+    if small.query_count != large.query_count:
+        added = [sql for sql in large.queries if sql not in small.queries]
+        test.fail(
+            f'{budget} ran {small.query_count} queries before and {large.query_count} after '
+            f'the dataset grew {growth}x. Queries at {growth}x:\n{format_queries(large.queries)}\n'
+            f'Not seen on the small dataset:\n{format_queries(added)}'
+        )
+    if not budget.scales_with_data:
+        limit = small.alloc_kb * alloc_tolerance + alloc_slack_kb
+        test.assertLessEqual(
+            large.alloc_kb, limit,
+            f'{budget} peak allocation grew from {small.alloc_kb:.0f}KB to {large.alloc_kb:.0f}KB '
+            f'when the dataset grew {growth}x. Queries:\n{format_queries(large.queries)}'
+        )
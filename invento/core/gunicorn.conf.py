@@ -0,0 +1,96 @@
+"""
+Gunicorn configuration, used by ``manage.py serve``.
+
+Serves ``core.wsgi`` with threaded workers or, with ``WEB_INTERFACE=asgi``,
+``core.asgi`` with uvicorn workers. Every value can be overridden with the
+environment variable next to it (or a ``serve`` option):
+
+- workers: WSGI ``2 * cores + 1`` (capped at ``WEB_MAX_WORKERS``), each
+  with ``WEB_THREADS`` threads for requests waiting on the database; ASGI
+  one event loop per core
+- the app is imported once in the master (``preload_app``), together with
+  the URLconf and every view module behind it, so workers start warm and share
+  those pages copy-on-write instead of each importing pandas and friends
+- workers are recycled after ``WEB_MAX_REQUESTS`` requests (jittered so they
+  don't all restart at once), which bounds slow memory growth
+
+Database connections: every worker thread keeps its own (``CONN_MAX_AGE``),
+plus ``ASYNC_QUERIES['MAX_WORKERS']`` per process for async views. Size the
+database's connection limit for ``workers * (threads + that)``.
+
+Several workers need a shared cache (``REDIS_URL``): with the default local
+memory cache every worker has its own inventory data version, SKU and
+response caches and subscribed webhook events, and they drift apart. The
+master logs a warning when it starts more than one worker on it.
+
+Reloads: ``manage.py serve --reload`` (SIGHUP) re-reads this file and
+replaces the workers gracefully; with the preloaded app they keep the code
+the master loaded. ``manage.py serve --upgrade`` (SIGUSR2, then SIGQUIT to
+the old master) starts a new master on the new code and retires the old one
+once its in-flight requests are done.
+"""
+import multiprocessing
+import os
+
+interface = os.getenv('WEB_INTERFACE', 'wsgi').lower()
+
+
+def _cores():
+    try:
+        # CPUs this process may run on (container limits, taskset)
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return multiprocessing.cpu_count()
+
+
+cores = _cores()
+
+bind = os.getenv('WEB_BIND', f"0.0.0.0:{os.getenv('PORT', '8000')}")
+if interface == 'asgi':
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    workers = int(os.getenv('WEB_WORKERS', 0)) or cores
+else:
+    worker_class = 'gthread'
+    workers = int(os.getenv('WEB_WORKERS', 0)) or min(2 * cores + 1, int(os.getenv('WEB_MAX_WORKERS', 12)))
+    threads = int(os.getenv('WEB_THREADS', 4))
+
+preload_app = os.getenv('WEB_PRELOAD', 'True').lower() == 'true'
+max_requests = int(os.getenv('WEB_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.getenv('WEB_MAX_REQUESTS_JITTER', max_requests // 10))
+# Long report downloads stream for a while; exports run in the background
+timeout = int(os.getenv('WEB_TIMEOUT', 60))
+graceful_timeout = int(os.getenv('WEB_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('WEB_KEEPALIVE', 5))
+pidfile = os.getenv('WEB_PIDFILE') or None
+
+accesslog = os.getenv('WEB_ACCESS_LOG', '-') or None
+errorlog = '-'
+loglevel = os.getenv('WEB_LOG_LEVEL', 'info')
+
+
+def when_ready(server):
+    """Runs in the master before the first fork."""
+    _warn_about_local_cache(server)
+    if not server.cfg.preload_app:
+        return
+    from django.db import connections
+    from django.urls import get_resolver
+
+    # Django imports the URLconf (and the views) on the first request: do it
+    # here so every worker inherits it instead of importing it itself
+    get_resolver().url_patterns
+    # Nothing opened here may be shared with the workers
+    connections.close_all()
+    server.log.info('Preloaded the URLconf and views')
+
+
+
+def _warn_about_local_cache(server):
+    from django.conf import settings
+
+    backend = settings.CACHES['default']['BACKEND']
+    if server.cfg.workers > 1 and backend.endswith('.LocMemCache'):
+        server.log.warning(
+            f'{server.cfg.workers} workers on the local memory cache: each keeps its own cached data and '
+            'versions, so they serve diverging results. Set REDIS_URL to share one cache.'
+        )
@@ -0,0 +1,274 @@
+"""
+Per-request performance metrics.
+
+``core.middleware.PerformanceMiddleware`` creates a ``RequestMetrics`` for each
+sampled request and makes it current for the duration of the request. Code that
+wants its time broken out wraps the work in ``span('name')``; database queries
+are counted automatically. Every request (sampled or not) feeds the per-route
+latency histogram that ``metrics_view`` renders in Prometheus text format.
+
+Aggregates live in process memory, so each worker process exposes its own
+series; aggregate them across scrape targets with ``sum()`` in PromQL.
+"""
+import threading
+from collections import defaultdict
+from secrets import compare_digest
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework import serializers
+from rest_framework.permissions import BasePermission, IsAuthenticated
+from rest_framework.views import APIView
+
+from accounts.permissions import IsAdmin
+
+DEFAULT_PERFORMANCE_SETTINGS = {
+    'ENABLED': True,
+    'SAMPLE_RATE': 1.0,
+    'SERVER_TIMING': False,
+    'TOKEN': '',
+    'BUCKETS': (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+}
+
+_current = ContextVar('request_metrics', default=None)
+
+
+def performance_settings():
+    """Return ``settings.PERFORMANCE_METRICS`` merged over the defaults."""
+    return {**DEFAULT_PERFORMANCE_SETTINGS, **getattr(settings, 'PERFORMANCE_METRICS', {})}
+
+
+class RequestMetrics:
+    """Query count/time and named span timings collected for one request."""
+
+    def __init__(self):
+        self.query_count = 0
+        self.query_time = 0.0
+        # Per database alias: [queries, seconds], so replica reads are visible
+        self.aliases = defaultdict(lambda: [0, 0.0])
+        self.spans = defaultdict(float)
+
+    def record_query(self, execute, sql, params, many, context):
+        """``connection.execute_wrapper`` hook counting every query."""
+        start = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = perf_counter() - start
+            self.query_time += elapsed
+            self.query_count += 1
+            alias = self.aliases[context['connection'].alias]
+            alias[0] += 1
+            alias[1] += elapsed
+
+    def add_span(self, name, seconds):
+        self.spans[name] += seconds
+
+    def merge(self, other):
+        """Add the queries and spans ``other`` collected (e.g. in a worker thread)."""
+        self.query_count += other.query_count
+        self.query_time += other.query_time
+        for alias, (count, seconds) in other.aliases.items():
+            self.aliases[alias][0] += count
+            self.aliases[alias][1] += seconds
+        for name, seconds in other.spans.items():
+            self.spans[name] += seconds
+
+    def server_timing(self, total):
+        """Format the collected timings as a ``Server-Timing`` header value."""
+        entries = [f'db;dur={self.query_time * 1000:.2f};desc="{self.query_count} queries"']
+        if set(self.aliases) - {'default'}:
+            entries += [
+                f'db-{alias};dur={seconds * 1000:.2f};desc="{count} queries"'
+                for alias, (count, seconds) in sorted(self.aliases.items())
+            ]
+        entries += [f'{name};dur={seconds * 1000:.2f}' for name, seconds in self.spans.items()]
+        entries.append(f'total;dur={total * 1000:.2f}')
+        return ', '.join(entries)
+
+
+def current_metrics():
+    """Return the ``RequestMetrics`` of the current request, or None if not sampled."""
+    return _current.get()
+
+
+def activate(metrics):
+    return _current.set(metrics)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+@contextmanager
+def span(name):
+    """Time the enclosed block under ``name`` if the current request is sampled."""
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add_span(name, perf_counter() - start)
+
+
+class InstrumentedSerializerMixin:
+    """Serializer mixin that times building ``.data`` as the "serialize" span."""
+
+    @property
+    def data(self):
+        with span('serialize'):
+            return super().data
+
+
+class InstrumentedListSerializer(InstrumentedSerializerMixin, serializers.ListSerializer):
+    """Use as ``Meta.list_serializer_class`` so ``many=True`` responses are timed too."""
+
+
+class LatencyRegistry:
+    """Thread-safe per-route aggregates rendered by ``metrics_view``."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.buckets = tuple(performance_settings()['BUCKETS'])
+        self.routes = {}
+
+    def observe(self, route, method, status_code, duration, metrics=None, response_size=None):
+        key = (route, method, f'{status_code // 100}xx')
+        with self._lock:
+            entry = self.routes.get(key)
+            if entry is None:
+                entry = self.routes[key] = {
+                    'bucket_counts': [0] * len(self.buckets),
+                    'count': 0,
+                    'sum': 0.0,
+                    'response_bytes': 0,
+                    'sampled': 0,
+                    'db_queries': 0,
+                    'db_seconds': 0.0,
+                    'db_aliases': defaultdict(lambda: [0, 0.0]),
+                    'spans': defaultdict(float),
+                }
+            entry['count'] += 1
+            entry['sum'] += duration
+            for index, bound in enumerate(self.buckets):
+                if duration <= bound:
+                    entry['bucket_counts'][index] += 1
+            if response_size is not None:
+                entry['response_bytes'] += response_size
+            if metrics is not None:
+                entry['sampled'] += 1
+                entry['db_queries'] += metrics.query_count
+                entry['db_seconds'] += metrics.query_time
+                for alias, (count, seconds) in metrics.aliases.items():
+                    entry['db_aliases'][alias][0] += count
+                    entry['db_aliases'][alias][1] += seconds
+                for name, seconds in metrics.spans.items():
+                    entry['spans'][name] += seconds
+
+    def render_prometheus(self):
+        """Return all aggregates in the Prometheus text exposition format."""
+        with self._lock:
+            routes = sorted(self.routes.items())
+            lines = [
+                '# HELP invento_request_duration_seconds Request latency by route.',
+                '# TYPE invento_request_duration_seconds histogram',
+            ]
+            for (route, method, status_class), entry in routes:
+                labels = f'route="{_escape(route)}",method="{method}",status="{status_class}"'
+                for bound, count in zip(self.buckets, entry['bucket_counts']):
+                    lines.append(f'invento_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'invento_request_duration_seconds_bucket{{{labels},le="+Inf"}} {entry["count"]}')
+                lines.append(f'invento_request_duration_seconds_sum{{{labels}}} {entry["sum"]:.6f}')
+                lines.append(f'invento_request_duration_seconds_count{{{labels}}} {entry["count"]}')
+
+            counters = (
+                ('invento_response_bytes_total', 'Response body bytes (non-streaming).', 'response_bytes'),
+                ('invento_requests_sampled_total', 'Requests with detailed instrumentation.', 'sampled'),
+                ('invento_request_db_queries_total', 'DB queries in sampled requests.', 'db_queries'),
+                ('invento_request_db_seconds_total', 'DB time in sampled requests.', 'db_seconds'),
+            )
+            for name, help_text, field in counters:
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} counter')
+                for (route, method, status_class), entry in routes:
+                    labels = f'route="{_escape(route)}",method="{method}",status="{status_class}"'
+                    lines.append(f'{name}{{{labels}}} {_number(entry[field])}')
+
+            alias_counters = (
+                ('invento_request_db_alias_queries_total', 'DB queries in sampled requests by database alias.', 0),
+                ('invento_request_db_alias_seconds_total', 'DB time in sampled requests by database alias.', 1),
+            )
+            for name, help_text, index in alias_counters:
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} counter')
+                for (route, method, status_class), entry in routes:
+                    labels = f'route="{_escape(route)}",method="{method}",status="{status_class}"'
+                    for alias, totals in sorted(entry['db_aliases'].items()):
+                        lines.append(f'{name}{{{labels},alias="{alias}"}} {_number(totals[index])}')
+
+            lines.append('# HELP invento_request_span_seconds_total Time in named spans (serialize, render, ...) in sampled requests.')
+            lines.append('# TYPE invento_request_span_seconds_total counter')
+            for (route, method, status_class), entry in routes:
+                labels = f'route="{_escape(route)}",method="{method}",status="{status_class}"'
+                for name, seconds in sorted(entry['spans'].items()):
+                    lines.append(f'invento_request_span_seconds_total{{{labels},span="{name}"}} {seconds:.6f}')
+
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _number(value):
+    return f'{value:.6f}' if isinstance(value, float) else str(value)
+
+
+registry = LatencyRegistry()
+
+
+class MetricsTokenPermission(BasePermission):
+    """The scraper's ``Authorization: Bearer <PERFORMANCE_METRICS['TOKEN']>`` header."""
+    message = 'Invalid metrics token'
+
+    def has_permission(self, request, view):
+        expected = f"Bearer {performance_settings()['TOKEN']}"
+        return compare_digest(request.headers.get('Authorization', ''), expected)
+
+
+class MetricsView(APIView):
+    """
+    GET /api/metrics/
+    Prometheus scrape endpoint. When ``PERFORMANCE_METRICS['TOKEN']`` is set the
+    scraper must send ``Authorization: Bearer <token>``; otherwise only admins
+    can read it.
+    """
+
+    def get_authenticators(self):
+        # The scrape token is not a JWT: don't let JWTAuthentication reject it
+        if performance_settings()['TOKEN']:
+            return []
+        return super().get_authenticators()
+
+    def get_permissions(self):
+        if performance_settings()['TOKEN']:
+            return [MetricsTokenPermission()]
+        return [IsAuthenticated(), IsAdmin()]
+
+    def get(self, request):
+        return HttpResponse(
+            registry.render_prometheus(),
+            content_type='text/plain; version=0.0.4; charset=utf-8'
+        )
+
+
+metrics_view = MetricsView.as_view()
@@ -0,0 +1,307 @@
+"""
+Project-wide middleware.
+"""
+import random
+from contextlib import ExitStack
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import compression, db_router, metrics
+from .sqlite import serialized_write
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+PRIMARY_PIN_COOKIE = 'invento_db_primary'
+
+
+class PerformanceMiddleware:
+    """
+    Records latency for every request and, for a sampled fraction of them
+    (``PERFORMANCE_METRICS['SAMPLE_RATE']``), DB query count/time, named spans
+    and render time. Sampled responses get a ``Server-Timing`` header when
+    ``PERFORMANCE_METRICS['SERVER_TIMING']`` is on (by default only with DEBUG).
+
+    Keep it first in ``MIDDLEWARE`` so the timings cover the whole stack.
+    Runs in sync (WSGI) and async (ASGI) mode.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = metrics.performance_settings()
+        self.enabled = config['ENABLED']
+        self.sample_rate = config['SAMPLE_RATE']
+        self.server_timing = config['SERVER_TIMING']
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self.enabled:
+            return self.get_response(request)
+
+        start = perf_counter()
+        request_metrics = self._sample()
+        token = metrics.activate(request_metrics)
+        try:
+            if request_metrics is None:
+                response = self.get_response(request)
+            else:
+                with ExitStack() as stack:
+                    _record_queries(stack, request_metrics)
+                    response = self.get_response(request)
+        finally:
+            metrics.deactivate(token)
+        return self._observe(request, response, start, request_metrics)
+
+    async def __acall__(self, request):
+        if not self.enabled:
+            return await self.get_response(request)
+
+        start = perf_counter()
+        request_metrics = self._sample()
+        token = metrics.activate(request_metrics)
+        try:
+            if request_metrics is None:
+                response = await self.get_response(request)
+            else:
+                # Sync views and the ORM run on the request's thread-sensitive
+                # thread, with that thread's connections: count queries there
+                stack = ExitStack()
+                await sync_to_async(_record_queries)(stack, request_metrics)
+                try:
+                    response = await self.get_response(request)
+                finally:
+                    await sync_to_async(stack.close)()
+        finally:
+            metrics.deactivate(token)
+        return self._observe(request, response, start, request_metrics)
+
+    def _sample(self):
+        if self.sample_rate >= 1 or random.random() < self.sample_rate:
+            return metrics.RequestMetrics()
+        return None
+
+    def _observe(self, request, response, start, request_metrics):
+        duration = perf_counter() - start
+        response_size = None if response.streaming else len(response.content)
+        metrics.registry.observe(
+            _route_name(request), request.method, response.status_code,
+            duration, request_metrics, response_size
+        )
+        if request_metrics is not None and self.server_timing:
+            response['Server-Timing'] = request_metrics.server_timing(duration)
+        return response
+
+    def process_template_response(self, request, response):
+        """Time deferred rendering (DRF ``Response`` and ``TemplateResponse``)."""
+        request_metrics = metrics.current_metrics()
+        if request_metrics is not None:
+            start = perf_counter()
+            response.add_post_render_callback(
+                lambda rendered: request_metrics.add_span('render', perf_counter() - start)
+            )
+        return response
+
+
+class CompressionMiddleware:
+    """
+    Compresses API responses (``RESPONSE_COMPRESSION['CONTENT_TYPES']``) of
+    at least ``RESPONSE_COMPRESSION['MIN_SIZE']`` bytes with brotli or gzip,
+    whichever the client accepts (brotli preferred). Streaming responses are
+    left alone: downloads that want compression stream it themselves
+    (``core.compression.gzip_stream``). So are responses to requests carrying
+    CSRF or session cookies and the token endpoints, which may hold secrets
+    (BREACH, see ``core.compression.carries_secrets``).
+
+    Sits right after ``PerformanceMiddleware``, so the recorded response
+    sizes are the bytes actually sent.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        config = compression.compression_settings()
+        if not config['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.config = config
+        self.content_types = frozenset(config['CONTENT_TYPES'])
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.compress(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.compress(request, await self.get_response(request))
+
+    def compress(self, request, response):
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        if compression.carries_secrets(request, self.config):
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type not in self.content_types or len(response.content) < self.config['MIN_SIZE']:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = compression.negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+        compressed = compression.compress(response.content, encoding, self.config)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+        response['Content-Encoding'] = encoding
+        # The bytes changed: a strong validator no longer matches them
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        return response
+
+
+class SerializedWriteMiddleware:
+    """
+    Runs requests with unsafe methods (POST/PUT/PATCH/DELETE) one at a time
+    through ``core.sqlite.write_queue`` so concurrent API writes don't fight
+    over the SQLite write lock. Reads are never queued.
+
+    Only active when ``SQLITE_WRITE_QUEUE`` is on and the default database is
+    SQLite. Sync only: queued writes block their thread anyway.
+    """
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'SQLITE_WRITE_QUEUE', False) or connections['default'].vendor != 'sqlite':
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method in SAFE_METHODS:
+            return self.get_response(request)
+        with serialized_write():
+            return self.get_response(request)
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Lets ``core.db_router.ReplicaRouter`` send reads to a replica for
+    safe-method requests to views with ``read_from_replica = True``, except
+    the viewset actions named in the view's ``primary_actions``.
+
+    Read-your-writes: once a request writes, the rest of it reads from the
+    primary and the response sets a cookie that keeps the client on the
+    primary for ``REPLICA_PIN_SECONDS`` so it doesn't read stale data from a
+    lagging replica.
+
+    Only active when a replica database is configured.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not db_router.replica_aliases():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.pin_seconds = getattr(settings, 'REPLICA_PIN_SECONDS', 5)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = db_router.activate(use_replica=False)
+        try:
+            response = self.get_response(request)
+            wrote = db_router.current_state().wrote
+        finally:
+            db_router.deactivate(token)
+        return self._pin_to_primary(request, response, wrote)
+
+    async def __acall__(self, request):
+        token = db_router.activate(use_replica=False)
+        try:
+            response = await self.get_response(request)
+            wrote = db_router.current_state().wrote
+        finally:
+            db_router.deactivate(token)
+        return self._pin_to_primary(request, response, wrote)
+
+    def _pin_to_primary(self, request, response, wrote):
+        if wrote or request.method not in SAFE_METHODS:
+            response.set_cookie(
+                PRIMARY_PIN_COOKIE, '1', max_age=self.pin_seconds,
+                httponly=True, samesite='Lax', secure=request.is_secure()
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # DRF and class-based views expose the view class on the function
+        view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+        # Viewset actions that must see the latest rows opt out with ``primary_actions``
+        action = getattr(view_func, 'actions', {}).get(request.method.lower())
+        db_router.current_state().use_replica = (
+            request.method in SAFE_METHODS
+            and getattr(view_class, 'read_from_replica', False)
+            and action not in getattr(view_class, 'primary_actions', ())
+            and PRIMARY_PIN_COOKIE not in request.COOKIES
+        )
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    WhiteNoise that also runs in async (ASGI) mode, so a sync-only
+    middleware doesn't make every request below it hold a thread. Non-static
+    requests cost a dictionary lookup; opening a matched file (and the
+    autorefresh file search) runs in a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+
+def _record_queries(stack, request_metrics):
+    """Count the queries of this thread's connections into ``request_metrics`` until ``stack`` closes."""
+    for connection in connections.all():
+        stack.enter_context(connection.execute_wrapper(request_metrics.record_query))
+
+
+def _route_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    return match.view_name or match.route
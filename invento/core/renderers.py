@@ -0,0 +1,127 @@
+"""
+Fast API renderers and parsers.
+
+``FastJSONRenderer`` and ``FastJSONParser`` use orjson when it is installed
+and produce exactly the bytes (and data) of DRF's ``JSONRenderer`` and
+``JSONParser``: the same compact separators, raw UTF-8, escaped U+2028/U+2029,
+and DRF's encoder for dates, times and Decimals. Anything orjson formats
+differently (floats printed in exponent form by Python, integers beyond 64
+bits, indented output for the browsable API) goes through DRF's stdlib path
+instead. The one deliberate difference: NaN/Infinity render as ``null``
+where DRF's strict renderer raises ``ValueError`` (a 500 for the client).
+
+``MessagePackRenderer`` and ``MessagePackParser`` (``application/msgpack``,
+needs the ``msgpack`` package) are chosen with the ``Accept`` and
+``Content-Type`` headers. Values are converted like the JSON output, so a
+client gets the same structure either way.
+"""
+import io
+import re
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Python's float repr switches to exponent form below 1e-4 and from 1e16 up
+# ("1e+16", "1e-05"), orjson writes "1e16" / "0.00001". Output that may hold
+# such a float goes through the stdlib path; a match inside a string only
+# costs that fallback. Literal-first patterns keep the scans fast.
+_EXPONENT = re.compile(rb'e[-0-9]')
+_SMALL_FLOAT = b'0.0000'
+
+# orjson parses integers outside int64/uint64 as floats; the stdlib keeps them
+# ints. Any run of 19+ digits takes the stdlib path.
+_DIGITS_TO_ZERO = bytes.maketrans(b'123456789', b'000000000')
+_BIG_INTEGER = b'0' * 19
+
+
+def _differs_from_stdlib(ret):
+    if _SMALL_FLOAT in ret:
+        return True
+    return any(ret[match.start() - 1:match.start()].isdigit() for match in _EXPONENT.finditer(ret))
+
+
+class FastJSONRenderer(JSONRenderer):
+    """Drop-in ``JSONRenderer`` that encodes with orjson when the output is identical."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (orjson is None or not self.compact or self.ensure_ascii or not self.strict
+                or self.get_indent(accepted_media_type, renderer_context or {})):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                # DRF's own conversions (ms-precision datetimes with "Z", Decimal -> float, ...)
+                default=self.encoder_class().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except orjson.JSONEncodeError:
+            # Unsupported types and huge integers; the stdlib path raises the usual errors
+            return super().render(data, accepted_media_type, renderer_context)
+
+        if _differs_from_stdlib(ret):
+            return super().render(data, accepted_media_type, renderer_context)
+        if b'\xe2\x80' in ret:
+            # Same as DRF: keep the output valid JavaScript
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    """Drop-in ``JSONParser`` that decodes UTF-8 bodies with orjson."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+
+        raw = stream.read()
+        if _BIG_INTEGER not in raw.translate(_DIGITS_TO_ZERO):
+            try:
+                return orjson.loads(raw)
+            except orjson.JSONDecodeError:
+                pass
+        # Let DRF produce the data or its usual ParseError message
+        return super().parse(io.BytesIO(raw), media_type, parser_context)
+
+
+def _msgpack_default(obj, _encoder=JSONEncoder()):
+    return _encoder.default(obj)
+
+
+class MessagePackRenderer(BaseRenderer):
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_msgpack_default, use_bin_type=True)
+
+
+class MessagePackParser(BaseParser):
+    media_type = 'application/msgpack'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return msgpack.unpackb(stream.read(), raw=False)
+        except (ValueError, msgpack.ExtraData, msgpack.FormatError, msgpack.StackError) as exc:
+            raise ParseError(f'MessagePack parse error - {exc}')
@@ -0,0 +1,245 @@
+"""
+Periodic job framework built on APScheduler.
+
+Apps declare their jobs in a ``jobs.py`` module with the ``periodic_job``
+decorator. ``runapscheduler`` discovers those modules, builds a scheduler with
+the executors and misfire/coalescing defaults from ``settings.SCHEDULER`` and
+schedules every registered job.
+
+Execution history is written by django_apscheduler into ``DjangoJobExecution``
+rows, so ``job_metrics`` reads timings from there: the API and the ``jobstats``
+command run in other processes than the scheduler and still see the same data.
+"""
+import logging
+from collections import OrderedDict
+
+import django
+from django.conf import settings
+from django.db.models import Avg, Count, Max, OuterRef, Q, Subquery
+from django.utils.module_loading import autodiscover_modules
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SCHEDULER_SETTINGS = {
+    'THREAD_POOL_SIZE': 10,
+    'PROCESS_POOL_SIZE': 2,
+    'COALESCE': True,
+    'MISFIRE_GRACE_TIME': 300,
+    'MAX_INSTANCES': 1,
+    'HISTOGRAM_BUCKETS': (0.1, 0.5, 1, 5, 15, 60, 300, 900),
+}
+
+_registry = OrderedDict()
+
+
+def scheduler_settings():
+    """Return ``settings.SCHEDULER`` merged over the defaults."""
+    return {**DEFAULT_SCHEDULER_SETTINGS, **getattr(settings, 'SCHEDULER', {})}
+
+
+class PeriodicJob:
+    """A job registered with ``periodic_job``, scheduled by ``runapscheduler``."""
+
+    def __init__(self, func, job_id, trigger, executor='default', max_instances=None,
+                 coalesce=None, misfire_grace_time=None, description=''):
+        self.func = func
+        self.job_id = job_id
+        self.trigger = trigger
+        self.executor = executor
+        self.max_instances = max_instances
+        self.coalesce = coalesce
+        self.misfire_grace_time = misfire_grace_time
+        self.description = description
+
+    def add_to(self, scheduler):
+        """Add (or replace) this job on ``scheduler``; unset options use the job defaults."""
+        options = {
+            name: value for name, value in (
+                ('max_instances', self.max_instances),
+                ('coalesce', self.coalesce),
+                ('misfire_grace_time', self.misfire_grace_time),
+            ) if value is not None
+        }
+        scheduler.add_job(
+            self.func,
+            trigger=self.trigger,
+            id=self.job_id,
+            executor=self.executor,
+            replace_existing=True,
+            **options
+        )
+
+
+def periodic_job(job_id, trigger, **options):
+    """
+    Register the decorated function as a periodic job.
+
+    ``trigger`` is any APScheduler trigger. Use ``executor='processpool'`` for
+    CPU-heavy jobs (snapshots, compaction) so they don't hold up the thread pool
+    that runs the daily report. ``max_instances``, ``coalesce`` and
+    ``misfire_grace_time`` override the scheduler-wide defaults.
+
+    The function is wrapped with ``close_old_connections`` and the wrapper is
+    what gets registered and returned, so it stays picklable for the process pool.
+    """
+    from django_apscheduler import util
+
+    def decorator(func):
+        wrapped = util.close_old_connections(func)
+        if job_id in _registry:
+            logger.warning(f"Periodic job '{job_id}' registered twice; keeping the last one")
+        _registry[job_id] = PeriodicJob(
+            wrapped, job_id, trigger,
+            description=options.pop('description', (func.__doc__ or '').strip().split('\n')[0]),
+            **options
+        )
+        return wrapped
+    return decorator
+
+
+def discover_jobs():
+    """Import ``jobs`` modules from all installed apps and return the registry."""
+    autodiscover_modules('jobs')
+    return _registry
+
+
+def _job_store():
+    from django import db
+    from django_apscheduler.jobstores import DjangoJobStore
+
+    class ConnectionManagedJobStore(DjangoJobStore):
+        """
+        Treats each scheduler wakeup like a request: connections that are past
+        ``CONN_MAX_AGE`` or failed their health check are dropped before the
+        due-jobs lookup, and otherwise reused between wakeups.
+        """
+
+        def get_due_jobs(self, now):
+            db.close_old_connections()
+            return super().get_due_jobs(now)
+
+    return ConnectionManagedJobStore()
+
+
+def build_scheduler():
+    """
+    Create a ``BackgroundScheduler`` with a thread pool ("default") and a
+    process pool ("processpool") executor plus the configured job defaults.
+    """
+    from apscheduler.executors.pool import ProcessPoolExecutor, ThreadPoolExecutor
+    from apscheduler.schedulers.background import BackgroundScheduler
+    config = scheduler_settings()
+    scheduler = BackgroundScheduler(
+        timezone=settings.TIME_ZONE,
+        executors={
+            'default': ThreadPoolExecutor(config['THREAD_POOL_SIZE']),
+            # Spawned workers need their own app registry before unpickling a job
+            'processpool': ProcessPoolExecutor(
+                config['PROCESS_POOL_SIZE'],
+                pool_kwargs={'initializer': django.setup},
+            ),
+        },
+        job_defaults={
+            'coalesce': config['COALESCE'],
+            'misfire_grace_time': config['MISFIRE_GRACE_TIME'],
+            'max_instances': config['MAX_INSTANCES'],
+        },
+    )
+    scheduler.add_jobstore(_job_store(), 'default')
+    return scheduler
+
+
+def job_metrics(job_id=None, since=None):
+    """
+    Per-job run counts, duration histogram and last run, computed from
+    ``DjangoJobExecution`` rows (optionally only those run at or after ``since``).
+
+    Returns a list of dicts ordered by job id. Registered jobs that have not
+    run yet are included with zero counts.
+    """
+    from django_apscheduler.models import DjangoJob, DjangoJobExecution
+
+    buckets = scheduler_settings()['HISTOGRAM_BUCKETS']
+
+    executions = DjangoJobExecution.objects.all()
+    if job_id:
+        executions = executions.filter(job_id=job_id)
+    if since:
+        executions = executions.filter(run_time__gte=since)
+
+    bucket_counts = {
+        f'le_{index}': Count('id', filter=Q(duration__lte=bound))
+        for index, bound in enumerate(buckets)
+    }
+    rows = executions.values('job_id').annotate(
+        runs=Count('id'),
+        timed=Count('duration'),
+        succeeded=Count('id', filter=Q(status=DjangoJobExecution.SUCCESS)),
+        failed=Count('id', filter=Q(status=DjangoJobExecution.ERROR)),
+        missed=Count('id', filter=Q(status=DjangoJobExecution.MISSED)),
+        skipped_max_instances=Count('id', filter=Q(status=DjangoJobExecution.MAX_INSTANCES)),
+        avg_duration=Avg('duration'),
+        max_duration=Max('duration'),
+        **bucket_counts
+    )
+    stats = {row['job_id']: row for row in rows}
+
+    latest = executions.filter(job_id=OuterRef('pk')).order_by('-run_time')
+    jobs = DjangoJob.objects.annotate(
+        last_run_time=Subquery(latest.values('run_time')[:1]),
+        last_status=Subquery(latest.values('status')[:1]),
+        last_duration=Subquery(latest.values('duration')[:1]),
+        last_exception=Subquery(latest.values('exception')[:1]),
+    ).order_by('id')
+    if job_id:
+        jobs = jobs.filter(id=job_id)
+
+    registry = discover_jobs()
+    result = []
+    seen = set()
+    for job in jobs:
+        seen.add(job.id)
+        result.append(_format_metrics(job.id, registry.get(job.id), stats.get(job.id), buckets, job))
+    for registered_id, registered in registry.items():
+        if registered_id not in seen and (not job_id or registered_id == job_id):
+            result.append(_format_metrics(registered_id, registered, None, buckets, None))
+    return sorted(result, key=lambda item: item['job_id'])
+
+
+def _format_metrics(job_id, registered, stats, buckets, job):
+    stats = stats or {}
+    histogram = [
+        {'le': bound, 'count': stats.get(f'le_{index}', 0)}
+        for index, bound in enumerate(buckets)
+    ]
+    histogram.append({'le': '+Inf', 'count': stats.get('timed', 0)})
+
+    last_run = None
+    if job is not None and job.last_run_time:
+        last_run = {
+            'run_time': job.last_run_time.isoformat(),
+            'status': job.last_status,
+            'duration': _seconds(job.last_duration),
+            'exception': job.last_exception,
+        }
+
+    return {
+        'job_id': job_id,
+        'description': registered.description if registered else '',
+        'executor': registered.executor if registered else None,
+        'registered': registered is not None,
+        'next_run_time': job.next_run_time.isoformat() if job is not None and job.next_run_time else None,
+        'runs': stats.get('runs', 0),
+        'succeeded': stats.get('succeeded', 0),
+        'failed': stats.get('failed', 0),
+        'missed': stats.get('missed', 0),
+        'skipped_max_instances': stats.get('skipped_max_instances', 0),
+        'avg_duration': _seconds(stats.get('avg_duration')),
+        'max_duration': _seconds(stats.get('max_duration')),
+        'duration_histogram': histogram,
+        'last_run': last_run,
+    }
+
+
+def _seconds(value):
+    return round(float(value), 2) if value is not None else None
@@ -4,11 +4,15 @@ Django settings for core project.
 Production-ready Inventory Management System
 """
 
+import importlib.util
 import os
 from pathlib import Path
 from datetime import timedelta
 from dotenv import load_dotenv
 
+from core.db_connections import configure_reuse as configure_connection_reuse
+from core.sqlite import production_options as sqlite_production_options
+
 # Load environment variables
 load_dotenv()
 
@@ -36,6 +40,8 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
+    # Before staticfiles: runserver leaves static files to WhiteNoise too
+    'whitenoise.runserver_nostatic',
     'django.contrib.staticfiles',
     
     # Third-party apps
@@ -43,22 +49,31 @@ INSTALLED_APPS = [
     'rest_framework_simplejwt',
     'rest_framework_simplejwt.token_blacklist',
     'django_filters',
+    'django_apscheduler',
     
     # Local apps
     'accounts',
     'inventory',
     'dashboard',
     'reports',
+    'audit',
+    'webhooks',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.PerformanceMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'core.middleware.SerializedWriteMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.StaticFilesMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'audit.middleware.AuditMiddleware',
 ]
 
 ROOT_URLCONF = 'core.urls'
@@ -96,6 +111,19 @@ if os.getenv('DB_ENGINE'):
             'PORT': os.getenv('DB_PORT', '5432'),
         }
     }
+
+    # Read replicas: DB_REPLICA_HOSTS=replica1,replica2:5433 adds replica_0, replica_1, ...
+    # (same credentials as the primary). core.db_router.ReplicaRouter sends
+    # dashboard, report and inventory reads there; see ReplicaRoutingMiddleware.
+    for index, replica in enumerate(filter(None, os.getenv('DB_REPLICA_HOSTS', '').split(','))):
+        host, _, port = replica.strip().partition(':')
+        DATABASES[f'replica_{index}'] = {
+            **DATABASES['default'],
+            'HOST': host,
+            'PORT': port or DATABASES['default']['PORT'],
+            # Tests run against the primary only
+            'TEST': {'MIRROR': 'default'},
+        }
 else:
     # Default to SQLite for development
     DATABASES = {
@@ -105,6 +133,160 @@ else:
         }
     }
 
+    # Small production sites on SQLite: SQLITE_PROFILE=production enables WAL,
+    # tuned pragmas and BEGIN IMMEDIATE transactions (see core/sqlite.py)
+    if os.getenv('SQLITE_PROFILE', 'default').lower() == 'production':
+        DATABASES['default']['OPTIONS'] = sqlite_production_options(
+            mmap_size=int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+            cache_size=-int(os.getenv('SQLITE_CACHE_SIZE_KB', 64 * 1024)),
+            busy_timeout=int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000)),
+        )
+
+# Connection reuse
+#   DB_CONN_MODE=persistent (default): each worker thread keeps its connection
+#     for DB_CONN_MAX_AGE seconds and health-checks it before reusing it
+#   DB_CONN_MODE=pool: psycopg 3 connection pool per process (PostgreSQL only;
+#     falls back to persistent connections elsewhere)
+#   DB_CONN_MODE=none: a new connection for every request
+DB_CONN_MODE = os.getenv('DB_CONN_MODE', 'persistent').lower()
+
+configure_connection_reuse(
+    DATABASES, DB_CONN_MODE,
+    max_age=int(os.getenv('DB_CONN_MAX_AGE', 60)),
+    pool={
+        'min_size': int(os.getenv('DB_POOL_MIN_SIZE', 2)),
+        'max_size': int(os.getenv('DB_POOL_MAX_SIZE', 10)),
+        'timeout': int(os.getenv('DB_POOL_TIMEOUT', 10)),
+    },
+)
+
+# Queue API writes one at a time inside each process (SQLite only)
+SQLITE_WRITE_QUEUE = os.getenv('SQLITE_WRITE_QUEUE', 'False').lower() == 'true'
+
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+
+# After a client writes, its reads stay on the primary for this long (read-your-writes)
+REPLICA_PIN_SECONDS = int(os.getenv('DB_REPLICA_PIN_SECONDS', 5))
+
+
+# Cache
+# Local memory is per process: with several workers set REDIS_URL so that
+# inventory version bumps (inventory/cache.py) reach every worker and the
+# snapshot file can be shared.
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'invento',
+        }
+    }
+
+# Versioned cache for inventory list/retrieve responses
+INVENTORY_CACHE = {
+    'ENABLED': os.getenv('INVENTORY_CACHE_ENABLED', 'True').lower() == 'true',
+    'TIMEOUT': int(os.getenv('INVENTORY_CACHE_TIMEOUT', 300)),
+    # API responses are only cached with REDIS_URL, unless this is on (safe with one worker process only)
+    'LOCAL': os.getenv('INVENTORY_CACHE_LOCAL', 'False').lower() == 'true',
+    # In-process SKU -> row LRU for the scanner lookups (rows per worker process)
+    'SKU_CACHE_SIZE': int(os.getenv('INVENTORY_SKU_CACHE_SIZE', 10000)),
+    # Seconds before an SKU row written by another process is re-read
+    'SKU_CACHE_TTL': int(os.getenv('INVENTORY_SKU_CACHE_TTL', 30)),
+    # Rebuild the autocomplete index for outside writes at most this often (seconds)
+    'AUTOCOMPLETE_MAX_AGE': int(os.getenv('INVENTORY_AUTOCOMPLETE_MAX_AGE', 60)),
+    'AUTOCOMPLETE_BACKGROUND_REBUILD': os.getenv('INVENTORY_AUTOCOMPLETE_BACKGROUND_REBUILD', 'True').lower() == 'true',
+}
+
+# Columnar analytics snapshot (inventory/snapshot.py). With PATH set, worker
+# processes share one memory-mapped copy written there (needs REDIS_URL: the
+# copy is matched against the shared data version)
+INVENTORY_SNAPSHOT = {
+    'PATH': os.getenv('INVENTORY_SNAPSHOT_PATH', ''),
+    # Pick up writes from other processes at most this often (seconds)
+    'MAX_AGE': int(os.getenv('INVENTORY_SNAPSHOT_MAX_AGE', 60)),
+}
+
+# Reorder engine (inventory/reorder.py)
+REORDER = {
+    # Consumption history used for the daily demand (days)
+    'WINDOW_DAYS': int(os.getenv('REORDER_WINDOW_DAYS', 30)),
+    # Demand covered by an order beyond the lead time (days)
+    'REVIEW_DAYS': int(os.getenv('REORDER_REVIEW_DAYS', 14)),
+    'DEFAULT_LEAD_TIME_DAYS': int(os.getenv('REORDER_DEFAULT_LEAD_TIME_DAYS', 7)),
+}
+
+# Brotli/gzip compression of API responses (core/compression.py)
+RESPONSE_COMPRESSION = {
+    'ENABLED': os.getenv('RESPONSE_COMPRESSION_ENABLED', 'True').lower() == 'true',
+    # Responses smaller than this (bytes) are sent as they are
+    'MIN_SIZE': int(os.getenv('RESPONSE_COMPRESSION_MIN_SIZE', 1024)),
+    'GZIP_LEVEL': int(os.getenv('RESPONSE_COMPRESSION_GZIP_LEVEL', 6)),
+    'BROTLI_QUALITY': int(os.getenv('RESPONSE_COMPRESSION_BROTLI_QUALITY', 5)),
+}
+
+# Parallel report exports (reports/exports.py)
+REPORT_EXPORTS = {
+    # Outside MEDIA_ROOT: files are only served by the authenticated export file endpoint
+    'DIR': os.getenv('REPORT_EXPORTS_DIR', str(BASE_DIR / 'exports')),
+    # Formatting processes per export (0: one per core)
+    'WORKERS': int(os.getenv('REPORT_EXPORTS_WORKERS', 0)),
+    'PARTITION_ROWS': int(os.getenv('REPORT_EXPORTS_PARTITION_ROWS', 250000)),
+    # Finished exports are deleted after this many hours
+    'MAX_AGE_HOURS': int(os.getenv('REPORT_EXPORTS_MAX_AGE_HOURS', 24)),
+    # Unfinished exports accepted from the API, in all (one per user)
+    'MAX_QUEUED': int(os.getenv('REPORT_EXPORTS_MAX_QUEUED', 10)),
+    # Seconds the export worker (manage.py runexports) waits when nothing is queued
+    'POLL_INTERVAL': int(os.getenv('REPORT_EXPORTS_POLL_INTERVAL', 2)),
+}
+
+# Dashboard headline stats: 'counters' reads the maintained InventoryTotals row,
+# 'snapshot' computes them from the analytics snapshot, 'live' recomputes them
+# from the inventory table on every request
+DASHBOARD_STATS_SOURCE = os.getenv('DASHBOARD_STATS_SOURCE', 'live').lower()
+
+# Async views (core/aio.py): independent queries run concurrently, each on a
+# pool thread with its own database connection
+ASYNC_QUERIES = {
+    'CONCURRENT': os.getenv('ASYNC_QUERIES_CONCURRENT', 'True').lower() == 'true',
+    'MAX_WORKERS': int(os.getenv('ASYNC_QUERIES_MAX_WORKERS', 4)),
+}
+
+
+# Audit trail (audit/): field-level changes to items and users, buffered in
+# process and written in batches every FLUSH_INTERVAL seconds or BUFFER_SIZE events
+AUDIT = {
+    'ENABLED': os.getenv('AUDIT_ENABLED', 'True').lower() == 'true',
+    'BUFFER_SIZE': int(os.getenv('AUDIT_BUFFER_SIZE', 500)),
+    'FLUSH_INTERVAL': float(os.getenv('AUDIT_FLUSH_INTERVAL', 2)),
+    # Pruned daily; on PostgreSQL a month is dropped once all of it is this old
+    'RETENTION_DAYS': int(os.getenv('AUDIT_RETENTION_DAYS', 365)),
+    'PARTITIONS_AHEAD': int(os.getenv('AUDIT_PARTITIONS_AHEAD', 3)),
+}
+
+
+# Inventory webhooks (webhooks/): events queued in an outbox with the change
+# and delivered in batches by "python manage.py runwebhooks"
+WEBHOOKS = {
+    'ENABLED': os.getenv('WEBHOOKS_ENABLED', 'True').lower() == 'true',
+    'POLL_INTERVAL': float(os.getenv('WEBHOOKS_POLL_INTERVAL', 1)),
+    'BATCH_SIZE': int(os.getenv('WEBHOOKS_BATCH_SIZE', 100)),
+    'WORKERS': int(os.getenv('WEBHOOKS_WORKERS', 4)),
+    'TIMEOUT': int(os.getenv('WEBHOOKS_TIMEOUT', 10)),
+    'BACKOFF_BASE': int(os.getenv('WEBHOOKS_BACKOFF_BASE', 5)),
+    'BACKOFF_MAX': int(os.getenv('WEBHOOKS_BACKOFF_MAX', 3600)),
+    'MAX_AGE_DAYS': int(os.getenv('WEBHOOKS_MAX_AGE_DAYS', 7)),
+    # Seconds an event waits before delivery, for transactions committing out of id order
+    'COMMIT_LAG': int(os.getenv('WEBHOOKS_COMMIT_LAG', 10)),
+    # Longest a process without a shared cache (REDIS_URL) misses a new subscription (seconds)
+    'SUBSCRIBED_TTL': int(os.getenv('WEBHOOKS_SUBSCRIBED_TTL', 10)),
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -144,6 +326,23 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# Production pipeline (core/storage.py): collectstatic minifies, content-hashes
+# and precompresses (gzip + brotli) the assets; WhiteNoise serves them with
+# far-future cache headers. Needs `manage.py collectstatic` before starting.
+# Off: WhiteNoise serves the source files from the finders, unversioned
+STATIC_PIPELINE = os.getenv('STATIC_PIPELINE', 'False').lower() == 'true'
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {
+        'BACKEND': 'core.storage.MinifiedStaticFilesStorage' if STATIC_PIPELINE
+        else 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+}
+WHITENOISE_USE_FINDERS = not STATIC_PIPELINE
+WHITENOISE_AUTOREFRESH = not STATIC_PIPELINE
+# Only the hashed, precompressed copies are served in production
+WHITENOISE_KEEP_ONLY_HASHED_FILES = STATIC_PIPELINE
+
 # Media files
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
@@ -166,8 +365,23 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
+    # orjson-backed JSON with byte-identical output (see core/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': [
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'core.renderers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
+# MessagePack via "Accept: application/msgpack" when msgpack is installed
+if importlib.util.find_spec('msgpack'):
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'].insert(1, 'core.renderers.MessagePackRenderer')
+    REST_FRAMEWORK['DEFAULT_PARSER_CLASSES'].append('core.renderers.MessagePackParser')
+
 
 # Simple JWT Configuration
 SIMPLE_JWT = {
@@ -179,6 +393,33 @@ SIMPLE_JWT = {
 }
 
 
+# Scheduler (runapscheduler) Configuration
+SCHEDULER = {
+    'THREAD_POOL_SIZE': int(os.getenv('SCHEDULER_THREAD_POOL_SIZE', 10)),
+    'PROCESS_POOL_SIZE': int(os.getenv('SCHEDULER_PROCESS_POOL_SIZE', 2)),
+    # Run a missed job once when the scheduler catches up, not once per missed slot
+    'COALESCE': os.getenv('SCHEDULER_COALESCE', 'True').lower() == 'true',
+    'MISFIRE_GRACE_TIME': int(os.getenv('SCHEDULER_MISFIRE_GRACE_TIME', 300)),
+    'MAX_INSTANCES': 1,
+}
+
+
+# Request performance instrumentation (core.middleware.PerformanceMiddleware)
+PERFORMANCE_METRICS = {
+    'ENABLED': os.getenv('PERF_METRICS_ENABLED', 'True').lower() == 'true',
+    # Fraction of requests that get query counting and span timings
+    'SAMPLE_RATE': float(os.getenv('PERF_SAMPLE_RATE', '1.0' if DEBUG else '0.1')),
+    # Timings are only sent to clients in development unless explicitly enabled
+    'SERVER_TIMING': os.getenv('PERF_SERVER_TIMING', str(DEBUG)).lower() == 'true',
+    # Bearer token required by /api/metrics/ (admin users only when empty)
+    'TOKEN': os.getenv('METRICS_TOKEN', ''),
+}
+
+# Route guardrail tests (core/guardrails.py): also fail routes over their
+# max_ms. Off by default: wall time is noise on a loaded CI machine
+GUARDRAILS_CHECK_LATENCY = os.getenv('GUARDRAILS_CHECK_LATENCY', 'False').lower() == 'true'
+
+
 # Custom User Model (to be defined in accounts app)
 AUTH_USER_MODEL = 'accounts.User'
 
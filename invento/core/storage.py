@@ -0,0 +1,68 @@
+"""
+Production static files storage.
+
+``collectstatic`` with ``MinifiedStaticFilesStorage`` (the ``staticfiles``
+storage when ``STATIC_PIPELINE`` is on):
+
+1. minifies the collected ``.css``/``.js`` copies (rcssmin/rjsmin, when
+   installed; sources stay readable in ``static/``)
+2. writes content-hashed copies (``app.3f2a9c1e.js``) and ``staticfiles.json``,
+   the manifest ``{% static %}`` resolves names through
+3. writes ``.gz`` and ``.br`` variants of every compressible file (WhiteNoise)
+
+WhiteNoise serves the result, picking the precompressed variant the client
+accepts and sending hashed files with a far-future ``immutable`` cache
+header, so repeat page loads don't fetch assets at all.
+"""
+import logging
+
+from django.core.files.base import ContentFile
+from whitenoise.storage import CompressedManifestStaticFilesStorage
+
+try:
+    import rcssmin
+except ImportError:
+    rcssmin = None
+
+try:
+    import rjsmin
+except ImportError:
+    rjsmin = None
+
+logger = logging.getLogger(__name__)
+
+
+def minifier(name):
+    """The minify function for a static file ``name``, or None to keep it as is."""
+    if '.min.' in name:
+        return None
+    if name.endswith('.css') and rcssmin is not None:
+        return rcssmin.cssmin
+    if name.endswith('.js') and rjsmin is not None:
+        return rjsmin.jsmin
+    return None
+
+
+class MinifiedStaticFilesStorage(CompressedManifestStaticFilesStorage):
+    """Minify, hash, then precompress (see the module docstring)."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        if not dry_run:
+            paths = dict(paths)
+            for name in list(paths):
+                minify = minifier(name)
+                if minify is not None:
+                    self._minify(name, minify)
+                    # Hash (and compress) the minified copy rather than the source. A copy
+                    # collectstatic skipped as unchanged was minified by an earlier run
+                    paths[name] = (self, name)
+        yield from super().post_process(paths, dry_run=dry_run, **options)
+
+    def _minify(self, name, minify):
+        with self.open(name) as collected:
+            text = collected.read().decode('utf-8')
+        minified = minify(text)
+        if len(minified) < len(text):
+            self.delete(name)
+            self._save(name, ContentFile(minified.encode('utf-8')))
+            logger.debug('Minified %s: %d -> %d bytes', name, len(text), len(minified))
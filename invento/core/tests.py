@@ -0,0 +1,921 @@
+import datetime as dt
+import gzip
+import io
+import itertools
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
+
+from apscheduler.triggers.interval import IntervalTrigger
+from asgiref.sync import async_to_sync
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.utils import ConnectionHandler
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import resolve
+from django.utils import timezone
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import User
+from audit.models import AuditEvent
+from inventory.models import Category, Inventory, Lot, PurchaseOrder, StockMovement, Supplier
+from inventory.seeding import generate_inventory
+from reports.models import ReportExport
+from webhooks import outbox
+from webhooks.models import WebhookSubscription
+from core import aio, compression, db_connections, db_router, metrics, renderers, scheduler, sqlite
+from core.middleware import (
+    PRIMARY_PIN_COOKIE, CompressionMiddleware, ReplicaRoutingMiddleware, SerializedWriteMiddleware,
+)
+from core.guardrails import (
+    RouteBudget, assert_constant, assert_within_budget, measure, named_routes,
+)
+
+_unique = itertools.count()
+
+# Finished exports written by the export budgets
+EXPORT_DIR = tempfile.mkdtemp(prefix='invento-exports-')
+
+
+def _new_item_path(test):
+    item = Inventory.objects.create(
+        name='Guardrail item', sku=f'GUARD-{next(_unique)}', quantity=50, unit_price='1.00'
+    )
+    return f'/api/inventory/{item.pk}/'
+
+
+def _new_order_path(action=''):
+    def path(test):
+        supplier, _ = Supplier.objects.get_or_create(name='Guardrail supplier')
+        order = PurchaseOrder.objects.create(supplier=supplier)
+        item = Inventory.objects.create(
+            name='Guardrail ordered item', sku=f'GUARD-{next(_unique)}', quantity=5, unit_price='1.00'
+        )
+        order.lines.create(item=item, quantity=10, unit_price='1.00')
+        return f'/api/inventory/purchase-orders/{order.pk}/{action}'
+    return path
+
+
+def _new_lot(test):
+    item = Inventory.objects.create(
+        name='Guardrail lot item', sku=f'GUARD-{next(_unique)}', quantity=0, unit_price='1.00'
+    )
+    return Lot.objects.create(
+        item=item, lot_number='L1', quantity=20, expiry_date=timezone.localdate() + timedelta(days=10)
+    )
+
+
+def _new_lot_path(test):
+    return f'/api/inventory/lots/{_new_lot(test).pk}/'
+
+
+def _allocate_path(test):
+    return f'/api/inventory/{_new_lot(test).item_id}/allocate/'
+
+
+def _new_export_path(suffix=''):
+    def path(test):
+        export = ReportExport.objects.create(
+            created_by=test.admin, file_format='csv', status=ReportExport.STATUS_DONE, total_rows=1,
+            rows_done=1, partitions=1, partitions_done=1, file_name=f'guardrail-{next(_unique)}.csv',
+        )
+        with open(os.path.join(EXPORT_DIR, export.file_name), 'w') as export_file:
+            export_file.write('Name,SKU\nGuardrail,GUARD-0\n')
+        return f'/api/reports/exports/{export.pk}/{suffix}'
+    return path
+
+
+def _exports_path(test):
+    # As if the export worker had run the exports queued by the previous requests
+    ReportExport.objects.filter(status=ReportExport.STATUS_PENDING).update(status=ReportExport.STATUS_DONE)
+    return '/api/reports/exports/'
+
+
+def _new_event_path(test):
+    event = AuditEvent.objects.create(
+        action=AuditEvent.ACTION_UPDATE, object_type='inventory.inventory', object_id=1,
+        user_id=test.admin.pk, user_email=test.admin.email, changes={'quantity': [5, 7]},
+    )
+    return f'/api/audit/events/{event.pk}/'
+
+
+def _new_subscription_path(action=''):
+    def path(test):
+        # Inactive: an active one would add the outbox insert to item writes in the next pass
+        subscription = WebhookSubscription.objects.create(
+            name='Guardrail hook', url='http://127.0.0.1:9/hook', is_active=False,
+        )
+        return f'/api/webhooks/subscriptions/{subscription.pk}/{action}'
+    return path
+
+
+def _refresh_token(test):
+    return {'refresh': str(RefreshToken.for_user(test.admin))}
+
+
+# One entry per (route, method) the app serves. Query counts include the JWT user lookup.
+ROUTE_BUDGETS = [
+    RouteBudget('home', 'get', '/', max_queries=0, authenticated=False),
+    RouteBudget('dashboard', 'get', '/dashboard/', max_queries=0, authenticated=False),
+    RouteBudget('inventory', 'get', '/inventory/', max_queries=0, authenticated=False),
+    RouteBudget('reports', 'get', '/reports/', max_queries=0, authenticated=False),
+    RouteBudget('alerts', 'get', '/alerts/', max_queries=0, authenticated=False),
+    RouteBudget('api-root', 'get', '/api/', max_queries=0, authenticated=False),
+    RouteBudget('metrics', 'get', '/api/metrics/', max_queries=1),
+
+    RouteBudget('accounts:register', 'post', '/api/accounts/register/', max_queries=3, authenticated=False,
+                status=201, data=lambda test: {'email': f'guard{next(_unique)}@example.com', 'password': 'Guardrail-pass-1'}),
+    RouteBudget('accounts:login', 'post', '/api/accounts/login/', max_queries=3, authenticated=False,
+                data={'email': 'guard-admin@example.com', 'password': 'Guardrail-pass-1'}),
+    RouteBudget('accounts:logout', 'post', '/api/accounts/logout/', max_queries=8, data=_refresh_token),
+    RouteBudget('accounts:token_refresh', 'post', '/api/accounts/token/refresh/', max_queries=13,
+                authenticated=False, data=_refresh_token),
+    RouteBudget('accounts:profile', 'get', '/api/accounts/profile/', max_queries=1),
+    RouteBudget('accounts:profile', 'patch', '/api/accounts/profile/', max_queries=2, data={'first_name': 'Guard'}),
+    RouteBudget('accounts:user_list', 'get', '/api/accounts/users/', max_queries=3),
+
+    RouteBudget('inventory-list', 'get', '/api/inventory/', max_queries=3),
+    RouteBudget('inventory-list', 'get', '/api/inventory/?search=rice', max_queries=3),
+    RouteBudget('inventory-list', 'get', '/api/inventory/?fields=id,name,status', max_queries=3),
+    RouteBudget('inventory-list', 'get', '/api/inventory/?category=Groceries', max_queries=3),
+    # Writes also record the stock movement. Their InventoryTotals delta runs after the
+    # commit (one more UPDATE, outside the request's transaction) and isn't counted here
+    RouteBudget('inventory-list', 'post', '/api/inventory/', max_queries=5, status=201, data=lambda test: {
+        'name': 'Guardrail create', 'sku': f'GUARD-{next(_unique)}', 'quantity': 100, 'unit_price': '2.50',
+    }),
+    RouteBudget('inventory-detail', 'get', _new_item_path, max_queries=2),
+    # + the locked read of the old category/quantity/price for the category counters
+    # + whether the item has lots (quantity changes only)
+    RouteBudget('inventory-detail', 'patch', _new_item_path, max_queries=6, data={'quantity': 75}),
+    # + cascading to the item's stock movements, purchase order lines and lots
+    RouteBudget('inventory-detail', 'delete', _new_item_path, max_queries=6, status=204),
+    RouteBudget('inventory-sku', 'get', '/api/inventory/sku/SEED-00000001/', max_queries=2),
+    RouteBudget('inventory-by-sku', 'post', '/api/inventory/by-sku/', max_queries=2,
+                data={'skus': [f'SEED-{index:08d}' for index in range(30)] + ['NO-SUCH-SKU']}),
+    # JWT user + count + orders + prefetched lines and their items
+    RouteBudget('purchase-order-list', 'get', lambda test: _new_order_path()(test) and '/api/inventory/purchase-orders/',
+                max_queries=5),
+    RouteBudget('purchase-order-detail', 'get', _new_order_path(), max_queries=4),
+    # JWT user + inventory columns + movements + supplier lead times + stock on order
+    # Whole-catalogue batch passes: arrays grow with the data, queries don't
+    RouteBudget('purchase-order-suggestions', 'get', '/api/inventory/purchase-orders/suggestions/', max_queries=5,
+                scales_with_data=True),
+    RouteBudget('purchase-order-generate', 'post', '/api/inventory/purchase-orders/generate/', max_queries=13,
+                scales_with_data=True),
+    RouteBudget('purchase-order-send', 'post', _new_order_path('send/'), max_queries=6),
+    RouteBudget('purchase-order-cancel', 'post', _new_order_path('cancel/'), max_queries=6),
+    # JWT user + the index (re)build: the data changed between the passes
+    RouteBudget('lot-list', 'get', lambda test: _new_lot(test) and '/api/inventory/lots/', max_queries=3),
+    # Writes also resync the item's quantity and expiry date through Inventory.save()
+    # + new lots: the locked item and whether it has lots yet (opening lot)
+    RouteBudget('lot-list', 'post', '/api/inventory/lots/', max_queries=10, status=201, data=lambda test: {
+        'item': _new_lot(test).item_id, 'lot_number': 'L2', 'quantity': 5, 'expiry_date': '2031-01-01',
+    }),
+    RouteBudget('lot-detail', 'get', _new_lot_path, max_queries=2),
+    RouteBudget('lot-detail', 'patch', _new_lot_path, max_queries=8, data={'quantity': 15}),
+    RouteBudget('lot-detail', 'delete', _new_lot_path, max_queries=9, status=204),
+    RouteBudget('lot-expiring', 'get', lambda test: _new_lot(test) and '/api/inventory/lots/expiring/?days=30',
+                max_queries=3),
+    RouteBudget('inventory-allocate', 'post', _allocate_path, max_queries=12, data={'quantity': 5}),
+    RouteBudget('inventory-autocomplete', 'get', '/api/inventory/autocomplete/?q=s', max_queries=2),
+
+    # 4 headline counts + 2 per day of the 7-day stock trend + category counters
+    RouteBudget('dashboard:dashboard-root', 'get', '/api/dashboard/', max_queries=20),
+    RouteBudget('dashboard:dashboard-stats', 'get', '/api/dashboard/stats/', max_queries=20),
+    # Headline stats from the InventoryTotals row instead of 4 queries
+    RouteBudget('dashboard:dashboard-stats', 'get', '/api/dashboard/stats/?source=counters', max_queries=18),
+    # JWT user + the snapshot (re)build + category names
+    RouteBudget('dashboard:dashboard-stats', 'get', '/api/dashboard/stats/?source=snapshot', max_queries=3),
+    RouteBudget('dashboard:dashboard-jobs', 'get', '/api/dashboard/jobs/', max_queries=3),
+    # Async views: the same queries (run one after another here, see ASYNC_QUERIES below)
+    RouteBudget('dashboard:dashboard-stats-async', 'get', '/api/dashboard/stats/async/', max_queries=20),
+    RouteBudget('dashboard:dashboard-stats-async', 'get', '/api/dashboard/stats/async/?source=counters',
+                max_queries=18),
+    RouteBudget('reports-summary-async', 'get', '/api/reports/summary/async/', max_queries=5),
+
+    RouteBudget('reports-list', 'get', '/api/reports/', max_queries=1),
+    RouteBudget('reports-summary', 'get', '/api/reports/summary/', max_queries=5),
+    RouteBudget('reports-summary', 'get', '/api/reports/summary/?source=snapshot', max_queries=2),
+    # JWT user + inventory columns + grouped movements (recomputed: the data changed between passes)
+    RouteBudget('reports-analytics', 'get', '/api/reports/analytics/', max_queries=3, scales_with_data=True),
+    RouteBudget('reports-download', 'get', '/api/reports/download/?file_format=csv', max_queries=2,
+                max_ms=2000, max_alloc_kb=16384, scales_with_data=True),
+    RouteBudget('reports-download', 'get', '/api/reports/download/?file_format=xlsx', max_queries=2,
+                max_ms=5000, max_alloc_kb=32768, scales_with_data=True),
+    # Streamed and compressed chunk by chunk: memory stays flat as the report grows
+    RouteBudget('reports-download', 'get', '/api/reports/download/?file_format=csv&compress=gzip', max_queries=2),
+    RouteBudget('reports-download', 'get', '/api/reports/download/?file_format=csv&compress=zip', max_queries=2),
+    # + the unfinished exports (one per user); the export itself is left to the export worker
+    RouteBudget('reports-exports', 'post', _exports_path, max_queries=3, status=202,
+                data={'file_format': 'csv', 'status': 'low_stock'}),
+    RouteBudget('reports-export-progress', 'get', _new_export_path(), max_queries=2),
+    RouteBudget('reports-export-file', 'get', _new_export_path('file/'), max_queries=2),
+
+    # JWT user + one page (cursor pagination: no count)
+    RouteBudget('audit-event-list', 'get', '/api/audit/events/', max_queries=2),
+    RouteBudget('audit-event-list', 'get', '/api/audit/events/?object_type=inventory&object_id=1&since=2026-01-01',
+                max_queries=2),
+    RouteBudget('audit-event-detail', 'get', _new_event_path, max_queries=2),
+
+    RouteBudget('webhook-subscription-list', 'get',
+                lambda test: _new_subscription_path()(test) and '/api/webhooks/subscriptions/', max_queries=3),
+    # + the newest outbox event, where the subscription starts
+    RouteBudget('webhook-subscription-list', 'post', '/api/webhooks/subscriptions/', max_queries=3, status=201,
+                data={'name': 'Guardrail hook', 'url': 'http://127.0.0.1:9/hook', 'is_active': False}),
+    RouteBudget('webhook-subscription-event-types', 'get', '/api/webhooks/subscriptions/event-types/',
+                max_queries=1),
+    RouteBudget('webhook-subscription-detail', 'get', _new_subscription_path(), max_queries=2),
+    RouteBudget('webhook-subscription-detail', 'patch', _new_subscription_path(), max_queries=3,
+                data={'events': ['inventory.low_stock']}),
+    RouteBudget('webhook-subscription-detail', 'delete', _new_subscription_path(), max_queries=3, status=204),
+    RouteBudget('webhook-subscription-retry', 'post', _new_subscription_path('retry/'), max_queries=3),
+]
+
+# Routes deliberately left unpinned
+UNBUDGETED_ROUTES = {
+    'accounts:test_email',  # sends a real email, debugging aid only
+}
+
+
+class RouteCoverageTests(SimpleTestCase):
+    def test_every_route_has_a_budget(self):
+        budgeted = {budget.name for budget in ROUTE_BUDGETS}
+        missing = sorted({
+            name for name in named_routes()
+            if not name.startswith('admin:') and name not in budgeted and name not in UNBUDGETED_ROUTES
+        })
+        self.assertEqual(
+            missing, [],
+            'Add a RouteBudget to core/tests.py for every new route: ' + ', '.join(missing)
+        )
+
+
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    PERFORMANCE_METRICS={'SAMPLE_RATE': 0},
+    # Rebuilt in the request, where its queries are counted
+    INVENTORY_CACHE={'AUTOCOMPLETE_MAX_AGE': 0, 'AUTOCOMPLETE_BACKGROUND_REBUILD': False},
+    INVENTORY_SNAPSHOT={'MAX_AGE': 0},
+    REPORT_EXPORTS={'DIR': EXPORT_DIR},
+    # Pool connections can't see the test transaction's rows (nor are they counted here)
+    ASYNC_QUERIES={'CONCURRENT': False},
+)
+class RouteBudgetTests(TestCase):
+    """Every route stays within budget and costs the same on a 10x larger dataset."""
+
+    BASE_ITEMS = 40
+    GROWTH = 10
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(EXPORT_DIR, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('guard-admin@example.com', 'Guardrail-pass-1', role='admin')
+        generate_inventory(items=cls.BASE_ITEMS, users=2, seed=1)
+
+    def client_for(self, budget):
+        if budget.authenticated:
+            token = RefreshToken.for_user(self.admin).access_token
+            self.client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+        else:
+            self.client.defaults.pop('HTTP_AUTHORIZATION', None)
+        return self.client
+
+    def measure_all(self):
+        # The metrics page grows with the routes seen so far, not with the data
+        metrics.registry.reset()
+        # Item writes read the subscribed webhook events from the cache: fill it
+        # (the subscription routes clear it)
+        outbox.subscribed_events()
+        return [measure(self, self.client_for(budget), budget) for budget in ROUTE_BUDGETS]
+
+    def test_routes_within_budget_and_constant_as_data_grows(self):
+        small = self.measure_all()
+        for budget, measurement in zip(ROUTE_BUDGETS, small):
+            with self.subTest(route=str(budget), items=self.BASE_ITEMS):
+                assert_within_budget(self, budget, measurement)
+
+        generate_inventory(items=self.BASE_ITEMS * (self.GROWTH - 1), users=2 * (self.GROWTH - 1), seed=2)
+        large = self.measure_all()
+        for budget, before, after in zip(ROUTE_BUDGETS, small, large):
+            with self.subTest(route=str(budget), items=self.BASE_ITEMS * self.GROWTH):
+                assert_within_budget(self, budget, after)
+                assert_constant(self, budget, before, after, self.GROWTH)
+
+
+class RecordingScheduler:
+    def __init__(self):
+        self.jobs = []
+
+    def add_job(self, func, **options):
+        self.jobs.append((func, options))
+
+
+class PeriodicJobTests(TestCase):
+    def setUp(self):
+        # Jobs modules are imported once: keep what they registered
+        self.registry = dict(scheduler.discover_jobs())
+        self.addCleanup(self.restore_registry)
+
+    def restore_registry(self):
+        scheduler._registry.clear()
+        scheduler._registry.update(self.registry)
+
+    def test_decorator_registers_the_job_with_its_docstring(self):
+        @scheduler.periodic_job('test_job', IntervalTrigger(minutes=5), executor='processpool', max_instances=2)
+        def test_job():
+            """Do the test thing
+
+            More detail that is not part of the description.
+            """
+            return 'ran'
+
+        job = scheduler._registry['test_job']
+        self.assertEqual(job.description, 'Do the test thing')
+        self.assertEqual(job.executor, 'processpool')
+        # The wrapper is what gets scheduled (and pickled for the process pool)
+        self.assertIs(job.func, test_job)
+        self.assertEqual(test_job(), 'ran')
+
+    def test_add_to_only_overrides_the_options_that_were_set(self):
+        trigger = IntervalTrigger(minutes=5)
+        scheduler.periodic_job('test_job', trigger, coalesce=False)(lambda: None)
+        recorder = RecordingScheduler()
+        scheduler._registry['test_job'].add_to(recorder)
+
+        (func, options), = recorder.jobs
+        self.assertEqual(options, {
+            'trigger': trigger, 'id': 'test_job', 'executor': 'default', 'replace_existing': True,
+            'coalesce': False,
+        })
+
+    def test_discovers_the_app_jobs(self):
+        registry = scheduler.discover_jobs()
+        self.assertIn('daily_stock_report', registry)
+        self.assertEqual(registry['refresh_inventory_snapshot'].executor, 'processpool')
+
+    @override_settings(SCHEDULER={'THREAD_POOL_SIZE': 3, 'PROCESS_POOL_SIZE': 1, 'MISFIRE_GRACE_TIME': 60})
+    def test_scheduler_gets_both_pools_and_the_job_defaults(self):
+        built = scheduler.build_scheduler()
+        self.assertEqual(set(built._executors), {'default', 'processpool'})
+        self.assertEqual(built._executors['default']._pool._max_workers, 3)
+        self.assertEqual(built._job_defaults, {'coalesce': True, 'misfire_grace_time': 60, 'max_instances': 1})
+        self.assertIn('default', built._jobstores)
+
+
+@override_settings(SCHEDULER={'HISTOGRAM_BUCKETS': (1, 10)})
+class JobMetricsTests(TestCase):
+    def setUp(self):
+        from django_apscheduler.models import DjangoJob, DjangoJobExecution
+
+        self.execution = DjangoJobExecution
+        self.job = DjangoJob.objects.create(id='daily_stock_report', job_state=b'')
+        self.now = timezone.now()
+
+    def run_job(self, duration, status=None, hours_ago=0, exception=None):
+        self.execution.objects.create(
+            job=self.job, status=status or self.execution.SUCCESS, duration=duration,
+            run_time=self.now - timedelta(hours=hours_ago), exception=exception,
+        )
+
+    def metrics_for(self, job_id, **kwargs):
+        return next(job for job in scheduler.job_metrics(**kwargs) if job['job_id'] == job_id)
+
+    def test_counts_histogram_and_last_run(self):
+        self.run_job('0.50', hours_ago=3)
+        self.run_job('5.00', hours_ago=2)
+        self.run_job('30.00', status=self.execution.ERROR, hours_ago=1, exception='boom')
+
+        job = self.metrics_for('daily_stock_report')
+        self.assertEqual((job['runs'], job['succeeded'], job['failed']), (3, 2, 1))
+        self.assertEqual(job['avg_duration'], 11.83)
+        self.assertEqual(job['max_duration'], 30.0)
+        # Cumulative, like a Prometheus histogram
+        self.assertEqual(job['duration_histogram'], [
+            {'le': 1, 'count': 1}, {'le': 10, 'count': 2}, {'le': '+Inf', 'count': 3},
+        ])
+        self.assertEqual(job['last_run']['status'], self.execution.ERROR)
+        self.assertEqual(job['last_run']['exception'], 'boom')
+        self.assertTrue(job['registered'])
+
+    def test_since_only_counts_recent_runs(self):
+        self.run_job('0.50', hours_ago=48)
+        self.run_job('2.00', hours_ago=1)
+
+        job = self.metrics_for('daily_stock_report', since=self.now - timedelta(hours=24))
+        self.assertEqual(job['runs'], 1)
+        self.assertEqual(job['max_duration'], 2.0)
+
+    def test_registered_jobs_that_never_ran_are_listed(self):
+        job = self.metrics_for('generate_purchase_orders')
+        self.assertEqual(job['runs'], 0)
+        self.assertIsNone(job['last_run'])
+        self.assertEqual(job['duration_histogram'][-1], {'le': '+Inf', 'count': 0})
+
+    def test_job_filter(self):
+        self.run_job('1.00')
+        jobs = scheduler.job_metrics(job_id='daily_stock_report')
+        self.assertEqual([job['job_id'] for job in jobs], ['daily_stock_report'])
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class MetricsViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('metrics-admin@example.com', 'Metrics-pass-1', role='admin')
+        cls.viewer = User.objects.create_user('metrics-viewer@example.com', 'Metrics-pass-1')
+
+    def get(self, user=None, authorization=None):
+        if user is not None:
+            authorization = f'Bearer {RefreshToken.for_user(user).access_token}'
+        headers = {'HTTP_AUTHORIZATION': authorization} if authorization else {}
+        return self.client.get('/api/metrics/', **headers)
+
+    @override_settings(PERFORMANCE_METRICS={'TOKEN': ''})
+    def test_admins_only_without_a_token(self):
+        self.assertEqual(self.get().status_code, 401)
+        self.assertEqual(self.get(self.viewer).status_code, 403)
+        response = self.get(self.admin)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        self.assertIn(b'invento_request_duration_seconds', response.content)
+
+    @override_settings(PERFORMANCE_METRICS={'TOKEN': 'scrape-secret'})
+    def test_token_required_when_configured(self):
+        self.assertEqual(self.get().status_code, 403)
+        self.assertEqual(self.get(authorization='Bearer wrong').status_code, 403)
+        # A user's JWT is not the scrape token
+        self.assertEqual(self.get(self.admin).status_code, 403)
+        self.assertEqual(self.get(authorization='Bearer scrape-secret').status_code, 200)
+
+
+class PerformanceMiddlewareTests(TestCase):
+    def setUp(self):
+        metrics.registry.reset()
+        self.addCleanup(metrics.registry.reset)
+
+    @override_settings(PERFORMANCE_METRICS={'SAMPLE_RATE': 1})
+    def test_no_server_timing_by_default(self):
+        response = self.client.get('/api/')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Server-Timing', response)
+
+    @override_settings(PERFORMANCE_METRICS={'SAMPLE_RATE': 1, 'SERVER_TIMING': True})
+    def test_server_timing_when_enabled(self):
+        response = self.client.get('/api/')
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="0 queries", .*total;dur=[\d.]+$')
+
+    @override_settings(PERFORMANCE_METRICS={'SAMPLE_RATE': 0, 'SERVER_TIMING': True})
+    def test_unsampled_requests_only_feed_the_latency_histogram(self):
+        response = self.client.get('/api/')
+        self.assertNotIn('Server-Timing', response)
+        rendered = metrics.registry.render_prometheus()
+        self.assertIn('invento_request_duration_seconds_count{route="api-root",method="GET",status="2xx"} 1', rendered)
+        self.assertIn('invento_requests_sampled_total{route="api-root",method="GET",status="2xx"} 0', rendered)
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    body = b'{"items": [' + b', '.join(b'{"name": "Item %d"}' % index for index in range(200)) + b']}'
+
+    def respond(self, response=None, path='/api/inventory/', accept_encoding='gzip', **extra):
+        request = RequestFactory().get(path, HTTP_ACCEPT_ENCODING=accept_encoding, **extra)
+        if response is None:
+            response = HttpResponse(self.body, content_type='application/json')
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_negotiates_the_accepted_encoding(self):
+        self.assertEqual(compression.negotiate('gzip, deflate'), 'gzip')
+        self.assertIsNone(compression.negotiate('gzip;q=0, identity'))
+        self.assertEqual(compression.negotiate('*'), 'br' if compression.brotli else 'gzip')
+        self.assertEqual(compression.negotiate('br;q=0.5, gzip;q=1'), 'gzip')
+
+        response = self.respond()
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(gzip.decompress(response.content), self.body)
+
+    def test_uncompressed_responses_still_vary_on_accept_encoding(self):
+        response = self.respond(accept_encoding='identity')
+        self.assertNotIn('Content-Encoding', response)
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+        self.assertEqual(response.content, self.body)
+
+    def test_skips_small_encoded_and_streaming_responses(self):
+        small = self.respond(HttpResponse(b'{"count": 1}', content_type='application/json'))
+        self.assertNotIn('Content-Encoding', small)
+        self.assertNotIn('Vary', small)
+
+        encoded = HttpResponse(gzip.compress(self.body), content_type='application/json')
+        encoded['Content-Encoding'] = 'gzip'
+        self.assertEqual(self.respond(encoded).content, encoded.content)
+
+        streamed = self.respond(StreamingHttpResponse(iter([self.body]), content_type='text/csv'))
+        self.assertNotIn('Content-Encoding', streamed)
+        self.assertEqual(b''.join(streamed.streaming_content), self.body)
+
+    def test_skips_requests_that_may_get_secrets(self):
+        for name, extra in (
+            ('csrf cookie', {'HTTP_COOKIE': 'csrftoken=secret'}),
+            ('session cookie', {'HTTP_COOKIE': 'sessionid=secret'}),
+            ('csrf header', {'HTTP_X_CSRFTOKEN': 'secret'}),
+            ('token endpoint', {'path': '/api/accounts/token/refresh/'}),
+        ):
+            with self.subTest(name):
+                response = self.respond(**extra)
+                self.assertNotIn('Content-Encoding', response)
+                self.assertEqual(response.content, self.body)
+
+        bearer = self.respond(HTTP_AUTHORIZATION='Bearer token')
+        self.assertEqual(bearer['Content-Encoding'], 'gzip')
+
+
+# Async views, the sync views they stand in for and the expected status
+ASYNC_ROUTES = (
+    ('/api/dashboard/stats/async/', '/api/dashboard/stats/', 200),
+    ('/api/dashboard/stats/async/?source=counters', '/api/dashboard/stats/?source=counters', 200),
+    ('/api/dashboard/stats/async/?source=bad', '/api/dashboard/stats/?source=bad', 400),
+    ('/api/reports/summary/async/', '/api/reports/summary/', 200),
+    ('/api/reports/summary/async/?status=low_stock', '/api/reports/summary/?status=low_stock', 200),
+    (
+        '/api/reports/summary/async/?source=snapshot&start_date=bad',
+        '/api/reports/summary/?source=snapshot&start_date=bad', 400,
+    ),
+)
+
+
+class AsyncViewAssertions:
+    def assert_same_responses(self, client):
+        for async_path, sync_path, status_code in ASYNC_ROUTES:
+            with self.subTest(async_path):
+                async_response, sync_response = client.get(async_path), client.get(sync_path)
+                self.assertEqual((async_response.status_code, sync_response.status_code), (status_code, status_code))
+                self.assertEqual(async_response['Content-Type'], sync_response['Content-Type'])
+                self.assertEqual(async_response.content, sync_response.content)
+
+
+@override_settings(
+    ASYNC_QUERIES={'CONCURRENT': False},
+    AUDIT={'ENABLED': False},
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+class AsyncViewTests(AsyncViewAssertions, TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        generate_inventory(items=40, seed=3)
+        cls.user = User.objects.create_user('async@example.com', 'pw')
+
+    def test_same_bytes_as_the_sync_views(self):
+        client = self.client_class()
+        client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {RefreshToken.for_user(self.user).access_token}'
+        self.assert_same_responses(client)
+
+    def test_same_errors_for_anonymous_requests(self):
+        for async_path, sync_path, _ in ASYNC_ROUTES[::3]:
+            with self.subTest(async_path):
+                async_response, sync_response = self.client.get(async_path), self.client.get(sync_path)
+                self.assertEqual(async_response.status_code, 401)
+                self.assertEqual(async_response['WWW-Authenticate'], sync_response['WWW-Authenticate'])
+                self.assertEqual(async_response.content, sync_response.content)
+
+    def test_gather_queries_returns_the_results_in_order(self):
+        results = async_to_sync(aio.gather_queries)(Inventory.objects.count, lambda: 'second')
+        self.assertEqual(results, [40, 'second'])
+
+
+@override_settings(
+    ASYNC_QUERIES={'CONCURRENT': True, 'MAX_WORKERS': 2},
+    AUDIT={'ENABLED': False},
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+class ConcurrentAsyncQueryTests(AsyncViewAssertions, TransactionTestCase):
+    """The queries run in pool threads on their own connections, so the rows are committed."""
+
+    def setUp(self):
+        generate_inventory(items=40, seed=3)
+        self.user = User.objects.create_user('async@example.com', 'pw')
+
+    def test_same_bytes_as_the_sync_views(self):
+        client = self.client_class()
+        client.defaults['HTTP_AUTHORIZATION'] = f'Bearer {RefreshToken.for_user(self.user).access_token}'
+        self.assert_same_responses(client)
+
+    def test_queries_run_in_pool_threads(self):
+        results = async_to_sync(aio.gather_queries)(threading.current_thread, threading.current_thread)
+        self.assertTrue(all(thread.name.startswith('async-query') for thread in results))
+        self.assertNotIn(threading.current_thread(), results)
+
+
+class SQLiteProductionProfileTests(SimpleTestCase):
+    def test_options_carry_the_pragmas_and_overrides(self):
+        options = sqlite.production_options(busy_timeout=2000, mmap_size=0)
+        self.assertEqual(options['transaction_mode'], 'IMMEDIATE')
+        self.assertEqual(options['timeout'], 2.0)
+        statements = options['init_command'].split(';')
+        self.assertIn('PRAGMA journal_mode=WAL', statements)
+        self.assertIn('PRAGMA busy_timeout=2000', statements)
+        self.assertIn('PRAGMA mmap_size=0', statements)
+
+    def test_new_connections_get_the_pragmas(self):
+        directory = tempfile.mkdtemp(prefix='invento-sqlite-')
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        handler = ConnectionHandler({'default': {}, 'profile': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.path.join(directory, 'profile.sqlite3'),
+            'OPTIONS': sqlite.production_options(cache_size=-1024),
+        }})
+        connection = handler['profile']
+        self.addCleanup(connection.close)
+        with connection.cursor() as cursor:
+            pragmas = {}
+            for name in ('journal_mode', 'synchronous', 'busy_timeout', 'cache_size'):
+                cursor.execute(f'PRAGMA {name}')
+                pragmas[name] = cursor.fetchone()[0]
+        self.assertEqual(pragmas, {'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 5000, 'cache_size': -1024})
+
+
+class WriteQueueTests(SimpleTestCase):
+    def test_writers_are_served_in_arrival_order(self):
+        queue = sqlite.WriteQueue()
+        served = []
+        threads = []
+        queue.acquire()
+        for index in range(3):
+            thread = threading.Thread(target=lambda index=index: (queue.acquire(), served.append(index), queue.release()))
+            thread.start()
+            threads.append(thread)
+            # Each writer takes its ticket before the next one starts
+            while queue.waiting < index + 1:
+                time.sleep(0.001)
+        self.assertEqual(served, [])
+        queue.release()
+        for thread in threads:
+            thread.join(timeout=5)
+        self.assertEqual(served, [0, 1, 2])
+        self.assertEqual(queue.waiting, 0)
+
+    def test_reentrant_for_the_owning_thread(self):
+        queue = sqlite.WriteQueue()
+
+        @sqlite.serialize_writes
+        def outer():
+            with sqlite.serialized_write():
+                return sqlite.write_queue._depth
+
+        self.assertEqual(outer(), 2)
+        self.assertIsNone(sqlite.write_queue._owner)
+        queue.acquire()
+        queue.acquire()
+        queue.release()
+        self.assertEqual(queue._owner, threading.get_ident())
+        queue.release()
+        self.assertIsNone(queue._owner)
+
+
+class SerializedWriteMiddlewareTests(SimpleTestCase):
+    def owner_during(self, method):
+        def get_response(request):
+            return sqlite.write_queue._owner
+        middleware = SerializedWriteMiddleware(get_response)
+        return middleware(RequestFactory().generic(method, '/api/inventory/'))
+
+    @override_settings(SQLITE_WRITE_QUEUE=False)
+    def test_off_by_default(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            SerializedWriteMiddleware(lambda request: None)
+
+    @override_settings(SQLITE_WRITE_QUEUE=True)
+    def test_only_unsafe_methods_are_queued(self):
+        self.assertIsNone(self.owner_during('GET'))
+        self.assertEqual(self.owner_during('POST'), threading.get_ident())
+        self.assertEqual(self.owner_during('DELETE'), threading.get_ident())
+        self.assertIsNone(sqlite.write_queue._owner)
+
+
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self):
+        self.router = db_router.ReplicaRouter()
+        self.router.replicas = ['replica']
+        patcher = mock.patch.object(db_router, 'replica_aliases', return_value=['replica'])
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def route(self, method, path, cookies=None, writes=False):
+        """The database the view's reads went to, and the response."""
+        seen = {}
+
+        def get_response(request):
+            match = resolve(request.path_info)
+            middleware.process_view(request, match.func, match.args, match.kwargs)
+            if writes:
+                self.router.db_for_write(Inventory)
+            seen['db'] = self.router.db_for_read(Inventory)
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(get_response)
+        request = RequestFactory().generic(method, path)
+        request.COOKIES.update(cookies or {})
+        response = middleware(request)
+        return seen['db'], response
+
+    def test_reads_of_replica_views_go_to_the_replica(self):
+        db, response = self.route('GET', '/api/reports/summary/')
+        self.assertEqual(db, 'replica')
+        self.assertNotIn(PRIMARY_PIN_COOKIE, response.cookies)
+
+    def test_export_lookups_stay_on_the_primary(self):
+        self.assertEqual(self.route('GET', '/api/reports/exports/1/')[0], 'default')
+        self.assertEqual(self.route('GET', '/api/reports/exports/1/file/')[0], 'default')
+
+    def test_other_views_use_the_primary(self):
+        self.assertEqual(self.route('GET', '/api/inventory/purchase-orders/')[0], 'default')
+
+    def test_writes_pin_the_client_to_the_primary(self):
+        db, response = self.route('POST', '/api/reports/exports/')
+        self.assertEqual(db, 'default')
+        self.assertEqual(response.cookies[PRIMARY_PIN_COOKIE]['max-age'], 5)
+
+        db, response = self.route('GET', '/api/reports/summary/', cookies={PRIMARY_PIN_COOKIE: '1'})
+        self.assertEqual(db, 'default')
+
+    def test_a_read_that_writes_reads_its_own_write(self):
+        db, response = self.route('GET', '/api/reports/summary/', writes=True)
+        self.assertEqual(db, 'default')
+        self.assertIn(PRIMARY_PIN_COOKIE, response.cookies)
+
+    def test_outside_requests_use_the_primary(self):
+        self.assertEqual(self.router.db_for_read(Inventory), 'default')
+
+
+class ConnectionReuseTests(SimpleTestCase):
+    def databases_for(self, mode):
+        databases = {
+            'default': {'ENGINE': 'django.db.backends.postgresql', 'OPTIONS': {'sslmode': 'require'}},
+            'replica_0': {'ENGINE': 'django.db.backends.postgresql'},
+            'local': {'ENGINE': 'django.db.backends.sqlite3'},
+        }
+        return db_connections.configure_reuse(databases, mode, max_age=30, pool={'max_size': 4})
+
+    def test_persistent_connections_are_health_checked(self):
+        for database in self.databases_for('persistent').values():
+            self.assertEqual(database['CONN_MAX_AGE'], 30)
+            self.assertTrue(database['CONN_HEALTH_CHECKS'])
+
+    def test_pool_on_postgresql_only(self):
+        databases = self.databases_for('pool')
+        self.assertEqual(databases['default']['CONN_MAX_AGE'], 0)
+        self.assertEqual(databases['default']['OPTIONS'], {'sslmode': 'require', 'pool': {'max_size': 4}})
+        self.assertEqual(databases['replica_0']['OPTIONS'], {'pool': {'max_size': 4}})
+        # No pool for SQLite: persistent connections instead
+        self.assertEqual(databases['local']['CONN_MAX_AGE'], 30)
+        self.assertNotIn('OPTIONS', databases['local'])
+
+    def test_none_leaves_the_per_request_default(self):
+        for database in self.databases_for('none').values():
+            self.assertNotIn('CONN_MAX_AGE', database)
+
+    def connection_with(self, **options):
+        directory = tempfile.mkdtemp(prefix='invento-conn-')
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        handler = ConnectionHandler({'default': {}, 'reuse': {
+            'ENGINE': 'django.db.backends.sqlite3', 'NAME': os.path.join(directory, 'reuse.sqlite3'), **options,
+        }})
+        connection = handler['reuse']
+        self.addCleanup(connection.close)
+        connection.cursor().close()
+        return connection
+
+    def test_persistent_connection_outlives_the_request(self):
+        connection = self.connection_with(CONN_MAX_AGE=60, CONN_HEALTH_CHECKS=True)
+        opened = connection.connection
+        # What request_finished does
+        connection.close_if_unusable_or_obsolete()
+        self.assertIs(connection.connection, opened)
+
+    def test_per_request_connection_is_closed(self):
+        connection = self.connection_with(CONN_MAX_AGE=0)
+        connection.close_if_unusable_or_obsolete()
+        self.assertIsNone(connection.connection)
+
+    def test_job_store_recycles_connections_on_each_wakeup(self):
+        from django_apscheduler.jobstores import DjangoJobStore
+
+        with mock.patch('django.db.close_old_connections') as close_old_connections, \
+                mock.patch.object(DjangoJobStore, 'get_due_jobs', return_value=[]):
+            self.assertEqual(scheduler._job_store().get_due_jobs(timezone.now()), [])
+        close_old_connections.assert_called_once_with()
+
+
+@skipUnless(renderers.orjson, 'orjson is not installed')
+class FastJSONRendererTests(SimpleTestCase):
+    """The orjson path must produce DRF's bytes exactly."""
+
+    def assertSameBytes(self, data, media_type=None):
+        expected = JSONRenderer().render(data, media_type)
+        self.assertEqual(renderers.FastJSONRenderer().render(data, media_type), expected)
+        return expected
+
+    def test_decimals_and_aware_datetimes(self):
+        kolkata = dt.timezone(timedelta(hours=5, minutes=30))
+        self.assertSameBytes({
+            'price': Decimal('12.50'),
+            'precise': Decimal('0.1000000000000000055511151231257827'),
+            'utc': dt.datetime(2026, 3, 1, 9, 30, 15, 123456, tzinfo=dt.timezone.utc),
+            'offset': dt.datetime(2026, 3, 1, 9, 30, tzinfo=kolkata),
+            'date': dt.date(2026, 3, 1),
+            'time': dt.time(9, 30, 15, 500000),
+            'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        })
+
+    def test_exponent_floats(self):
+        for value in (1e16, 1.5e-5, 0.00001, 1e300, -2.5e-7, 0.1, 123456789.125):
+            with self.subTest(value=value):
+                self.assertSameBytes({'value': value, 'list': [value, 1]})
+        # Exponent-looking text inside strings doesn't change anything either
+        self.assertSameBytes({'sku': '1e5-A', 'note': '0.00001'})
+
+    def test_non_ascii_and_line_separators(self):
+        rendered = self.assertSameBytes({'name': 'Crème brûlée 日本 ✓', 'notes': 'a\u2028b\u2029c'})
+        self.assertIn('brûlée'.encode(), rendered)
+        self.assertIn(b'a\\u2028b\\u2029c', rendered)
+
+    def test_big_integers_and_indented_output(self):
+        self.assertSameBytes({'big': 2 ** 70, 'negative': -(2 ** 64)})
+        self.assertSameBytes({'nested': {'rows': [1, 2]}}, 'application/json; indent=4')
+        self.assertEqual(renderers.FastJSONRenderer().render(None), b'')
+
+    def test_nan_renders_as_null_where_drf_raises(self):
+        # The one documented difference
+        for value in (float('nan'), float('inf'), float('-inf')):
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    JSONRenderer().render({'value': value})
+                self.assertEqual(renderers.FastJSONRenderer().render({'value': value}), b'{"value":null}')
+
+    def test_parser_matches_drf(self):
+        for body in (b'{"name":"Cr\xc3\xa8me","qty":5,"price":1.5}', b'{"big":123456789012345678901234}', b'[]'):
+            with self.subTest(body=body):
+                self.assertEqual(
+                    renderers.FastJSONParser().parse(io.BytesIO(body)),
+                    JSONParser().parse(io.BytesIO(body)),
+                )
+        with self.assertRaises(ParseError):
+            renderers.FastJSONParser().parse(io.BytesIO(b'{"name":'))
+
+
+@override_settings(AUDIT={'ENABLED': False})
+class InventoryWriteBudgetTests(TestCase):
+    """
+    Queries per ``Inventory.save()``: the price of the maintained counters and
+    stock movements, paid per row by code that saves items one by one. The
+    totals row delta runs after the commit and is not counted. Stock stays
+    above the reorder level: low stock saves also look up the admins to alert.
+    """
+
+    def setUp(self):
+        self.category = Category.objects.create(name='Budget category')
+        self.items = [
+            Inventory.objects.create(
+                name=f'Budget item {index}', sku=f'BUDGET-{index}', quantity=50, unit_price='1.00',
+                category=self.category,
+            )
+            for index in range(10)
+        ]
+
+    def test_create(self):
+        # INSERT item + category counters + receipt movement
+        with self.assertNumQueries(3):
+            Inventory.objects.create(
+                name='Budget new', sku='BUDGET-NEW', quantity=50, unit_price='1.00', category=self.category
+            )
+
+    def test_quantity_change(self):
+        # Locked read of the old values + UPDATE item + category counters + movement
+        with self.assertNumQueries(4 * len(self.items)):
+            for item in self.items:
+                item.quantity += 1
+                item.save()
+        self.assertEqual(StockMovement.objects.filter(change=1).count(), len(self.items))
+
+    def test_price_change_records_no_movement(self):
+        item = self.items[0]
+        item.unit_price = '2.00'
+        with self.assertNumQueries(3):
+            item.save()
+
+    def test_uncounted_fields_skip_the_counters(self):
+        item = self.items[0]
+        item.name = 'Renamed'
+        with self.assertNumQueries(1):
+            item.save(update_fields=['name'])
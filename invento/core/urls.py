@@ -4,12 +4,13 @@ URL configuration for core project.
 from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
-from django.conf.urls.static import static
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from django.views.generic import TemplateView
 
+from core.metrics import metrics_view
+
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
@@ -28,6 +29,9 @@ def api_root(request):
             'inventory': '/api/inventory/',
             'dashboard': '/api/dashboard/',
             'reports': '/api/reports/',
+            'audit': '/api/audit/events/',
+            'webhooks': '/api/webhooks/subscriptions/',
+            'metrics': '/api/metrics/',
             'admin': '/admin/',
         }
     })
@@ -43,6 +47,7 @@ urlpatterns = [
     
     # Admin and API
     path('api/', api_root, name='api-root'),
+    path('api/metrics/', metrics_view, name='metrics'),
     path('admin/', admin.site.urls),
     
     # API endpoints
@@ -50,17 +55,15 @@ urlpatterns = [
     path('api/inventory/', include('inventory.urls')),
     path('api/dashboard/', include('dashboard.urls')),
     path('api/reports/', include('reports.urls')),
+    path('api/audit/', include('audit.urls')),
+    path('api/webhooks/', include('webhooks.urls')),
 ]
 
-# Serve media and static files in development
+# Serve media files in development (static files are served by WhiteNoise)
 if settings.DEBUG:
     from django.urls import re_path
     from django.views.static import serve
-    import os
-    static_root = os.path.join(settings.BASE_DIR, 'static')
     media_root = str(settings.MEDIA_ROOT)
     urlpatterns += [
-        re_path(r'^static/(?P<path>.*)$', serve, {'document_root': static_root}),
         re_path(r'^media/(?P<path>.*)$', serve, {'document_root': media_root}),
     ]
-
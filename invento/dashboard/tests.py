@@ -1,3 +1,36 @@
-from django.test import TestCase
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
 
-# Create your tests here.
+from accounts.models import User
+
+
+def _client(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+    return client
+
+
+FAST_HASHER = override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+
+
+@FAST_HASHER
+class JobMetricsAPITests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('jobs-admin@example.com', 'Jobs-pass-1', role='admin')
+        cls.viewer = User.objects.create_user('jobs-viewer@example.com', 'Jobs-pass-1')
+
+    def test_admins_only(self):
+        self.assertEqual(_client(self.viewer).get('/api/dashboard/jobs/').status_code, 403)
+        self.assertEqual(APIClient().get('/api/dashboard/jobs/').status_code, 401)
+
+    def test_lists_the_registered_jobs(self):
+        response = _client(self.admin).get('/api/dashboard/jobs/?job=daily_stock_report&hours=24')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([job['job_id'] for job in response.json()['jobs']], ['daily_stock_report'])
+
+    def test_rejects_non_integer_hours(self):
+        response = _client(self.admin).get('/api/dashboard/jobs/?hours=soon')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'hours must be an integer'})
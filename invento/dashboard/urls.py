@@ -1,9 +1,12 @@
 from django.urls import path
-from .views import DashboardStatsAPIView
+from .views import AsyncDashboardStatsView, DashboardStatsAPIView, JobMetricsAPIView
 
 app_name = 'dashboard'
 
 urlpatterns = [
     path('', DashboardStatsAPIView.as_view(), name='dashboard-root'),
     path('stats/', DashboardStatsAPIView.as_view(), name='dashboard-stats'),
+    # Same response; queries run concurrently when served through ASGI
+    path('stats/async/', AsyncDashboardStatsView.as_view(), name='dashboard-stats-async'),
+    path('jobs/', JobMetricsAPIView.as_view(), name='dashboard-jobs'),
 ]
@@ -1,60 +1,209 @@
+from functools import partial
+
+from asgiref.sync import sync_to_async
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Sum, F, Count
+from rest_framework import status
+from django.conf import settings
+from django.db.models import Sum, F
 from django.utils.timezone import now
 from datetime import timedelta
 
-from inventory.models import Inventory
+from inventory import snapshot
+from inventory.models import Category, Inventory, InventoryTotals
+from accounts.permissions import IsAdmin
+from core.aio import AsyncAPIView, gather_queries
+from core.scheduler import job_metrics
+
+STATS_SOURCES = ('live', 'counters', 'snapshot')
+
+
+def stats_source(request):
+    """``?source=``, else ``DASHBOARD_STATS_SOURCE``."""
+    return request.query_params.get('source', getattr(settings, 'DASHBOARD_STATS_SOURCE', 'live'))
+
+
+def invalid_source(source):
+    return {'error': f'Invalid source: {source}. Use live, counters or snapshot.'}
+
+
+def trend_days(today):
+    return [today - timedelta(days=i) for i in range(6, -1, -1)]
+
+
+def counters_row():
+    return InventoryTotals.objects.filter(pk=InventoryTotals.SINGLETON_PK).first()
+
+
+def _total_quantity(queryset):
+    return queryset.aggregate(total=Sum('quantity'))['total'] or 0
+
+
+def _stock_value():
+    return Inventory.objects.aggregate(total=Sum(F('quantity') * F('unit_price')))['total'] or 0
+
+
+def _category_counts():
+    # One row per category, from the per-category counters
+    return list(Category.objects.filter(item_count__gt=0).values_list('name', 'item_count'))
+
+
+def live_totals_queries(today):
+    """The headline stats (items, stock value, low stock, expired) as independent queries."""
+    return [
+        Inventory.objects.count,
+        _stock_value,
+        Inventory.objects.filter(quantity__lte=F('reorder_level')).count,
+        Inventory.objects.filter(expiry_date__lt=today).count,
+    ]
+
+
+def stats_queries(today, days, totals):
+    """
+    The independent queries of the live and counters stats: item count and
+    total quantity by each of ``days``, the category counts, then whatever
+    headline stats ``totals`` (the ``InventoryTotals`` row or None) doesn't
+    answer. ``stats_data`` takes their results in this order.
+    """
+    queries = []
+    for date in days:
+        # Items that existed by each day and their total quantity
+        items_by_date = Inventory.objects.filter(created_at__date__lte=date)
+        queries += [items_by_date.count, partial(_total_quantity, items_by_date)]
+    queries.append(_category_counts)
+    if totals is None:
+        queries += live_totals_queries(today)
+    elif totals.expired_as_of != today:
+        # Reconciliation for today hasn't run yet
+        queries.append(Inventory.objects.filter(expiry_date__lt=today).count)
+    return queries
+
+
+def stats_data(today, days, totals, results):
+    """The stats response from the ``stats_queries`` results."""
+    trend = list(zip(results[:2 * len(days):2], results[1:2 * len(days):2]))
+    categories = results[2 * len(days)]
+    rest = results[2 * len(days) + 1:]
+    if totals is None:
+        total_items, total_stock_value, low_stock_items, expired_items = rest
+    else:
+        total_items = totals.item_count
+        total_stock_value = totals.total_value
+        low_stock_items = totals.low_stock_count
+        expired_items = totals.expired_count if totals.expired_as_of == today else rest[0]
+    return format_stats(total_items, total_stock_value, low_stock_items, expired_items, days, trend, categories)
+
+
+def snapshot_stats(today, days):
+    """The stats computed from the in-memory analytics snapshot (inventory/snapshot.py)."""
+    totals = snapshot.shared.totals(today)
+    counts = snapshot.shared.category_counts()
+    names = dict(Category.objects.filter(pk__in=[pk for pk in counts if pk]).values_list('pk', 'name'))
+    categories = [(names.get(pk, 'Uncategorized'), count) for pk, count in counts.items() if pk]
+    return format_stats(
+        totals['item_count'], totals['total_value'], totals['low_stock_count'], totals['expired_count'],
+        days, snapshot.shared.stock_trend(days), categories,
+    )
+
+
+def format_stats(total_items, total_stock_value, low_stock_items, expired_items, days, trend, categories):
+    # Stock trend for last 7 days - shows total stock quantity per day
+    stock_trend = [
+        {
+            'date': date.isoformat(),
+            'day': date.strftime('%a'),  # Short day name (Mon, Tue, etc.)
+            'total_items': count,
+            'total_quantity': total_qty,
+        }
+        for date, (count, total_qty) in zip(days, trend)
+    ]
+
+    uncategorized = total_items - sum(count for _, count in categories)
+    if uncategorized > 0:
+        categories.append(('Uncategorized', uncategorized))
+    categories.sort(key=lambda category: -category[1])
+    category_distribution = [
+        {'count': count, 'category_name': name} for name, count in categories[:6]
+    ]
+
+    return {
+        "total_items": total_items,
+        "total_stock_value": float(total_stock_value),
+        "low_stock_items": low_stock_items,
+        "expired_items": expired_items,
+        "stock_trend": stock_trend,
+        "category_distribution": category_distribution
+    }
+
 
 class DashboardStatsAPIView(APIView):
+    """
+    Headline stats, 7-day stock trend and category distribution.
+
+    ``DASHBOARD_STATS_SOURCE`` (or ``?source=``) picks where they come from:
+    ``live`` counts the inventory table, ``counters`` reads the headline stats
+    from the maintained ``InventoryTotals`` row and ``snapshot`` computes
+    everything from the in-memory analytics snapshot (inventory/snapshot.py).
+    """
     permission_classes = [IsAuthenticated]
+    read_from_replica = True
 
     def get(self, request):
-        total_items = Inventory.objects.count()
+        source = stats_source(request)
+        if source not in STATS_SOURCES:
+            return Response(invalid_source(source), status=status.HTTP_400_BAD_REQUEST)
 
-        total_stock_value = Inventory.objects.aggregate(
-            total=Sum(F('quantity') * F('unit_price'))
-        )['total'] or 0
+        today = now().date()
+        days = trend_days(today)
+        if source == 'snapshot':
+            return Response(snapshot_stats(today, days))
+
+        totals = counters_row() if source == 'counters' else None
+        results = [query() for query in stats_queries(today, days, totals)]
+        return Response(stats_data(today, days, totals, results))
 
-        low_stock_items = Inventory.objects.filter(
-            quantity__lte=F('reorder_level')
-        ).count()
 
-        expired_items = Inventory.objects.filter(
-            expiry_date__lt=now().date()
-        ).count()
+class AsyncDashboardStatsView(AsyncAPIView):
+    """
+    ``DashboardStatsAPIView`` for the ASGI entry point: the same response,
+    with the trend, category and headline queries run concurrently
+    (core/aio.py) instead of one after another.
+    """
+    permission_classes = [IsAuthenticated]
+    read_from_replica = True
+
+    async def get(self, request):
+        source = stats_source(request)
+        if source not in STATS_SOURCES:
+            return self.render(invalid_source(source), status=status.HTTP_400_BAD_REQUEST)
 
-        # Stock trend for last 7 days - shows total stock quantity per day
-        stock_trend = []
         today = now().date()
-        for i in range(6, -1, -1):
-            date = today - timedelta(days=i)
-            # Sum of quantities for items that existed by that date
-            items_by_date = Inventory.objects.filter(created_at__date__lte=date)
-            total_qty = items_by_date.aggregate(total=Sum('quantity'))['total'] or 0
-            stock_trend.append({
-                'date': date.isoformat(),
-                'day': date.strftime('%a'),  # Short day name (Mon, Tue, etc.)
-                'total_items': items_by_date.count(),
-                'total_quantity': total_qty
-            })
-
-        # Category distribution
-        category_distribution = list(
-            Inventory.objects.values('category')
-            .annotate(count=Count('id'))
-            .order_by('-count')[:6]
-        )
-        # Rename 'category' to 'category_name' for frontend
-        for item in category_distribution:
-            item['category_name'] = item.pop('category') or 'Uncategorized'
+        days = trend_days(today)
+        if source == 'snapshot':
+            return self.render(await sync_to_async(snapshot_stats)(today, days))
+
+        totals = (await gather_queries(counters_row))[0] if source == 'counters' else None
+        results = await gather_queries(*stats_queries(today, days, totals))
+        return self.render(stats_data(today, days, totals, results))
+
+
+class JobMetricsAPIView(APIView):
+    """
+    Timing histograms and last-run details for scheduled jobs.
+    Optional query params: job=<job id>, hours=<only executions from the last N hours>
+    """
+    permission_classes = [IsAuthenticated, IsAdmin]
+
+    def get(self, request):
+        since = None
+        hours = request.query_params.get('hours')
+        if hours:
+            try:
+                since = now() - timedelta(hours=int(hours))
+            except ValueError:
+                return Response({'error': 'hours must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
 
         return Response({
-            "total_items": total_items,
-            "total_stock_value": float(total_stock_value),
-            "low_stock_items": low_stock_items,
-            "expired_items": expired_items,
-            "stock_trend": stock_trend,
-            "category_distribution": category_distribution
-        })
\ No newline at end of file
+            'jobs': job_metrics(job_id=request.query_params.get('job'), since=since)
+        })
@@ -1,10 +1,54 @@
 from django.contrib import admin
 
-from .models import Inventory
+from .models import Category, Inventory, Lot, PurchaseOrder, PurchaseOrderLine, Supplier
+
+
+class LotInline(admin.TabularInline):
+    model = Lot
+    readonly_fields = ('created_at',)
+    extra = 0
+
 
 @admin.register(Inventory)
 class InventoryAdmin(admin.ModelAdmin):
     list_display = ('name', 'sku', 'quantity', 'unit_price', 'category', 'supplier', 'expiry_date')
-    search_fields = ('name', 'sku', 'category', 'supplier')
+    search_fields = ('name', 'sku', 'category__name', 'supplier__name')
     list_filter = ('category',)
+    list_select_related = ('category', 'supplier')
+    inlines = [LotInline]
+
+
+@admin.register(Category)
+class CategoryAdmin(admin.ModelAdmin):
+    list_display = ('name', 'item_count', 'total_quantity', 'total_value')
+    search_fields = ('name',)
+    # Maintained by Inventory.save() and signals (inventory/counters.py)
+    readonly_fields = ('item_count', 'total_quantity', 'total_value')
+
+
+@admin.register(Supplier)
+class SupplierAdmin(admin.ModelAdmin):
+    list_display = ('name', 'lead_time_days')
+    search_fields = ('name',)
+
+
+class PurchaseOrderLineInline(admin.TabularInline):
+    model = PurchaseOrderLine
+    raw_id_fields = ('item',)
+    extra = 0
+
+
+@admin.register(PurchaseOrder)
+class PurchaseOrderAdmin(admin.ModelAdmin):
+    list_display = ('id', 'supplier', 'status', 'created_at')
+    list_filter = ('status',)
+    list_select_related = ('supplier',)
+    inlines = [PurchaseOrderLineInline]
+
 
+@admin.register(Lot)
+class LotAdmin(admin.ModelAdmin):
+    list_display = ('item', 'lot_number', 'quantity', 'expiry_date', 'received_date')
+    search_fields = ('lot_number', 'item__sku', 'item__name')
+    raw_id_fields = ('item',)
+    list_select_related = ('item',)
@@ -0,0 +1,200 @@
+"""
+Catalogue analytics: ABC classification, stock turnover and days of supply.
+
+``load_columns`` pulls the inventory into NumPy arrays in chunks and joins
+the per-item receipts/consumption of the window from ``StockMovement`` (one
+grouped query). ``compute_metrics`` is pure array code over those columns, so
+the whole catalogue is classified in one vectorized pass. ``catalogue_metrics``
+caches the result per data version, day and window in this process.
+
+- ABC: items sorted by value, class A up to ``ABC_THRESHOLDS[0]`` of the
+  cumulative value, B up to ``ABC_THRESHOLDS[1]``, C for the rest. The value is
+  the consumption value of the window (consumed quantity x unit price); when
+  no consumption was recorded at all it falls back to the stock value.
+- Turnover: consumption over the average stock of the window (start and end
+  quantity), annualized.
+- Days of supply: current quantity over the average daily consumption.
+
+Items without consumption have no turnover or days of supply (``NaN``).
+"""
+import threading
+from collections import OrderedDict
+from datetime import timedelta
+
+import numpy as np
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from .cache import data_version
+
+ABC_THRESHOLDS = (0.8, 0.95)
+ABC_CLASSES = np.array(['A', 'B', 'C'])
+
+DEFAULT_WINDOW_DAYS = 90
+CHUNK_SIZE = 50_000
+
+# Results kept per (version, day, window)
+_RESULTS_KEPT = 4
+
+_DTYPES = {
+    'pk': np.int64, 'sku': object, 'name': object, 'supplier': np.int64,
+    'quantity': np.int64, 'unit_price': np.float64, 'reorder_level': np.int64,
+}
+
+# Supplier column value for items without a supplier
+NO_SUPPLIER = -1
+
+
+def load_columns(days, chunk_size=CHUNK_SIZE):
+    """Inventory columns plus the window's ``received``/``consumed`` quantities per item."""
+    from .models import Inventory, StockMovement
+
+    parts = {name: [] for name in ('pk', 'sku', 'name', 'supplier', 'quantity', 'unit_price', 'reorder_level')}
+    rows = Inventory.objects.order_by('pk').values_list(
+        'pk', 'sku', 'name', 'supplier_id', 'quantity', 'unit_price', 'reorder_level'
+    ).iterator(chunk_size=chunk_size)
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            _add_chunk(parts, chunk)
+            chunk = []
+    _add_chunk(parts, chunk)
+    columns = {
+        name: np.concatenate(values) if values else np.empty(0, dtype=_DTYPES[name])
+        for name, values in parts.items()
+    }
+
+    since = timezone.now() - timedelta(days=days)
+    movements = (
+        StockMovement.objects.filter(created_at__gte=since).order_by().values('item')
+        .annotate(received=Sum('change', filter=Q(change__gt=0)), consumed=Sum('change', filter=Q(change__lt=0)))
+        .values_list('item', 'received', 'consumed')
+    )
+    columns['received'] = np.zeros(len(columns['pk']), dtype=np.int64)
+    columns['consumed'] = np.zeros(len(columns['pk']), dtype=np.int64)
+    moved = np.array([(item, received or 0, -(consumed or 0)) for item, received, consumed in movements], dtype=np.int64)
+    if len(moved):
+        # pk is sorted: locate each moved item's row
+        positions = np.searchsorted(columns['pk'], moved[:, 0])
+        found = (positions < len(columns['pk'])) & (columns['pk'][np.minimum(positions, len(columns['pk']) - 1)] == moved[:, 0])
+        columns['received'][positions[found]] = moved[found, 1]
+        columns['consumed'][positions[found]] = moved[found, 2]
+    return columns
+
+
+def _add_chunk(parts, chunk):
+    if not chunk:
+        return
+    for (name, values), column in zip(parts.items(), zip(*chunk)):
+        if name == 'supplier':
+            column = [NO_SUPPLIER if value is None else value for value in column]
+        values.append(np.array(column, dtype=_DTYPES[name]))
+
+
+def compute_metrics(columns, days):
+    """
+    Vectorized metrics for ``columns`` (see ``load_columns``); adds
+    ``stock_value``, ``consumption_value``, ``abc``, ``turnover`` and
+    ``days_of_supply`` arrays plus ``order`` (row indices by value, highest
+    first) and returns ``(columns, basis)``.
+    """
+    quantity = columns['quantity'].astype(np.float64)
+    consumed = columns['consumed'].astype(np.float64)
+    price = columns['unit_price']
+
+    stock_value = quantity * price
+    consumption_value = consumed * price
+    basis = 'consumption' if consumption_value.any() else 'stock'
+    value = consumption_value if basis == 'consumption' else stock_value
+
+    abc = np.full(len(value), 'C', dtype=ABC_CLASSES.dtype)
+    order = np.argsort(-value, kind='stable')
+    total = value.sum()
+    if total > 0:
+        # Share of the total reached *before* each item: the item that crosses a threshold stays in the class
+        before = (np.cumsum(value[order]) - value[order]) / total
+        abc[order] = ABC_CLASSES[np.searchsorted(ABC_THRESHOLDS, before, side='right')]
+
+    # Quantity at the start of the window from the net movement since
+    start = quantity - (columns['received'] - columns['consumed'])
+    average = (np.maximum(start, 0) + quantity) / 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        turnover = np.where((consumed > 0) & (average > 0), consumed / average * (365 / days), np.nan)
+        days_of_supply = np.where(consumed > 0, quantity / (consumed / days), np.nan)
+
+    columns.update(
+        stock_value=stock_value,
+        consumption_value=consumption_value,
+        abc=abc,
+        turnover=turnover,
+        days_of_supply=days_of_supply,
+        order=order,
+    )
+    return columns, basis
+
+
+class _Results:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._results = OrderedDict()
+
+    def get(self, days):
+        key = (data_version(), timezone.now().date(), days)
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                return self._results[key]
+        # Computed outside the lock; concurrent misses for the same key just both compute
+        result = compute_metrics(load_columns(days), days)
+        with self._lock:
+            self._results[key] = result
+            while len(self._results) > _RESULTS_KEPT:
+                self._results.popitem(last=False)
+        return result
+
+
+_results = _Results()
+
+
+def catalogue_metrics(days=DEFAULT_WINDOW_DAYS):
+    """``(columns, basis)`` for the whole catalogue, cached per data version, day and window."""
+    return _results.get(days)
+
+
+def summarize(columns, basis):
+    """Per-class item counts and value shares."""
+    value = columns['consumption_value'] if basis == 'consumption' else columns['stock_value']
+    total = value.sum()
+    classes = {}
+    for name in ABC_CLASSES:
+        selected = columns['abc'] == name
+        classes[str(name)] = {
+            'items': int(np.count_nonzero(selected)),
+            'value': round(float(value[selected].sum()), 2),
+            'value_share': round(float(value[selected].sum() / total), 4) if total else 0.0,
+        }
+    return classes
+
+
+def _number(value, digits=2):
+    return None if np.isnan(value) else round(float(value), digits)
+
+
+def rows(columns, indices):
+    """JSON rows for the items at ``indices``."""
+    return [
+        {
+            'id': int(columns['pk'][index]),
+            'sku': columns['sku'][index],
+            'name': columns['name'][index],
+            'abc_class': str(columns['abc'][index]),
+            'quantity': int(columns['quantity'][index]),
+            'stock_value': round(float(columns['stock_value'][index]), 2),
+            'consumed': int(columns['consumed'][index]),
+            'consumption_value': round(float(columns['consumption_value'][index]), 2),
+            'turnover': _number(columns['turnover'][index]),
+            'days_of_supply': _number(columns['days_of_supply'][index], 1),
+        }
+        for index in indices.tolist()
+    ]
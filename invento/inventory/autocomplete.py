@@ -0,0 +1,185 @@
+"""
+In-memory prefix index for the autocomplete endpoint.
+
+Each field (name, SKU, category, supplier) keeps its distinct values in a
+sorted list of case-folded keys, so a prefix lookup is a ``bisect`` plus a
+short scan. The index is built from one query the first time it's used and
+then kept current by ``inventory.signals`` (``apply_save``/``apply_delete``
+when the write commits), which also moves its version along with the
+version bumps of that write. Writes made by other processes, or that skip
+signals, are picked up by a rebuild once the shared data version has moved
+past the index's and the index is older than
+``INVENTORY_CACHE['AUTOCOMPLETE_MAX_AGE']`` seconds. The rebuild runs in a
+thread while the current index keeps answering
+(``AUTOCOMPLETE_BACKGROUND_REBUILD``), so no request waits on it.
+"""
+import heapq
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import Counter
+
+from django.db import connections
+
+from .cache import cache_settings, data_version
+
+FIELDS = ('name', 'sku', 'category', 'supplier')
+
+# Column read for each field when building
+COLUMNS = ('name', 'sku', 'category__name', 'supplier__name')
+
+# Fields with few distinct values, ranked by how many items use them;
+# the others are returned in alphabetical order
+RANKED_FIELDS = {'category', 'supplier'}
+
+
+def _key(value):
+    return value.strip().casefold()
+
+
+class _FieldIndex:
+    def __init__(self):
+        self.keys = []
+        # key -> Counter of the spellings seen for it
+        self.spellings = {}
+
+    def add(self, value):
+        if not value or not value.strip():
+            return
+        key = _key(value)
+        counts = self.spellings.get(key)
+        if counts is None:
+            counts = self.spellings[key] = Counter()
+            insort(self.keys, key)
+        counts[value.strip()] += 1
+
+    def remove(self, value):
+        if not value or not value.strip():
+            return
+        key = _key(value)
+        counts = self.spellings.get(key)
+        if counts is None:
+            return
+        counts[value.strip()] -= 1
+        if counts[value.strip()] <= 0:
+            del counts[value.strip()]
+        if not counts:
+            del self.spellings[key]
+            del self.keys[bisect_left(self.keys, key)]
+
+    def suggest(self, prefix, limit, ranked):
+        keys = self.keys
+        matches = []
+        for position in range(bisect_left(keys, prefix), len(keys)):
+            key = keys[position]
+            if not key.startswith(prefix):
+                break
+            counts = self.spellings[key]
+            matches.append((counts.most_common(1)[0][0], sum(counts.values())))
+            if not ranked and len(matches) == limit:
+                break
+        if ranked:
+            matches = heapq.nlargest(limit, matches, key=lambda match: match[1])
+        return [{'value': value, 'count': count} for value, count in matches]
+
+
+class PrefixIndex:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self.fields = None
+        self.rows = {}
+        self.version = None
+        self.built_at = 0.0
+
+    def build(self):
+        from .models import Inventory
+
+        # Version first: a write during the build leaves the index marked stale
+        version = data_version()
+        fields = {field: _FieldIndex() for field in FIELDS}
+        rows = {}
+        for row in Inventory.objects.values_list('pk', *COLUMNS).iterator(chunk_size=5000):
+            rows[row[0]] = row[1:]
+            for field, value in zip(FIELDS, row[1:]):
+                fields[field].add(value)
+        with self._lock:
+            self.fields, self.rows, self.version = fields, rows, version
+            self.built_at = time.monotonic()
+
+    def ensure_current(self):
+        """Build on first use; rebuild after outside writes once the index is old enough."""
+        if self.fields is None:
+            with self._build_lock:
+                if self.fields is None:
+                    self.build()
+            return
+        config = cache_settings()
+        if time.monotonic() - self.built_at < config['AUTOCOMPLETE_MAX_AGE'] or data_version() == self.version:
+            return
+        # One thread rebuilds; the others keep answering from the current index
+        if not self._build_lock.acquire(blocking=False):
+            return
+        if config['AUTOCOMPLETE_BACKGROUND_REBUILD']:
+            threading.Thread(target=self._rebuild, name='autocomplete-rebuild', daemon=True).start()
+        else:
+            self._rebuild(close_connections=False)
+
+    def _rebuild(self, close_connections=True):
+        # Runs with _build_lock held
+        try:
+            self.build()
+        finally:
+            self._build_lock.release()
+            if close_connections:
+                # Like the end of a request: drop broken or expired connections
+                for connection in connections.all(initialized_only=True):
+                    connection.close_if_unusable_or_obsolete()
+
+    def suggest(self, prefix, fields=FIELDS, limit=10):
+        """Return ``{field: [{'value', 'count'}, ...]}`` for values starting with ``prefix``."""
+        self.ensure_current()
+        prefix = _key(prefix)
+        with self._lock:
+            return {
+                field: self.fields[field].suggest(prefix, limit, field in RANKED_FIELDS)
+                for field in fields
+            }
+
+    @staticmethod
+    def values_for(instance):
+        """The indexed values of an ``Inventory`` instance, in ``FIELDS`` order."""
+        return (
+            instance.name,
+            instance.sku,
+            instance.category.name if instance.category_id else None,
+            instance.supplier.name if instance.supplier_id else None,
+        )
+
+    def apply_save(self, pk, values, versions=None):
+        """Replace row ``pk`` with ``values`` (one per ``FIELDS`` entry), written with ``versions``."""
+        with self._lock:
+            if self.fields is None:
+                return
+            self._remove_row(pk)
+            self.rows[pk] = values
+            for field, value in zip(FIELDS, values):
+                self.fields[field].add(value)
+            if versions is not None:
+                self.version = versions.advance(self.version)
+
+    def apply_delete(self, pk, versions=None):
+        with self._lock:
+            if self.fields is not None:
+                self._remove_row(pk)
+                if versions is not None:
+                    self.version = versions.advance(self.version)
+
+    def _remove_row(self, pk):
+        old = self.rows.pop(pk, None)
+        if old is not None:
+            for field, value in zip(FIELDS, old):
+                self.fields[field].remove(value)
+
+
+index = PrefixIndex()
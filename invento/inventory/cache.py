@@ -0,0 +1,278 @@
+"""
+Versioned response cache for the inventory API.
+
+Every cached list/retrieve response is keyed by the global inventory data
+version, so invalidation is a single ``incr``: bumping the version makes every
+older entry unreachable (they expire on their own). ``inventory.signals`` bumps
+the version on every save/delete, once straight away and once more when the
+transaction commits, so a response read from the database before the commit
+can't survive under the new version. The in-process copies kept current by
+signals (the autocomplete index, the analytics snapshot) move their own
+version along with those bumps (``WriteVersions.advance``), so only writes
+they didn't see make them stale.
+
+Writes that bypass signals (``bulk_create``, ``QuerySet.update``) must call
+``bump_version()`` (and ``sku_cache.clear()``) themselves.
+
+Responses are only cached in a cache shared by all processes (Redis): with
+the per-process local memory cache, a write in one worker would leave the
+others serving their old responses until they expire. ``LOCAL`` turns it on
+there anyway for single-process deployments.
+
+``sku_cache`` is an in-process LRU of serialized rows by SKU for the scanner
+lookups. It does not follow the global version (a write to one item would
+empty it): signals evict just the written SKU, now and when the write
+commits, and lookups never touch the shared cache. Writes made by other
+processes (and renamed categories or suppliers, which appear in the rows)
+are picked up when entries expire, after ``SKU_CACHE_TTL`` seconds; the
+midnight status change invalidates them too.
+"""
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.response import Response
+
+from core import db_router
+from core.metrics import span
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'inventory:data-version'
+
+DEFAULT_CACHE_SETTINGS = {
+    'ENABLED': True,
+    'TIMEOUT': 300,
+    # Cache responses in a process-local cache too (one worker process only)
+    'LOCAL': False,
+    'SKU_CACHE_SIZE': 10000,
+    # Longest an SKU row written by another process is served stale
+    'SKU_CACHE_TTL': 30,
+    'AUTOCOMPLETE_MAX_AGE': 60,
+    # Rebuild a stale index in a thread while the current one keeps answering
+    'AUTOCOMPLETE_BACKGROUND_REBUILD': True,
+}
+
+
+def cache_settings():
+    """Return ``settings.INVENTORY_CACHE`` merged over the defaults."""
+    return {**DEFAULT_CACHE_SETTINGS, **getattr(settings, 'INVENTORY_CACHE', {})}
+
+
+def _initial_version():
+    # Time based, so a version key evicted from the cache never restarts at a
+    # number whose old entries are still stored
+    return int(time.time() * 1000)
+
+
+def cache_is_shared():
+    """Whether the cache (and so the data version) is shared between processes."""
+    # ``cache`` is a proxy: check the backend it stands for
+    return not isinstance(caches['default'], LocMemCache)
+
+
+def data_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, _initial_version(), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_version():
+    try:
+        return cache.incr(VERSION_KEY)
+    except ValueError:
+        # Key missing (evicted or never set)
+        version = _initial_version()
+        cache.set(VERSION_KEY, version, timeout=None)
+        return version
+
+
+class WriteVersions:
+    """The data versions one write bumped: ``bumped`` straight away, ``committed`` once it commits."""
+
+    def __init__(self, bumped):
+        self.bumped = bumped
+        self.committed = None
+
+    def commit(self):
+        self.committed = bump_version()
+
+    def advance(self, version):
+        """
+        The version an in-process copy current at ``version`` is at once it
+        has applied this write: ``committed`` if nothing else bumped the
+        version in between, otherwise ``version`` unchanged (the copy is stale
+        and gets rebuilt).
+        """
+        if self.committed is None or (version, self.committed) != (self.bumped - 1, self.bumped + 1):
+            return version
+        return self.committed
+
+
+def bump_version_now_and_on_commit():
+    """Bump the version now and when the transaction commits; returns the ``WriteVersions``."""
+    versions = WriteVersions(bump_version())
+    transaction.on_commit(versions.commit)
+    return versions
+
+
+def response_key(request):
+    """Cache key for ``request``: data version, day, host, path and sorted query params."""
+    params = sorted((key, value) for key in request.query_params for value in request.query_params.getlist(key))
+    # The day is part of the key because the computed status ("Expired") depends on it
+    raw = f'{request.get_host()}{request.path}?{params}|{timezone.localdate()}'
+    return f'inventory:response:{data_version()}:{hashlib.md5(raw.encode()).hexdigest()}'
+
+
+def cached_response(request, build):
+    """
+    Return the cached data for ``request`` or call ``build()`` and cache its
+    data if it is a 200. Runs after authentication and permission checks.
+    """
+    config = cache_settings()
+    if not config['ENABLED'] or not (config['LOCAL'] or cache_is_shared()):
+        return build()
+
+    key = response_key(request)
+    with span('cache'):
+        data = cache.get(key)
+    if data is not None:
+        return Response(data)
+
+    response = build()
+    if response.status_code == 200:
+        timeout = config['TIMEOUT']
+        state = db_router.current_state()
+        if state is not None and state.use_replica and not state.wrote:
+            # A lagging replica may still return pre-write data; don't keep it long
+            timeout = min(timeout, getattr(settings, 'REPLICA_PIN_SECONDS', 5))
+        cache.set(key, response.data, timeout)
+    return response
+
+
+class SkuCache:
+    """
+    Thread-safe LRU of serialized inventory rows keyed by SKU.
+
+    A lookup takes ``generation()`` before reading the database and hands
+    it to ``set_many``, which skips the SKUs evicted since: a row read just
+    before a write committed is not cached after its eviction.
+    """
+
+    # Evictions remembered for set_many; older readers don't cache at all
+    EVICTION_HISTORY = 1024
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        # sku -> (row or None for an unknown SKU, day, expires_at)
+        self._rows = OrderedDict()
+        self._skus_by_pk = {}
+        self._generation = 0
+        # sku -> generation of its last eviction, oldest first
+        self._evicted = OrderedDict()
+        self._forgotten = 0
+
+    def generation(self):
+        with self._lock:
+            return self._generation
+
+    def get_many(self, skus, day):
+        """Return ``{sku: row}`` for the fresh cached entries among ``skus`` (None: known missing)."""
+        found = {}
+        now = time.monotonic()
+        with self._lock:
+            for sku in skus:
+                entry = self._rows.get(sku)
+                if entry is None:
+                    continue
+                row, entry_day, expires_at = entry
+                if entry_day != day or expires_at < now:
+                    self._discard(sku)
+                    continue
+                self._rows.move_to_end(sku)
+                found[sku] = row
+        return found
+
+    def set_many(self, rows, day, generation, ttl):
+        """Store ``{sku: serialized row or None}`` read after ``generation()`` returned ``generation``."""
+        expires_at = time.monotonic() + ttl
+        with self._lock:
+            if generation < self._forgotten:
+                return
+            for sku, row in rows.items():
+                if self._evicted.get(sku, -1) > generation:
+                    continue
+                self._discard(sku)
+                self._rows[sku] = (row, day, expires_at)
+                if row is not None:
+                    self._skus_by_pk[row['id']] = sku
+            while len(self._rows) > self.maxsize:
+                self._discard(next(iter(self._rows)))
+
+    def evict(self, pk=None, sku=None):
+        """Drop the entry for ``sku`` and whatever SKU row ``pk`` was cached under (renames)."""
+        with self._lock:
+            self._generation += 1
+            skus = {sku, self._skus_by_pk.get(pk)} - {None}
+            for evicted in skus:
+                self._discard(evicted)
+                self._evicted.pop(evicted, None)
+                self._evicted[evicted] = self._generation
+            while len(self._evicted) > self.EVICTION_HISTORY:
+                _, self._forgotten = self._evicted.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._rows.clear()
+            self._skus_by_pk.clear()
+
+    def _discard(self, sku):
+        entry = self._rows.pop(sku, None)
+        if entry is not None and entry[0] is not None:
+            self._skus_by_pk.pop(entry[0]['id'], None)
+
+    def __len__(self):
+        return len(self._rows)
+
+
+sku_cache = SkuCache(cache_settings()['SKU_CACHE_SIZE'])
+
+
+def evict_sku_now_and_on_commit(pk, sku):
+    sku_cache.evict(pk, sku)
+    transaction.on_commit(lambda: sku_cache.evict(pk, sku))
+
+
+def rows_by_sku(skus, serialize):
+    """
+    Serialized rows for ``skus`` as ``{sku: row}`` (unknown SKUs are left
+    out). Cache misses are loaded with ``serialize(missing_skus)``, which runs
+    one ``sku IN (...)`` query and returns the serialized rows.
+    """
+    day = timezone.localdate()
+    # Taken before the database read: SKUs evicted meanwhile aren't cached
+    generation = sku_cache.generation()
+    found = sku_cache.get_many(skus, day)
+    missing = [sku for sku in skus if sku not in found]
+    if missing:
+        # Unknown SKUs are cached too (as None) so rescanning them stays cheap
+        rows = dict.fromkeys(missing)
+        rows.update((row['sku'], row) for row in serialize(missing))
+        ttl = cache_settings()['SKU_CACHE_TTL']
+        state = db_router.current_state()
+        if state is not None and state.use_replica and not state.wrote:
+            # A lagging replica may still return pre-write data; don't keep it long
+            ttl = min(ttl, getattr(settings, 'REPLICA_PIN_SECONDS', 5))
+        sku_cache.set_many(rows, day, generation, ttl)
+        found.update(rows)
+    return {sku: row for sku, row in found.items() if row is not None}
@@ -0,0 +1,185 @@
+"""
+Maintained inventory counters.
+
+Per category: item count, total quantity and total value (``Category``).
+Whole inventory: the dashboard headline totals (``InventoryTotals``, one row).
+
+``Inventory.save()`` and the post_delete signal call ``apply_counter_changes``
+inside the write's transaction with the row's old and new
+``COUNTED_FIELDS`` values, which turns into at most one
+``UPDATE ... SET item_count = item_count + n`` per affected category plus one
+on the totals row. Bulk writes (``bulk_create``, ``QuerySet.update``) bypass
+this and must call ``recount_categories()`` and ``reconcile_totals()``
+afterwards.
+
+Every write touches the same totals row, so its update runs once the write
+has committed, in its own short transaction: holding that row lock until the
+end of each request would serialize all writers. A delta lost in between (the
+process dying right after the commit, or a write committing while
+``reconcile_totals`` recounts) is corrected by the nightly reconciliation.
+"""
+import logging
+from collections import defaultdict
+from decimal import Decimal
+from functools import partial
+
+from django.db import transaction
+from django.db.models import (
+    Case, Count, DecimalField, ExpressionWrapper, F, IntegerField, OuterRef, Q, Subquery, Sum, Value, When,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+COUNTED_FIELDS = ('category_id', 'quantity', 'unit_price', 'reorder_level', 'expiry_date')
+
+# Totals compared (and corrected) by reconcile_totals
+TOTAL_FIELDS = ('item_count', 'total_quantity', 'total_value', 'low_stock_count', 'expired_count')
+
+
+def counted_values(instance, old=None, update_fields=None):
+    """The row's counted values as saved (fields outside ``update_fields`` keep their old value)."""
+    values = tuple(getattr(instance, field) for field in COUNTED_FIELDS)
+    if old is not None and update_fields is not None:
+        saved = set(update_fields)
+        if 'category' in saved:
+            saved.add('category_id')
+        values = tuple(
+            value if field in saved else old_value
+            for field, value, old_value in zip(COUNTED_FIELDS, values, old)
+        )
+    return values
+
+
+def _expired(expiry_date):
+    """1 on the totals row if ``expiry_date`` is before its ``expired_as_of``, else 0 (evaluated in SQL)."""
+    if expiry_date is None:
+        return Value(0)
+    return Case(When(expired_as_of__gt=expiry_date, then=Value(1)), default=Value(0), output_field=IntegerField())
+
+
+def apply_counter_changes(old, new):
+    """
+    Move a row's contribution from ``old`` to ``new`` (either may be None):
+    the category counters now, the totals row when the transaction commits.
+    """
+    from .models import Category
+
+    deltas = defaultdict(lambda: [0, 0, Decimal(0)])
+    totals = [0, 0, Decimal(0), 0]
+    for values, sign in ((old, -1), (new, 1)):
+        if values is None:
+            continue
+        category_id, quantity, unit_price, reorder_level, _ = values
+        quantity = int(quantity)
+        value = quantity * Decimal(str(unit_price))
+        low_stock = int(quantity <= int(reorder_level))
+        totals[0] += sign
+        totals[1] += sign * quantity
+        totals[2] += sign * value
+        totals[3] += sign * low_stock
+        if category_id is not None:
+            delta = deltas[category_id]
+            delta[0] += sign
+            delta[1] += sign * quantity
+            delta[2] += sign * value
+
+    for category_id, (items, quantity, value) in deltas.items():
+        if items or quantity or value:
+            Category.objects.filter(pk=category_id).update(
+                item_count=F('item_count') + items,
+                total_quantity=F('total_quantity') + quantity,
+                total_value=F('total_value') + value,
+            )
+
+    old_expiry = old[4] if old is not None else None
+    new_expiry = new[4] if new is not None else None
+    if any(totals) or old_expiry != new_expiry:
+        transaction.on_commit(partial(apply_totals_change, totals, old_expiry, new_expiry), robust=True)
+
+
+def apply_totals_change(totals, old_expiry, new_expiry):
+    """Add one committed write's deltas to the ``InventoryTotals`` row."""
+    from .models import InventoryTotals
+
+    # No row yet (never reconciled): nothing to keep in step
+    InventoryTotals.objects.filter(pk=InventoryTotals.SINGLETON_PK).update(
+        item_count=F('item_count') + totals[0],
+        total_quantity=F('total_quantity') + totals[1],
+        total_value=F('total_value') + totals[2],
+        low_stock_count=F('low_stock_count') + totals[3],
+        expired_count=F('expired_count') + _expired(new_expiry) - _expired(old_expiry),
+    )
+
+
+def recount_categories():
+    """Recompute every category's counters from the inventory table."""
+    from .models import Category, Inventory
+
+    per_category = Inventory.objects.filter(category=OuterRef('pk')).order_by().values('category')
+    value = ExpressionWrapper(F('quantity') * F('unit_price'), output_field=DecimalField(max_digits=18, decimal_places=2))
+    Category.objects.update(
+        item_count=Coalesce(Subquery(per_category.annotate(n=Count('pk')).values('n')), 0),
+        total_quantity=Coalesce(Subquery(per_category.annotate(n=Sum('quantity')).values('n')), 0),
+        total_value=Coalesce(
+            Subquery(per_category.annotate(n=Sum(value)).values('n')),
+            Value(Decimal(0)), output_field=DecimalField(max_digits=18, decimal_places=2),
+        ),
+    )
+
+
+def count_totals(as_of):
+    """The ``InventoryTotals`` values recounted from the inventory table, with expiry relative to ``as_of``."""
+    from .models import Inventory
+
+    value = ExpressionWrapper(F('quantity') * F('unit_price'), output_field=DecimalField(max_digits=18, decimal_places=2))
+    counts = Inventory.objects.aggregate(
+        item_count=Count('pk'),
+        total_quantity=Sum('quantity'),
+        total_value=Sum(value),
+        low_stock_count=Count('pk', filter=Q(quantity__lte=F('reorder_level'))),
+        expired_count=Count('pk', filter=Q(expiry_date__lt=as_of)),
+    )
+    counts['total_quantity'] = counts['total_quantity'] or 0
+    counts['total_value'] = Decimal(counts['total_value'] or 0).quantize(Decimal('0.01'))
+    return counts
+
+
+def reconcile_totals(as_of=None):
+    """
+    Recount the totals row (creating it if needed) and move ``expired_as_of``
+    to ``as_of`` (default: today). Returns the drift found, as
+    ``{field: stored - recounted}`` for the fields that were off; the expiry
+    date moving forward is not drift.
+    """
+    from .models import InventoryTotals
+
+    as_of = as_of or timezone.now().date()
+    with transaction.atomic():
+        # Locked first: deltas of writes committed from here on wait on this row
+        # and apply after the recount
+        totals = InventoryTotals.objects.select_for_update().filter(pk=InventoryTotals.SINGLETON_PK).first()
+        counts = count_totals(as_of)
+        if totals is None:
+            totals = InventoryTotals(pk=InventoryTotals.SINGLETON_PK, expired_as_of=as_of)
+            drift = {}
+        else:
+            stored = {field: getattr(totals, field) for field in TOTAL_FIELDS}
+            if totals.expired_as_of != as_of:
+                # Expected change, not drift: compare against the count at the stored date
+                stored['expired_count'] -= count_totals(totals.expired_as_of)['expired_count'] - counts['expired_count']
+            drift = {
+                field: stored[field] - counts[field]
+                for field in TOTAL_FIELDS if stored[field] != counts[field]
+            }
+        for field, value in counts.items():
+            setattr(totals, field, value)
+        totals.expired_as_of = as_of
+        totals.reconciled_at = timezone.now()
+        totals.last_drift = {field: str(value) for field, value in drift.items()}
+        totals.save()
+
+    if drift:
+        logger.warning('Inventory totals drifted, corrected: %s', drift)
+    return drift
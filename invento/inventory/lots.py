@@ -0,0 +1,117 @@
+"""
+Lot tracking: parent quantities and first-expiry-first-out allocation.
+
+An item with lots gets its quantity (sum of the lots) and expiry date
+(earliest expiry among lots in stock) from ``sync_item``, which runs after
+every lot save/delete and allocation and saves the item through
+``Inventory.save()``, so counters, stock movements and caches follow as for
+any other quantity change. The stock an item already holds when its first
+lot is added is moved into an opening lot first (``open_lot``), so the new
+lot adds to it instead of replacing it.
+
+``allocate_fefo`` takes stock from the lots that expire first. It locks the
+item and then the candidate lots (read in ``(item, expiry_date)`` index
+order), so concurrent allocations for the same item queue instead of
+double-allocating.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Min, Q, Sum
+from django.utils import timezone
+
+
+# Lot number of the lot holding an item's stock from before it had lots
+OPENING_LOT = 'OPENING'
+
+
+class InsufficientStock(Exception):
+    def __init__(self, requested, available):
+        self.requested = requested
+        self.available = available
+        super().__init__(f'Requested {requested}, only {available} available in lots')
+
+
+def sync_item(item_id):
+    """Set the item's quantity and expiry date from its lots; returns the item (None if gone)."""
+    from .models import Inventory, Lot
+
+    with transaction.atomic(savepoint=False):
+        item = Inventory.objects.select_for_update().filter(pk=item_id).first()
+        if item is None:
+            return None
+        stock = Lot.objects.filter(item_id=item_id).aggregate(
+            total=Sum('quantity'),
+            first_expiry=Min('expiry_date', filter=Q(quantity__gt=0)),
+        )
+        quantity = stock['total'] or 0
+        if item.quantity != quantity or item.expiry_date != stock['first_expiry']:
+            item.quantity = quantity
+            item.expiry_date = stock['first_expiry']
+            item.save(update_fields=['quantity', 'expiry_date', 'updated_at'])
+        return item
+
+
+def open_lot(item_id):
+    """
+    Before the first lot of an item: put the quantity the item holds into an
+    opening lot (with the item's expiry date). Returns that lot, or None when
+    the item already has lots or holds nothing. Call it inside the
+    transaction that adds the lot.
+    """
+    from .models import Inventory, Lot
+
+    item = Inventory.objects.select_for_update().filter(pk=item_id).values_list('quantity', 'expiry_date').first()
+    if item is None or not item[0] or Lot.objects.filter(item_id=item_id).exists():
+        return None
+    quantity, expiry_date = item
+    lot = Lot(item_id=item_id, lot_number=OPENING_LOT, quantity=quantity, expiry_date=expiry_date)
+    # Not save(): the item already holds this quantity, there is nothing to sync
+    Lot.objects.bulk_create([lot])
+    return lot
+
+
+def allocate_fefo(item_id, quantity, include_expired=False):
+    """
+    Take ``quantity`` units of the item from its lots, earliest expiry first
+    (lots without an expiry date last). Expired lots are skipped unless
+    ``include_expired``. Returns ``[(lot, taken)]``; raises
+    ``InsufficientStock`` without changing anything if the lots can't cover it.
+    """
+    from .models import Inventory, Lot
+
+    with transaction.atomic():
+        # Item first: allocations for one item are serialized on its row
+        Inventory.objects.select_for_update().filter(pk=item_id).values_list('pk', flat=True).first()
+        lots = Lot.objects.select_for_update().filter(item_id=item_id, quantity__gt=0)
+        if not include_expired:
+            lots = lots.filter(Q(expiry_date__isnull=True) | Q(expiry_date__gte=timezone.now().date()))
+        lots = lots.order_by(F('expiry_date').asc(nulls_last=True), 'received_date', 'pk')
+
+        allocations = []
+        remaining = quantity
+        for lot in lots:
+            taken = min(lot.quantity, remaining)
+            lot.quantity -= taken
+            allocations.append((lot, taken))
+            remaining -= taken
+            if not remaining:
+                break
+        if remaining:
+            raise InsufficientStock(quantity, quantity - remaining)
+
+        Lot.objects.bulk_update([lot for lot, _ in allocations], ['quantity'])
+        sync_item(item_id)
+    return allocations
+
+
+def expiring_lots(days, today=None):
+    """Lots in stock expiring within ``days`` days (expired ones included), soonest first."""
+    from .models import Lot
+
+    today = today or timezone.now().date()
+    return (
+        Lot.objects.filter(quantity__gt=0, expiry_date__lte=today + timedelta(days=days))
+        .select_related('item')
+        .order_by('expiry_date', 'pk')
+    )
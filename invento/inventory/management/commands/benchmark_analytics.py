@@ -0,0 +1,80 @@
+"""
+Catalogue Analytics Benchmark Management Command
+Times the vectorized ABC / turnover / days-of-supply computation from
+inventory/analytics.py and the reorder suggestions from inventory/reorder.py
+on synthetic catalogues of the given sizes (no database needed), and
+optionally the full load + compute on the real table.
+
+Run manually: python manage.py benchmark_analytics --items 100000 1000000 --database
+"""
+import json
+from time import perf_counter
+
+import numpy as np
+from django.core.management.base import BaseCommand
+
+from inventory import analytics, reorder
+
+
+def synthetic_columns(items, days, seed=42):
+    rng = np.random.default_rng(seed)
+    quantity = rng.integers(0, 1000, items)
+    received = rng.integers(0, 500, items)
+    # A third of the catalogue didn't move in the window
+    consumed = np.where(rng.random(items) < 0.66, rng.zipf(1.5, items).clip(max=5000), 0)
+    return {
+        'pk': np.arange(1, items + 1, dtype=np.int64),
+        'sku': np.array([f'SYN-{index:08d}' for index in range(items)], dtype=object),
+        'name': np.array([f'Synthetic {index}' for index in range(items)], dtype=object),
+        'supplier': rng.integers(1, 50, items),
+        'quantity': quantity,
+        'unit_price': rng.uniform(0.5, 5000, items).round(2),
+        'reorder_level': rng.choice([5, 10, 20, 50], items),
+        'received': received,
+        'consumed': consumed,
+    }
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the vectorized catalogue analytics'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, nargs='+', default=[100_000, 1_000_000])
+        parser.add_argument('--days', type=int, default=analytics.DEFAULT_WINDOW_DAYS)
+        parser.add_argument('--database', action='store_true',
+                            help='Also time load_columns + compute_metrics on the inventory table')
+
+    def handle(self, *args, **options):
+        days = options['days']
+        results = {}
+        for items in options['items']:
+            columns = synthetic_columns(items, days)
+            start = perf_counter()
+            columns, basis = analytics.compute_metrics(columns, days)
+            seconds = perf_counter() - start
+            start = perf_counter()
+            indices, _, _ = reorder.compute_suggestions(
+                columns, np.full(items, 7.0), np.zeros(items, dtype=np.int64), days, 14
+            )
+            reorder_seconds = perf_counter() - start
+            results[f'synthetic_{items}'] = {
+                'compute_seconds': round(seconds, 3),
+                'items_per_sec': round(items / seconds),
+                'reorder_seconds': round(reorder_seconds, 3),
+                'items_to_order': len(indices),
+                'classes': analytics.summarize(columns, basis),
+            }
+
+        if options['database']:
+            start = perf_counter()
+            columns = analytics.load_columns(days)
+            loaded = perf_counter()
+            analytics.compute_metrics(columns, days)
+            done = perf_counter()
+            results['database'] = {
+                'items': len(columns['pk']),
+                'load_seconds': round(loaded - start, 3),
+                'compute_seconds': round(done - loaded, 3),
+            }
+
+        self.stdout.write(json.dumps({'days': days, 'results': results}, indent=2))
@@ -0,0 +1,188 @@
+"""
+WSGI vs ASGI Benchmark Management Command
+Sends dashboard stats and report summary requests through the real handlers
+at increasing concurrency and compares latency and throughput:
+
+- wsgi: the sync views through WSGIHandler, one request per thread of a
+  --threads pool (like a threaded WSGI worker)
+- asgi: the async views (core/aio.py, queries run concurrently) through
+  core.asgi.application, every request on one event loop
+
+A thread pool stops scaling at its size: requests beyond it queue, so p95
+grows with concurrency while an event loop keeps accepting them. How much
+the concurrent queries save depends on the database: they only overlap when
+it has cores to spare (PostgreSQL), not in-process SQLite on a small machine.
+
+Run manually: python manage.py benchmark_asgi --concurrency 1 --concurrency 16 --concurrency 64
+"""
+import asyncio
+import json
+import statistics
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import RequestFactory
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from accounts.models import User
+from core.benchmark import percentile
+
+BENCHMARK_EMAIL = 'benchmark@invento.local'
+
+# name: (sync path for WSGI, async path for ASGI)
+ENDPOINTS = {
+    'dashboard_stats': ('/api/dashboard/stats/', '/api/dashboard/stats/async/'),
+    'report_summary': ('/api/reports/summary/', '/api/reports/summary/async/'),
+}
+
+
+def _stats(timings, elapsed, statuses):
+    timings.sort()
+    ms = [value * 1000 for value in timings]
+    return {
+        'p50_ms': round(percentile(ms, 0.50), 3),
+        'p95_ms': round(percentile(ms, 0.95), 3),
+        'mean_ms': round(statistics.fmean(ms), 3),
+        'throughput_rps': round(len(ms) / elapsed, 2) if elapsed else None,
+        'status_codes': {str(code): statuses.count(code) for code in sorted(set(statuses))},
+    }
+
+
+def run_wsgi(path, token, requests, concurrency, threads):
+    """``requests`` requests, ``concurrency`` at a time, served by a pool of ``threads``."""
+    factory = RequestFactory()
+    handler = WSGIHandler()
+
+    def send():
+        environ = factory._base_environ(PATH_INFO=path, REQUEST_METHOD='GET', HTTP_AUTHORIZATION=f'Bearer {token}')
+        statuses = []
+        start = perf_counter()
+        response = handler(environ, lambda status, headers, exc_info=None: statuses.append(status))
+        try:
+            b''.join(response)
+        finally:
+            response.close()
+        return perf_counter() - start, int(statuses[0].split()[0])
+
+    def client(count):
+        # One client sending its requests back to back; latency includes queueing for a thread
+        results = []
+        for _ in range(count):
+            submitted = perf_counter()
+            _, status = pool.submit(send).result()
+            results.append((perf_counter() - submitted, status))
+        return results
+
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix='wsgi') as pool:
+        pool.submit(send).result()  # warm up
+        started = perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as clients:
+            per_client = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+            outcomes = [outcome for results in clients.map(client, per_client) for outcome in results]
+        elapsed = perf_counter() - started
+    return _stats([duration for duration, _ in outcomes], elapsed, [status for _, status in outcomes])
+
+
+async def _asgi_get(application, path, token):
+    path, _, query = path.partition('?')
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': 'GET', 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+        'query_string': query.encode(), 'root_path': '',
+        'headers': [(b'host', b'testserver'), (b'authorization', f'Bearer {token}'.encode())],
+        'client': ('127.0.0.1', 0), 'server': ('testserver', 80),
+    }
+    body_sent = False
+    disconnected = asyncio.Event()
+    statuses = []
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # The client stays connected until the response is complete
+        await disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            statuses.append(message['status'])
+
+    start = perf_counter()
+    try:
+        await application(scope, receive, send)
+    finally:
+        disconnected.set()
+    return perf_counter() - start, statuses[0]
+
+
+async def _run_asgi(application, path, token, requests, concurrency):
+    await _asgi_get(application, path, token)  # warm up
+
+    async def client(count):
+        return [await _asgi_get(application, path, token) for _ in range(count)]
+
+    started = perf_counter()
+    per_client = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+    results = await asyncio.gather(*(client(count) for count in per_client))
+    elapsed = perf_counter() - started
+    outcomes = [outcome for client_results in results for outcome in client_results]
+    return _stats([duration for duration, _ in outcomes], elapsed, [status for _, status in outcomes])
+
+
+def run_asgi(path, token, requests, concurrency):
+    """``requests`` requests, ``concurrency`` at a time, on one event loop."""
+    from core.asgi import application
+
+    threads_before = threading.active_count()
+    results = asyncio.run(_run_asgi(application, path, token, requests, concurrency))
+    # Threads the run left behind (thread-sensitive executors, the query pool)
+    results['threads_added'] = threading.active_count() - threads_before
+    return results
+
+
+class Command(BaseCommand):
+    help = 'Compare latency and concurrent capacity of the WSGI and ASGI (async view) paths'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint and concurrency level')
+        parser.add_argument('--concurrency', type=int, action='append', dest='levels',
+                            help='Requests in flight at once (repeatable; default 1, 8 and 32)')
+        parser.add_argument('--threads', type=int, default=8, help='WSGI worker threads')
+        parser.add_argument('--endpoint', action='append', dest='endpoints', choices=list(ENDPOINTS),
+                            help='Only run this endpoint (repeatable)')
+
+    def handle(self, *args, **options):
+        from rest_framework_simplejwt.tokens import RefreshToken
+
+        levels = options['levels'] or [1, 8, 32]
+        # "testserver" host for the requests
+        setup_test_environment()
+        user, created = User.objects.get_or_create(email=BENCHMARK_EMAIL, defaults={'role': 'admin'})
+        token = str(RefreshToken.for_user(user).access_token)
+        results = {}
+        try:
+            for name in options['endpoints'] or list(ENDPOINTS):
+                sync_path, async_path = ENDPOINTS[name]
+                results[name] = {}
+                for level in levels:
+                    results[name][f'concurrency_{level}'] = {
+                        'wsgi': run_wsgi(sync_path, token, options['requests'], level, options['threads']),
+                        'asgi': run_asgi(async_path, token, options['requests'], level),
+                    }
+        finally:
+            if created:
+                user.delete()
+            teardown_test_environment()
+
+        self.stdout.write(json.dumps({
+            'database': connections['default'].vendor,
+            'requests': options['requests'],
+            'wsgi_threads': options['threads'],
+            'results': results,
+        }, indent=2))
@@ -0,0 +1,159 @@
+"""
+DB Connection Reuse Benchmark Management Command
+Sends short requests (inventory retrieve, profile) through the real WSGI
+handler, so Django's request_started/request_finished connection handling
+runs as in production, once per connection mode:
+
+- per-request: CONN_MAX_AGE = 0, a new connection for every request
+- persistent: connections kept between requests, health-checked before reuse
+- pool: psycopg 3 connection pool (PostgreSQL with psycopg-pool only)
+
+Run manually: python manage.py benchmark_connections --iterations 200
+"""
+import json
+import statistics
+from time import perf_counter
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.test import RequestFactory
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from accounts.models import User
+from core.benchmark import percentile
+from inventory.models import Inventory
+
+BENCHMARK_EMAIL = 'benchmark@invento.local'
+
+MODES = {
+    'per-request': {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False, 'pool': False},
+    'persistent': {'CONN_MAX_AGE': 600, 'CONN_HEALTH_CHECKS': True, 'pool': False},
+    'pool': {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False, 'pool': True},
+}
+
+
+def pool_available():
+    if connections['default'].vendor != 'postgresql':
+        return False
+    try:
+        import psycopg_pool  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _apply_mode(mode):
+    """Close every connection (and pool) and switch all aliases to ``mode``."""
+    for conn in connections.all():
+        conn.close()
+        if hasattr(conn, 'close_pool'):
+            conn.close_pool()
+        options = {k: v for k, v in conn.settings_dict.get('OPTIONS', {}).items() if k != 'pool'}
+        if mode['pool']:
+            options['pool'] = True
+        conn.settings_dict.update(
+            CONN_MAX_AGE=mode['CONN_MAX_AGE'],
+            CONN_HEALTH_CHECKS=mode['CONN_HEALTH_CHECKS'],
+            OPTIONS=options,
+        )
+
+
+def _send(handler, environ):
+    statuses = []
+    response = handler(environ, lambda status, headers, exc_info=None: statuses.append(status))
+    try:
+        b''.join(response)
+    finally:
+        # Fires request_finished, where Django closes or keeps the connection
+        response.close()
+    return statuses[0]
+
+
+def run_mode(mode, paths, token, iterations, warmup):
+    factory = RequestFactory()
+    handler = WSGIHandler()
+    connects = []
+
+    def count_connect(sender, connection, **kwargs):
+        connects.append(connection.alias)
+
+    _apply_mode(mode)
+    connection_created.connect(count_connect)
+    try:
+        results = {}
+        for name, path in paths.items():
+            def request():
+                environ = factory._base_environ(PATH_INFO=path, REQUEST_METHOD='GET',
+                                                HTTP_AUTHORIZATION=f'Bearer {token}')
+                return _send(handler, environ)
+
+            for _ in range(warmup):
+                request()
+            del connects[:]
+            timings = []
+            for _ in range(iterations):
+                start = perf_counter()
+                status = request()
+                timings.append((perf_counter() - start) * 1000)
+            timings.sort()
+            results[name] = {
+                'status': status,
+                'p50_ms': round(percentile(timings, 0.50), 3),
+                'p95_ms': round(percentile(timings, 0.95), 3),
+                'mean_ms': round(statistics.fmean(timings), 3),
+                'connections_opened': len(connects),
+            }
+        return results
+    finally:
+        connection_created.disconnect(count_connect)
+
+
+class Command(BaseCommand):
+    help = 'Compare per-request latency with and without DB connection reuse'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument('--mode', action='append', dest='modes', choices=list(MODES),
+                            help='Only run this mode (repeatable)')
+
+    def handle(self, *args, **options):
+        from rest_framework_simplejwt.tokens import RefreshToken
+
+        modes = options['modes'] or list(MODES)
+        if 'pool' in modes and not pool_available():
+            self.stdout.write(self.style.WARNING('Skipping pool mode: needs PostgreSQL and psycopg-pool'))
+            modes.remove('pool')
+
+        # "testserver" host for the WSGI requests
+        setup_test_environment()
+        user, created = User.objects.get_or_create(email=BENCHMARK_EMAIL, defaults={'role': 'admin'})
+        item = Inventory.objects.order_by('pk').first()
+        paths = {'profile': '/api/accounts/profile/'}
+        if item is not None:
+            paths['inventory_retrieve'] = f'/api/inventory/{item.pk}/'
+        token = str(RefreshToken.for_user(user).access_token)
+
+        original = {conn.alias: dict(conn.settings_dict) for conn in connections.all()}
+        try:
+            results = {
+                name: run_mode(MODES[name], paths, token, options['iterations'], options['warmup'])
+                for name in modes
+            }
+        finally:
+            for conn in connections.all():
+                conn.close()
+                if hasattr(conn, 'close_pool'):
+                    conn.close_pool()
+                conn.settings_dict.update(original[conn.alias])
+            if created:
+                user.delete()
+            teardown_test_environment()
+
+        self.stdout.write(json.dumps({
+            'database': connections['default'].vendor,
+            'iterations': options['iterations'],
+            'results': results,
+        }, indent=2))
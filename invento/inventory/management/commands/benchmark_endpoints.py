@@ -0,0 +1,70 @@
+"""
+Endpoint Benchmark Management Command
+Drives inventory, dashboard and report endpoints through the Django test client
+and prints latency percentiles, throughput, query counts and peak memory as JSON.
+
+Run manually:
+    python manage.py seed_inventory --items 50000 --clear
+    python manage.py benchmark_endpoints --iterations 100 --output baseline.json
+    python manage.py benchmark_endpoints --baseline baseline.json --max-regression 20
+"""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from accounts.models import User
+from core.benchmark import SCENARIOS, compare_results, run_benchmark
+
+BENCHMARK_EMAIL = 'benchmark@invento.local'
+
+
+class Command(BaseCommand):
+    help = 'Benchmark API endpoints and report results as JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--scenario', action='append', dest='scenarios',
+                            choices=[scenario[0] for scenario in SCENARIOS],
+                            help='Only run this scenario (repeatable)')
+        parser.add_argument('--output', help='Write the JSON results to this file')
+        parser.add_argument('--baseline', help='Compare against a previous JSON results file')
+        parser.add_argument('--max-regression', type=float,
+                            help='Fail if p95 latency grew by more than this percentage')
+
+    def handle(self, *args, **options):
+        # Locmem email backend (no alert mails from the create scenario) and "testserver" host
+        setup_test_environment()
+        user, created = User.objects.get_or_create(
+            email=BENCHMARK_EMAIL, defaults={'role': 'admin'}
+        )
+        try:
+            results = run_benchmark(
+                user,
+                iterations=options['iterations'],
+                warmup=options['warmup'],
+                scenarios=options['scenarios'],
+            )
+        finally:
+            if created:
+                user.delete()
+            teardown_test_environment()
+
+        if options['baseline']:
+            with open(options['baseline']) as baseline_file:
+                results['comparison'] = compare_results(results, json.load(baseline_file))
+
+        output = json.dumps(results, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                output_file.write(output)
+        self.stdout.write(output)
+
+        if options['max_regression'] is not None and 'comparison' in results:
+            regressed = [
+                name for name, metrics in results['comparison'].items()
+                if (metrics['p95_ms']['change_pct'] or 0) > options['max_regression']
+            ]
+            if regressed:
+                raise CommandError(f"p95 regression over {options['max_regression']}%: {', '.join(regressed)}")
@@ -0,0 +1,82 @@
+"""
+API Serialization Throughput Benchmark Management Command
+Renders and parses serialized inventory pages with DRF's stdlib JSON
+renderer/parser, the orjson-backed ones from core/renderers.py and
+MessagePack, reports items/s and MB/s for each, and checks that the fast JSON
+output is byte-identical to DRF's.
+
+Run manually: python manage.py benchmark_renderers --items 1000 --iterations 50
+"""
+import io
+import json
+from time import perf_counter
+
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core import renderers
+from inventory.models import Inventory
+from inventory.serializers import InventorySerializer
+
+
+def _time(func, iterations):
+    start = perf_counter()
+    for _ in range(iterations):
+        result = func()
+    return (perf_counter() - start) / iterations, result
+
+
+def _formats():
+    formats = {
+        'json (stdlib)': (JSONRenderer(), JSONParser()),
+        'json (fast)': (renderers.FastJSONRenderer(), renderers.FastJSONParser()),
+    }
+    if renderers.msgpack is not None:
+        formats['msgpack'] = (renderers.MessagePackRenderer(), renderers.MessagePackParser())
+    return formats
+
+
+class Command(BaseCommand):
+    help = 'Benchmark JSON and MessagePack rendering/parsing of inventory pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=1000, help='Items per rendered page')
+        parser.add_argument('--iterations', type=int, default=50)
+
+    def handle(self, *args, **options):
+        items = list(Inventory.objects.select_related('category', 'supplier').order_by('pk')[:options['items']])
+        if not items:
+            raise CommandError('No inventory items; run seed_inventory first')
+        # The same shape the list endpoint returns
+        data = {'count': len(items), 'next': None, 'previous': None,
+                'results': InventorySerializer(items, many=True).data}
+        iterations = options['iterations']
+
+        results = {}
+        baseline = None
+        for name, (renderer, parser) in _formats().items():
+            render_seconds, body = _time(lambda: renderer.render(data), iterations)
+            parse_seconds, parsed = _time(
+                lambda: parser.parse(io.BytesIO(body), parser_context={'encoding': 'utf-8'}), iterations
+            )
+            results[name] = {
+                'bytes': len(body),
+                'render_ms': round(render_seconds * 1000, 3),
+                'render_items_per_sec': round(len(items) / render_seconds),
+                'render_mb_per_sec': round(len(body) / render_seconds / 1e6, 1),
+                'parse_ms': round(parse_seconds * 1000, 3),
+                'parse_items_per_sec': round(len(items) / parse_seconds),
+                'round_trip_equal': parsed == json.loads(json.dumps(data)),
+            }
+            if name == 'json (stdlib)':
+                baseline = body
+            elif name == 'json (fast)':
+                results[name]['identical_to_stdlib'] = body == baseline
+                results[name]['orjson'] = renderers.orjson is not None
+
+        self.stdout.write(json.dumps({
+            'items': len(items),
+            'iterations': iterations,
+            'results': results,
+        }, indent=2))
@@ -0,0 +1,180 @@
+"""
+Application Server Load Test Management Command
+Starts each server on a free local port, drives it over real HTTP from
+--clients keep-alive client threads for --duration seconds and prints
+throughput and latency percentiles per server:
+
+- runserver: the development server (one process, a thread per request)
+- serve: gunicorn via ``manage.py serve`` (workers sized from the CPU count)
+- serve-asgi: ``manage.py serve --asgi`` (uvicorn workers, async views where they exist)
+
+The client threads share the machine with the server, so on a small box
+the absolute numbers are low; the ratio between servers is what to compare.
+
+Run manually: python manage.py benchmark_server --clients 16 --duration 20
+"""
+import http.client
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+from time import perf_counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.models import User
+from core.benchmark import percentile
+
+BENCHMARK_EMAIL = 'benchmark@invento.local'
+
+SERVERS = {
+    'runserver': lambda address: ['runserver', '--noreload', address],
+    'serve': lambda address: ['serve', '--bind', address],
+    'serve-asgi': lambda address: ['serve', '--asgi', '--bind', address],
+}
+
+# (name, path, authenticated)
+REQUESTS = [
+    ('api_root', '/api/', False),
+    ('inventory_list', '/api/inventory/?page=1', True),
+    ('static_js', '/static/js/app.js', False),
+]
+
+# Seconds a server gets to start answering
+STARTUP_TIMEOUT = 60
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_up(port, process):
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise CommandError(f'Server exited with {process.returncode} before answering')
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            connection.request('GET', '/api/', headers={'Host': 'localhost'})
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise CommandError(f'Server on port {port} did not answer within {STARTUP_TIMEOUT}s')
+
+
+def load(port, token, clients, duration):
+    """Keep ``clients`` connections busy for ``duration`` seconds; returns per-request stats."""
+    timings = {name: [] for name, _, _ in REQUESTS}
+    errors = {name: 0 for name, _, _ in REQUESTS}
+    lock = threading.Lock()
+    deadline = perf_counter() + duration
+
+    def client(offset):
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        local = {name: [] for name, _, _ in REQUESTS}
+        failed = {name: 0 for name, _, _ in REQUESTS}
+        index = offset
+        while perf_counter() < deadline:
+            name, path, authenticated = REQUESTS[index % len(REQUESTS)]
+            index += 1
+            headers = {'Host': 'localhost', 'Accept-Encoding': 'gzip, br'}
+            if authenticated:
+                headers['Authorization'] = f'Bearer {token}'
+            start = perf_counter()
+            try:
+                connection.request('GET', path, headers=headers)
+                response = connection.getresponse()
+                response.read()
+                if response.status != 200:
+                    failed[name] += 1
+                    continue
+                local[name].append(perf_counter() - start)
+                if response.getheader('Connection', '').lower() == 'close':
+                    connection.close()
+            except (OSError, http.client.HTTPException):
+                failed[name] += 1
+                connection.close()
+        connection.close()
+        with lock:
+            for name in timings:
+                timings[name] += local[name]
+                errors[name] += failed[name]
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    started = perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = perf_counter() - started
+
+    results = {}
+    for name, values in timings.items():
+        ms = sorted(value * 1000 for value in values)
+        results[name] = {
+            'requests': len(ms),
+            'errors': errors[name],
+            'throughput_rps': round(len(ms) / elapsed, 2),
+            'p50_ms': round(percentile(ms, 0.50), 3),
+            'p95_ms': round(percentile(ms, 0.95), 3),
+        }
+    results['total_rps'] = round(sum(len(values) for values in timings.values()) / elapsed, 2)
+    return results
+
+
+def run_server(name, token, clients, duration):
+    port = _free_port()
+    command = [sys.executable, os.path.join(settings.BASE_DIR, 'manage.py')] + SERVERS[name](f'127.0.0.1:{port}')
+    # Own process group: gunicorn's workers go down with it
+    process = subprocess.Popen(
+        command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True
+    )
+    try:
+        _wait_until_up(port, process)
+        return load(port, token, clients, duration)
+    finally:
+        os.killpg(process.pid, signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+
+
+class Command(BaseCommand):
+    help = 'Load test runserver against the gunicorn/uvicorn server of manage.py serve'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=16, help='Concurrent keep-alive clients')
+        parser.add_argument('--duration', type=float, default=15, help='Seconds of load per server')
+        parser.add_argument('--server', action='append', dest='servers', choices=list(SERVERS),
+                            help='Only run this server (repeatable)')
+
+    def handle(self, *args, **options):
+        from rest_framework_simplejwt.tokens import RefreshToken
+
+        user, created = User.objects.get_or_create(email=BENCHMARK_EMAIL, defaults={'role': 'admin'})
+        token = str(RefreshToken.for_user(user).access_token)
+        results = {}
+        try:
+            for name in options['servers'] or list(SERVERS):
+                self.stderr.write(f'Load testing {name}...')
+                results[name] = run_server(name, token, options['clients'], options['duration'])
+        finally:
+            if created:
+                user.delete()
+
+        self.stdout.write(json.dumps({
+            'cpus': os.cpu_count(),
+            'clients': options['clients'],
+            'duration_s': options['duration'],
+            'results': results,
+        }, indent=2))
@@ -0,0 +1,167 @@
+"""
+SQLite Mixed Read/Write Benchmark Management Command
+Compares the default SQLite setup with the production profile (WAL, tuned
+pragmas, BEGIN IMMEDIATE) and with the in-process write queue on top, using
+reader and writer threads against a scratch database file.
+
+Run manually: python manage.py benchmark_sqlite --readers 8 --writers 4 --seconds 5
+"""
+import json
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import threading
+from time import perf_counter
+
+from django.core.management.base import BaseCommand
+
+from core.benchmark import percentile
+from core.sqlite import PRODUCTION_PRAGMAS, WriteQueue, pragma_statements
+
+CATEGORIES = ['Groceries', 'Dairy', 'Hardware', 'Office', 'Medical', 'Cleaning']
+
+PROFILES = {
+    # Django's defaults: rollback journal, deferred transactions, 5s timeout
+    'default': {'pragmas': {}, 'begin': 'BEGIN', 'timeout': 5, 'queue': False},
+    'production': {'pragmas': PRODUCTION_PRAGMAS, 'begin': 'BEGIN IMMEDIATE',
+                   'timeout': PRODUCTION_PRAGMAS['busy_timeout'] / 1000, 'queue': False},
+    'production+queue': {'pragmas': PRODUCTION_PRAGMAS, 'begin': 'BEGIN IMMEDIATE',
+                         'timeout': PRODUCTION_PRAGMAS['busy_timeout'] / 1000, 'queue': True},
+}
+
+
+def _connect(path, profile):
+    conn = sqlite3.connect(path, timeout=profile['timeout'], isolation_level=None, check_same_thread=False)
+    for statement in pragma_statements(profile['pragmas']):
+        conn.execute(statement)
+    return conn
+
+
+def _create_database(path, rows):
+    conn = sqlite3.connect(path, isolation_level=None)
+    conn.execute(
+        'CREATE TABLE item (id INTEGER PRIMARY KEY, sku TEXT UNIQUE, category TEXT, '
+        'quantity INTEGER, unit_price REAL)'
+    )
+    rng = random.Random(1)
+    conn.execute('BEGIN')
+    conn.executemany(
+        'INSERT INTO item (sku, category, quantity, unit_price) VALUES (?, ?, ?, ?)',
+        [(f'SKU-{i}', rng.choice(CATEGORIES), rng.randint(0, 500), rng.uniform(1, 100)) for i in range(rows)]
+    )
+    conn.execute('COMMIT')
+    conn.execute('CREATE INDEX item_category ON item (category)')
+    conn.close()
+
+
+def run_profile(name, readers, writers, seconds, rows):
+    profile = PROFILES[name]
+    queue = WriteQueue() if profile['queue'] else None
+    directory = tempfile.mkdtemp(prefix='invento-sqlite-bench-')
+    path = os.path.join(directory, 'bench.sqlite3')
+    _create_database(path, rows)
+
+    lock = threading.Lock()
+    results = {'read_ms': [], 'write_ms': [], 'lock_errors': 0}
+    deadline = perf_counter() + seconds
+
+    def reader(seed):
+        rng = random.Random(seed)
+        conn = _connect(path, profile)
+        timings = []
+        errors = 0
+        while perf_counter() < deadline:
+            start = perf_counter()
+            try:
+                conn.execute(
+                    'SELECT COUNT(*), SUM(quantity * unit_price) FROM item WHERE category = ?',
+                    (rng.choice(CATEGORIES),)
+                ).fetchone()
+                timings.append((perf_counter() - start) * 1000)
+            except sqlite3.OperationalError:
+                errors += 1
+        conn.close()
+        with lock:
+            results['read_ms'] += timings
+            results['lock_errors'] += errors
+
+    def writer(seed):
+        rng = random.Random(seed)
+        conn = _connect(path, profile)
+        timings = []
+        errors = 0
+        while perf_counter() < deadline:
+            item_id = rng.randint(1, rows)
+            start = perf_counter()
+            if queue:
+                queue.acquire()
+            try:
+                # Read-then-write, like validate_sku() followed by the save
+                conn.execute(profile['begin'])
+                conn.execute('SELECT quantity FROM item WHERE id = ?', (item_id,)).fetchone()
+                conn.execute('UPDATE item SET quantity = quantity + 1 WHERE id = ?', (item_id,))
+                conn.execute('COMMIT')
+                timings.append((perf_counter() - start) * 1000)
+            except sqlite3.OperationalError:
+                errors += 1
+                if conn.in_transaction:
+                    conn.execute('ROLLBACK')
+            finally:
+                if queue:
+                    queue.release()
+        conn.close()
+        with lock:
+            results['write_ms'] += timings
+            results['lock_errors'] += errors
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads += [threading.Thread(target=writer, args=(100 + i,)) for i in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    os.rmdir(directory)
+
+    read_ms = sorted(results['read_ms'])
+    write_ms = sorted(results['write_ms'])
+    return {
+        'reads_per_sec': round(len(read_ms) / seconds, 1),
+        'writes_per_sec': round(len(write_ms) / seconds, 1),
+        'read_p50_ms': round(percentile(read_ms, 0.5), 3),
+        'read_p95_ms': round(percentile(read_ms, 0.95), 3),
+        'write_p50_ms': round(percentile(write_ms, 0.5), 3),
+        'write_p95_ms': round(percentile(write_ms, 0.95), 3),
+        'write_mean_ms': round(statistics.fmean(write_ms), 3) if write_ms else None,
+        'lock_errors': results['lock_errors'],
+    }
+
+
+class Command(BaseCommand):
+    help = 'Benchmark mixed SQLite read/write throughput for the default and production profiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--seconds', type=float, default=5)
+        parser.add_argument('--rows', type=int, default=20000)
+        parser.add_argument('--profile', action='append', dest='profiles', choices=list(PROFILES),
+                            help='Only run this profile (repeatable)')
+
+    def handle(self, *args, **options):
+        results = {
+            name: run_profile(name, options['readers'], options['writers'], options['seconds'], options['rows'])
+            for name in (options['profiles'] or PROFILES)
+        }
+        self.stdout.write(json.dumps({
+            'readers': options['readers'],
+            'writers': options['writers'],
+            'seconds': options['seconds'],
+            'rows': options['rows'],
+            'results': results,
+        }, indent=2))
@@ -18,7 +18,7 @@ class Command(BaseCommand):
     def handle(self, *args, **kwargs):
         # Get inventory statistics
         total_items = Inventory.objects.count()
-        low_stock_items = Inventory.objects.filter(quantity__lt=F('low_stock_threshold'))
+        low_stock_items = Inventory.objects.filter(quantity__lte=F('reorder_level'))
         total_low_stock = low_stock_items.count()
 
         # Build email message
@@ -35,7 +35,7 @@ Low Stock Items: {total_low_stock}
             message += "-" * 40 + "\n"
             for item in low_stock_items:
                 message += f"• {item.name} (SKU: {item.sku})\n"
-                message += f"  Quantity: {item.quantity} | Threshold: {item.low_stock_threshold}\n\n"
+                message += f"  Quantity: {item.quantity} | Reorder Level: {item.reorder_level}\n\n"
         else:
             message += "✅ All items are sufficiently stocked!"
 
@@ -0,0 +1,24 @@
+"""
+Purchase Order Generation Management Command
+Runs the reorder engine (inventory/reorder.py) and replaces the draft
+purchase orders with its suggestions, one draft per supplier.
+
+Run manually: python manage.py generate_purchase_orders --days 30
+"""
+import json
+
+from django.core.management.base import BaseCommand
+
+from inventory.reorder import generate_purchase_orders
+
+
+class Command(BaseCommand):
+    help = 'Regenerate the draft purchase orders from the reorder engine'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=None,
+                            help="Consumption window (default: settings.REORDER['WINDOW_DAYS'])")
+
+    def handle(self, *args, **options):
+        summary = generate_purchase_orders(options['days'])
+        self.stdout.write(json.dumps(summary, indent=2))
@@ -0,0 +1,59 @@
+"""
+Scheduler Job Statistics Management Command
+Prints run counts, duration histograms and the last run of every periodic job.
+Run manually: python manage.py jobstats [--job daily_stock_report] [--hours 24] [--json]
+"""
+import json
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.scheduler import job_metrics
+
+
+class Command(BaseCommand):
+    help = 'Show timing and last-run metrics for scheduled jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--job', help='Only show this job id')
+        parser.add_argument('--hours', type=int, help='Only count executions from the last N hours')
+        parser.add_argument('--json', action='store_true', help='Print raw metrics as JSON')
+
+    def handle(self, *args, **options):
+        since = None
+        if options['hours']:
+            since = timezone.now() - timedelta(hours=options['hours'])
+
+        metrics = job_metrics(job_id=options['job'], since=since)
+
+        if options['json']:
+            self.stdout.write(json.dumps(metrics, indent=2))
+            return
+
+        if not metrics:
+            self.stdout.write(self.style.WARNING('No jobs found'))
+            return
+
+        for job in metrics:
+            self.stdout.write(self.style.SUCCESS(f"{job['job_id']} [{job['executor'] or 'unregistered'}]"))
+            self.stdout.write(f"  Next run: {job['next_run_time'] or '-'}")
+            self.stdout.write(
+                f"  Runs: {job['runs']} | OK: {job['succeeded']} | Failed: {job['failed']} | "
+                f"Missed: {job['missed']} | Skipped (overlap): {job['skipped_max_instances']}"
+            )
+            if job['avg_duration'] is not None:
+                self.stdout.write(f"  Duration avg/max: {job['avg_duration']}s / {job['max_duration']}s")
+
+            previous = 0
+            for bucket in job['duration_histogram']:
+                self.stdout.write(f"    <= {bucket['le']}s: {bucket['count'] - previous}")
+                previous = bucket['count']
+
+            last_run = job['last_run']
+            if last_run:
+                self.stdout.write(
+                    f"  Last run: {last_run['run_time']} {last_run['status']} ({last_run['duration']}s)"
+                )
+                if last_run['exception']:
+                    self.stdout.write(self.style.ERROR(f"    {last_run['exception']}"))
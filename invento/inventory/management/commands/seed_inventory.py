@@ -0,0 +1,57 @@
+"""
+Seed Inventory Management Command
+Bulk-generates a reproducible synthetic inventory for local scaling tests.
+Run manually: python manage.py seed_inventory --items 100000 --users 20 --seed 7
+"""
+from django.core.management.base import BaseCommand
+
+from inventory.seeding import generate_inventory
+
+
+class Command(BaseCommand):
+    help = 'Generate a seeded synthetic inventory dataset with bulk inserts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--items', type=int, default=1000, help='Number of inventory items')
+        parser.add_argument('--users', type=int, default=0, help='Number of viewer accounts')
+        parser.add_argument('--categories', type=int, default=12)
+        parser.add_argument('--suppliers', type=int, default=25)
+        parser.add_argument('--category-skew', type=float, default=1.1,
+                            help='Zipf exponent for category popularity (0 = uniform)')
+        parser.add_argument('--supplier-skew', type=float, default=0.8,
+                            help='Zipf exponent for supplier popularity (0 = uniform)')
+        parser.add_argument('--perishable-ratio', type=float, default=0.4,
+                            help='Fraction of items with an expiry date')
+        parser.add_argument('--expired-ratio', type=float, default=0.1,
+                            help='Fraction of perishable items already expired')
+        parser.add_argument('--low-stock-ratio', type=float, default=0.15)
+        parser.add_argument('--history-days', type=int, default=365,
+                            help='Spread created_at over this many past days')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--sku-prefix', default='SEED')
+        parser.add_argument('--clear', action='store_true',
+                            help='Delete previously seeded items/users with this prefix first')
+
+    def handle(self, *args, **options):
+        summary = generate_inventory(
+            items=options['items'],
+            users=options['users'],
+            categories=options['categories'],
+            suppliers=options['suppliers'],
+            category_skew=options['category_skew'],
+            supplier_skew=options['supplier_skew'],
+            perishable_ratio=options['perishable_ratio'],
+            expired_ratio=options['expired_ratio'],
+            low_stock_ratio=options['low_stock_ratio'],
+            history_days=options['history_days'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            sku_prefix=options['sku_prefix'],
+            clear=options['clear'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {summary['items_created']} items and {summary['users_created']} users "
+            f"({summary['categories']} categories, {summary['suppliers']} suppliers, "
+            f"{summary['total_items']} items in total)"
+        ))
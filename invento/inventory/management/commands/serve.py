@@ -0,0 +1,135 @@
+"""
+Serve Management Command
+Runs the production application server: gunicorn with threaded workers for
+``core.wsgi``, or uvicorn workers for ``core.asgi`` (``--asgi``), sized from
+the CPU count and configured by ``core/gunicorn.conf.py``. The command
+becomes the gunicorn master process, so signals and the pidfile reach it
+directly.
+
+Run manually:
+    python manage.py collectstatic --noinput   # with STATIC_PIPELINE=True
+    python manage.py serve --bind 0.0.0.0:8000 --pidfile /tmp/invento.pid
+    python manage.py serve --pidfile /tmp/invento.pid --reload    # new config, graceful
+    python manage.py serve --pidfile /tmp/invento.pid --upgrade   # new code, zero downtime
+"""
+import os
+import shutil
+import signal
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+CONFIG_FILE = os.path.join(settings.BASE_DIR, 'core', 'gunicorn.conf.py')
+APPLICATIONS = {
+    'wsgi': 'core.wsgi:application',
+    'asgi': 'core.asgi:application',
+}
+
+# How long --upgrade waits for the new master to come up
+UPGRADE_TIMEOUT = 60
+
+
+def read_pid(pidfile):
+    try:
+        with open(pidfile) as f:
+            return int(f.read().strip())
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+class Command(BaseCommand):
+    help = 'Run the gunicorn/uvicorn application server (or gracefully reload a running one)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--asgi', action='store_true',
+                            help='Serve core.asgi with uvicorn workers (async views) instead of core.wsgi')
+        parser.add_argument('--bind', help='Address to listen on (default 0.0.0.0:$PORT or 8000)')
+        parser.add_argument('--workers', type=int, help='Worker processes (default from the CPU count)')
+        parser.add_argument('--threads', type=int, help='Threads per WSGI worker (default 4)')
+        parser.add_argument('--max-requests', type=int, help='Requests before a worker is recycled (default 2000)')
+        parser.add_argument('--no-preload', action='store_true', help='Import the app in each worker instead')
+        parser.add_argument('--pidfile', help='Write the master pid here (needed by --reload/--upgrade)')
+        parser.add_argument('--reload', action='store_true',
+                            help='Gracefully restart the workers of the running server (SIGHUP)')
+        parser.add_argument('--upgrade', action='store_true',
+                            help='Start a new master on the current code and retire the running one')
+        parser.add_argument('--print-command', action='store_true', help='Print the gunicorn command and exit')
+
+    def handle(self, *args, **options):
+        if options['reload'] or options['upgrade']:
+            if not options['pidfile']:
+                raise CommandError('--reload and --upgrade need the --pidfile the server was started with')
+            if options['reload']:
+                self.signal_master(options['pidfile'], signal.SIGHUP)
+            else:
+                self.upgrade(options['pidfile'])
+            return
+
+        # The console script, not "python -m gunicorn": --upgrade re-executes the
+        # master's argv, and from gunicorn/__main__.py its "http" package would
+        # shadow the standard library's
+        executable = shutil.which('gunicorn', path=os.path.dirname(sys.executable)) or shutil.which('gunicorn')
+        if executable is None:
+            raise CommandError('gunicorn is not installed: pip install gunicorn uvicorn')
+        interface = 'asgi' if options['asgi'] else 'wsgi'
+        if interface == 'asgi':
+            try:
+                import uvicorn  # noqa: F401
+            except ImportError:
+                raise CommandError('--asgi needs uvicorn: pip install uvicorn')
+
+        argv = [executable, '--config', CONFIG_FILE, '--chdir', str(settings.BASE_DIR)]
+        for option, flag in (
+            ('bind', '--bind'), ('workers', '--workers'), ('threads', '--threads'),
+            ('max_requests', '--max-requests'), ('pidfile', '--pid'),
+        ):
+            if options[option] is not None:
+                argv += [flag, str(options[option])]
+        argv.append(APPLICATIONS[interface])
+
+        # Read by the config file; the settings module carries over to the workers
+        os.environ['WEB_INTERFACE'] = interface
+        os.environ['WEB_PRELOAD'] = 'False' if options['no_preload'] else os.getenv('WEB_PRELOAD', 'True')
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
+
+        if options['print_command']:
+            self.stdout.write(' '.join(argv))
+            return
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.execv(executable, argv)
+
+    def signal_master(self, pidfile, signum):
+        pid = read_pid(pidfile)
+        if pid is None:
+            raise CommandError(f'No running server recorded in {pidfile}')
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            raise CommandError(f'Server {pid} from {pidfile} is not running')
+        self.stdout.write(self.style.SUCCESS(f'Sent {signal.Signals(signum).name} to {pid}'))
+        return pid
+
+    def upgrade(self, pidfile):
+        """
+        SIGUSR2 makes the master start a new master (new code, same sockets)
+        that records itself in ``<pidfile>.2``; once it has, SIGQUIT retires
+        the old master after its in-flight requests and the new one takes
+        over ``pidfile``. The listening socket stays open throughout:
+        requests arriving while the new workers boot wait in its backlog.
+        """
+        old_pid = self.signal_master(pidfile, signal.SIGUSR2)
+        deadline = time.monotonic() + UPGRADE_TIMEOUT
+        while time.monotonic() < deadline:
+            new_pid = read_pid(f'{pidfile}.2')
+            if new_pid and new_pid != old_pid:
+                os.kill(old_pid, signal.SIGQUIT)
+                self.stdout.write(self.style.SUCCESS(f'New master {new_pid} is up; retiring {old_pid}'))
+                return
+            time.sleep(0.5)
+        raise CommandError(
+            f'The new master did not start within {UPGRADE_TIMEOUT}s; {old_pid} keeps serving '
+            f'(check the server log)'
+        )
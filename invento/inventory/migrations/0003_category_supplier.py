@@ -0,0 +1,116 @@
+# Generated by Django 6.0 on 2026-10-19 09:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Sum
+
+
+def _link(apps, schema_editor, field, model_name):
+    """Point ``<field>_ref`` at a row of ``model_name`` for every distinct (trimmed) string."""
+    Inventory = apps.get_model('inventory', 'Inventory')
+    Model = apps.get_model('inventory', model_name)
+    db = schema_editor.connection.alias
+
+    values = (
+        Inventory.objects.using(db).exclude(**{f'{field}__isnull': True})
+        .values_list(field, flat=True).distinct()
+    )
+    for value in values:
+        name = value.strip()
+        if not name:
+            continue
+        obj, _ = Model.objects.using(db).get_or_create(name=name)
+        Inventory.objects.using(db).filter(**{field: value}).update(**{f'{field}_ref': obj})
+
+
+def forwards(apps, schema_editor):
+    _link(apps, schema_editor, 'category', 'Category')
+    _link(apps, schema_editor, 'supplier', 'Supplier')
+
+    Inventory = apps.get_model('inventory', 'Inventory')
+    Category = apps.get_model('inventory', 'Category')
+    db = schema_editor.connection.alias
+    value = ExpressionWrapper(F('quantity') * F('unit_price'), output_field=DecimalField(max_digits=18, decimal_places=2))
+    totals = (
+        Inventory.objects.using(db).exclude(category_ref__isnull=True).order_by()
+        .values('category_ref').annotate(items=Count('pk'), total_quantity=Sum('quantity'), total_value=Sum(value))
+    )
+    for row in totals:
+        Category.objects.using(db).filter(pk=row['category_ref']).update(
+            item_count=row['items'], total_quantity=row['total_quantity'] or 0, total_value=row['total_value'] or 0
+        )
+
+
+def backwards(apps, schema_editor):
+    Inventory = apps.get_model('inventory', 'Inventory')
+    db = schema_editor.connection.alias
+    for field, model_name in (('category', 'Category'), ('supplier', 'Supplier')):
+        Model = apps.get_model('inventory', model_name)
+        for obj in Model.objects.using(db).all():
+            Inventory.objects.using(db).filter(**{f'{field}_ref': obj}).update(**{field: obj.name})
+
+
+class Migration(migrations.Migration):
+    # The row updates run (and commit) in their own transaction: PostgreSQL
+    # refuses to alter a table with pending foreign key trigger events
+    atomic = False
+
+    dependencies = [
+        ('inventory', '0002_rename_expiration_date_inventory_expiry_date_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Category',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+                ('item_count', models.IntegerField(default=0)),
+                ('total_quantity', models.BigIntegerField(default=0)),
+                ('total_value', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+            ],
+            options={
+                'verbose_name_plural': 'categories',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Supplier',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='inventory',
+            name='category_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='items', to='inventory.category'),
+        ),
+        migrations.AddField(
+            model_name='inventory',
+            name='supplier_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='items', to='inventory.supplier'),
+        ),
+        migrations.RunPython(forwards, backwards, atomic=True),
+        migrations.RemoveField(
+            model_name='inventory',
+            name='category',
+        ),
+        migrations.RemoveField(
+            model_name='inventory',
+            name='supplier',
+        ),
+        migrations.RenameField(
+            model_name='inventory',
+            old_name='category_ref',
+            new_name='category',
+        ),
+        migrations.RenameField(
+            model_name='inventory',
+            old_name='supplier_ref',
+            new_name='supplier',
+        ),
+    ]
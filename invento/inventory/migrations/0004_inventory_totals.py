@@ -0,0 +1,58 @@
+# Generated by Django 6.0 on 2026-10-19 10:20
+
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum
+from django.utils import timezone
+
+
+def create_totals(apps, schema_editor):
+    Inventory = apps.get_model('inventory', 'Inventory')
+    InventoryTotals = apps.get_model('inventory', 'InventoryTotals')
+    db = schema_editor.connection.alias
+    today = timezone.now().date()
+    value = ExpressionWrapper(F('quantity') * F('unit_price'), output_field=DecimalField(max_digits=18, decimal_places=2))
+    counts = Inventory.objects.using(db).aggregate(
+        item_count=Count('pk'),
+        total_quantity=Sum('quantity'),
+        total_value=Sum(value),
+        low_stock_count=Count('pk', filter=Q(quantity__lte=F('reorder_level'))),
+        expired_count=Count('pk', filter=Q(expiry_date__lt=today)),
+    )
+    InventoryTotals.objects.using(db).create(
+        pk=1,
+        item_count=counts['item_count'],
+        total_quantity=counts['total_quantity'] or 0,
+        total_value=counts['total_value'] or 0,
+        low_stock_count=counts['low_stock_count'],
+        expired_count=counts['expired_count'],
+        expired_as_of=today,
+        reconciled_at=timezone.now(),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0003_category_supplier'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryTotals',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('item_count', models.IntegerField(default=0)),
+                ('total_quantity', models.BigIntegerField(default=0)),
+                ('total_value', models.DecimalField(decimal_places=2, default=0, max_digits=18)),
+                ('low_stock_count', models.IntegerField(default=0)),
+                ('expired_count', models.IntegerField(default=0)),
+                ('expired_as_of', models.DateField()),
+                ('reconciled_at', models.DateTimeField(blank=True, null=True)),
+                ('last_drift', models.JSONField(blank=True, default=dict)),
+            ],
+            options={
+                'verbose_name_plural': 'inventory totals',
+            },
+        ),
+        migrations.RunPython(create_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0 on 2026-10-19 13:37
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0006_purchase_orders'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Lot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('lot_number', models.CharField(blank=True, max_length=100)),
+                ('quantity', models.PositiveIntegerField()),
+                ('expiry_date', models.DateField(blank=True, null=True)),
+                ('received_date', models.DateField(default=django.utils.timezone.localdate)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lots', to='inventory.inventory')),
+            ],
+            options={
+                'ordering': ['expiry_date', 'received_date', 'id'],
+                'indexes': [models.Index(fields=['item', 'expiry_date'], name='inventory_lot_item_expiry_idx'), models.Index(condition=models.Q(('quantity__gt', 0)), fields=['expiry_date'], name='inventory_lot_stock_expiry_idx')],
+            },
+        ),
+    ]
@@ -1,12 +1,52 @@
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 
-class Inventory(models.Model):
+from audit.tracking import AuditedModel
+
+
+class Category(models.Model):
+    """
+    Item category. The counters are kept in step with the inventory rows by
+    ``Inventory.save()`` and the post_delete signal (see inventory/counters.py),
+    so distribution charts read one row per category.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    # Plain (signed) integers: a drifted counter must never make a write fail a CHECK
+    item_count = models.IntegerField(default=0)
+    total_quantity = models.BigIntegerField(default=0)
+    total_value = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+
+    class Meta:
+        ordering = ['name']
+        verbose_name_plural = 'categories'
+
+    def __str__(self):
+        return self.name
+
+
+class Supplier(models.Model):
+    name = models.CharField(max_length=255, unique=True)
+    # Days from ordering to delivery, used by the reorder engine
+    lead_time_days = models.PositiveIntegerField(default=7)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class Inventory(AuditedModel, models.Model):
     name = models.CharField(max_length=255)
     sku = models.CharField(max_length=100, unique=True)
-    category = models.CharField(max_length=255, blank=True, null=True)
+    category = models.ForeignKey(
+        Category, on_delete=models.PROTECT, related_name='items', blank=True, null=True
+    )
     quantity = models.PositiveIntegerField()
     unit_price = models.DecimalField(max_digits=10, decimal_places=2)
-    supplier = models.CharField(max_length=255, blank=True, null=True)
+    supplier = models.ForeignKey(
+        Supplier, on_delete=models.PROTECT, related_name='items', blank=True, null=True
+    )
     reorder_level = models.PositiveIntegerField(default=10)
     expiry_date = models.DateField(null=True, blank=True)
     description = models.TextField(blank=True, null=True)
@@ -14,8 +54,42 @@ class Inventory(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # Field-level history in audit.AuditEvent (audit/tracking.py)
+    audit_exclude = ('created_at', 'updated_at')
+
     def __str__(self):
         return f"{self.name} ({self.sku})"
+
+    def save(self, *args, **kwargs):
+        """
+        Save and move this row's contribution to the counters in the same transaction.
+
+        Each counted save costs a locked read of the old values, the UPDATE, a
+        category counter UPDATE and, when the quantity moved, a StockMovement
+        INSERT; the totals delta runs after the commit. Bulk paths pay this per
+        row, as locked in by ``core.tests.InventoryWriteBudgetTests``.
+        """
+        from .counters import COUNTED_FIELDS, apply_counter_changes, counted_values
+
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not set(update_fields) & {'category', *COUNTED_FIELDS}:
+            return super().save(*args, **kwargs)
+
+        # No savepoint: a failed save already fails the enclosing transaction
+        with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            old = None
+            if self.pk is not None and not self._state.adding:
+                # Locked so concurrent writers to the same row can't double count
+                old = (
+                    type(self)._base_manager.select_for_update()
+                    .filter(pk=self.pk).values_list(*COUNTED_FIELDS).first()
+                )
+            super().save(*args, **kwargs)
+            new = counted_values(self, old, update_fields)
+            apply_counter_changes(old, new)
+            change = new[1] - (old[1] if old is not None else 0)
+            if change:
+                StockMovement.objects.create(item=self, change=change, quantity_after=new[1])
     
     @property
     def is_low_stock(self):
@@ -27,3 +101,136 @@ class Inventory(models.Model):
         if self.expiry_date:
             return self.expiry_date < timezone.now().date()
         return False
+
+
+class Lot(models.Model):
+    """
+    A received batch of an item with its own expiry. For items with lots the
+    item's quantity is the sum of its lots and its expiry date the earliest
+    expiry among lots in stock, kept in step by ``inventory.lots``.
+    """
+    item = models.ForeignKey(Inventory, on_delete=models.CASCADE, related_name='lots')
+    lot_number = models.CharField(max_length=100, blank=True)
+    quantity = models.PositiveIntegerField()
+    expiry_date = models.DateField(null=True, blank=True)
+    received_date = models.DateField(default=timezone.localdate)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['expiry_date', 'received_date', 'id']
+        indexes = [
+            # FEFO allocation: an item's lots in expiry order
+            models.Index(fields=['item', 'expiry_date'], name='inventory_lot_item_expiry_idx'),
+            # Expiring-soon range scans over the lots still in stock
+            models.Index(fields=['expiry_date'], name='inventory_lot_stock_expiry_idx',
+                         condition=models.Q(quantity__gt=0)),
+        ]
+
+    def __str__(self):
+        return f"{self.item_id} lot {self.lot_number or self.pk} ({self.quantity})"
+
+    def save(self, *args, **kwargs):
+        from .lots import open_lot, sync_item
+
+        with transaction.atomic(using=kwargs.get('using'), savepoint=False):
+            if self._state.adding:
+                open_lot(self.item_id)
+            super().save(*args, **kwargs)
+            sync_item(self.item_id)
+
+
+class StockMovement(models.Model):
+    """
+    A change of an item's quantity, recorded by ``Inventory.save()``
+    (creation counts as a receipt of the initial quantity). The consumption
+    history behind the turnover and days-of-supply analytics.
+    """
+    item = models.ForeignKey(Inventory, on_delete=models.CASCADE, related_name='movements')
+    # Positive for receipts, negative for consumption
+    change = models.IntegerField()
+    quantity_after = models.PositiveIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['item', 'created_at']),
+            # Window aggregates over all items
+            models.Index(fields=['created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.item_id}: {self.change:+d}"
+
+
+class PurchaseOrder(models.Model):
+    """
+    Order to one supplier. Drafts are (re)generated by the reorder engine
+    (inventory/reorder.py); sent orders count as stock on order.
+    """
+    STATUS_DRAFT = 'draft'
+    STATUS_SENT = 'sent'
+    STATUS_RECEIVED = 'received'
+    STATUS_CANCELLED = 'cancelled'
+    STATUS_CHOICES = [
+        (STATUS_DRAFT, 'Draft'),
+        (STATUS_SENT, 'Sent'),
+        (STATUS_RECEIVED, 'Received'),
+        (STATUS_CANCELLED, 'Cancelled'),
+    ]
+
+    supplier = models.ForeignKey(Supplier, on_delete=models.PROTECT, related_name='purchase_orders')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_DRAFT)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [models.Index(fields=['status', 'supplier'])]
+
+    def __str__(self):
+        return f"PO {self.pk} ({self.supplier}, {self.status})"
+
+
+class PurchaseOrderLine(models.Model):
+    order = models.ForeignKey(PurchaseOrder, on_delete=models.CASCADE, related_name='lines')
+    item = models.ForeignKey(Inventory, on_delete=models.CASCADE, related_name='purchase_order_lines')
+    quantity = models.PositiveIntegerField()
+    unit_price = models.DecimalField(max_digits=10, decimal_places=2)
+    # Why the engine suggested it: 'low_stock' or 'at_risk'
+    reason = models.CharField(max_length=20, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['order', 'item'], name='unique_purchase_order_item'),
+        ]
+
+    def __str__(self):
+        return f"{self.quantity} x {self.item_id}"
+
+
+class InventoryTotals(models.Model):
+    """
+    Single row (pk 1) of whole-inventory totals for the dashboard headline
+    stats, kept in step by the same deltas as the category counters, applied
+    when each write commits (see inventory/counters.py). ``expired_count`` counts items with an expiry date
+    before ``expired_as_of``; the nightly reconciliation job moves that date
+    forward and corrects any drift.
+    """
+    SINGLETON_PK = 1
+
+    item_count = models.IntegerField(default=0)
+    total_quantity = models.BigIntegerField(default=0)
+    total_value = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    low_stock_count = models.IntegerField(default=0)
+    expired_count = models.IntegerField(default=0)
+    expired_as_of = models.DateField()
+    reconciled_at = models.DateTimeField(null=True, blank=True)
+    # Stored minus recounted values found by the last reconciliation
+    last_drift = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        verbose_name_plural = 'inventory totals'
+
+    def __str__(self):
+        return f"Inventory totals ({self.item_count} items)"
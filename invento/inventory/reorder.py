@@ -0,0 +1,172 @@
+"""
+Reorder engine: suggested order quantities and draft purchase orders.
+
+One vectorized pass over the catalogue columns (``analytics.load_columns``)
+with the consumption of the last ``WINDOW_DAYS`` days:
+
+- daily demand = consumed / window days
+- reorder point = reorder level + demand x supplier lead time
+- an item needs ordering when its quantity plus what is on sent purchase
+  orders is at or below the reorder point (``low_stock`` when the quantity is
+  at or below the reorder level, otherwise ``at_risk``)
+- suggested quantity = the order-up-to level (reorder point + demand x
+  ``REVIEW_DAYS``, at least twice the reorder level) minus quantity and
+  stock on order, rounded up
+
+``generate_purchase_orders`` replaces the draft purchase orders with one
+draft per supplier holding the suggestions. Drafts belong to the engine:
+edit an order after sending it. Items without a supplier are only counted.
+Concurrent runs (the nightly job and the API) take turns on the supplier
+rows, so they never leave two drafts for a supplier.
+"""
+import logging
+from decimal import Decimal
+from time import perf_counter
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+
+from . import analytics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REORDER_SETTINGS = {
+    'WINDOW_DAYS': 30,
+    'REVIEW_DAYS': 14,
+    # For items without a supplier
+    'DEFAULT_LEAD_TIME_DAYS': 7,
+}
+
+LINE_BATCH_SIZE = 1000
+
+
+def reorder_settings():
+    """Return ``settings.REORDER`` merged over the defaults."""
+    return {**DEFAULT_REORDER_SETTINGS, **getattr(settings, 'REORDER', {})}
+
+
+def compute_suggestions(columns, lead_time, on_order, days, review_days):
+    """
+    Pure array part of the engine. ``lead_time`` and ``on_order`` are per-row
+    arrays aligned with ``columns``. Returns ``(indices, quantities, low_stock)``
+    for the rows that need ordering.
+    """
+    quantity = columns['quantity']
+    reorder_level = columns['reorder_level']
+    demand = columns['consumed'] / days
+
+    reorder_point = reorder_level + demand * lead_time
+    order_up_to = np.maximum(reorder_point + demand * review_days, 2 * reorder_level)
+    available = quantity + on_order
+    suggested = np.ceil(order_up_to - available)
+
+    indices = np.flatnonzero((available <= reorder_point) & (suggested > 0))
+    return indices, suggested[indices].astype(np.int64), quantity[indices] <= reorder_level[indices]
+
+
+def _lead_times(suppliers, default):
+    from .models import Supplier
+
+    rows = np.array(list(Supplier.objects.order_by('pk').values_list('pk', 'lead_time_days')), dtype=np.int64)
+    lead_time = np.full(len(suppliers), float(default))
+    if len(rows):
+        ids, days = rows[:, 0], rows[:, 1]
+        positions = np.minimum(np.searchsorted(ids, suppliers), len(ids) - 1)
+        known = ids[positions] == suppliers
+        lead_time[known] = days[positions[known]]
+    return lead_time
+
+
+def _on_order(pks):
+    from .models import PurchaseOrder, PurchaseOrderLine
+
+    on_order = np.zeros(len(pks), dtype=np.int64)
+    rows = (
+        PurchaseOrderLine.objects.filter(order__status=PurchaseOrder.STATUS_SENT)
+        .order_by().values('item').annotate(total=Sum('quantity')).values_list('item', 'total')
+    )
+    ordered = np.array(list(rows), dtype=np.int64).reshape(-1, 2)
+    if len(ordered) and len(pks):
+        positions = np.minimum(np.searchsorted(pks, ordered[:, 0]), len(pks) - 1)
+        found = pks[positions] == ordered[:, 0]
+        on_order[positions[found]] = ordered[found, 1]
+    return on_order
+
+
+def suggest(days=None):
+    """
+    Suggestions for the whole catalogue as ``(columns, indices, quantities,
+    low_stock)`` (see ``compute_suggestions``).
+    """
+    config = reorder_settings()
+    days = days or config['WINDOW_DAYS']
+    columns = analytics.load_columns(days)
+    lead_time = _lead_times(columns['supplier'], config['DEFAULT_LEAD_TIME_DAYS'])
+    on_order = _on_order(columns['pk'])
+    return (columns, *compute_suggestions(columns, lead_time, on_order, days, config['REVIEW_DAYS']))
+
+
+def suggestion_rows(columns, indices, quantities, low_stock):
+    return [
+        {
+            'id': int(columns['pk'][index]),
+            'sku': columns['sku'][index],
+            'name': columns['name'][index],
+            'supplier_id': None if columns['supplier'][index] == analytics.NO_SUPPLIER else int(columns['supplier'][index]),
+            'quantity': int(columns['quantity'][index]),
+            'reorder_level': int(columns['reorder_level'][index]),
+            'suggested_quantity': int(quantity),
+            'reason': 'low_stock' if low else 'at_risk',
+        }
+        for index, quantity, low in zip(indices.tolist(), quantities.tolist(), low_stock.tolist())
+    ]
+
+
+def generate_purchase_orders(days=None):
+    """Replace the draft purchase orders with the current suggestions; returns a summary."""
+    from .models import PurchaseOrder, PurchaseOrderLine, Supplier
+
+    start = perf_counter()
+    columns, indices, quantities, low_stock = suggest(days)
+    suppliers = columns['supplier'][indices]
+    assigned = suppliers != analytics.NO_SUPPLIER
+
+    with transaction.atomic():
+        # Held until commit: another run waits here, then replaces these drafts in turn
+        list(Supplier.objects.select_for_update().order_by('pk').values_list('pk', flat=True))
+        PurchaseOrder.objects.filter(status=PurchaseOrder.STATUS_DRAFT).delete()
+        supplier_ids = np.unique(suppliers[assigned]).tolist()
+        orders = PurchaseOrder.objects.bulk_create(
+            [PurchaseOrder(supplier_id=supplier_id) for supplier_id in supplier_ids]
+        )
+        order_ids = dict(zip(supplier_ids, (order.pk for order in orders)))
+        lines = [
+            PurchaseOrderLine(
+                order_id=order_ids[supplier],
+                item_id=int(columns['pk'][index]),
+                quantity=quantity,
+                unit_price=Decimal(str(columns['unit_price'][index])),
+                reason='low_stock' if low else 'at_risk',
+            )
+            for index, supplier, quantity, low in zip(
+                indices[assigned].tolist(), suppliers[assigned].tolist(),
+                quantities[assigned].tolist(), low_stock[assigned].tolist(),
+            )
+        ]
+        PurchaseOrderLine.objects.bulk_create(lines, batch_size=LINE_BATCH_SIZE)
+
+    summary = {
+        'items_checked': len(columns['pk']),
+        'items_to_order': len(indices),
+        'low_stock': int(np.count_nonzero(low_stock)),
+        'at_risk': int(np.count_nonzero(~low_stock)),
+        'without_supplier': int(np.count_nonzero(~assigned)),
+        'purchase_orders': len(orders),
+        'lines': len(lines),
+        'units': int(quantities[assigned].sum()),
+        'seconds': round(perf_counter() - start, 3),
+    }
+    logger.info(f'Draft purchase orders generated: {summary}')
+    return summary
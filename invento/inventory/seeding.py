@@ -0,0 +1,152 @@
+"""
+Seeded synthetic inventory generator.
+
+Used by ``python manage.py seed_inventory`` and by the benchmark/guardrail
+code to build reproducible datasets of any size. Everything is derived from
+one ``random.Random(seed)``, so the same arguments always produce the same rows.
+"""
+import random
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils import timezone
+
+from .cache import bump_version_now_and_on_commit, sku_cache
+from .counters import reconcile_totals, recount_categories
+from .models import Category, Inventory, Supplier
+from accounts.models import User
+
+ADJECTIVES = [
+    'Organic', 'Premium', 'Classic', 'Fresh', 'Frozen', 'Heavy-Duty', 'Compact',
+    'Wireless', 'Stainless', 'Recycled', 'Deluxe', 'Mini', 'Industrial', 'Eco',
+]
+NOUNS = [
+    'Rice', 'Coffee Beans', 'Olive Oil', 'Gloves', 'Batteries', 'Cable', 'Notebook',
+    'Detergent', 'Milk', 'Flour', 'Screws', 'Tape', 'Sensor', 'Filter', 'Bottle',
+    'Cartridge', 'Yogurt', 'Paint', 'Charger', 'Bandage',
+]
+CATEGORY_NAMES = [
+    'Groceries', 'Beverages', 'Dairy', 'Electronics', 'Hardware', 'Stationery',
+    'Cleaning', 'Medical', 'Office', 'Packaging', 'Automotive', 'Garden',
+    'Frozen Food', 'Bakery', 'Personal Care', 'Safety', 'Tools', 'Lighting',
+    'Furniture', 'Textiles',
+]
+
+
+def zipf_weights(count, skew):
+    """Weights for ``count`` values following a Zipf distribution (0 = uniform)."""
+    return [1 / (rank ** skew) for rank in range(1, count + 1)]
+
+
+@contextmanager
+def _backdated_created_at():
+    """Let bulk inserts set ``created_at`` instead of ``auto_now_add`` overwriting it."""
+    field = Inventory._meta.get_field('created_at')
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def generate_inventory(items=1000, users=0, categories=12, suppliers=25,
+                       category_skew=1.1, supplier_skew=0.8, perishable_ratio=0.4,
+                       expired_ratio=0.1, low_stock_ratio=0.15, history_days=365,
+                       seed=42, batch_size=2000, sku_prefix='SEED', clear=False):
+    """
+    Bulk-insert ``items`` inventory rows (and ``users`` viewer accounts).
+
+    Categories and suppliers are drawn with Zipf skew so a few of them hold
+    most of the items, like real catalogues. ``perishable_ratio`` of the items
+    get an expiry date and ``expired_ratio`` of those are already expired.
+    ``created_at`` is spread over the last ``history_days`` days.
+
+    Signals are not sent (``bulk_create``), so no alert emails go out; the
+    counters are recounted and the response cache version is bumped
+    explicitly.
+    Returns a summary dict.
+    """
+    rng = random.Random(seed)
+    now = timezone.now()
+    today = now.date()
+
+    category_pool = CATEGORY_NAMES[:categories] + [
+        f'Category {index}' for index in range(len(CATEGORY_NAMES), categories)
+    ]
+    supplier_pool = [f'Supplier {index:03d}' for index in range(1, suppliers + 1)]
+    category_weights = zipf_weights(len(category_pool), category_skew)
+    supplier_weights = zipf_weights(len(supplier_pool), supplier_skew)
+
+    with transaction.atomic():
+        if clear:
+            Inventory.objects.filter(sku__startswith=f'{sku_prefix}-').delete()
+            User.objects.filter(email__endswith='@seed.invento.local').delete()
+
+        categories_by_name = {name: Category.objects.get_or_create(name=name)[0] for name in category_pool}
+        suppliers_by_name = {name: Supplier.objects.get_or_create(name=name)[0] for name in supplier_pool}
+
+        offset = Inventory.objects.filter(sku__startswith=f'{sku_prefix}-').count()
+        created = 0
+        with _backdated_created_at():
+            for start in range(0, items, batch_size):
+                batch = []
+                for index in range(start, min(start + batch_size, items)):
+                    reorder_level = rng.choice((5, 10, 10, 20, 25, 50))
+                    if rng.random() < low_stock_ratio:
+                        quantity = rng.randint(0, reorder_level)
+                    else:
+                        quantity = rng.randint(reorder_level + 1, reorder_level * 20)
+
+                    expiry_date = None
+                    if rng.random() < perishable_ratio:
+                        if rng.random() < expired_ratio:
+                            expiry_date = today - timedelta(days=rng.randint(1, 180))
+                        else:
+                            expiry_date = today + timedelta(days=rng.randint(0, 365))
+
+                    created_at = now - timedelta(
+                        days=rng.randint(0, history_days), seconds=rng.randint(0, 86_399)
+                    )
+                    batch.append(Inventory(
+                        name=f'{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {index + offset}',
+                        sku=f'{sku_prefix}-{index + offset:08d}',
+                        category=categories_by_name[rng.choices(category_pool, category_weights)[0]],
+                        supplier=suppliers_by_name[rng.choices(supplier_pool, supplier_weights)[0]],
+                        quantity=quantity,
+                        unit_price=Decimal(rng.randint(50, 500_000)) / 100,
+                        reorder_level=reorder_level,
+                        expiry_date=expiry_date,
+                        description=f'Seeded item {index + offset}' if rng.random() < 0.5 else '',
+                        created_at=created_at,
+                        updated_at=created_at,
+                    ))
+                Inventory.objects.bulk_create(batch, batch_size=batch_size)
+                created += len(batch)
+
+        if users:
+            # Hash once; every seeded account shares the password "seed-password"
+            password = make_password('seed-password')
+            existing = User.objects.filter(email__endswith='@seed.invento.local').count()
+            User.objects.bulk_create([
+                User(email=f'user{existing + index}@seed.invento.local', password=password, role='viewer')
+                for index in range(users)
+            ], batch_size=batch_size)
+
+        # bulk_create skips Inventory.save() and the signals: recount the
+        # counters and invalidate cached responses and SKU rows
+        recount_categories()
+        reconcile_totals()
+        bump_version_now_and_on_commit()
+        sku_cache.clear()
+
+    return {
+        'items_created': created,
+        'users_created': users,
+        'categories': len(category_pool),
+        'suppliers': len(supplier_pool),
+        'total_items': Inventory.objects.count(),
+        'seed': seed,
+    }
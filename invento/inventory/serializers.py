@@ -1,26 +1,65 @@
 from rest_framework import serializers
+from django.db import transaction
 from django.utils import timezone
 from decimal import Decimal, InvalidOperation
-from .models import Inventory
+from .models import Category, Inventory, Lot, PurchaseOrder, PurchaseOrderLine, Supplier
+from core.metrics import InstrumentedSerializerMixin, InstrumentedListSerializer
 
 
-class InventorySerializer(serializers.ModelSerializer):
+class NamedObjectField(serializers.Field):
+    """
+    A Category/Supplier foreign key read and written as its name, the way the
+    API exposed these when they were plain text columns. A blank name clears
+    the field.
+
+    Validation only looks the name up: an unknown name validates to an unsaved
+    instance, which ``InventorySerializer`` creates in the save's transaction
+    (``save_with_named_objects``), so a request that fails leaves no rows behind.
+    """
+    default_error_messages = {
+        'invalid': 'Not a valid string.',
+        'max_length': 'Ensure this field has no more than {max_length} characters.',
+    }
+
+    def __init__(self, model, **kwargs):
+        self.model = model
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return value.name
+
+    def to_internal_value(self, data):
+        if isinstance(data, bool) or not isinstance(data, (str, int, float)):
+            self.fail('invalid')
+        name = str(data).strip()
+        if not name:
+            return None
+        max_length = self.model._meta.get_field('name').max_length
+        if len(name) > max_length:
+            self.fail('max_length', max_length=max_length)
+        return self.model.objects.filter(name=name).first() or self.model(name=name)
+
+
+class InventorySerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     """
     Serializer for Inventory model with auto-computed status field
     and robust validation for production use.
     """
+    category = NamedObjectField(Category, required=False, allow_null=True)
+    supplier = NamedObjectField(Supplier, required=False, allow_null=True)
+
     # Allow frontend to send category_name/supplier_name as aliases
-    category_name = serializers.CharField(
-        source='category', 
-        required=False, 
-        allow_null=True, 
-        allow_blank=True
+    category_name = NamedObjectField(
+        Category,
+        source='category',
+        required=False,
+        allow_null=True
     )
-    supplier_name = serializers.CharField(
-        source='supplier', 
-        required=False, 
-        allow_null=True, 
-        allow_blank=True
+    supplier_name = NamedObjectField(
+        Supplier,
+        source='supplier',
+        required=False,
+        allow_null=True
     )
     
     # Price alias for unit_price (frontend compatibility)
@@ -51,13 +90,64 @@ class InventorySerializer(serializers.ModelSerializer):
             'expiry_date', 'description', 'created_at', 'updated_at', 'status'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'status']
+        list_serializer_class = InstrumentedListSerializer
         extra_kwargs = {
-            'category': {'required': False, 'allow_null': True, 'allow_blank': True},
-            'supplier': {'required': False, 'allow_null': True, 'allow_blank': True},
             'description': {'required': False, 'allow_null': True, 'allow_blank': True},
             'reorder_level': {'required': False, 'default': 10},
         }
     
+    # Model fields behind computed fields, for ``only()`` projections
+    computed_field_sources = {
+        'status': ['expiry_date', 'quantity', 'reorder_level'],
+    }
+
+    def __init__(self, *args, fields=None, **kwargs):
+        """``fields``: optional subset of field names to serialize (sparse fieldsets)."""
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def model_fields_for(cls, names):
+        """Model field names needed to serialize the serializer fields ``names``."""
+        fields = cls().fields
+        model_fields = {'id'}
+        for name in names:
+            if name in cls.computed_field_sources:
+                model_fields.update(cls.computed_field_sources[name])
+            elif isinstance(fields[name], NamedObjectField):
+                # Loaded with select_related
+                model_fields.update((fields[name].source, f'{fields[name].source}__name'))
+            else:
+                model_fields.add(fields[name].source)
+        return sorted(model_fields)
+
+    @staticmethod
+    def new_named_objects(validated_data):
+        """The relations in ``validated_data`` whose category/supplier doesn't exist yet."""
+        return [
+            relation for relation in ('category', 'supplier')
+            if validated_data.get(relation) is not None and validated_data[relation].pk is None
+        ]
+
+    def save_with_named_objects(self, validated_data, save, *args):
+        """Run ``save(*args)``, first creating new categories/suppliers in the same transaction."""
+        new = self.new_named_objects(validated_data)
+        if not new:
+            return save(*args)
+        with transaction.atomic():
+            for relation in new:
+                obj = validated_data[relation]
+                validated_data[relation], _ = type(obj).objects.get_or_create(name=obj.name)
+            return save(*args)
+
+    def create(self, validated_data):
+        return self.save_with_named_objects(validated_data, super().create, validated_data)
+
+    def update(self, instance, validated_data):
+        return self.save_with_named_objects(validated_data, super().update, instance, validated_data)
+
     def get_status(self, obj):
         """
         Compute status based on expiry date and stock level.
@@ -168,5 +258,56 @@ class InventorySerializer(serializers.ModelSerializer):
         # Ensure reorder_level has a default if not provided
         if 'reorder_level' not in attrs or attrs.get('reorder_level') is None:
             attrs['reorder_level'] = 10
+
+        # Items with lots take their quantity and expiry date from the lots
+        instance = getattr(self, 'instance', None)
+        if instance is not None:
+            changed = [
+                field for field in ('quantity', 'expiry_date')
+                if field in attrs and attrs[field] != getattr(instance, field)
+            ]
+            if changed and instance.lots.exists():
+                raise serializers.ValidationError({
+                    field: "This item is tracked in lots: change its lots instead." for field in changed
+                })
         
         return attrs
+
+
+class PurchaseOrderLineSerializer(serializers.ModelSerializer):
+    sku = serializers.CharField(source='item.sku', read_only=True)
+    name = serializers.CharField(source='item.name', read_only=True)
+
+    class Meta:
+        model = PurchaseOrderLine
+        fields = ['id', 'item', 'sku', 'name', 'quantity', 'unit_price', 'reason']
+        read_only_fields = fields
+
+
+class PurchaseOrderSerializer(serializers.ModelSerializer):
+    supplier = serializers.CharField(source='supplier.name', read_only=True)
+    lines = PurchaseOrderLineSerializer(many=True, read_only=True)
+    total_value = serializers.SerializerMethodField()
+
+    class Meta:
+        model = PurchaseOrder
+        fields = ['id', 'supplier', 'status', 'created_at', 'updated_at', 'total_value', 'lines']
+        read_only_fields = fields
+
+    def get_total_value(self, obj):
+        return sum(line.quantity * line.unit_price for line in obj.lines.all())
+
+
+class LotSerializer(serializers.ModelSerializer):
+    sku = serializers.CharField(source='item.sku', read_only=True)
+
+    class Meta:
+        model = Lot
+        fields = ['id', 'item', 'sku', 'lot_number', 'quantity', 'expiry_date', 'received_date', 'created_at']
+        read_only_fields = ['created_at']
+
+    def validate(self, attrs):
+        # Moving a lot to another item would leave the old item's totals stale
+        if self.instance is not None and 'item' in attrs and attrs['item'] != self.instance.item:
+            raise serializers.ValidationError({'item': "A lot can't be moved to another item."})
+        return attrs
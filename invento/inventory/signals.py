@@ -1,11 +1,66 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 from django.core.mail import send_mail
 from django.conf import settings
 
-from .models import Inventory
+from . import autocomplete, snapshot
+from .cache import bump_version_now_and_on_commit, evict_sku_now_and_on_commit
+from .counters import apply_counter_changes, counted_values
+from .lots import sync_item
+from .models import Inventory, Lot
 from accounts.models import User
 
+
+@receiver(post_save, sender=Inventory)
+@receiver(post_delete, sender=Inventory)
+def bump_inventory_version(sender, instance, **kwargs):
+    """Invalidate cached inventory responses and SKU rows (see inventory/cache.py)."""
+    # Read by the in-process copies below, whose receivers run after this one
+    instance._data_versions = bump_version_now_and_on_commit()
+    evict_sku_now_and_on_commit(instance.pk, instance.sku)
+
+
+@receiver(post_save, sender=Inventory)
+def index_for_autocomplete(sender, instance, **kwargs):
+    """Update the autocomplete prefix index once the write commits."""
+    values, versions = autocomplete.index.values_for(instance), instance._data_versions
+    transaction.on_commit(lambda: autocomplete.index.apply_save(instance.pk, values, versions))
+
+
+@receiver(post_delete, sender=Inventory)
+def unindex_for_autocomplete(sender, instance, **kwargs):
+    pk, versions = instance.pk, instance._data_versions
+    transaction.on_commit(lambda: autocomplete.index.apply_delete(pk, versions))
+
+
+@receiver(post_save, sender=Inventory)
+def update_snapshot(sender, instance, **kwargs):
+    """Update this process's analytics snapshot once the write commits."""
+    pk, row, versions = instance.pk, snapshot.row_for(instance), instance._data_versions
+    transaction.on_commit(lambda: snapshot.shared.apply_save(pk, row, versions))
+
+
+@receiver(post_delete, sender=Inventory)
+def remove_from_snapshot(sender, instance, **kwargs):
+    pk, versions = instance.pk, instance._data_versions
+    transaction.on_commit(lambda: snapshot.shared.apply_delete(pk, versions))
+
+
+@receiver(post_delete, sender=Inventory)
+def uncount_deleted_item(sender, instance, **kwargs):
+    """Take a deleted item out of its category's counters (saves are counted in ``Inventory.save``)."""
+    apply_counter_changes(counted_values(instance), None)
+
+
+@receiver(post_delete, sender=Lot)
+def sync_item_after_lot_delete(sender, instance, origin=None, **kwargs):
+    """Take a deleted lot out of its item's quantity (not when the item itself is being deleted)."""
+    if isinstance(origin, Inventory):
+        return
+    sync_item(instance.item_id)
+
+
 @receiver(post_save, sender=Inventory)
 def low_stock_alert(sender, instance, **kwargs):
     """
@@ -0,0 +1,358 @@
+"""
+Columnar in-memory snapshot of the inventory table for analytics.
+
+The snapshot keeps one NumPy array per column (see ``COLUMNS``) so dashboard
+and report aggregates are vectorized passes over contiguous memory instead of
+ORM queries. It is built from the database in chunks on first use and then
+kept current by ``inventory.signals`` (``apply_save``/``apply_delete`` when the
+write commits), which also moves its version along with the version bumps of
+that write. Writes made by other processes are picked up once the shared
+data version has moved past the snapshot's and the snapshot is older than
+``INVENTORY_SNAPSHOT['MAX_AGE']`` seconds.
+
+With ``INVENTORY_SNAPSHOT['PATH']`` set, snapshots are also written there as
+``.npy`` files plus a ``manifest.json``, and every worker process maps the
+newest one (copy-on-write) instead of building its own: the pages are shared
+through the OS page cache. The ``refresh_inventory_snapshot`` job rewrites it
+after writes; a worker whose mapped copy is stale rebuilds and rewrites it
+itself. A mapped copy is current only if the version in the manifest is the
+data version every process sees, so sharing it needs a shared cache
+(``REDIS_URL``): with the per-process local memory cache each process has
+its own version, the manifest (almost) never matches and every worker builds
+its own snapshot anyway.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, time as dt_time, timedelta
+from decimal import Decimal
+
+import numpy as np
+from django.conf import settings
+from django.utils import timezone
+
+from .cache import cache_is_shared, data_version
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOT_SETTINGS = {
+    'PATH': '',
+    'MAX_AGE': 60,
+    'CHUNK_SIZE': 50_000,
+}
+
+# Column -> dtype. Prices are whole cents so sums stay exact
+COLUMNS = {
+    'pk': np.int64,
+    'quantity': np.int64,
+    'reorder_level': np.int64,
+    'price_cents': np.int64,
+    # Date ordinal, NO_EXPIRY for items without an expiry date
+    'expiry': np.int32,
+    # Category id, NO_CATEGORY for uncategorized items
+    'category': np.int64,
+    # created_at as Unix seconds
+    'created': np.int64,
+}
+NO_EXPIRY = 0
+NO_CATEGORY = -1
+
+# Model fields read for each row, in the order ``_row`` expects
+SOURCE_FIELDS = ('pk', 'quantity', 'reorder_level', 'unit_price', 'expiry_date', 'category_id', 'created_at')
+
+MANIFEST = 'manifest.json'
+
+
+def snapshot_settings():
+    """Return ``settings.INVENTORY_SNAPSHOT`` merged over the defaults."""
+    return {**DEFAULT_SNAPSHOT_SETTINGS, **getattr(settings, 'INVENTORY_SNAPSHOT', {})}
+
+
+def _row(values):
+    """Column values for one ``SOURCE_FIELDS`` tuple."""
+    pk, quantity, reorder_level, unit_price, expiry_date, category_id, created_at = values
+    return (
+        pk,
+        quantity,
+        reorder_level,
+        int(unit_price * 100),
+        expiry_date.toordinal() if expiry_date else NO_EXPIRY,
+        category_id if category_id is not None else NO_CATEGORY,
+        int(created_at.timestamp()),
+    )
+
+
+def row_for(instance):
+    """Column values for an ``Inventory`` instance."""
+    values = [getattr(instance, field) for field in SOURCE_FIELDS]
+    # Assigned prices may still be floats or strings
+    values[3] = Decimal(str(values[3]))
+    return _row(values)
+
+
+def _day_end(day):
+    """Unix seconds of the first moment after ``day`` in the current time zone."""
+    return int(timezone.make_aware(datetime.combine(day + timedelta(days=1), dt_time.min)).timestamp())
+
+
+class InventorySnapshot:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self.columns = None
+        # Rows in use; arrays may be longer (room to append)
+        self.size = 0
+        self.live = None
+        self.deleted = 0
+        self._positions = None
+        self.version = None
+        self.built_at = 0.0
+        # Manifest generation this snapshot was mapped from (None: built here)
+        self.generation = None
+
+    # Building, loading and writing
+
+    def build(self):
+        """Load every inventory row from the database, in chunks."""
+        from .models import Inventory
+
+        # Version first: a write during the build leaves the snapshot marked stale
+        version = data_version()
+        chunk_size = snapshot_settings()['CHUNK_SIZE']
+        chunks = {name: [] for name in COLUMNS}
+        rows = []
+        queryset = Inventory.objects.order_by().values_list(*SOURCE_FIELDS).iterator(chunk_size=chunk_size)
+        for values in queryset:
+            rows.append(_row(values))
+            if len(rows) == chunk_size:
+                self._add_chunk(chunks, rows)
+                rows = []
+        self._add_chunk(chunks, rows)
+        columns = {
+            name: np.concatenate(parts) if parts else np.empty(0, dtype=COLUMNS[name])
+            for name, parts in chunks.items()
+        }
+        self._install(columns, version, generation=None)
+
+    @staticmethod
+    def _add_chunk(chunks, rows):
+        if not rows:
+            return
+        for name, values in zip(COLUMNS, zip(*rows)):
+            chunks[name].append(np.fromiter(values, dtype=COLUMNS[name], count=len(rows)))
+
+    def _install(self, columns, version, generation):
+        size = len(columns['pk'])
+        with self._lock:
+            self.columns = columns
+            self.size = size
+            self.live = np.ones(size, dtype=bool)
+            self.deleted = 0
+            self._positions = None
+            self.version = version
+            self.generation = generation
+            self.built_at = time.monotonic()
+
+    def load(self, path):
+        """Map the newest snapshot written to ``path``; False if there is none."""
+        try:
+            with open(os.path.join(path, MANIFEST)) as manifest_file:
+                manifest = json.load(manifest_file)
+            columns = {
+                # Copy-on-write: incremental changes stay private to this process
+                name: np.load(os.path.join(path, f"{manifest['generation']}-{name}.npy"), mmap_mode='c')
+                for name in COLUMNS
+            }
+        except (OSError, ValueError, KeyError):
+            return False
+        self._install(columns, manifest['version'], manifest['generation'])
+        return True
+
+    def write(self, path):
+        """Write the live rows to ``path`` and point its manifest at them."""
+        os.makedirs(path, exist_ok=True)
+        with self._lock:
+            columns = {name: np.array(values) for name, values in self._live_columns().items()}
+            version = self.version
+        generation = f'{time.time_ns()}-{os.getpid()}'
+        for name, values in columns.items():
+            target = os.path.join(path, f'{generation}-{name}.npy')
+            with open(f'{target}.tmp', 'wb') as column_file:
+                np.save(column_file, values)
+            os.replace(f'{target}.tmp', target)
+        manifest = os.path.join(path, MANIFEST)
+        with open(f'{manifest}.{generation}.tmp', 'w') as manifest_file:
+            json.dump({'generation': generation, 'version': version, 'rows': len(columns['pk'])}, manifest_file)
+        os.replace(f'{manifest}.{generation}.tmp', manifest)
+
+        # Processes still mapping older generations keep their (unlinked) files
+        for name in os.listdir(path):
+            if name.endswith('.npy') and not name.startswith(f'{generation}-'):
+                try:
+                    os.remove(os.path.join(path, name))
+                except OSError:
+                    pass
+        return generation
+
+    def ensure_current(self):
+        """
+        Build (or map) on first use; afterwards pick up outside writes once
+        the snapshot is old enough.
+        """
+        config = snapshot_settings()
+        if self.columns is None:
+            with self._build_lock:
+                if self.columns is None:
+                    if config['PATH'] and not cache_is_shared():
+                        logger.warning(
+                            "INVENTORY_SNAPSHOT['PATH'] is set but the cache is local to this process: "
+                            'workers will build their own snapshots (set REDIS_URL to share it)'
+                        )
+                    self._refresh(config['PATH'])
+            return
+        if time.monotonic() - self.built_at >= config['MAX_AGE'] and data_version() != self.version:
+            # One thread refreshes; the others keep answering from the current snapshot
+            if self._build_lock.acquire(blocking=False):
+                try:
+                    self._refresh(config['PATH'])
+                finally:
+                    self._build_lock.release()
+
+    def _refresh(self, path):
+        if path and self.load(path) and self.version == data_version():
+            return
+        self.build()
+        if path:
+            try:
+                self.generation = self.write(path)
+            except OSError:
+                logger.exception('Could not write the inventory snapshot to %s', path)
+
+    # Change events
+
+    def apply_save(self, pk, row, versions=None):
+        """Insert or replace row ``pk`` with ``row`` (see ``row_for``), written with ``versions``."""
+        with self._lock:
+            if self.columns is None:
+                return
+            position = self._positions_by_pk().get(pk)
+            if position is None:
+                position = self._append()
+                self._positions[pk] = position
+            for name, value in zip(COLUMNS, row):
+                self.columns[name][position] = value
+            if versions is not None:
+                self.version = versions.advance(self.version)
+
+    def apply_delete(self, pk, versions=None):
+        with self._lock:
+            if self.columns is None:
+                return
+            position = self._positions_by_pk().pop(pk, None)
+            if position is not None:
+                self.live[position] = False
+                self.deleted += 1
+            if versions is not None:
+                self.version = versions.advance(self.version)
+
+    def _positions_by_pk(self):
+        if self._positions is None:
+            pks = self.columns['pk'][:self.size]
+            self._positions = {pk: position for position, pk in enumerate(pks.tolist()) if self.live[position]}
+        return self._positions
+
+    def _append(self):
+        capacity = len(self.columns['pk'])
+        if self.size == capacity:
+            # Grow by half: appends stay amortized O(1); replaces mapped arrays with private ones
+            extra = max(capacity // 2, 1024)
+            self.columns = {
+                name: np.concatenate((values, np.zeros(extra, dtype=values.dtype)))
+                for name, values in self.columns.items()
+            }
+            self.live = np.concatenate((self.live, np.zeros(extra, dtype=bool)))
+        position = self.size
+        self.size += 1
+        self.live[position] = True
+        return position
+
+    # Aggregates
+
+    def _live_columns(self):
+        """The live rows of every column (views when nothing was deleted)."""
+        if not self.deleted:
+            return {name: values[:self.size] for name, values in self.columns.items()}
+        live = self.live[:self.size]
+        return {name: values[:self.size][live] for name, values in self.columns.items()}
+
+    def columns_for(self, names):
+        """Copies of the live rows of ``names``, consistent with each other."""
+        self.ensure_current()
+        with self._lock:
+            columns = self._live_columns()
+            return {name: np.array(columns[name]) for name in names}
+
+    def totals(self, today=None, created_from=None, created_to=None, status=None):
+        """
+        Headline totals, optionally only for items created between the dates
+        ``created_from``/``created_to`` (inclusive) and with ``status``
+        ``'in_stock'``, ``'low_stock'`` or ``'expired'``, like the report filters.
+        """
+        self.ensure_current()
+        today = (today or timezone.now().date()).toordinal()
+        with self._lock:
+            columns = self._live_columns()
+            quantity = columns['quantity']
+            expiry = columns['expiry']
+            low_stock = quantity <= columns['reorder_level']
+            expired = (expiry != NO_EXPIRY) & (expiry < today)
+
+            selected = None
+            if created_from:
+                selected = columns['created'] >= _day_end(created_from - timedelta(days=1))
+            if created_to:
+                before_end = columns['created'] < _day_end(created_to)
+                selected = before_end if selected is None else selected & before_end
+            status_mask = {'low_stock': low_stock, 'expired': expired, 'in_stock': ~low_stock}.get(status)
+            if status_mask is not None:
+                selected = status_mask if selected is None else selected & status_mask
+            if selected is not None:
+                quantity, low_stock, expired = quantity[selected], low_stock[selected], expired[selected]
+                price_cents = columns['price_cents'][selected]
+            else:
+                price_cents = columns['price_cents']
+
+            return {
+                'item_count': len(quantity),
+                'total_quantity': int(quantity.sum()),
+                'total_value': Decimal(int(np.dot(quantity, price_cents))) / 100,
+                'low_stock_count': int(np.count_nonzero(low_stock)),
+                'expired_count': int(np.count_nonzero(expired)),
+            }
+
+    def stock_trend(self, days):
+        """``[(item_count, total_quantity)]`` of the items created by the end of each of ``days``."""
+        self.ensure_current()
+        ends = [_day_end(day) for day in days]
+        trend = []
+        with self._lock:
+            columns = self._live_columns()
+            for end in ends:
+                existed = columns['created'] < end
+                trend.append((int(np.count_nonzero(existed)), int(columns['quantity'][existed].sum())))
+        return trend
+
+    def category_counts(self):
+        """``{category_id or None: item count}``."""
+        self.ensure_current()
+        with self._lock:
+            ids, counts = np.unique(self._live_columns()['category'], return_counts=True)
+        return {
+            (None if category_id == NO_CATEGORY else int(category_id)): int(count)
+            for category_id, count in zip(ids.tolist(), counts.tolist())
+        }
+
+
+shared = InventorySnapshot()
@@ -1,3 +1,561 @@
-from django.test import TestCase
+import math
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import User
+from .analytics import compute_metrics, load_columns
+from .autocomplete import PrefixIndex
+from .cache import bump_version, cache_is_shared, data_version, rows_by_sku, sku_cache
+from .counters import TOTAL_FIELDS, reconcile_totals
+from .lots import OPENING_LOT, InsufficientStock, allocate_fefo
+from .models import Category, Inventory, InventoryTotals, Lot, PurchaseOrder, PurchaseOrderLine, StockMovement, Supplier
+from .reorder import compute_suggestions, generate_purchase_orders
+from .snapshot import InventorySnapshot, row_for as snapshot_row
+
+
+def _serialize(skus):
+    return [
+        {'id': item.pk, 'sku': item.sku, 'quantity': item.quantity}
+        for item in Inventory.objects.filter(sku__in=skus)
+    ]
+
+
+class SkuCacheTests(TestCase):
+    def setUp(self):
+        sku_cache.clear()
+        self.first = Inventory.objects.create(name='First', sku='SKU-A', quantity=5, unit_price='1.00')
+        self.second = Inventory.objects.create(name='Second', sku='SKU-B', quantity=7, unit_price='1.00')
+
+    def test_write_evicts_only_the_written_sku(self):
+        rows_by_sku(['SKU-A', 'SKU-B'], _serialize)
+
+        self.first.quantity = 9
+        self.first.save()
+
+        cached = sku_cache.get_many(['SKU-A', 'SKU-B'], timezone.localdate())
+        self.assertEqual(list(cached), ['SKU-B'])
+        self.assertEqual(rows_by_sku(['SKU-A'], _serialize)['SKU-A']['quantity'], 9)
+
+    def test_renamed_sku_is_evicted_under_its_old_name(self):
+        rows_by_sku(['SKU-A'], _serialize)
+
+        self.first.sku = 'SKU-A2'
+        self.first.save()
+
+        self.assertEqual(rows_by_sku(['SKU-A'], _serialize), {})
+
+    def test_row_read_before_an_eviction_is_not_cached(self):
+        generation = sku_cache.generation()
+        stale = {row['sku']: row for row in _serialize(['SKU-A'])}
+        sku_cache.evict(self.first.pk, 'SKU-A')
+
+        sku_cache.set_many(stale, timezone.localdate(), generation, ttl=30)
+
+        self.assertEqual(sku_cache.get_many(['SKU-A'], timezone.localdate()), {})
+
+    def test_sku_endpoint_serves_the_new_quantity_after_a_write(self):
+        admin = User.objects.create_user('sku-admin@example.com', 'Sku-pass-1', role='admin')
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(admin).access_token}')
+        self.assertEqual(client.get('/api/inventory/sku/SKU-A/').data['quantity'], 5)
+
+        client.patch(f'/api/inventory/{self.first.pk}/', {'quantity': 3}, format='json')
+
+        self.assertEqual(client.get('/api/inventory/sku/SKU-A/').data['quantity'], 3)
+
+
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    INVENTORY_CACHE={'LOCAL': True},
+    AUDIT={'ENABLED': False},
+)
+class ResponseCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('cache-admin@example.com', 'Cache-pass-1', role='admin')
+        cls.item = Inventory.objects.create(name='Widget', sku='WID-1', quantity=5, unit_price='1.00')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.admin).access_token}')
+        self.detail = f'/api/inventory/{self.item.pk}/'
+
+    def quantities(self):
+        listed = self.client.get('/api/inventory/').data['results']
+        return [row['quantity'] for row in listed], self.client.get(self.detail).data['quantity']
+
+    def test_repeated_reads_are_served_from_the_cache(self):
+        self.quantities()
+        # Only the JWT user lookup
+        with self.assertNumQueries(2):
+            self.assertEqual(self.quantities(), ([5], 5))
+
+    def test_write_invalidates_the_list_and_detail_responses(self):
+        self.quantities()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(self.detail, {'quantity': 9}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(self.quantities(), ([9], 9))
+
+    def test_outside_write_is_seen_after_a_version_bump(self):
+        self.quantities()
+        Inventory.objects.filter(pk=self.item.pk).update(quantity=2)
+        bump_version()
+
+        self.assertEqual(self.quantities(), ([2], 2))
+
+    @override_settings(INVENTORY_CACHE={'LOCAL': False})
+    def test_not_cached_in_a_process_local_cache(self):
+        self.assertFalse(cache_is_shared())
+        self.quantities()
+        with CaptureQueriesContext(connection) as queries:
+            self.quantities()
+        self.assertGreater(len(queries), 2)
+
+    @override_settings(INVENTORY_CACHE={'LOCAL': False})
+    def test_cached_in_a_shared_cache(self):
+        with mock.patch('inventory.cache.cache_is_shared', return_value=True):
+            self.quantities()
+            with self.assertNumQueries(2):
+                self.quantities()
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class FieldSelectionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('fields-admin@example.com', 'Fields-pass-1', role='admin')
+        cls.item = Inventory.objects.create(
+            name='Widget', sku='WID-1', quantity=5, unit_price='1.00', description='A long description',
+            category=Category.objects.create(name='Tools'),
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.admin).access_token}')
+
+    def get(self, query, path='/api/inventory/'):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'{path}?{query}')
+        selects = [query['sql'] for query in queries if 'inventory_inventory' in query['sql']]
+        return response, selects[-1] if selects else ''
+
+    def test_fields_keeps_only_the_named_columns(self):
+        response, sql = self.get('fields=status,name,id')
+        self.assertEqual(response.status_code, 200)
+        # In the serializer's order, whatever the order asked for
+        self.assertEqual(list(response.data['results'][0]), ['id', 'name', 'status'])
+        # Only the columns those fields read are loaded
+        self.assertNotIn('"description"', sql)
+        self.assertNotIn('"unit_price"', sql)
+        self.assertIn('"reorder_level"', sql)
+        self.assertNotIn('JOIN', sql)
+
+    def test_omit_drops_columns(self):
+        response, sql = self.get('omit=description,created_at')
+        row = response.data['results'][0]
+        self.assertNotIn('description', row)
+        self.assertNotIn('created_at', row)
+        self.assertIn('category', row)
+        self.assertNotIn('"description"', sql)
+
+    def test_fields_and_omit_combine(self):
+        response, _ = self.get('fields=id,name,sku&omit=sku')
+        self.assertEqual(list(response.data['results'][0]), ['id', 'name'])
+
+    def test_related_names_join_only_their_table(self):
+        response, sql = self.get('fields=id,category')
+        self.assertEqual(response.data['results'][0], {'id': self.item.pk, 'category': 'Tools'})
+        self.assertIn('inventory_category', sql)
+        self.assertNotIn('inventory_supplier', sql)
+
+    def test_detail_supports_fields(self):
+        response, _ = self.get('fields=sku,quantity', path=f'/api/inventory/{self.item.pk}/')
+        self.assertEqual(response.data, {'sku': 'WID-1', 'quantity': 5})
+
+    def test_unknown_fields_are_rejected(self):
+        for query in ('fields=id,bogus', 'omit=price,nope'):
+            with self.subTest(query=query):
+                response, _ = self.get(query)
+                self.assertEqual(response.status_code, 400)
+                self.assertTrue(response.data['error'].startswith('Unknown field(s): '))
+        self.assertIn('bogus', self.get('fields=id,bogus')[0].data['error'])
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class NamedObjectFieldTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user('named-admin@example.com', 'Named-pass-1', role='admin')
+        cls.tools = Category.objects.create(name='Tools')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.admin).access_token}')
+
+    def create(self, **fields):
+        return self.client.post('/api/inventory/', {
+            'name': 'Widget', 'sku': 'WID-1', 'quantity': 5, 'unit_price': '1.00', **fields,
+        }, format='json')
+
+    def test_new_names_are_created_with_the_item(self):
+        response = self.create(category='Garden', supplier_name='Acme')
+        self.assertEqual(response.status_code, 201)
+        item = Inventory.objects.get(sku='WID-1')
+        self.assertEqual((item.category.name, item.supplier.name), ('Garden', 'Acme'))
+
+    def test_existing_names_are_reused(self):
+        self.assertEqual(self.create(category=' Tools ').status_code, 201)
+        self.assertEqual(Inventory.objects.get(sku='WID-1').category, self.tools)
+        self.assertEqual(Category.objects.count(), 1)
+
+    def test_failed_validation_creates_nothing(self):
+        response = self.create(category='Garden', supplier='Acme', quantity=-1)
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Category.objects.filter(name='Garden').exists())
+        self.assertFalse(Supplier.objects.exists())
+
+    def test_failed_update_creates_nothing(self):
+        item = Inventory.objects.create(name='Lotted', sku='LOT-1', quantity=0, unit_price='1.00')
+        Lot.objects.create(item=item, lot_number='L1', quantity=5)
+
+        response = self.client.patch(f'/api/inventory/{item.pk}/', {'supplier': 'Acme', 'quantity': 9}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Supplier.objects.exists())
+
+    def test_blank_name_clears_the_field(self):
+        self.create(category='Tools')
+        item = Inventory.objects.get(sku='WID-1')
+        self.client.patch(f'/api/inventory/{item.pk}/', {'category': ''}, format='json')
+        item.refresh_from_db()
+        self.assertIsNone(item.category)
+
+
+@override_settings(AUDIT={'ENABLED': False})
+class CounterTests(TestCase):
+    def setUp(self):
+        self.tools = Category.objects.create(name='Tools')
+        self.garden = Category.objects.create(name='Garden')
+        self.today = timezone.localdate()
+        reconcile_totals(self.today)
+
+    def save(self, item):
+        with self.captureOnCommitCallbacks(execute=True):
+            item.save()
+        return item
+
+    def counters(self, category):
+        category.refresh_from_db()
+        return category.item_count, category.total_quantity, category.total_value
+
+    def totals(self):
+        totals = InventoryTotals.objects.get(pk=InventoryTotals.SINGLETON_PK)
+        return {field: getattr(totals, field) for field in TOTAL_FIELDS}
+
+    def new_item(self, **fields):
+        return self.save(Inventory(**{
+            'name': 'Widget', 'sku': f'WID-{Inventory.objects.count()}', 'quantity': 4, 'unit_price': '2.50',
+            'category': self.tools, **fields,
+        }))
+
+    def test_create_and_update(self):
+        item = self.new_item(reorder_level=5)
+        self.assertEqual(self.counters(self.tools), (1, 4, Decimal('10.00')))
+        self.assertEqual(self.totals(), {
+            'item_count': 1, 'total_quantity': 4, 'total_value': Decimal('10.00'),
+            'low_stock_count': 1, 'expired_count': 0,
+        })
+
+        item.quantity = 10
+        item.unit_price = Decimal('3.00')
+        item.expiry_date = self.today - timedelta(days=1)
+        self.save(item)
+        self.assertEqual(self.counters(self.tools), (1, 10, Decimal('30.00')))
+        self.assertEqual(self.totals(), {
+            'item_count': 1, 'total_quantity': 10, 'total_value': Decimal('30.00'),
+            'low_stock_count': 0, 'expired_count': 1,
+        })
+
+    def test_category_move(self):
+        item = self.new_item()
+        self.new_item(quantity=1)
+
+        item.category = self.garden
+        self.save(item)
+
+        self.assertEqual(self.counters(self.tools), (1, 1, Decimal('2.50')))
+        self.assertEqual(self.counters(self.garden), (1, 4, Decimal('10.00')))
+        self.assertEqual(self.totals()['item_count'], 2)
+
+    def test_delete(self):
+        item = self.new_item(expiry_date=self.today - timedelta(days=3))
+        with self.captureOnCommitCallbacks(execute=True):
+            item.delete()
+
+        self.assertEqual(self.counters(self.tools), (0, 0, Decimal('0.00')))
+        self.assertEqual(set(self.totals().values()), {0})
+
+    def test_totals_follow_only_committed_writes(self):
+        item = self.new_item()
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                item.quantity = 50
+                item.save()
+                raise RuntimeError('rolled back')
+
+        self.assertEqual(self.counters(self.tools), (1, 4, Decimal('10.00')))
+        self.assertEqual(self.totals()['total_quantity'], 4)
+
+    def test_reconcile_corrects_drift(self):
+        self.new_item()
+        # Bypasses the counters
+        Inventory.objects.update(quantity=7)
+
+        with self.assertLogs('inventory.counters', 'WARNING'):
+            drift = reconcile_totals(self.today)
+
+        self.assertEqual(drift, {'total_quantity': -3, 'total_value': Decimal('-7.50')})
+        self.assertEqual(self.totals()['total_quantity'], 7)
+        self.assertEqual(InventoryTotals.objects.get().last_drift, {'total_quantity': '-3', 'total_value': '-7.50'})
+        self.assertEqual(reconcile_totals(self.today), {})
+
+    def test_reconcile_moves_the_expiry_date_without_reporting_drift(self):
+        self.new_item(expiry_date=self.today)
+        self.assertEqual(self.totals()['expired_count'], 0)
+
+        self.assertEqual(reconcile_totals(self.today + timedelta(days=1)), {})
+        self.assertEqual(self.totals()['expired_count'], 1)
+
+
+@override_settings(
+    INVENTORY_CACHE={'AUTOCOMPLETE_MAX_AGE': 0, 'AUTOCOMPLETE_BACKGROUND_REBUILD': False},
+    # Committed events would reach the audit buffer, outliving the test database
+    AUDIT={'ENABLED': False},
+)
+class AutocompleteIndexTests(TestCase):
+    def setUp(self):
+        self.item = Inventory.objects.create(name='Widget', sku='WID-1', quantity=5, unit_price='1.00')
+        self.index = PrefixIndex()
+        self.index.build()
+
+    def save(self, name):
+        self.item.name = name
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.save()
+        self.index.apply_save(self.item.pk, self.index.values_for(self.item), self.item._data_versions)
+
+    def test_local_writes_keep_the_index_current(self):
+        self.save('Gadget')
+        self.save('Gizmo')
+
+        self.assertEqual(self.index.version, data_version())
+        with self.assertNumQueries(0):
+            self.assertEqual(self.index.suggest('gi', ['name'])['name'], [{'value': 'Gizmo', 'count': 1}])
+
+    def test_outside_write_triggers_a_rebuild(self):
+        self.save('Gadget')
+        # Another process adds an item
+        Inventory.objects.bulk_create([Inventory(name='Doohickey', sku='DOO-1', quantity=1, unit_price='1.00')])
+        bump_version()
+        self.save('Gizmo')
+
+        self.assertNotEqual(self.index.version, data_version())
+        self.assertEqual(self.index.suggest('doo', ['name'])['name'], [{'value': 'Doohickey', 'count': 1}])
+        self.assertEqual(self.index.version, data_version())
+
+
+@override_settings(INVENTORY_SNAPSHOT={'MAX_AGE': 0}, AUDIT={'ENABLED': False})
+class InventorySnapshotTests(TestCase):
+    def setUp(self):
+        self.item = Inventory.objects.create(name='Widget', sku='WID-1', quantity=5, unit_price='1.00')
+        self.snapshot = InventorySnapshot()
+        self.snapshot.build()
+
+    def test_local_writes_advance_the_version(self):
+        self.item.quantity = 8
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.save()
+        self.snapshot.apply_save(self.item.pk, snapshot_row(self.item), self.item._data_versions)
+
+        self.assertEqual(self.snapshot.version, data_version())
+        with self.assertNumQueries(0):
+            self.snapshot.ensure_current()
+        self.assertEqual(self.snapshot.columns['quantity'][:self.snapshot.size].tolist(), [8])
+
+        pk = self.item.pk
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item.delete()
+        self.snapshot.apply_delete(pk, self.item._data_versions)
+        self.assertEqual(self.snapshot.version, data_version())
+        self.assertEqual(self.snapshot.deleted, 1)
+
+
+def _columns(quantity, unit_price, received=None, consumed=None):
+    count = len(quantity)
+    return {
+        'pk': np.arange(1, count + 1, dtype=np.int64),
+        'quantity': np.array(quantity, dtype=np.int64),
+        'unit_price': np.array(unit_price, dtype=np.float64),
+        'received': np.array(received or [0] * count, dtype=np.int64),
+        'consumed': np.array(consumed or [0] * count, dtype=np.int64),
+    }
+
+
+class AnalyticsMetricsTests(SimpleTestCase):
+    def test_abc_classes_keep_the_item_that_crosses_a_threshold(self):
+        # Consumption values 70, 10, 10, 5, 5: 0%, 70%, 80%, 90% and 95% of the total come before each
+        columns, basis = compute_metrics(_columns([1] * 5, [7, 1, 1, 1, 1], consumed=[10, 10, 10, 5, 5]), 30)
+
+        self.assertEqual(basis, 'consumption')
+        self.assertEqual(columns['abc'].tolist(), ['A', 'A', 'B', 'B', 'C'])
+        self.assertEqual(columns['order'].tolist(), [0, 1, 2, 3, 4])
+
+    def test_stock_value_is_the_basis_without_consumption(self):
+        columns, basis = compute_metrics(_columns([10, 90], [1, 1]), 30)
+
+        self.assertEqual(basis, 'stock')
+        self.assertEqual(columns['abc'].tolist(), ['B', 'A'])
+        self.assertTrue(np.isnan(columns['turnover']).all())
+        self.assertTrue(np.isnan(columns['days_of_supply']).all())
+
+    def test_turnover_and_days_of_supply(self):
+        # 50 left after consuming 50 and receiving 20 in 30 days: 80 at the start
+        columns, _ = compute_metrics(_columns([50], [2], received=[20], consumed=[50]), 30)
+
+        self.assertTrue(math.isclose(columns['turnover'][0], 50 / 65 * 365 / 30))
+        self.assertTrue(math.isclose(columns['days_of_supply'][0], 30))
+
+    def test_out_of_stock_item_has_no_days_of_supply_left(self):
+        columns, _ = compute_metrics(_columns([0], [1], consumed=[10]), 10)
+
+        self.assertEqual(columns['days_of_supply'][0], 0)
+        # Average stock of 5 over the window
+        self.assertTrue(math.isclose(columns['turnover'][0], 10 / 5 * 365 / 10))
+
+
+class AnalyticsColumnsTests(TestCase):
+    def test_window_movements_are_joined_per_item(self):
+        moved = Inventory.objects.create(name='Moved', sku='MOV-1', quantity=20, unit_price='1.00')
+        idle = Inventory.objects.create(name='Idle', sku='IDL-1', quantity=5, unit_price='1.00')
+        for quantity in (12, 30, 25):
+            moved.quantity = quantity
+            moved.save()
+
+        columns = load_columns(30)
+
+        self.assertEqual(columns['pk'].tolist(), [moved.pk, idle.pk])
+        # Created with 20, then -8, +18, -5
+        self.assertEqual(columns['received'].tolist(), [38, 5])
+        self.assertEqual(columns['consumed'].tolist(), [13, 0])
+
+
+class ReorderSuggestionTests(SimpleTestCase):
+    def test_suggested_quantities(self):
+        columns = {
+            'quantity': np.array([5, 15, 15, 10, 50]),
+            'reorder_level': np.array([10, 10, 10, 10, 10]),
+            'consumed': np.array([30, 30, 30, 0, 30]),
+        }
+        lead_time = np.array([7.0] * 5)
+        on_order = np.array([0, 0, 10, 0, 0])
+
+        indices, quantities, low_stock = compute_suggestions(columns, lead_time, on_order, days=30, review_days=14)
+
+        # Demand 1/day: reorder point 17, order up to 31; without demand, up to twice the reorder level
+        self.assertEqual(indices.tolist(), [0, 1, 3])
+        self.assertEqual(quantities.tolist(), [26, 16, 10])
+        self.assertEqual(low_stock.tolist(), [True, False, True])
+
+
+class PurchaseOrderGenerationTests(TestCase):
+    def setUp(self):
+        self.acme = Supplier.objects.create(name='Acme')
+        self.globex = Supplier.objects.create(name='Globex')
+        for sku, supplier in (('A-1', self.acme), ('A-2', self.acme), ('G-1', self.globex), ('N-1', None)):
+            Inventory.objects.create(
+                name=sku, sku=sku, quantity=2, unit_price='1.00', reorder_level=10, supplier=supplier
+            )
+        Inventory.objects.create(name='Stocked', sku='S-1', quantity=500, unit_price='1.00', supplier=self.acme)
+
+    def test_one_draft_per_supplier_replaced_on_each_run(self):
+        generate_purchase_orders()
+        summary = generate_purchase_orders()
+
+        drafts = PurchaseOrder.objects.filter(status=PurchaseOrder.STATUS_DRAFT)
+        self.assertEqual(sorted(drafts.values_list('supplier__name', flat=True)), ['Acme', 'Globex'])
+        self.assertEqual(
+            sorted(PurchaseOrderLine.objects.values_list('order__supplier__name', 'item__sku')),
+            [('Acme', 'A-1'), ('Acme', 'A-2'), ('Globex', 'G-1')],
+        )
+        self.assertEqual((summary['purchase_orders'], summary['lines'], summary['without_supplier']), (2, 3, 1))
+
+    def test_sent_orders_are_kept_and_count_as_stock_on_order(self):
+        generate_purchase_orders()
+        PurchaseOrder.objects.filter(supplier=self.globex).update(status=PurchaseOrder.STATUS_SENT)
+
+        generate_purchase_orders()
+
+        self.assertEqual(PurchaseOrder.objects.filter(supplier=self.globex).count(), 1)
+        self.assertEqual(PurchaseOrder.objects.get(supplier=self.acme).status, PurchaseOrder.STATUS_DRAFT)
+
+
+class LotTests(TestCase):
+    def setUp(self):
+        self.item = Inventory.objects.create(name='Milk', sku='MILK-1', quantity=0, unit_price='1.00')
+        self.today = timezone.localdate()
+
+    def add_lot(self, number, quantity, days=None):
+        expiry_date = None if days is None else self.today + timedelta(days=days)
+        return Lot.objects.create(item=self.item, lot_number=number, quantity=quantity, expiry_date=expiry_date)
+
+    def quantities(self):
+        return dict(Lot.objects.filter(item=self.item).values_list('lot_number', 'quantity'))
+
+    def test_fefo_takes_the_earliest_expiry_first_and_skips_expired_lots(self):
+        self.add_lot('LATE', 10, days=30)
+        self.add_lot('NONE', 10)
+        self.add_lot('SOON', 5, days=3)
+        self.add_lot('GONE', 10, days=-1)
+
+        allocations = allocate_fefo(self.item.pk, 12)
+
+        self.assertEqual([(lot.lot_number, taken) for lot, taken in allocations], [('SOON', 5), ('LATE', 7)])
+        self.assertEqual(self.quantities(), {'GONE': 10, 'SOON': 0, 'LATE': 3, 'NONE': 10})
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.quantity, self.item.expiry_date), (23, self.today - timedelta(days=1)))
+
+    def test_insufficient_stock_changes_nothing(self):
+        self.add_lot('A', 5, days=3)
+        self.add_lot('B', 5, days=10)
+
+        with self.assertRaises(InsufficientStock) as raised:
+            allocate_fefo(self.item.pk, 11)
+
+        self.assertEqual((raised.exception.requested, raised.exception.available), (11, 10))
+        self.assertEqual(self.quantities(), {'A': 5, 'B': 5})
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 10)
+
+    def test_first_lot_keeps_the_stock_held_before_lots(self):
+        Inventory.objects.filter(pk=self.item.pk).update(quantity=100)
+        self.item.refresh_from_db()
+
+        self.add_lot('L1', 20, days=10)
+
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.quantity, 120)
+        self.assertEqual(self.quantities(), {OPENING_LOT: 100, 'L1': 20})
+        self.assertEqual(StockMovement.objects.filter(item=self.item).latest('pk').change, 20)
@@ -3,9 +3,12 @@ Inventory API URL Configuration
 Provides CRUD endpoints for inventory management.
 """
 from rest_framework.routers import DefaultRouter
-from .views import InventoryViewSet
+from .views import InventoryViewSet, LotViewSet, PurchaseOrderViewSet
 
 router = DefaultRouter()
+# Before the inventory routes, whose detail pattern would match 'purchase-orders/' and 'lots/'
+router.register(r'purchase-orders', PurchaseOrderViewSet, basename='purchase-order')
+router.register(r'lots', LotViewSet, basename='lot')
 router.register(r'', InventoryViewSet, basename='inventory')
 
 urlpatterns = router.urls
@@ -1,17 +1,36 @@
 import logging
-from rest_framework.viewsets import ModelViewSet
+import numpy as np
+from rest_framework.decorators import action
+from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 from rest_framework.filters import SearchFilter
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 
-from .models import Inventory
-from .serializers import InventorySerializer
+from . import autocomplete, lots, reorder
+from .cache import cached_response, rows_by_sku
+from .models import Inventory, Lot, PurchaseOrder
+from .serializers import InventorySerializer, LotSerializer, PurchaseOrderSerializer
 from .pagination import InventoryPagination
 from accounts.permissions import IsAdminOrReadOnly
 
 logger = logging.getLogger(__name__)
 
+# Most SKUs one by-sku request may resolve
+MAX_BATCH_SKUS = 500
+
+# Suggestions per field returned by autocomplete (default / maximum)
+AUTOCOMPLETE_LIMIT = 10
+MAX_AUTOCOMPLETE_LIMIT = 50
+
+# Reorder suggestions returned by the preview (default / maximum)
+SUGGESTION_LIMIT = 100
+MAX_SUGGESTION_LIMIT = 1000
+
+# Look-ahead of the expiring lots list, in days (default / maximum)
+EXPIRING_DAYS = 30
+MAX_EXPIRING_DAYS = 3650
+
 
 class InventoryViewSet(ModelViewSet):
     """
@@ -28,9 +47,201 @@ class InventoryViewSet(ModelViewSet):
     serializer_class = InventorySerializer
     permission_classes = [IsAuthenticated, IsAdminOrReadOnly]
     pagination_class = InventoryPagination
+    # Safe-method requests only; writes always go to the primary
+    read_from_replica = True
     filter_backends = [SearchFilter]
-    search_fields = ['name', 'sku', 'supplier']
+    search_fields = ['name', 'sku', 'supplier__name']
+
+    # Serializer fields to return, from ?fields= / ?omit= (None: all of them)
+    selected_fields = None
+
+    def select_fields(self, request):
+        """
+        Read the comma separated ``fields`` (keep only these) and ``omit``
+        (drop these) query params. Returns an error message for unknown names.
+        """
+        available = InventorySerializer.Meta.fields
+        requested = {
+            param: [name.strip() for name in request.query_params[param].split(',') if name.strip()]
+            for param in ('fields', 'omit') if param in request.query_params
+        }
+        unknown = sorted({name for names in requested.values() for name in names} - set(available))
+        if unknown:
+            return f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(available)}"
+
+        if requested:
+            keep = requested.get('fields') or available
+            omit = set(requested.get('omit', ()))
+            self.selected_fields = [name for name in available if name in keep and name not in omit]
+        return None
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list':
+            # ?category=<name> / ?supplier=<name>: exact match through the unique name index
+            for relation in ('category', 'supplier'):
+                if relation in self.request.query_params:
+                    queryset = queryset.filter(**{f'{relation}__name': self.request.query_params[relation]})
+
+        if self.selected_fields is None:
+            return queryset.select_related('category', 'supplier')
+        # Only load the columns the requested fields read
+        model_fields = InventorySerializer.model_fields_for(self.selected_fields)
+        related = [relation for relation in ('category', 'supplier') if relation in model_fields]
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*model_fields)
+
+    def get_serializer(self, *args, **kwargs):
+        if self.selected_fields is not None:
+            kwargs.setdefault('fields', self.selected_fields)
+        return super().get_serializer(*args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        """
+        List inventory items, served from the versioned response cache when possible.
+        ``?category=`` / ``?supplier=`` filter by exact name.
+        ``?fields=id,name,quantity`` / ``?omit=description`` trim the response and the query.
+        """
+        error = self.select_fields(request)
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+        return cached_response(request, lambda: super(InventoryViewSet, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve one inventory item (same cache and ``fields``/``omit`` support as list)."""
+        error = self.select_fields(request)
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+        return cached_response(request, lambda: super(InventoryViewSet, self).retrieve(request, *args, **kwargs))
     
+    def _rows_by_sku(self, skus):
+        def serialize(missing):
+            items = Inventory.objects.select_related('category', 'supplier').filter(sku__in=missing)
+            return [dict(row) for row in InventorySerializer(items, many=True).data]
+
+        rows = rows_by_sku(skus, serialize)
+        if self.selected_fields is not None:
+            rows = {sku: {name: row[name] for name in self.selected_fields} for sku, row in rows.items()}
+        return rows
+
+    @action(detail=False, methods=['get'], url_path=r'sku/(?P<sku>[^/]+)', url_name='sku')
+    def sku(self, request, sku=None):
+        """
+        GET /api/inventory/sku/<sku>/
+        Exact SKU lookup for barcode scanners, served from the in-process SKU cache.
+        """
+        error = self.select_fields(request)
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+        row = self._rows_by_sku([sku]).get(sku)
+        if row is None:
+            return Response({'error': f'No inventory item with SKU {sku}'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(row)
+
+    @action(detail=False, methods=['get', 'post'], url_path='by-sku', url_name='by-sku',
+            permission_classes=[IsAuthenticated])
+    def by_sku(self, request):
+        """
+        GET /api/inventory/by-sku/?skus=A,B or POST {"skus": ["A", "B", ...]}
+        Resolve up to MAX_BATCH_SKUS SKUs with one query for the cache misses.
+        Returns the rows in request order plus the SKUs that don't exist.
+        POST is a read here, so viewers may use it too.
+        """
+        error = self.select_fields(request)
+        if error:
+            return Response({'error': error}, status=status.HTTP_400_BAD_REQUEST)
+
+        if request.method == 'POST':
+            skus = request.data.get('skus') if isinstance(request.data, dict) else None
+        else:
+            skus = request.query_params.get('skus', '').split(',')
+        if not isinstance(skus, list) or not all(isinstance(sku, str) for sku in skus):
+            return Response({'error': 'skus must be a list of SKU strings'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Keep the first occurrence of each SKU, in order
+        skus = list(dict.fromkeys(sku.strip() for sku in skus if sku.strip()))
+        if not skus:
+            return Response({'error': 'No SKUs given'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(skus) > MAX_BATCH_SKUS:
+            return Response(
+                {'error': f'At most {MAX_BATCH_SKUS} SKUs per request (got {len(skus)})'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        rows = self._rows_by_sku(skus)
+        return Response({
+            'results': [rows[sku] for sku in skus if sku in rows],
+            'missing': [sku for sku in skus if sku not in rows],
+        })
+
+    @action(detail=False, methods=['get'], url_path='autocomplete', url_name='autocomplete',
+            permission_classes=[IsAuthenticated])
+    def autocomplete(self, request):
+        """
+        GET /api/inventory/autocomplete/?q=ric&field=name&limit=10
+        Prefix suggestions from the in-memory index. ``field`` (repeatable or
+        comma separated) limits the answer to name, sku, category and/or
+        supplier. Categories and suppliers are ranked by item count, so an
+        empty ``q`` lists the most used ones (for pickers).
+        """
+        fields = [
+            field.strip() for value in request.query_params.getlist('field')
+            for field in value.split(',') if field.strip()
+        ] or list(autocomplete.FIELDS)
+        unknown = sorted(set(fields) - set(autocomplete.FIELDS))
+        if unknown:
+            return Response(
+                {'error': f"Unknown field(s): {', '.join(unknown)}. Use {', '.join(autocomplete.FIELDS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            limit = int(request.query_params.get('limit', AUTOCOMPLETE_LIMIT))
+        except ValueError:
+            return Response({'error': 'limit must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, MAX_AUTOCOMPLETE_LIMIT))
+
+        query = request.query_params.get('q', '')
+        return Response({
+            'query': query,
+            'results': autocomplete.index.suggest(query, fields, limit),
+        })
+
+    @action(detail=True, methods=['post'])
+    def allocate(self, request, pk=None):
+        """
+        POST /api/inventory/<id>/allocate/ {"quantity": 5, "include_expired": false}
+        Take stock from the item's lots, earliest expiry first. Returns the
+        lots taken from; 400 if the lots in date don't hold enough.
+        """
+        item = self.get_object()
+        data = request.data if isinstance(request.data, dict) else {}
+        quantity = data.get('quantity')
+        if isinstance(quantity, bool) or not isinstance(quantity, int) or quantity < 1:
+            return Response({'error': 'quantity must be a positive integer'}, status=status.HTTP_400_BAD_REQUEST)
+        include_expired = data.get('include_expired', False)
+        if not isinstance(include_expired, bool):
+            return Response({'error': 'include_expired must be true or false'}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            allocations = lots.allocate_fefo(item.pk, quantity, include_expired=include_expired)
+        except lots.InsufficientStock as e:
+            return Response(
+                {'error': str(e), 'requested': e.requested, 'available': e.available},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        logger.info(f"Allocated {quantity} of {item.sku} from {len(allocations)} lot(s)")
+        return Response({
+            'item': item.pk,
+            'sku': item.sku,
+            'allocated': quantity,
+            'lots': [
+                {'id': lot.pk, 'lot_number': lot.lot_number, 'expiry_date': lot.expiry_date,
+                 'taken': taken, 'remaining': lot.quantity}
+                for lot, taken in allocations
+            ],
+        })
+
     def create(self, request, *args, **kwargs):
         """
         Create a new inventory item.
@@ -92,4 +303,110 @@ class InventoryViewSet(ModelViewSet):
             return Response(status=status.HTTP_204_NO_CONTENT)
         except Exception as e:
             logger.error(f"Error deleting inventory item {sku}: {e}")
-            raise
\ No newline at end of file
+            raise
+
+class LotViewSet(ModelViewSet):
+    """
+    Lots (batches) of inventory items. Saving or deleting a lot updates its
+    item's quantity and expiry date (inventory/lots.py).
+
+    - GET /api/inventory/lots/?item=<id>
+    - GET /api/inventory/lots/expiring/?days=30  (lots in stock expiring within days, expired included)
+    """
+    queryset = Lot.objects.select_related('item')
+    serializer_class = LotSerializer
+    permission_classes = [IsAuthenticated, IsAdminOrReadOnly]
+    pagination_class = InventoryPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'list' and 'item' in self.request.query_params:
+            queryset = queryset.filter(item_id=self.request.query_params['item'])
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        item = request.query_params.get('item')
+        if item is not None and not item.isdigit():
+            return Response({'error': 'item must be an item id'}, status=status.HTTP_400_BAD_REQUEST)
+        return super().list(request, *args, **kwargs)
+
+    @action(detail=False, methods=['get'])
+    def expiring(self, request):
+        """Range scan of the partial expiry index, soonest first."""
+        try:
+            days = int(request.query_params.get('days', EXPIRING_DAYS))
+        except ValueError:
+            return Response({'error': 'days must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        days = max(0, min(days, MAX_EXPIRING_DAYS))
+
+        page = self.paginate_queryset(lots.expiring_lots(days))
+        return self.get_paginated_response(self.get_serializer(page, many=True).data)
+
+
+class PurchaseOrderViewSet(ReadOnlyModelViewSet):
+    """
+    Purchase orders. Drafts are generated by the reorder engine
+    (inventory/reorder.py), nightly or with POST generate/.
+
+    - GET  /api/inventory/purchase-orders/?status=draft
+    - GET  /api/inventory/purchase-orders/suggestions/?limit=100  (preview, nothing saved)
+    - POST /api/inventory/purchase-orders/generate/               (admin)
+    - POST /api/inventory/purchase-orders/<id>/send/ and cancel/  (admin)
+    """
+    queryset = PurchaseOrder.objects.select_related('supplier').prefetch_related('lines__item')
+    serializer_class = PurchaseOrderSerializer
+    permission_classes = [IsAuthenticated, IsAdminOrReadOnly]
+    pagination_class = InventoryPagination
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if 'status' in self.request.query_params:
+            queryset = queryset.filter(status=self.request.query_params['status'])
+        return queryset
+
+    @action(detail=False, methods=['get'])
+    def suggestions(self, request):
+        """Current reorder suggestions, low stock first, without touching the drafts."""
+        try:
+            limit = int(request.query_params.get('limit', SUGGESTION_LIMIT))
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, MAX_SUGGESTION_LIMIT))
+
+        columns, indices, quantities, low_stock = reorder.suggest()
+        # Low stock first, then the largest orders
+        order = np.lexsort((-quantities, ~low_stock))[:limit]
+        return Response({
+            'count': len(indices),
+            'low_stock': int(np.count_nonzero(low_stock)),
+            'results': reorder.suggestion_rows(columns, indices[order], quantities[order], low_stock[order]),
+        })
+
+    @action(detail=False, methods=['post'])
+    def generate(self, request):
+        """Replace the draft purchase orders with the current suggestions."""
+        summary = reorder.generate_purchase_orders()
+        logger.info(f"Purchase orders generated by {request.user}: {summary}")
+        return Response(summary)
+
+    @action(detail=True, methods=['post'])
+    def send(self, request, pk=None):
+        """Mark a draft as sent: its lines now count as stock on order."""
+        return self._move(PurchaseOrder.STATUS_SENT, allowed_from=[PurchaseOrder.STATUS_DRAFT])
+
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        return self._move(
+            PurchaseOrder.STATUS_CANCELLED, allowed_from=[PurchaseOrder.STATUS_DRAFT, PurchaseOrder.STATUS_SENT]
+        )
+
+    def _move(self, target, allowed_from):
+        order = self.get_object()
+        if order.status not in allowed_from:
+            return Response(
+                {'error': f'Cannot change a {order.status} purchase order to {target}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        order.status = target
+        order.save(update_fields=['status', 'updated_at'])
+        return Response(self.get_serializer(order).data)
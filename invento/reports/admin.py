@@ -1,3 +1,11 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import ReportExport
+
+
+@admin.register(ReportExport)
+class ReportExportAdmin(admin.ModelAdmin):
+    list_display = ('id', 'file_format', 'status', 'total_rows', 'partitions', 'workers', 'created_by', 'created_at')
+    list_filter = ('status', 'file_format')
+    list_select_related = ('created_by',)
+    readonly_fields = [field.name for field in ReportExport._meta.fields]
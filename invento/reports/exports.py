@@ -0,0 +1,333 @@
+"""
+Parallel partitioned inventory exports.
+
+``run_export`` splits the filtered inventory into primary-key ranges of
+``REPORT_EXPORTS['PARTITION_ROWS']`` rows (one index-only pass over the
+primary keys), formats each range in a process pool and joins the parts:
+
+- CSV: the header plus the parts concatenated in key order, one file
+- xlsx: one workbook per part (each fits the 1,048,576-row sheet limit),
+  zipped together
+
+Formatting is what bounds a single-process export, so wall time scales down
+with ``REPORT_EXPORTS['WORKERS']`` (default: every core). Workers are spawned,
+set Django up and open their own database connections. Progress is written to
+the ``ReportExport`` row after every partition, for the progress endpoint.
+
+Exports requested through the API are queued as ``pending`` rows and run one
+at a time, oldest first, by ``manage.py runexports`` (``claim_next``), so a
+web worker never holds an export and at most ``WORKERS`` formatting
+processes run per export worker. The API takes one unfinished export per
+user and ``REPORT_EXPORTS['MAX_QUEUED']`` in all. Each running export
+records the ``host:pid`` of its process; when an export worker starts it
+fails the exports left ``running`` by a stopped process on its host
+(``fail_interrupted``). ``manage.py export_inventory``
+runs an export in the foreground instead.
+
+Files are written to ``REPORT_EXPORTS['DIR']``, outside ``MEDIA_ROOT``, and
+only served by ``GET /api/reports/exports/<id>/file/`` to the export's owner
+or an admin.
+"""
+import csv
+import io
+import logging
+import os
+import shutil
+import socket
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, timedelta
+from multiprocessing import get_context
+from time import perf_counter
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EXPORT_SETTINGS = {
+    'DIR': '',
+    # 0: one worker per core
+    'WORKERS': 0,
+    'PARTITION_ROWS': 250_000,
+    'MAX_AGE_HOURS': 24,
+    # Pending and running exports accepted from the API, in all
+    'MAX_QUEUED': 10,
+    # Seconds the export worker sleeps when nothing is pending
+    'POLL_INTERVAL': 2,
+}
+
+EXPORT_FIELDS = (
+    'name', 'sku', 'category__name', 'quantity', 'unit_price',
+    'supplier__name', 'reorder_level', 'expiry_date', 'created_at',
+)
+EXPORT_HEADERS = (
+    'Name', 'SKU', 'Category', 'Quantity', 'Unit Price',
+    'Supplier', 'Reorder Level', 'Expiry Date', 'Created At',
+)
+FILTERS = ('start_date', 'end_date', 'status')
+FORMATS = ('csv', 'xlsx')
+
+# Primary keys read per round trip while partitioning
+PK_CHUNK_SIZE = 50_000
+
+# Rows formatted per chunk of a streamed CSV download
+STREAM_CHUNK_ROWS = 2000
+
+
+def export_settings():
+    """Return ``settings.REPORT_EXPORTS`` merged over the defaults."""
+    config = {**DEFAULT_EXPORT_SETTINGS, **getattr(settings, 'REPORT_EXPORTS', {})}
+    config['DIR'] = str(config['DIR'] or os.path.join(settings.BASE_DIR, 'exports'))
+    config['WORKERS'] = config['WORKERS'] or os.cpu_count() or 1
+    return config
+
+
+def filtered_queryset(filters, today=None):
+    """
+    The inventory rows of a report with ``filters``: ``start_date``/``end_date``
+    (created on or after / on or before) and ``status`` (in_stock, low_stock,
+    expired).
+    """
+    from inventory.models import Inventory
+
+    queryset = Inventory.objects.all()
+    if filters.get('start_date'):
+        queryset = queryset.filter(created_at__date__gte=filters['start_date'])
+    if filters.get('end_date'):
+        queryset = queryset.filter(created_at__date__lte=filters['end_date'])
+
+    status_filter = filters.get('status')
+    if status_filter == 'low_stock':
+        queryset = queryset.filter(quantity__lte=F('reorder_level'))
+    elif status_filter == 'expired':
+        queryset = queryset.filter(expiry_date__lt=today or timezone.now().date())
+    elif status_filter == 'in_stock':
+        queryset = queryset.filter(quantity__gt=F('reorder_level'))
+    return queryset
+
+
+def partition_bounds(queryset, partition_rows):
+    """
+    ``(total rows, [(first pk, last pk), ...])`` splitting ``queryset`` into
+    key ranges of ``partition_rows`` rows. An empty queryset gets one empty
+    range, so every export has at least one part (the xlsx header).
+    """
+    pks = queryset.order_by('pk').values_list('pk', flat=True).iterator(chunk_size=PK_CHUNK_SIZE)
+    pks = np.fromiter(pks, dtype=np.int64)
+    if not len(pks):
+        return 0, [(0, 0)]
+    firsts = pks[::partition_rows]
+    lasts = np.append(pks[partition_rows - 1::partition_rows], pks[-1])[:len(firsts)]
+    return len(pks), list(zip(firsts.tolist(), lasts.tolist()))
+
+
+def report_frame(rows):
+    """DataFrame of ``EXPORT_FIELDS`` rows with the report headers."""
+    return pd.DataFrame(rows, columns=EXPORT_HEADERS)
+
+
+def write_xlsx(frame, target):
+    # Excel has no time zones: write the datetimes as naive UTC
+    for column in frame.columns:
+        if getattr(frame[column].dtype, 'tz', None) is not None:
+            frame[column] = frame[column].dt.tz_localize(None)
+    frame.to_excel(target, index=False, engine='openpyxl')
+
+
+def format_partition(file_format, filters, today, first, last, target):
+    """Write the rows with keys ``first``..``last`` to ``target``; returns the row count. Runs in a worker."""
+    rows = list(
+        filtered_queryset(filters, today).filter(pk__range=(first, last))
+        .order_by('pk').values_list(*EXPORT_FIELDS)
+    )
+    frame = report_frame(rows)
+    if file_format == 'xlsx':
+        write_xlsx(frame, target)
+    else:
+        frame.to_csv(target, index=False, header=False)
+    return len(rows)
+
+
+def csv_chunks(queryset, chunk_rows=STREAM_CHUNK_ROWS):
+    """
+    The report CSV of ``queryset`` (same columns and formatting as the
+    pandas download) as UTF-8 chunks of ``chunk_rows`` rows, read with a
+    server-side iterator so nothing holds the whole file.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(EXPORT_HEADERS)
+    rows = queryset.order_by('pk').values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_rows)
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if count % chunk_rows == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def _init_worker(settings_module):
+    os.environ['DJANGO_SETTINGS_MODULE'] = settings_module
+    import django
+
+    django.setup()
+
+
+def _format_all(export, bounds, workers, parts_dir, today):
+    """Format every partition, in a process pool unless there is only one; yields ``(index, rows)``."""
+    extension = 'xlsx' if export.file_format == 'xlsx' else 'csv'
+    tasks = [
+        (export.file_format, export.filters, today, first, last, os.path.join(parts_dir, f'part-{index:05d}.{extension}'))
+        for index, (first, last) in enumerate(bounds)
+    ]
+    if workers == 1 or len(tasks) == 1:
+        for index, task in enumerate(tasks):
+            yield index, format_partition(*task)
+        return
+
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(tasks)),
+        # Spawned, not forked: no inherited database connections or locks
+        mp_context=get_context('spawn'),
+        initializer=_init_worker,
+        initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'core.settings'),),
+    ) as pool:
+        futures = {pool.submit(format_partition, *task): index for index, task in enumerate(tasks)}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+def _join(export, parts, target):
+    if export.file_format == 'xlsx':
+        # Workbooks are already deflated
+        with zipfile.ZipFile(target, 'w', compression=zipfile.ZIP_STORED) as archive:
+            for index, part in enumerate(parts, start=1):
+                archive.write(part, f'inventory_report_part_{index:03d}.xlsx')
+        return
+    with open(target, 'wb') as output:
+        output.write(report_frame([]).to_csv(index=False).encode())
+        for part in parts:
+            with open(part, 'rb') as source:
+                shutil.copyfileobj(source, output, 1024 * 1024)
+
+
+def run_export(export_id, workers=None):
+    """Run the export ``export_id`` to completion (or failure); returns the updated ``ReportExport``."""
+    from .models import ReportExport
+
+    config = export_settings()
+    workers = workers or config['WORKERS']
+    export = ReportExport.objects.get(pk=export_id)
+    today = date.fromisoformat(export.filters['as_of']) if export.filters.get('as_of') else timezone.now().date()
+    parts_dir = os.path.join(config['DIR'], f'export-{export.pk}')
+    start = perf_counter()
+    try:
+        total_rows, bounds = partition_bounds(filtered_queryset(export.filters, today), config['PARTITION_ROWS'])
+        ReportExport.objects.filter(pk=export.pk).update(
+            status=ReportExport.STATUS_RUNNING, started_at=timezone.now(),
+            total_rows=total_rows, partitions=len(bounds), workers=min(workers, len(bounds)),
+        )
+        os.makedirs(parts_dir, exist_ok=True)
+        for index, rows in _format_all(export, bounds, workers, parts_dir, today):
+            ReportExport.objects.filter(pk=export.pk).update(
+                rows_done=F('rows_done') + rows, partitions_done=F('partitions_done') + 1,
+            )
+
+        extension = 'zip' if export.file_format == 'xlsx' else 'csv'
+        file_name = f"inventory_report_{export.pk}_{timezone.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
+        parts = sorted(os.path.join(parts_dir, name) for name in os.listdir(parts_dir))
+        _join(export, parts, os.path.join(config['DIR'], file_name))
+        ReportExport.objects.filter(pk=export.pk).update(
+            status=ReportExport.STATUS_DONE, file_name=file_name, finished_at=timezone.now(),
+        )
+        logger.info(
+            f'Export {export.pk} done: {total_rows} rows in {len(bounds)} partition(s), '
+            f'{min(workers, len(bounds))} worker(s), {perf_counter() - start:.2f}s'
+        )
+    except Exception as e:
+        logger.exception(f'Export {export.pk} failed')
+        ReportExport.objects.filter(pk=export.pk).update(
+            status=ReportExport.STATUS_FAILED, error=str(e), finished_at=timezone.now(),
+        )
+    finally:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+    export.refresh_from_db()
+    return export
+
+
+def worker_id():
+    """This process as ``host:pid``, recorded on the exports it runs."""
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _process_exists(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Exists, owned by another user
+        return True
+    return True
+
+
+def claim_next():
+    """Mark the oldest pending export running; returns its id, or None when nothing is pending."""
+    from .models import ReportExport
+
+    pending = ReportExport.objects.filter(status=ReportExport.STATUS_PENDING)
+    for export_id in pending.order_by('created_at', 'pk').values_list('pk', flat=True)[:10]:
+        # Another worker may have claimed it meanwhile
+        claimed = pending.filter(pk=export_id).update(
+            status=ReportExport.STATUS_RUNNING, started_at=timezone.now(), worker=worker_id(),
+        )
+        if claimed:
+            return export_id
+    return None
+
+
+def fail_interrupted():
+    """
+    Fail the exports left running by a process of this host that stopped;
+    returns how many. Exports run on other hosts, or by live processes here
+    (other export workers, ``manage.py export_inventory``), are left alone.
+    Call it before this process claims anything: an export recorded under its
+    own pid was left by an earlier process that had the same pid.
+    """
+    from .models import ReportExport
+
+    host, _, pid = worker_id().rpartition(':')
+    interrupted = []
+    running = ReportExport.objects.filter(status=ReportExport.STATUS_RUNNING, worker__startswith=f'{host}:')
+    for export_id, worker in running.values_list('pk', 'worker'):
+        worker_pid = worker.rpartition(':')[2]
+        if worker_pid == pid or not (worker_pid.isdigit() and _process_exists(int(worker_pid))):
+            interrupted.append(export_id)
+    return ReportExport.objects.filter(pk__in=interrupted, status=ReportExport.STATUS_RUNNING).update(
+        status=ReportExport.STATUS_FAILED,
+        error='Interrupted: the export worker stopped before it finished',
+        finished_at=timezone.now(),
+    )
+
+
+def delete_old_exports(max_age_hours=None):
+    """Delete exports (rows and files) created more than ``max_age_hours`` ago; returns how many."""
+    from .models import ReportExport
+
+    config = export_settings()
+    cutoff = timezone.now() - timedelta(hours=max_age_hours or config['MAX_AGE_HOURS'])
+    old = ReportExport.objects.filter(created_at__lt=cutoff)
+    for export in old.only('pk', 'file_name'):
+        if export.file_name:
+            try:
+                os.remove(os.path.join(config['DIR'], export.file_name))
+            except FileNotFoundError:
+                pass
+        shutil.rmtree(os.path.join(config['DIR'], f'export-{export.pk}'), ignore_errors=True)
+    deleted, _ = old.delete()
+    return deleted
@@ -0,0 +1,20 @@
+"""
+Periodic jobs for the reports app.
+Discovered and scheduled by ``python manage.py runapscheduler``.
+"""
+import logging
+
+from apscheduler.triggers.cron import CronTrigger
+
+from core.scheduler import periodic_job
+from reports.exports import delete_old_exports
+
+logger = logging.getLogger(__name__)
+
+
+@periodic_job('delete_old_report_exports', CronTrigger(minute=30))
+def delete_old_report_exports():
+    """Delete parallel exports (and their files) older than REPORT_EXPORTS['MAX_AGE_HOURS']"""
+    deleted = delete_old_exports()
+    if deleted:
+        logger.info(f'Deleted {deleted} old report export(s)')
@@ -0,0 +1,55 @@
+"""
+Export Worker Management Command
+Runs the report exports queued through POST /api/reports/exports/
+(reports/exports.py), one at a time, oldest first, each formatted by up to
+REPORT_EXPORTS['WORKERS'] processes. Sleeps REPORT_EXPORTS['POLL_INTERVAL']
+seconds whenever the queue is empty. On start it fails the exports left
+unfinished by stopped processes on its host; exports of live workers are
+left running.
+
+Run manually: python manage.py runexports
+"""
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from reports import exports
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Run the queued report exports'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run the queued exports and exit')
+
+    def handle(self, *args, **options):
+        config = exports.export_settings()
+        interrupted = exports.fail_interrupted()
+        if interrupted:
+            logger.warning(f'Marked {interrupted} interrupted export(s) as failed')
+        self.stdout.write(self.style.SUCCESS('Running report exports...'))
+        try:
+            while True:
+                try:
+                    export_id = exports.claim_next()
+                    if export_id is not None:
+                        exports.run_export(export_id)
+                except Exception:
+                    logger.exception('Export worker pass failed')
+                    export_id = None
+                finally:
+                    # Like the end of a request: drop broken or expired connections
+                    for connection in connections.all(initialized_only=True):
+                        connection.close_if_unusable_or_obsolete()
+                if export_id is None:
+                    if options['once']:
+                        break
+                    time.sleep(config['POLL_INTERVAL'])
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('Stopping the export worker...'))
+        finally:
+            connections.close_all()
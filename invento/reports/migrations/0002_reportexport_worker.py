@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-19 03:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='reportexport',
+            name='worker',
+            field=models.CharField(blank=True, max_length=255),
+        ),
+    ]
@@ -1,3 +1,53 @@
+from django.conf import settings
 from django.db import models
 
-# Create your models here.
+
+class ReportExport(models.Model):
+    """
+    A parallel inventory export (reports/exports.py): its filters, progress
+    and, once done, the file it wrote.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_DONE, 'Done'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='report_exports'
+    )
+    file_format = models.CharField(max_length=10)
+    # The download filters (start_date, end_date, status) and the as_of date for 'expired'
+    filters = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    total_rows = models.PositiveIntegerField(default=0)
+    rows_done = models.PositiveIntegerField(default=0)
+    partitions = models.PositiveIntegerField(default=0)
+    partitions_done = models.PositiveIntegerField(default=0)
+    workers = models.PositiveIntegerField(default=0)
+    # host:pid of the process running it (reports.exports.worker_id)
+    worker = models.CharField(max_length=255, blank=True)
+    # Relative to REPORT_EXPORTS['DIR']
+    file_name = models.CharField(max_length=255, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"Export {self.pk} ({self.file_format}, {self.status})"
+
+    @property
+    def progress(self):
+        """Share of the rows formatted so far (0-1)."""
+        if self.status == self.STATUS_DONE:
+            return 1.0
+        return round(self.rows_done / self.total_rows, 4) if self.total_rows else 0.0
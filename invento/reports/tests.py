@@ -1,3 +1,174 @@
-from django.test import TestCase
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
 
-# Create your tests here.
+from django.conf import settings
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import User
+from inventory.models import Category, Inventory
+from . import exports
+from .models import ReportExport
+
+EXPORT_DIR = tempfile.mkdtemp(prefix='invento-report-tests-')
+
+
+def _create_items(count):
+    category = Category.objects.create(name='Pantry')
+    for index in range(count):
+        Inventory.objects.create(
+            name=f'Item, "{index}"', sku=f'REP-{index:03d}', quantity=index, unit_price='1.25',
+            reorder_level=5, category=category if index % 2 else None,
+        )
+
+
+class PartitionBoundsTests(TestCase):
+    def test_empty_queryset_gets_one_empty_partition(self):
+        self.assertEqual(exports.partition_bounds(Inventory.objects.all(), 10), (0, [(0, 0)]))
+
+    def test_ranges_cover_every_row_once(self):
+        _create_items(7)
+        pks = list(Inventory.objects.order_by('pk').values_list('pk', flat=True))
+
+        for partition_rows, sizes in ((3, [3, 3, 1]), (7, [7]), (1, [1] * 7), (100, [7])):
+            with self.subTest(partition_rows=partition_rows):
+                total, bounds = exports.partition_bounds(Inventory.objects.all(), partition_rows)
+                self.assertEqual(total, 7)
+                self.assertEqual([len([pk for pk in pks if first <= pk <= last]) for first, last in bounds], sizes)
+                self.assertEqual((bounds[0][0], bounds[-1][1]), (pks[0], pks[-1]))
+
+    def test_ranges_follow_the_filter_across_key_gaps(self):
+        _create_items(6)
+        Inventory.objects.filter(sku__in=['REP-001', 'REP-002']).delete()
+        low_stock = exports.filtered_queryset({'status': 'low_stock'})
+
+        total, bounds = exports.partition_bounds(low_stock, 2)
+
+        # Quantities 0, 3, 4 and 5 are at or below the reorder level
+        pks = list(low_stock.order_by('pk').values_list('pk', flat=True))
+        self.assertEqual(total, 4)
+        self.assertEqual(bounds, [(pks[0], pks[1]), (pks[2], pks[3])])
+
+
+@override_settings(REPORT_EXPORTS={'DIR': EXPORT_DIR, 'PARTITION_ROWS': 3})
+class RunExportTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(EXPORT_DIR, ignore_errors=True)
+        super().tearDownClass()
+
+    def test_partitioned_csv_equals_the_serial_report(self):
+        _create_items(8)
+        export = ReportExport.objects.create(file_format='csv', status=ReportExport.STATUS_RUNNING)
+
+        # One process: the pool runs the same format_partition per range
+        export = exports.run_export(export.pk, workers=1)
+
+        self.assertEqual((export.status, export.partitions, export.rows_done), (ReportExport.STATUS_DONE, 3, 8))
+        with open(os.path.join(EXPORT_DIR, export.file_name), 'rb') as export_file:
+            partitioned = export_file.read()
+        rows = list(Inventory.objects.order_by('pk').values_list(*exports.EXPORT_FIELDS))
+        self.assertEqual(partitioned, exports.report_frame(rows).to_csv(index=False).encode())
+        self.assertEqual(partitioned, b''.join(exports.csv_chunks(Inventory.objects.all())))
+
+    def test_worker_claims_the_oldest_pending_export(self):
+        first = ReportExport.objects.create(file_format='csv')
+        second = ReportExport.objects.create(file_format='csv')
+
+        self.assertEqual([exports.claim_next(), exports.claim_next(), exports.claim_next()], [first.pk, second.pk, None])
+        self.assertEqual(
+            set(ReportExport.objects.values_list('status', 'worker')),
+            {(ReportExport.STATUS_RUNNING, exports.worker_id())},
+        )
+
+    def test_fails_only_the_exports_of_stopped_processes_on_this_host(self):
+        host = socket.gethostname()
+        stopped = subprocess.Popen([sys.executable, '-c', ''])
+        stopped.wait()
+        workers = {
+            'stopped': f'{host}:{stopped.pid}',
+            # An earlier process that had this pid
+            'same_pid': exports.worker_id(),
+            'live': f'{host}:{os.getppid()}',
+            'other_host': f'not-{host}:{stopped.pid}',
+            'unrecorded': '',
+        }
+        running = {
+            name: ReportExport.objects.create(file_format='csv', status=ReportExport.STATUS_RUNNING, worker=worker)
+            for name, worker in workers.items()
+        }
+
+        self.assertEqual(exports.fail_interrupted(), 2)
+        statuses = {name: ReportExport.objects.get(pk=export.pk).status for name, export in running.items()}
+        self.assertEqual(statuses, {
+            'stopped': ReportExport.STATUS_FAILED,
+            'same_pid': ReportExport.STATUS_FAILED,
+            'live': ReportExport.STATUS_RUNNING,
+            'other_host': ReportExport.STATUS_RUNNING,
+            'unrecorded': ReportExport.STATUS_RUNNING,
+        })
+
+
+@override_settings(REPORT_EXPORTS={'DIR': EXPORT_DIR, 'MAX_QUEUED': 2})
+class ExportQueueTests(TestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(email=f'viewer{index}@example.com', password='pw')
+            for index in range(3)
+        ]
+
+    def post(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        return client.post('/api/reports/exports/', {'file_format': 'csv'}, format='json')
+
+    def test_one_unfinished_export_per_user_and_a_global_cap(self):
+        self.assertEqual(self.post(self.users[0]).status_code, 202)
+        self.assertEqual(self.post(self.users[0]).status_code, 409)
+        self.assertEqual(self.post(self.users[1]).status_code, 202)
+        self.assertEqual(self.post(self.users[2]).status_code, 429)
+
+        ReportExport.objects.filter(created_by=self.users[0]).update(status=ReportExport.STATUS_DONE)
+        self.assertEqual(self.post(self.users[2]).status_code, 202)
+        self.assertEqual(ReportExport.objects.filter(status=ReportExport.STATUS_PENDING).count(), 2)
+
+
+@override_settings(REPORT_EXPORTS={'DIR': EXPORT_DIR}, PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ExportFileTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(email='owner@example.com', password='pw')
+        self.export = ReportExport.objects.create(
+            created_by=self.owner, file_format='csv', status=ReportExport.STATUS_DONE, file_name='exported.csv',
+        )
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        with open(os.path.join(EXPORT_DIR, self.export.file_name), 'wb') as export_file:
+            export_file.write(b'Name\r\n')
+
+    def tearDown(self):
+        os.remove(os.path.join(EXPORT_DIR, self.export.file_name))
+
+    def client_for(self, user):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(user).access_token}')
+        return client
+
+    def test_default_dir_is_outside_media_root(self):
+        with override_settings(REPORT_EXPORTS={}):
+            export_dir = exports.export_settings()['DIR']
+        media_root = os.path.abspath(settings.MEDIA_ROOT)
+        self.assertNotEqual(os.path.commonpath([media_root, os.path.abspath(export_dir)]), media_root)
+
+    def test_files_are_only_served_to_the_owner(self):
+        self.assertEqual(APIClient().get(f'/media/exports/{self.export.file_name}').status_code, 404)
+        self.assertEqual(APIClient().get(f'/api/reports/exports/{self.export.pk}/file/').status_code, 401)
+        other = User.objects.create_user(email='other@example.com', password='pw')
+        self.assertEqual(self.client_for(other).get(f'/api/reports/exports/{self.export.pk}/file/').status_code, 404)
+
+        response = self.client_for(self.owner).get(f'/api/reports/exports/{self.export.pk}/file/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'Name\r\n')
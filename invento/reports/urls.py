@@ -6,13 +6,17 @@ Endpoints:
     GET /api/reports/           - List available report endpoints
     GET /api/reports/download/  - Download CSV or Excel report
     GET /api/reports/summary/   - Get report summary statistics
+    GET /api/reports/summary/async/ - The same summary, queries run concurrently (ASGI)
 """
+from django.urls import path
 from rest_framework.routers import DefaultRouter
-from .views import ReportsViewSet
+from .views import AsyncReportSummaryView, ReportsViewSet
 
 # Create router and register viewset
 router = DefaultRouter()
 router.register(r'', ReportsViewSet, basename='reports')
 
 # Use router URLs
-urlpatterns = router.urls
\ No newline at end of file
+urlpatterns = [
+    path('summary/async/', AsyncReportSummaryView.as_view(), name='reports-summary-async'),
+] + router.urls
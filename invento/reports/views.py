@@ -2,16 +2,76 @@
 Reports Views - Inventory Report Generation
 Provides CSV and Excel export functionality for inventory data.
 """
+import logging
+import os
+from datetime import date
+from functools import partial
+
 import pandas as pd
-from django.http import HttpResponse
+from asgiref.sync import sync_to_async
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import F
+from django.db.models import Count, F, Q, Sum
 from django.utils.timezone import now
 
-from inventory.models import Inventory
+from inventory import analytics, snapshot
+from core import compression
+from core.aio import AsyncAPIView, gather_queries
+from core.metrics import span
+from . import exports
+from .models import ReportExport
+
+logger = logging.getLogger(__name__)
+
+# Items returned by analytics (default / maximum)
+ANALYTICS_LIMIT = 100
+MAX_ANALYTICS_LIMIT = 1000
+
+INVALID_DATE = {'error': 'Invalid date. Use YYYY-MM-DD.'}
+
+
+def _total_value(queryset):
+    return queryset.aggregate(total=Sum(F('quantity') * F('unit_price')))['total'] or 0
+
+
+def summary_queries(queryset):
+    """The summary stats of ``queryset`` (items, value, low stock, expired) as independent queries."""
+    return [
+        queryset.count,
+        partial(_total_value, queryset),
+        queryset.filter(quantity__lte=F('reorder_level')).count,
+        queryset.filter(expiry_date__lt=now().date()).count,
+    ]
+
+
+def snapshot_summary(params):
+    """
+    The summary stats from the in-memory analytics snapshot
+    (inventory/snapshot.py); ValueError for a malformed date.
+    """
+    start_date, end_date = (
+        date.fromisoformat(params[param]) if params.get(param) else None
+        for param in ('start_date', 'end_date')
+    )
+    totals = snapshot.shared.totals(now().date(), start_date, end_date, params.get('status'))
+    return totals['item_count'], totals['total_value'], totals['low_stock_count'], totals['expired_count']
+
+
+def summary_data(request, total_items, total_value, low_stock_count, expired_count):
+    return {
+        'total_items': total_items,
+        'total_value': float(total_value),
+        'low_stock_count': low_stock_count,
+        'expired_count': expired_count,
+        'filters_applied': {
+            'start_date': request.query_params.get('start_date'),
+            'end_date': request.query_params.get('end_date'),
+            'status': request.query_params.get('status'),
+        }
+    }
 
 
 class ReportsViewSet(viewsets.ViewSet):
@@ -21,8 +81,17 @@ class ReportsViewSet(viewsets.ViewSet):
     Endpoints:
         GET /api/reports/download/ - Download inventory report (CSV or XLSX)
         GET /api/reports/summary/ - Get report summary statistics
+        GET /api/reports/summary/async/ - The same summary, async (AsyncReportSummaryView)
+        GET /api/reports/analytics/ - ABC class, turnover and days of supply per item
+        POST /api/reports/exports/ - Start a parallel export (large reports)
+        GET /api/reports/exports/<id>/ - Export progress
+        GET /api/reports/exports/<id>/file/ - Download a finished export
     """
     permission_classes = [IsAuthenticated]
+    read_from_replica = True
+    # The export worker updates these rows on the primary: a lagging replica
+    # would report stale progress or 404 on a just-created export
+    primary_actions = ('export_progress', 'export_file')
 
     def list(self, request):
         """
@@ -31,8 +100,10 @@ class ReportsViewSet(viewsets.ViewSet):
         """
         return Response({
             'endpoints': {
-                'download': '/api/reports/download/?format=csv|xlsx&start_date=YYYY-MM-DD&end_date=YYYY-MM-DD',
+                'download': '/api/reports/download/?format=csv|xlsx&compress=gzip|zip&start_date=YYYY-MM-DD&end_date=YYYY-MM-DD',
                 'summary': '/api/reports/summary/',
+                'analytics': '/api/reports/analytics/?days=90&abc_class=A|B|C&limit=100&offset=0',
+                'exports': '/api/reports/exports/ (POST {"file_format": "csv|xlsx", "start_date", "end_date", "status"})',
             },
             'available_formats': ['csv', 'xlsx'],
             'filters': ['start_date', 'end_date', 'status']
@@ -47,27 +118,7 @@ class ReportsViewSet(viewsets.ViewSet):
             end_date: Filter items created on or before this date
             status: Filter by stock status (in_stock, low_stock, expired)
         """
-        queryset = Inventory.objects.all()
-        
-        # Date filters
-        start_date = request.query_params.get('start_date')
-        end_date = request.query_params.get('end_date')
-        status_filter = request.query_params.get('status')
-        
-        if start_date:
-            queryset = queryset.filter(created_at__date__gte=start_date)
-        if end_date:
-            queryset = queryset.filter(created_at__date__lte=end_date)
-        
-        # Status filter
-        if status_filter == 'low_stock':
-            queryset = queryset.filter(quantity__lte=F('reorder_level'))
-        elif status_filter == 'expired':
-            queryset = queryset.filter(expiry_date__lt=now().date())
-        elif status_filter == 'in_stock':
-            queryset = queryset.filter(quantity__gt=F('reorder_level'))
-        
-        return queryset
+        return exports.filtered_queryset(request.query_params)
 
     @action(detail=False, methods=['get'], url_path='download', url_name='download')
     def download(self, request):
@@ -78,6 +129,8 @@ class ReportsViewSet(viewsets.ViewSet):
         
         Query Parameters:
             file_format: 'csv' or 'xlsx' (default: csv)
+            compress: 'gzip' (.csv.gz) or 'zip' (.zip), csv only: streamed,
+                compressed chunk by chunk as the rows are read
             start_date: Filter start date (YYYY-MM-DD)
             end_date: Filter end date (YYYY-MM-DD)
             status: Filter by status (in_stock, low_stock, expired)
@@ -98,31 +151,29 @@ class ReportsViewSet(viewsets.ViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        compress = request.query_params.get('compress', '').lower()
+        if compress and (compress not in ('gzip', 'zip') or format_type != 'csv'):
+            return Response(
+                {'error': 'compress must be gzip or zip, with file_format=csv.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
         # Get filtered queryset
         queryset = self._get_filtered_queryset(request)
+        if compress:
+            return self._compressed_csv(queryset, compress)
         
         # Extract data for report
-        data = queryset.values(
-            'name',
-            'sku',
-            'category',
-            'quantity',
-            'unit_price',
-            'supplier',
-            'reorder_level',
-            'expiry_date',
-            'created_at'
-        )
-        
-        # Create DataFrame
-        df = pd.DataFrame(list(data))
+        data = queryset.values(*exports.EXPORT_FIELDS)
         
-        # Rename columns for better readability
-        if not df.empty:
-            df.columns = [
-                'Name', 'SKU', 'Category', 'Quantity', 'Unit Price',
-                'Supplier', 'Reorder Level', 'Expiry Date', 'Created At'
-            ]
+        # Create DataFrame (query runs first so pandas time is measured on its own)
+        rows = list(data)
+        with span('pandas'):
+            df = pd.DataFrame(rows)
+            
+            # Rename columns for better readability
+            if not df.empty:
+                df.columns = list(exports.EXPORT_HEADERS)
         
         # Generate filename with timestamp
         timestamp = now().strftime('%Y%m%d_%H%M%S')
@@ -132,14 +183,15 @@ class ReportsViewSet(viewsets.ViewSet):
             try:
                 from io import BytesIO
                 
-                # Convert timezone-aware datetimes to timezone-naive for Excel compatibility
-                for col in df.columns:
-                    if df[col].dtype == 'datetime64[ns, UTC]' or (hasattr(df[col].dtype, 'tz') and df[col].dtype.tz is not None):
-                        df[col] = df[col].dt.tz_localize(None)
-                
-                buffer = BytesIO()
-                df.to_excel(buffer, index=False, engine='openpyxl')
-                buffer.seek(0)
+                with span('pandas'):
+                    # Convert timezone-aware datetimes to timezone-naive for Excel compatibility
+                    for col in df.columns:
+                        if df[col].dtype == 'datetime64[ns, UTC]' or (hasattr(df[col].dtype, 'tz') and df[col].dtype.tz is not None):
+                            df[col] = df[col].dt.tz_localize(None)
+                    
+                    buffer = BytesIO()
+                    df.to_excel(buffer, index=False, engine='openpyxl')
+                    buffer.seek(0)
                 
                 response = HttpResponse(
                     buffer.getvalue(),
@@ -147,40 +199,220 @@ class ReportsViewSet(viewsets.ViewSet):
                 )
                 response['Content-Disposition'] = f'attachment; filename="inventory_report_{timestamp}.xlsx"'
             except Exception as e:
-                import traceback
-                print(f"XLSX Error: {e}")
-                traceback.print_exc()
+                logger.exception('XLSX report failed')
                 return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
         else:
             # CSV export (default)
             response = HttpResponse(content_type='text/csv')
             response['Content-Disposition'] = f'attachment; filename="inventory_report_{timestamp}.csv"'
-            df.to_csv(response, index=False)
+            with span('pandas'):
+                df.to_csv(response, index=False)
         
         return response
 
+    def _compressed_csv(self, queryset, compress):
+        timestamp = now().strftime('%Y%m%d_%H%M%S')
+        chunks = exports.csv_chunks(queryset)
+        if compress == 'zip':
+            stream = compression.zip_stream(f'inventory_report_{timestamp}.csv', chunks)
+            content_type, file_name = 'application/zip', f'inventory_report_{timestamp}.zip'
+        else:
+            stream = compression.gzip_stream(chunks)
+            content_type, file_name = 'application/gzip', f'inventory_report_{timestamp}.csv.gz'
+        response = StreamingHttpResponse(stream, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{file_name}"'
+        return response
+
     @action(detail=False, methods=['get'], url_path='summary', url_name='summary')
     def summary(self, request):
         """
         GET /api/reports/summary/
         
         Get summary statistics for inventory report.
+        ``?source=snapshot`` computes them from the in-memory analytics
+        snapshot (inventory/snapshot.py) instead of querying the table.
         """
-        queryset = self._get_filtered_queryset(request)
-        
-        total_items = queryset.count()
-        total_value = sum(item.quantity * item.unit_price for item in queryset)
-        low_stock_count = queryset.filter(quantity__lte=F('reorder_level')).count()
-        expired_count = queryset.filter(expiry_date__lt=now().date()).count()
-        
+        if request.query_params.get('source') == 'snapshot':
+            try:
+                totals = snapshot_summary(request.query_params)
+            except ValueError:
+                return Response(INVALID_DATE, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            totals = [query() for query in summary_queries(self._get_filtered_queryset(request))]
+        return Response(summary_data(request, *totals))
+
+    @action(detail=False, methods=['get'], url_path='analytics', url_name='analytics')
+    def analytics(self, request):
+        """
+        GET /api/reports/analytics/
+
+        ABC classification, stock turnover and days of supply for the whole
+        catalogue (see inventory/analytics.py), computed in one vectorized
+        pass and cached per data version.
+
+        Query Parameters:
+            days: Consumption window in days (default 90, 1-3650)
+            abc_class: Only items of this class (A, B or C)
+            limit: Items returned, highest value first (default 100, max 1000)
+            offset: Items skipped (default 0)
+        """
+        try:
+            days = int(request.query_params.get('days', analytics.DEFAULT_WINDOW_DAYS))
+            limit = int(request.query_params.get('limit', ANALYTICS_LIMIT))
+            offset = int(request.query_params.get('offset', 0))
+        except ValueError:
+            return Response(
+                {'error': 'days, limit and offset must be integers.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not 1 <= days <= 3650 or not 1 <= limit <= MAX_ANALYTICS_LIMIT or offset < 0:
+            return Response(
+                {'error': f'Use 1 <= days <= 3650, 1 <= limit <= {MAX_ANALYTICS_LIMIT} and offset >= 0.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        abc_class = request.query_params.get('abc_class', '').upper()
+        if abc_class and abc_class not in analytics.ABC_CLASSES:
+            return Response(
+                {'error': f'Invalid abc_class: {abc_class}. Use A, B or C.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        with span('analytics'):
+            columns, basis = analytics.catalogue_metrics(days)
+            order = columns['order']
+            if abc_class:
+                order = order[columns['abc'][order] == abc_class]
+            results = analytics.rows(columns, order[offset:offset + limit])
+
         return Response({
-            'total_items': total_items,
-            'total_value': float(total_value),
-            'low_stock_count': low_stock_count,
-            'expired_count': expired_count,
-            'filters_applied': {
-                'start_date': request.query_params.get('start_date'),
-                'end_date': request.query_params.get('end_date'),
-                'status': request.query_params.get('status'),
-            }
+            'days': days,
+            'basis': basis,
+            'classes': analytics.summarize(columns, basis),
+            'count': len(order),
+            'results': results,
         })
+
+    @action(detail=False, methods=['post'], url_path='exports', url_name='exports')
+    def start_export(self, request):
+        """
+        POST /api/reports/exports/
+
+        Start a parallel export of the report (see reports/exports.py) for
+        reports too large to format in one request. Takes the download
+        parameters as JSON: file_format (csv, or xlsx for a zip of workbooks),
+        start_date, end_date and status. Returns 202 with the export's
+        progress; poll the progress URL and fetch the file once it is done.
+        The export is queued for the export worker (manage.py runexports):
+        409 while the user has an export pending or running, 429 when
+        REPORT_EXPORTS['MAX_QUEUED'] exports are.
+        """
+        data = request.data if isinstance(request.data, dict) else {}
+        file_format = str(data.get('file_format', 'csv')).lower()
+        if file_format not in exports.FORMATS:
+            return Response(
+                {'error': f'Invalid format: {file_format}. Use csv or xlsx.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        filters = {name: data[name] for name in exports.FILTERS if data.get(name)}
+        try:
+            for param in ('start_date', 'end_date'):
+                if param in filters:
+                    filters[param] = date.fromisoformat(str(filters[param])).isoformat()
+        except ValueError:
+            return Response({'error': 'Invalid date. Use YYYY-MM-DD.'}, status=status.HTTP_400_BAD_REQUEST)
+        if filters.get('status') not in (None, 'in_stock', 'low_stock', 'expired'):
+            return Response(
+                {'error': 'Invalid status. Use in_stock, low_stock or expired.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        # Every partition judges expiry against the same day
+        filters['as_of'] = now().date().isoformat()
+
+        unfinished = ReportExport.objects.filter(
+            status__in=(ReportExport.STATUS_PENDING, ReportExport.STATUS_RUNNING)
+        ).aggregate(total=Count('pk'), mine=Count('pk', filter=Q(created_by=request.user)))
+        if unfinished['mine']:
+            return Response(
+                {'error': 'You already have an export in progress. Wait for it to finish.'},
+                status=status.HTTP_409_CONFLICT
+            )
+        if unfinished['total'] >= exports.export_settings()['MAX_QUEUED']:
+            return Response(
+                {'error': 'Too many exports in progress. Try again later.'},
+                status=status.HTTP_429_TOO_MANY_REQUESTS
+            )
+
+        export = ReportExport.objects.create(created_by=request.user, file_format=file_format, filters=filters)
+        return Response(self._export_data(export), status=status.HTTP_202_ACCEPTED)
+
+    def _get_export(self, request, export_id):
+        queryset = ReportExport.objects.all()
+        if request.user.role != 'admin':
+            queryset = queryset.filter(created_by=request.user)
+        return queryset.filter(pk=export_id).first()
+
+    def _export_data(self, export):
+        return {
+            'id': export.pk,
+            'file_format': export.file_format,
+            'filters': export.filters,
+            'status': export.status,
+            'progress': export.progress,
+            'total_rows': export.total_rows,
+            'rows_done': export.rows_done,
+            'partitions': export.partitions,
+            'partitions_done': export.partitions_done,
+            'workers': export.workers,
+            'error': export.error,
+            'created_at': export.created_at,
+            'started_at': export.started_at,
+            'finished_at': export.finished_at,
+            'progress_url': f'/api/reports/exports/{export.pk}/',
+            'file_url': f'/api/reports/exports/{export.pk}/file/' if export.status == ReportExport.STATUS_DONE else None,
+        }
+
+    @action(detail=False, methods=['get'], url_path=r'exports/(?P<export_id>[0-9]+)', url_name='export-progress')
+    def export_progress(self, request, export_id=None):
+        """GET /api/reports/exports/<id>/ - Status and progress of an export (own exports, or any for admins)"""
+        export = self._get_export(request, export_id)
+        if export is None:
+            return Response({'error': f'No export {export_id}'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(self._export_data(export))
+
+    @action(detail=False, methods=['get'], url_path=r'exports/(?P<export_id>[0-9]+)/file', url_name='export-file')
+    def export_file(self, request, export_id=None):
+        """GET /api/reports/exports/<id>/file/ - The finished export (.csv, or .zip of .xlsx workbooks)"""
+        export = self._get_export(request, export_id)
+        if export is None:
+            return Response({'error': f'No export {export_id}'}, status=status.HTTP_404_NOT_FOUND)
+        if export.status != ReportExport.STATUS_DONE:
+            return Response(
+                {'error': f'Export {export.pk} is {export.status}, not done.'},
+                status=status.HTTP_409_CONFLICT
+            )
+        path = os.path.join(exports.export_settings()['DIR'], export.file_name)
+        if not os.path.exists(path):
+            return Response({'error': f'Export {export.pk} has expired.'}, status=status.HTTP_410_GONE)
+        content_type = 'application/zip' if export.file_name.endswith('.zip') else 'text/csv'
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=export.file_name, content_type=content_type)
+
+
+class AsyncReportSummaryView(AsyncAPIView):
+    """
+    GET /api/reports/summary/async/
+
+    ``ReportsViewSet.summary`` for the ASGI entry point: the same response,
+    with the four summary queries run concurrently (core/aio.py).
+    """
+    permission_classes = [IsAuthenticated]
+    read_from_replica = True
+
+    async def get(self, request):
+        if request.query_params.get('source') == 'snapshot':
+            try:
+                totals = await sync_to_async(snapshot_summary)(request.query_params)
+            except ValueError:
+                return self.render(INVALID_DATE, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            totals = await gather_queries(*summary_queries(exports.filtered_queryset(request.query_params)))
+        return self.render(summary_data(request, *totals))
@@ -0,0 +1,766 @@
+// Single-page app (templates/index.html)
+// ===== State =====
+let currentUser = null;
+let inventory = [];
+let stockChart = null;
+let categoryChart = null;
+
+// ===== API Base URL =====
+const API_BASE = '/api';
+
+// ===== Utility Functions =====
+function showToast(title, message, type = 'success') {
+    const container = document.getElementById('toast-container');
+    const toast = document.createElement('div');
+    toast.className = `toast ${type}`;
+    toast.innerHTML = `
+<div class="toast-content">
+  <div class="toast-title">${title}</div>
+  <div class="toast-message">${message}</div>
+</div>
+`;
+    container.appendChild(toast);
+    setTimeout(() => toast.remove(), 4000);
+}
+
+function formatCurrency(amount) {
+    return '₹' + parseFloat(amount || 0).toLocaleString('en-IN');
+}
+
+function formatDate(dateStr) {
+    if (!dateStr) return '-';
+    return new Date(dateStr).toLocaleDateString('en-IN');
+}
+
+// ===== Authentication =====
+function getToken() {
+    return localStorage.getItem('access_token');
+}
+
+function setTokens(access, refresh) {
+    localStorage.setItem('access_token', access);
+    localStorage.setItem('refresh_token', refresh);
+}
+
+function clearTokens() {
+    localStorage.removeItem('access_token');
+    localStorage.removeItem('refresh_token');
+    localStorage.removeItem('user');
+}
+
+async function apiRequest(endpoint, options = {}) {
+    const token = getToken();
+    const headers = {
+        'Content-Type': 'application/json',
+        ...options.headers
+    };
+
+    if (token) {
+        headers['Authorization'] = `Bearer ${token}`;
+    }
+
+    try {
+        const response = await fetch(`${API_BASE}${endpoint}`, {
+            ...options,
+            headers
+        });
+
+        if (response.status === 401) {
+            // Try to refresh token
+            const refreshed = await refreshToken();
+            if (refreshed) {
+                headers['Authorization'] = `Bearer ${getToken()}`;
+                return fetch(`${API_BASE}${endpoint}`, { ...options, headers });
+            } else {
+                logout();
+                throw new Error('Session expired');
+            }
+        }
+
+        return response;
+    } catch (error) {
+        console.error('API Error:', error);
+        throw error;
+    }
+}
+
+async function refreshToken() {
+    const refresh = localStorage.getItem('refresh_token');
+    if (!refresh) return false;
+
+    try {
+        const response = await fetch(`${API_BASE}/accounts/token/refresh/`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ refresh })
+        });
+
+        if (response.ok) {
+            const data = await response.json();
+            localStorage.setItem('access_token', data.access);
+            return true;
+        }
+    } catch (e) { }
+    return false;
+}
+
+async function login(email, password) {
+    try {
+        const response = await fetch(`${API_BASE}/accounts/login/`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ email, password })
+        });
+
+        const data = await response.json();
+
+        if (response.ok) {
+            setTokens(data.access, data.refresh);
+            localStorage.setItem('user', JSON.stringify(data.user || { email }));
+            currentUser = data.user || { email };
+            showApp();
+            loadDashboard();
+            showToast('Welcome!', 'Login successful');
+        } else {
+            showToast('Login Failed', data.detail || 'Invalid credentials', 'error');
+        }
+    } catch (error) {
+        showToast('Error', 'Connection failed. Please try again.', 'error');
+    }
+}
+
+function logout() {
+    clearTokens();
+    currentUser = null;
+    document.getElementById('login-section').classList.remove('hidden');
+    document.getElementById('app-section').classList.add('hidden');
+    // Reset to login tab
+    switchAuthTab('login');
+}
+
+// ===== Auth Tab Switching =====
+function switchAuthTab(tab) {
+    const loginForm = document.getElementById('login-form');
+    const registerForm = document.getElementById('register-form');
+    const loginTab = document.getElementById('tab-login');
+    const registerTab = document.getElementById('tab-register');
+
+    if (tab === 'login') {
+        loginForm.classList.remove('hidden');
+        registerForm.classList.add('hidden');
+        loginTab.style.color = 'var(--primary)';
+        loginTab.style.borderBottomColor = 'var(--primary)';
+        registerTab.style.color = 'var(--gray-500)';
+        registerTab.style.borderBottomColor = 'transparent';
+    } else {
+        loginForm.classList.add('hidden');
+        registerForm.classList.remove('hidden');
+        registerTab.style.color = 'var(--primary)';
+        registerTab.style.borderBottomColor = 'var(--primary)';
+        loginTab.style.color = 'var(--gray-500)';
+        loginTab.style.borderBottomColor = 'transparent';
+    }
+}
+
+// ===== Registration =====
+async function register(firstName, lastName, email, password, role) {
+    try {
+        const response = await fetch(`${API_BASE}/accounts/register/`, {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({
+                first_name: firstName,
+                last_name: lastName,
+                email: email,
+                password: password,
+                role: role
+            })
+        });
+
+        const data = await response.json();
+
+        if (response.ok || response.status === 201) {
+            // Auto-login: Save tokens and user data
+            if (data.tokens) {
+                setTokens(data.tokens.access, data.tokens.refresh);
+            }
+            if (data.user) {
+                currentUser = data.user;
+                localStorage.setItem('user', JSON.stringify(data.user));
+            }
+
+            showToast('Success!', 'Account created! Redirecting to dashboard...', 'success');
+
+            // Redirect to dashboard directly
+            setTimeout(() => {
+                window.location.href = '/dashboard/';
+            }, 1000);
+        } else {
+            // Handle validation errors
+            let errorMessage = 'Registration failed';
+            if (data.email) {
+                errorMessage = data.email[0] || 'Email already exists';
+            } else if (data.password) {
+                errorMessage = data.password[0] || 'Password too weak';
+            } else if (data.detail) {
+                errorMessage = data.detail;
+            } else if (typeof data === 'object') {
+                errorMessage = Object.values(data).flat()[0] || 'Registration failed';
+            }
+            showToast('Registration Failed', errorMessage, 'error');
+        }
+    } catch (error) {
+        showToast('Error', 'Connection failed. Please try again.', 'error');
+    }
+}
+
+function showApp() {
+    document.getElementById('login-section').classList.add('hidden');
+    document.getElementById('app-section').classList.remove('hidden');
+
+    // Update user info
+    const user = JSON.parse(localStorage.getItem('user') || '{}');
+    document.getElementById('user-name').textContent = user.first_name || user.email || 'User';
+    document.getElementById('user-avatar').textContent = (user.first_name || user.email || 'U')[0].toUpperCase();
+
+    // Show/hide admin-only UI elements
+    updateAdminUI();
+}
+
+// ===== Role-Based Access =====
+function isAdmin() {
+    const user = JSON.parse(localStorage.getItem('user') || '{}');
+    return user.role === 'admin';
+}
+
+function updateAdminUI() {
+    const addItemBtn = document.getElementById('add-item-btn');
+    if (addItemBtn) {
+        addItemBtn.style.display = isAdmin() ? '' : 'none';
+    }
+}
+
+// ===== Navigation =====
+function switchPage(pageName) {
+    // Update tabs
+    document.querySelectorAll('.nav-tab').forEach(tab => {
+        tab.classList.toggle('active', tab.dataset.page === pageName);
+    });
+
+    // Update pages
+    document.querySelectorAll('.page-section').forEach(section => {
+        section.classList.toggle('active', section.id === `page-${pageName}`);
+    });
+
+    // Load page data
+    switch (pageName) {
+        case 'dashboard':
+            loadDashboard();
+            break;
+        case 'inventory':
+            loadInventory();
+            break;
+        case 'reports':
+            loadReports();
+            break;
+        case 'alerts':
+            loadAlerts();
+            break;
+    }
+}
+
+// ===== Dashboard =====
+async function loadDashboard() {
+    try {
+        const response = await apiRequest('/dashboard/');
+        if (response.ok) {
+            const data = await response.json();
+            updateKPIs(data);
+            initCharts(data);
+        }
+    } catch (e) {
+        // Use inventory data as fallback
+        await loadInventory();
+        const data = calculateStats();
+        updateKPIs(data);
+        initCharts(data);
+    }
+}
+
+function updateKPIs(data) {
+    document.getElementById('kpi-total').textContent = data.total_items || inventory.length;
+    document.getElementById('kpi-low').textContent = data.low_stock_count || inventory.filter(i => i.quantity <= (i.reorder_level || 10)).length;
+    document.getElementById('kpi-expired').textContent = data.expired_count || inventory.filter(i => i.expiry_date && new Date(i.expiry_date) < new Date()).length;
+    document.getElementById('kpi-value').textContent = formatCurrency(data.total_value || inventory.reduce((sum, i) => sum + (i.quantity * i.unit_price), 0));
+}
+
+function calculateStats() {
+    const lowStock = inventory.filter(i => i.quantity <= (i.reorder_level || 10));
+    const expired = inventory.filter(i => i.expiry_date && new Date(i.expiry_date) < new Date());
+    const totalValue = inventory.reduce((sum, i) => sum + (i.quantity * i.unit_price), 0);
+
+    return {
+        total_items: inventory.length,
+        low_stock_count: lowStock.length,
+        expired_count: expired.length,
+        total_value: totalValue
+    };
+}
+
+function initCharts(data) {
+    // Stock Trend Chart - uses real data from backend
+    const stockCtx = document.getElementById('stock-chart').getContext('2d');
+
+    if (stockChart) stockChart.destroy();
+
+    let labels = [];
+    let values = [];
+
+    // Use real stock_trend data from API if available
+    if (data.stock_trend && data.stock_trend.length > 0) {
+        labels = data.stock_trend.map(item => item.day || new Date(item.date).toLocaleDateString('en-IN', { weekday: 'short' }));
+        values = data.stock_trend.map(item => item.total_quantity || item.total_items || 0);
+    } else {
+        // Fallback: use current inventory data to show current stock levels
+        const totalQuantity = inventory.reduce((sum, item) => sum + item.quantity, 0);
+        for (let i = 6; i >= 0; i--) {
+            const d = new Date();
+            d.setDate(d.getDate() - i);
+            labels.push(d.toLocaleDateString('en-IN', { weekday: 'short' }));
+            // Show same value (current stock) since we don't have historical data
+            values.push(totalQuantity);
+        }
+    }
+
+    stockChart = new Chart(stockCtx, {
+        type: 'line',
+        data: {
+            labels,
+            datasets: [{
+                label: 'Total Stock Quantity',
+                data: values,
+                borderColor: '#3b82f6',
+                backgroundColor: 'rgba(59, 130, 246, 0.1)',
+                fill: true,
+                tension: 0.3
+            }]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            plugins: { legend: { display: false } },
+            scales: {
+                y: {
+                    beginAtZero: true,
+                    title: {
+                        display: true,
+                        text: 'Total Units'
+                    }
+                }
+            }
+        }
+    });
+
+    // Category Chart
+    const categoryCtx = document.getElementById('category-chart').getContext('2d');
+
+    if (categoryChart) categoryChart.destroy();
+
+    const categories = {};
+    inventory.forEach(item => {
+        const cat = item.category_name || item.category || 'Uncategorized';
+        categories[cat] = (categories[cat] || 0) + item.quantity;
+    });
+
+    categoryChart = new Chart(categoryCtx, {
+        type: 'doughnut',
+        data: {
+            labels: Object.keys(categories).length ? Object.keys(categories) : ['No Data'],
+            datasets: [{
+                data: Object.keys(categories).length ? Object.values(categories) : [1],
+                backgroundColor: ['#3b82f6', '#10b981', '#f59e0b', '#ef4444', '#8b5cf6', '#06b6d4']
+            }]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false
+        }
+    });
+}
+
+// ===== Inventory =====
+async function loadInventory() {
+    try {
+        const response = await apiRequest('/inventory/');
+        if (response.ok) {
+            const data = await response.json();
+            inventory = data.results || data || [];
+            renderInventoryTable();
+        }
+    } catch (e) {
+        console.error('Failed to load inventory:', e);
+    }
+}
+
+function renderInventoryTable() {
+    const tbody = document.getElementById('inventory-tbody');
+    const search = document.getElementById('search-input').value.toLowerCase();
+    const statusFilter = document.getElementById('filter-status').value;
+
+    let filtered = inventory.filter(item => {
+        const matchSearch = item.name.toLowerCase().includes(search) ||
+            item.sku.toLowerCase().includes(search);
+
+        if (!matchSearch) return false;
+
+        if (statusFilter === 'low_stock') {
+            return item.quantity <= (item.reorder_level || 10);
+        } else if (statusFilter === 'expired') {
+            return item.expiry_date && new Date(item.expiry_date) < new Date();
+        } else if (statusFilter === 'in_stock') {
+            return item.quantity > (item.reorder_level || 10);
+        }
+        return true;
+    });
+
+    if (filtered.length === 0) {
+        tbody.innerHTML = `
+  <tr>
+    <td colspan="8" class="empty-state">
+      <div class="empty-state-title">No items found</div>
+      <p>Try adjusting your search or filters</p>
+    </td>
+  </tr>
+`;
+        return;
+    }
+
+    tbody.innerHTML = filtered.map(item => {
+        const isLowStock = item.quantity <= (item.reorder_level || 10);
+        const isExpired = item.expiry_date && new Date(item.expiry_date) < new Date();
+        const rowClass = isExpired ? 'row-expired' : (isLowStock ? 'row-low-stock' : '');
+
+        let status = 'In Stock';
+        let statusClass = 'badge-success';
+        if (isExpired) {
+            status = 'Expired';
+            statusClass = 'badge-danger';
+        } else if (isLowStock) {
+            status = 'Low Stock';
+            statusClass = 'badge-warning';
+        }
+
+        // Only show action buttons for admin users
+        const actionButtons = isAdmin() ? `
+      <button class="action-btn" onclick="editItem(${item.id})" title="Edit">
+        <svg width="16" height="16" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
+          <path d="M11 4H4a2 2 0 0 0-2 2v14a2 2 0 0 0 2 2h14a2 2 0 0 0 2-2v-7"></path>
+          <path d="M18.5 2.5a2.121 2.121 0 0 1 3 3L12 15l-4 1 1-4 9.5-9.5z"></path>
+        </svg>
+      </button>
+      <button class="action-btn danger" onclick="deleteItem(${item.id})" title="Delete">
+        <svg width="16" height="16" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2">
+          <polyline points="3 6 5 6 21 6"></polyline>
+          <path d="M19 6v14a2 2 0 0 1-2 2H7a2 2 0 0 1-2-2V6m3 0V4a2 2 0 0 1 2-2h4a2 2 0 0 1 2 2v2"></path>
+        </svg>
+      </button>
+    ` : '<span style="color: var(--gray-400); font-size: 0.8rem;">View only</span>';
+
+        return `
+  <tr class="${rowClass}">
+    <td><strong>${item.sku}</strong></td>
+    <td>${item.name}</td>
+    <td>${item.category_name || item.category || '-'}</td>
+    <td>${item.quantity}</td>
+    <td>${formatCurrency(item.unit_price)}</td>
+    <td><span class="badge ${statusClass}">${status}</span></td>
+    <td>${formatDate(item.expiry_date)}</td>
+    <td>${actionButtons}</td>
+  </tr>
+`;
+    }).join('');
+}
+
+// ===== Modal Functions =====
+function openAddModal() {
+    document.getElementById('modal-title').textContent = 'Add New Item';
+    document.getElementById('item-form').reset();
+    document.getElementById('item-id').value = '';
+    document.getElementById('item-modal').classList.add('active');
+}
+
+function editItem(id) {
+    const item = inventory.find(i => i.id === id);
+    if (!item) return;
+
+    document.getElementById('modal-title').textContent = 'Edit Item';
+    document.getElementById('item-id').value = id;
+    document.getElementById('item-name').value = item.name;
+    document.getElementById('item-sku').value = item.sku;
+    document.getElementById('item-category').value = item.category_name || item.category || '';
+    document.getElementById('item-supplier').value = item.supplier_name || item.supplier || '';
+    document.getElementById('item-quantity').value = item.quantity;
+    document.getElementById('item-price').value = item.unit_price;
+    document.getElementById('item-reorder').value = item.reorder_level || 10;
+    document.getElementById('item-expiry').value = item.expiry_date || '';
+    document.getElementById('item-desc').value = item.description || '';
+
+    document.getElementById('item-modal').classList.add('active');
+}
+
+function closeModal() {
+    document.getElementById('item-modal').classList.remove('active');
+}
+
+async function saveItem() {
+    const id = document.getElementById('item-id').value;
+    const formData = {
+        name: document.getElementById('item-name').value,
+        sku: document.getElementById('item-sku').value,
+        category_name: document.getElementById('item-category').value || null,
+        supplier_name: document.getElementById('item-supplier').value || null,
+        quantity: parseInt(document.getElementById('item-quantity').value),
+        unit_price: parseFloat(document.getElementById('item-price').value),
+        reorder_level: parseInt(document.getElementById('item-reorder').value) || 10,
+        expiry_date: document.getElementById('item-expiry').value || null,
+        description: document.getElementById('item-desc').value || null
+    };
+
+    try {
+        let response;
+        if (id) {
+            response = await apiRequest(`/inventory/${id}/`, {
+                method: 'PUT',
+                body: JSON.stringify(formData)
+            });
+        } else {
+            response = await apiRequest('/inventory/', {
+                method: 'POST',
+                body: JSON.stringify(formData)
+            });
+        }
+
+        // Check for success (200, 201) or server error (5xx - item may have been saved)
+        if (response.ok || response.status === 201) {
+            closeModal();
+            showToast('Success', id ? 'Item updated successfully' : 'Item added successfully');
+            await loadInventory();
+            loadDashboard();
+        } else if (response.status >= 500) {
+            // Server error but data might have been saved - refresh to check
+            closeModal();
+            showToast('Warning', 'Operation completed but response failed. Refreshing...', 'warning');
+            await loadInventory();
+            loadDashboard();
+        } else {
+            // Client error (4xx) - validation failed, item not saved
+            const error = await response.json();
+            showToast('Error', error.detail || Object.values(error).flat().join(', ') || 'Failed to save item', 'error');
+        }
+    } catch (e) {
+        // Network error or other issue - still refresh to be safe
+        console.error('Save error:', e);
+        showToast('Error', 'Connection error. Refreshing to check...', 'error');
+        await loadInventory();
+        loadDashboard();
+        closeModal();
+    }
+}
+
+async function deleteItem(id) {
+    if (!confirm('Are you sure you want to delete this item?')) return;
+
+    try {
+        const response = await apiRequest(`/inventory/${id}/`, { method: 'DELETE' });
+
+        if (response.ok || response.status === 204) {
+            showToast('Success', 'Item deleted successfully');
+            loadInventory();
+            loadDashboard();
+        } else {
+            showToast('Error', 'Failed to delete item', 'error');
+        }
+    } catch (e) {
+        showToast('Error', 'Failed to delete item', 'error');
+    }
+}
+
+// ===== Reports =====
+function loadReports() {
+    // Set default dates
+    const end = new Date();
+    const start = new Date();
+    start.setDate(start.getDate() - 30);
+
+    document.getElementById('report-start').valueAsDate = start;
+    document.getElementById('report-end').valueAsDate = end;
+
+    // Update summary
+    const stats = calculateStats();
+    document.getElementById('report-total').textContent = stats.total_items;
+    document.getElementById('report-value').textContent = formatCurrency(stats.total_value);
+    document.getElementById('report-low').textContent = stats.low_stock_count;
+    document.getElementById('report-expired').textContent = stats.expired_count;
+}
+
+async function downloadReport(format) {
+    const start = document.getElementById('report-start').value;
+    const end = document.getElementById('report-end').value;
+
+    try {
+        const response = await apiRequest(`/reports/download/?file_format=${format}&start_date=${start}&end_date=${end}`);
+
+        if (response.ok) {
+            const blob = await response.blob();
+            const url = window.URL.createObjectURL(blob);
+            const a = document.createElement('a');
+            a.href = url;
+            a.download = `inventory_report_${new Date().toISOString().split('T')[0]}.${format}`;
+            a.click();
+            showToast('Success', `Report downloaded as ${format.toUpperCase()}`);
+        } else {
+            showToast('Error', 'Failed to download report', 'error');
+        }
+    } catch (e) {
+        showToast('Error', 'Failed to download report', 'error');
+    }
+}
+
+// ===== Alerts =====
+function loadAlerts() {
+    const container = document.getElementById('alerts-container');
+
+    const lowStock = inventory.filter(i => i.quantity <= (i.reorder_level || 10));
+    const expired = inventory.filter(i => i.expiry_date && new Date(i.expiry_date) < new Date());
+
+    const alerts = [
+        ...lowStock.map(item => ({
+            type: 'warning',
+            title: 'Low Stock Alert',
+            message: `${item.name} (${item.sku}) - Only ${item.quantity} units left`,
+            time: 'Now'
+        })),
+        ...expired.map(item => ({
+            type: 'danger',
+            title: 'Expired Item',
+            message: `${item.name} (${item.sku}) - Expired on ${formatDate(item.expiry_date)}`,
+            time: 'Now'
+        }))
+    ];
+
+    // Update badge
+    const badge = document.getElementById('alert-badge');
+    if (alerts.length > 0) {
+        badge.textContent = alerts.length;
+        badge.classList.remove('hidden');
+    } else {
+        badge.classList.add('hidden');
+    }
+
+    if (alerts.length === 0) {
+        container.innerHTML = `
+  <div class="empty-state">
+    <div class="empty-state-title">No Alerts</div>
+    <p>Your inventory is in good condition</p>
+  </div>
+`;
+        return;
+    }
+
+    container.innerHTML = alerts.map(alert => `
+<div class="alert-item">
+  <div class="alert-icon ${alert.type}">
+    ${alert.type === 'warning' ?
+            '<svg width="20" height="20" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><path d="M10.29 3.86L1.82 18a2 2 0 0 0 1.71 3h16.94a2 2 0 0 0 1.71-3L13.71 3.86a2 2 0 0 0-3.42 0z"></path><line x1="12" y1="9" x2="12" y2="13"></line><line x1="12" y1="17" x2="12.01" y2="17"></line></svg>' :
+            '<svg width="20" height="20" viewBox="0 0 24 24" fill="none" stroke="currentColor" stroke-width="2"><circle cx="12" cy="12" r="10"></circle><line x1="15" y1="9" x2="9" y2="15"></line><line x1="9" y1="9" x2="15" y2="15"></line></svg>'
+        }
+  </div>
+  <div class="alert-content">
+    <div class="alert-title">${alert.title}</div>
+    <div class="alert-message">${alert.message}</div>
+    <div class="alert-time">${alert.time}</div>
+  </div>
+</div>
+`).join('');
+}
+
+// ===== Event Listeners =====
+document.addEventListener('DOMContentLoaded', () => {
+    // Check if already logged in
+    if (getToken()) {
+        showApp();
+        loadDashboard();
+        loadInventory();
+    }
+
+    // Login form
+    document.getElementById('login-form').addEventListener('submit', (e) => {
+        e.preventDefault();
+        const email = document.getElementById('login-email').value;
+        const password = document.getElementById('login-password').value;
+        login(email, password);
+    });
+
+    // Register form
+    document.getElementById('register-form').addEventListener('submit', (e) => {
+        e.preventDefault();
+        const firstName = document.getElementById('register-firstname').value.trim();
+        const lastName = document.getElementById('register-lastname').value.trim();
+        const email = document.getElementById('register-email').value.trim();
+        const password = document.getElementById('register-password').value;
+        const confirm = document.getElementById('register-confirm').value;
+        const role = document.querySelector('input[name="register-role"]:checked').value;
+
+        // Validate passwords match
+        if (password !== confirm) {
+            showToast('Error', 'Passwords do not match', 'error');
+            return;
+        }
+
+        // Validate password length
+        if (password.length < 8) {
+            showToast('Error', 'Password must be at least 8 characters', 'error');
+            return;
+        }
+
+        register(firstName, lastName, email, password, role);
+    });
+
+    // Navigation tabs
+    document.querySelectorAll('.nav-tab').forEach(tab => {
+        tab.addEventListener('click', () => switchPage(tab.dataset.page));
+    });
+
+    // Search and filter
+    document.getElementById('search-input').addEventListener('input', renderInventoryTable);
+    document.getElementById('filter-status').addEventListener('change', renderInventoryTable);
+
+    // Role selector styling toggle
+    document.querySelectorAll('input[name="register-role"]').forEach(radio => {
+        radio.addEventListener('change', () => {
+            document.querySelectorAll('.role-option').forEach(opt => {
+                opt.classList.remove('selected');
+                opt.style.borderColor = 'var(--gray-200)';
+                opt.style.background = 'transparent';
+            });
+            const selectedLabel = radio.closest('.role-option');
+            if (selectedLabel) {
+                selectedLabel.classList.add('selected');
+                selectedLabel.style.borderColor = 'var(--primary)';
+                selectedLabel.style.background = 'rgba(30, 58, 138, 0.05)';
+            }
+        });
+    });
+
+    // Close modal on overlay click
+    document.getElementById('item-modal').addEventListener('click', (e) => {
+        if (e.target.classList.contains('modal-overlay')) {
+            closeModal();
+        }
+    });
+
+    // Close modal on Escape
+    document.addEventListener('keydown', (e) => {
+        if (e.key === 'Escape') closeModal();
+    });
+});
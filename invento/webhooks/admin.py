@@ -0,0 +1,18 @@
+from django.contrib import admin
+
+from .models import OutboxEvent, WebhookSubscription
+
+
+@admin.register(WebhookSubscription)
+class WebhookSubscriptionAdmin(admin.ModelAdmin):
+    list_display = ('name', 'url', 'is_active', 'last_event_id', 'last_delivered_at', 'failures', 'retry_at')
+    list_filter = ('is_active',)
+    readonly_fields = ('created_by', 'created_at', 'last_event_id', 'last_delivered_at', 'failures', 'retry_at',
+                       'last_error')
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ('id', 'event_type', 'object_id', 'created_at')
+    list_filter = ('event_type',)
+    readonly_fields = [field.name for field in OutboxEvent._meta.fields]
@@ -0,0 +1,246 @@
+"""
+Delivery side of the inventory webhooks, run by ``manage.py runwebhooks``.
+
+Each pass sends every active subscription that is due the next batch of
+outbox events after its ``last_event_id`` (up to ``WEBHOOKS['BATCH_SIZE']``)
+in one POST, coalesced first: a batch carries only the latest event per
+(type, item), so ten quick edits of an item arrive as one update with its
+final state. Subscribers are served in parallel by up to
+``WEBHOOKS['WORKERS']`` threads sharing one ``requests`` session, whose
+connection pool keeps a connection per subscriber host alive between
+batches.
+
+The cursor is the highest outbox id sent, but ids are taken when events are
+inserted and transactions commit in any order: an event can become visible
+after one with a higher id has been sent. So a batch only holds events
+emitted more than ``WEBHOOKS['COMMIT_LAG']`` seconds ago, and stops at the
+first younger one. An event whose transaction stays open longer than that
+after emitting it (the item's write) can still be passed over: keep item
+writes shorter than the lag, or raise it.
+
+A 2xx answer moves the subscription's cursor past the batch, and past the
+events of other types scanned with it, so a subscription filtered by type
+doesn't rescan the events it never receives. Anything else (error status,
+timeout, refused connection) leaves the cursor where it was and schedules a
+retry with exponential backoff and jitter, so a subscriber that is down
+costs one request per backoff period and receives everything it missed, in
+order, once it is back.
+
+Request body::
+
+    {"subscription": 3, "events": [
+        {"id": 41, "type": "inventory.updated", "object_id": 7,
+         "created_at": "2026-10-19T09:00:00Z", "data": {...}}, ...]}
+
+Headers: ``X-Invento-Event-Count`` and, for subscriptions with a secret,
+``X-Invento-Signature: sha256=<hex HMAC-SHA256 of the body>``.
+"""
+import hashlib
+import hmac
+import json
+import logging
+import random
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import requests
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Max, Min, Q
+from django.utils import timezone
+from requests.adapters import HTTPAdapter
+
+from .outbox import webhook_settings
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'Invento-Webhooks/1.0'
+
+
+def build_session(pool_size):
+    """A ``requests`` session keeping up to ``pool_size`` connections per host; no retries of its own."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers.update({'User-Agent': USER_AGENT, 'Content-Type': 'application/json'})
+    return session
+
+
+def coalesce(events):
+    """The latest event per (type, item), in the order of those latest events."""
+    latest = {}
+    for event in events:
+        key = (event.event_type, event.object_id)
+        latest.pop(key, None)
+        latest[key] = event
+    return list(latest.values())
+
+
+def backoff_seconds(failures, config):
+    """Delay before the next attempt after ``failures`` consecutive failures (full jitter over the upper half)."""
+    delay = min(config['BACKOFF_BASE'] * 2 ** (failures - 1), config['BACKOFF_MAX'])
+    return delay * random.uniform(0.5, 1)
+
+
+def body_for(subscription, events):
+    return json.dumps({
+        'subscription': subscription.pk,
+        'events': [
+            {
+                'id': event.pk,
+                'type': event.event_type,
+                'object_id': event.object_id,
+                'created_at': event.created_at,
+                'data': event.payload,
+            }
+            for event in events
+        ],
+    }, cls=DjangoJSONEncoder).encode()
+
+
+def signature(secret, body):
+    return 'sha256=' + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def pending_events(subscription, limit, commit_lag=0):
+    """
+    ``(events, cursor, full)`` for the next ``limit`` outbox events after the
+    subscription's cursor, up to the first one emitted less than
+    ``commit_lag`` seconds ago (ids below that one may still belong to
+    transactions that haven't committed): the scanned events of the types it
+    subscribes to, the id of the last one scanned, where its cursor moves
+    once they are sent, and whether the scan stopped at ``limit``. Types are
+    filtered here rather than in the query so the cursor moves past the
+    events it doesn't receive as well.
+    """
+    from .models import OutboxEvent
+
+    scanned = list(
+        OutboxEvent.objects.filter(pk__gt=subscription.last_event_id)
+        .order_by('pk').values_list('pk', 'event_type', 'created_at')[:limit]
+    )
+    cutoff = timezone.now() - timedelta(seconds=commit_lag)
+    cursor, wanted, full = subscription.last_event_id, [], len(scanned) == limit
+    for pk, event_type, created_at in scanned:
+        if created_at > cutoff:
+            full = False
+            break
+        cursor = pk
+        if not subscription.events or event_type in subscription.events:
+            wanted.append(pk)
+    events = list(OutboxEvent.objects.filter(pk__in=wanted).order_by('pk')) if wanted else []
+    return events, cursor, full
+
+
+def deliver(subscription, session, config=None):
+    """
+    Send ``subscription`` its next batch and record the outcome; returns
+    ``(events sent, whether the batch was full)``, ``(0, False)`` when the
+    delivery failed. Without events to send the cursor still moves past the
+    events of other types.
+    """
+    from .models import WebhookSubscription
+
+    config = config or webhook_settings()
+    events, cursor, full = pending_events(subscription, config['BATCH_SIZE'], config['COMMIT_LAG'])
+    # update(), not save(): an admin may be editing the subscription meanwhile
+    subscriptions = WebhookSubscription.objects.filter(pk=subscription.pk)
+    if not events:
+        if cursor != subscription.last_event_id:
+            subscriptions.update(last_event_id=cursor)
+        return 0, full
+    batch = coalesce(events)
+    body = body_for(subscription, batch)
+    headers = {'X-Invento-Event-Count': str(len(batch))}
+    if subscription.secret:
+        headers['X-Invento-Signature'] = signature(subscription.secret, body)
+
+    error = None
+    try:
+        response = session.post(subscription.url, data=body, headers=headers, timeout=config['TIMEOUT'])
+        response.close()
+        if not 200 <= response.status_code < 300:
+            error = f'HTTP {response.status_code}'
+    except requests.RequestException as e:
+        error = f'{type(e).__name__}: {e}'
+
+    now = timezone.now()
+    if error is None:
+        subscriptions.update(
+            last_event_id=cursor, last_delivered_at=now, failures=0, retry_at=None, last_error='',
+        )
+        return len(batch), full
+
+    failures = subscription.failures + 1
+    retry_in = backoff_seconds(failures, config)
+    subscriptions.update(failures=failures, retry_at=now + timedelta(seconds=retry_in), last_error=error[:1000])
+    logger.warning(
+        f'Webhook delivery to {subscription.url} failed ({error}); attempt {failures}, retrying in {retry_in:.0f}s'
+    )
+    return 0, False
+
+
+def due_subscriptions(now=None):
+    """Active subscriptions with undelivered events whose retry (if any) is due."""
+    from .models import OutboxEvent, WebhookSubscription
+
+    newest = OutboxEvent.objects.aggregate(newest=Max('pk'))['newest']
+    if newest is None:
+        return []
+    now = now or timezone.now()
+    return list(
+        WebhookSubscription.objects
+        .filter(is_active=True, last_event_id__lt=newest)
+        .filter(Q(retry_at__isnull=True) | Q(retry_at__lte=now))
+    )
+
+
+def _deliver_in_thread(subscription, session, config):
+    try:
+        return deliver(subscription, session, config)
+    except Exception:
+        logger.exception(f'Webhook delivery to {subscription.url} crashed')
+        return 0, False
+    finally:
+        # Pool threads never see request_finished
+        for connection in connections.all(initialized_only=True):
+            connection.close_if_unusable_or_obsolete()
+
+
+def deliver_pending(session, executor=None, config=None):
+    """
+    One pass over the due subscriptions, in parallel on ``executor`` if
+    given; returns ``(events sent, whether any subscriber has more waiting)``.
+    """
+    config = config or webhook_settings()
+    due = due_subscriptions()
+    if executor is None or len(due) <= 1:
+        results = [deliver(subscription, session, config) for subscription in due]
+    else:
+        results = list(executor.map(lambda subscription: _deliver_in_thread(subscription, session, config), due))
+    return sum(sent for sent, _ in results), any(full for _, full in results)
+
+
+def create_executor(config=None):
+    """Threads for parallel deliveries, or ``None`` to deliver in the calling thread."""
+    config = config or webhook_settings()
+    if config['WORKERS'] <= 1:
+        return None
+    return ThreadPoolExecutor(max_workers=config['WORKERS'], thread_name_prefix='webhook')
+
+
+def prune_outbox(max_age_days=None):
+    """
+    Delete the events every active subscription has been sent, and those
+    older than ``max_age_days`` whether sent or not; returns how many.
+    """
+    from .models import OutboxEvent, WebhookSubscription
+
+    max_age_days = webhook_settings()['MAX_AGE_DAYS'] if max_age_days is None else max_age_days
+    delivered = WebhookSubscription.objects.filter(is_active=True).aggregate(cursor=Min('last_event_id'))['cursor']
+    stale = Q(created_at__lt=timezone.now() - timedelta(days=max_age_days))
+    # No active subscription: nobody is waiting for any of it
+    condition = stale | Q(pk__lte=delivered) if delivered is not None else Q(pk__isnull=False)
+    deleted, _ = OutboxEvent.objects.filter(condition).delete()
+    return deleted
@@ -0,0 +1,20 @@
+"""
+Periodic jobs for the webhooks app.
+Discovered and scheduled by ``python manage.py runapscheduler``.
+"""
+import logging
+
+from apscheduler.triggers.cron import CronTrigger
+
+from core.scheduler import periodic_job
+from webhooks.delivery import prune_outbox
+
+logger = logging.getLogger(__name__)
+
+
+@periodic_job('prune_webhook_outbox', CronTrigger(minute=45))
+def prune_webhook_outbox():
+    """Delete outbox events every subscriber has received, and those past WEBHOOKS['MAX_AGE_DAYS']"""
+    deleted = prune_outbox()
+    if deleted:
+        logger.info(f'Pruned {deleted} webhook outbox event(s)')
@@ -0,0 +1,57 @@
+"""
+Webhook Delivery Management Command
+Delivers the inventory events queued in the webhook outbox to their
+subscribers (webhooks/delivery.py): batched and coalesced per subscriber,
+in parallel over one pooled HTTP session, with exponential backoff for
+subscribers that fail. Sleeps WEBHOOKS['POLL_INTERVAL'] seconds whenever
+the outbox is drained. Run one per deployment.
+
+Run manually: python manage.py runwebhooks
+"""
+import logging
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from webhooks import delivery
+from webhooks.outbox import webhook_settings
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Deliver queued inventory webhook events to their subscribers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run a single pass and exit')
+
+    def handle(self, *args, **options):
+        config = webhook_settings()
+        session = delivery.build_session(config['WORKERS'])
+        executor = delivery.create_executor(config)
+        self.stdout.write(self.style.SUCCESS('Delivering webhooks...'))
+        try:
+            while True:
+                try:
+                    sent, more = delivery.deliver_pending(session, executor, config)
+                    if sent:
+                        logger.info(f'Delivered {sent} webhook event(s)')
+                except Exception:
+                    logger.exception('Webhook delivery pass failed')
+                    more = False
+                finally:
+                    # Like the end of a request: drop broken or expired connections
+                    for connection in connections.all(initialized_only=True):
+                        connection.close_if_unusable_or_obsolete()
+                if options['once']:
+                    break
+                if not more:
+                    time.sleep(config['POLL_INTERVAL'])
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.WARNING('Stopping webhook delivery...'))
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            session.close()
+            connections.close_all()
@@ -0,0 +1,72 @@
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils import timezone
+
+EVENT_CREATED = 'inventory.created'
+EVENT_UPDATED = 'inventory.updated'
+EVENT_DELETED = 'inventory.deleted'
+# The item's quantity fell to its reorder level or below
+EVENT_LOW_STOCK = 'inventory.low_stock'
+EVENT_TYPES = [EVENT_CREATED, EVENT_UPDATED, EVENT_DELETED, EVENT_LOW_STOCK]
+
+
+class WebhookSubscription(models.Model):
+    """
+    An endpoint that receives the inventory events it subscribed to, in
+    batches (webhooks/delivery.py). It also holds the delivery state:
+    ``last_event_id`` is how far into the outbox it has been sent, and
+    after failed deliveries ``retry_at`` is when the next attempt is due.
+    """
+    name = models.CharField(max_length=255)
+    url = models.URLField(max_length=500)
+    # Signs every delivery (X-Invento-Signature: sha256=<HMAC of the body>); blank: unsigned
+    secret = models.CharField(max_length=255, blank=True)
+    # Event types to send; empty: all of them
+    events = models.JSONField(default=list, blank=True)
+    is_active = models.BooleanField(default=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='webhook_subscriptions'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    last_event_id = models.BigIntegerField(default=0)
+    last_delivered_at = models.DateTimeField(null=True, blank=True)
+    # Consecutive failed deliveries (the backoff grows with them)
+    failures = models.PositiveIntegerField(default=0)
+    retry_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return f'{self.name} ({self.url})'
+
+    def save(self, *args, **kwargs):
+        # New subscribers start from now, not from the events queued for others
+        if self._state.adding and not self.last_event_id:
+            self.last_event_id = OutboxEvent.objects.aggregate(newest=models.Max('pk'))['newest'] or 0
+        super().save(*args, **kwargs)
+
+
+class OutboxEvent(models.Model):
+    """
+    An inventory event waiting to be delivered. Written in the transaction
+    that made the change, so an event exists exactly when its change was
+    committed; deleted once every active subscription has been sent it.
+    """
+    event_type = models.CharField(max_length=50)
+    object_id = models.BigIntegerField()
+    payload = models.JSONField(encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['created_at'], name='webhook_outbox_created_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.event_type} {self.object_id}'
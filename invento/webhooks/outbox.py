@@ -0,0 +1,105 @@
+"""
+Capture side of the inventory webhooks.
+
+The receivers in webhooks/signals.py turn item saves and deletes into
+``OutboxEvent`` rows, inserted in the same transaction as the change: a
+rolled back change leaves no event and a committed one is stored with it,
+with no window between the commit and a separate write. Delivery reads the
+outbox separately (webhooks/delivery.py), so a save never waits on a
+subscriber; it holds events back for ``COMMIT_LAG`` seconds because they
+can commit out of id order, and an event whose transaction stays open
+longer than that can be missed.
+
+Nothing is written for event types no active subscription wants. That set
+is kept in the Django cache for ``WEBHOOKS['SUBSCRIBED_TTL']`` seconds, so
+without subscribers a save costs no query at all. Changing a subscription
+clears it; with ``REDIS_URL`` that reaches every process, with the local
+memory cache only the one that made the change, and the others pick the new
+subscriptions up when their copy expires.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import EVENT_TYPES
+
+SUBSCRIBED_KEY = 'webhooks:subscribed-events'
+
+DEFAULT_WEBHOOK_SETTINGS = {
+    'ENABLED': True,
+    # Seconds the worker sleeps when the outbox is drained
+    'POLL_INTERVAL': 1.0,
+    # Outbox events per delivery (before coalescing)
+    'BATCH_SIZE': 100,
+    # Subscribers delivered to in parallel, over one pooled HTTP session
+    'WORKERS': 4,
+    'TIMEOUT': 10,
+    # Retry after BACKOFF_BASE * 2 ** (failures - 1) seconds (jittered), at most BACKOFF_MAX
+    'BACKOFF_BASE': 5,
+    'BACKOFF_MAX': 3600,
+    # Undelivered events are dropped after this many days
+    'MAX_AGE_DAYS': 7,
+    # Events are sent once they are this old (seconds): earlier ids may not have committed yet
+    'COMMIT_LAG': 10,
+    # Seconds the subscribed event types are cached
+    'SUBSCRIBED_TTL': 10,
+}
+
+
+def webhook_settings():
+    """Return ``settings.WEBHOOKS`` merged over the defaults."""
+    return {**DEFAULT_WEBHOOK_SETTINGS, **getattr(settings, 'WEBHOOKS', {})}
+
+
+def subscribed_events():
+    """The event types at least one active subscription wants."""
+    from .models import WebhookSubscription
+
+    events = cache.get(SUBSCRIBED_KEY)
+    if events is None:
+        wanted = set()
+        for types in WebhookSubscription.objects.filter(is_active=True).values_list('events', flat=True):
+            wanted.update(types or EVENT_TYPES)
+        events = sorted(wanted)
+        cache.set(SUBSCRIBED_KEY, events, timeout=webhook_settings()['SUBSCRIBED_TTL'])
+    return events
+
+
+def subscriptions_changed():
+    """Forget the subscribed event types, now and (for reads racing the commit) once the change commits."""
+    cache.delete(SUBSCRIBED_KEY)
+    transaction.on_commit(lambda: cache.delete(SUBSCRIBED_KEY))
+
+
+def item_payload(item):
+    """What subscribers receive about an item (no related rows: no queries)."""
+    return {
+        'id': item.pk,
+        'sku': item.sku,
+        'name': item.name,
+        'category_id': item.category_id,
+        'supplier_id': item.supplier_id,
+        'quantity': item.quantity,
+        'unit_price': item.unit_price,
+        'reorder_level': item.reorder_level,
+        'expiry_date': item.expiry_date,
+        'low_stock': item.quantity <= item.reorder_level,
+        'updated_at': item.updated_at,
+    }
+
+
+def emit(event_types, item, payload=None, using=None):
+    """Write an outbox event of each of ``event_types`` that has subscribers; returns how many."""
+    from .models import OutboxEvent
+
+    if not webhook_settings()['ENABLED']:
+        return 0
+    subscribed = subscribed_events()
+    event_types = [event_type for event_type in event_types if event_type in subscribed]
+    if not event_types:
+        return 0
+    payload = item_payload(item) if payload is None else payload
+    OutboxEvent.objects.using(using).bulk_create([
+        OutboxEvent(event_type=event_type, object_id=item.pk, payload=payload) for event_type in event_types
+    ])
+    return len(event_types)
@@ -0,0 +1,26 @@
+from rest_framework import serializers
+
+from .models import EVENT_TYPES, WebhookSubscription
+
+
+class WebhookSubscriptionSerializer(serializers.ModelSerializer):
+    events = serializers.ListField(
+        child=serializers.ChoiceField(choices=EVENT_TYPES), required=False,
+        help_text='Event types to send; empty for all of them',
+    )
+    has_secret = serializers.SerializerMethodField()
+
+    class Meta:
+        model = WebhookSubscription
+        fields = [
+            'id', 'name', 'url', 'secret', 'has_secret', 'events', 'is_active', 'created_at',
+            'last_event_id', 'last_delivered_at', 'failures', 'retry_at', 'last_error',
+        ]
+        read_only_fields = ['last_event_id', 'last_delivered_at', 'failures', 'retry_at', 'last_error']
+        extra_kwargs = {'secret': {'write_only': True}}
+
+    def get_has_secret(self, obj):
+        return bool(obj.secret)
+
+    def validate_events(self, value):
+        return sorted(set(value))
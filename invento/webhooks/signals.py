@@ -0,0 +1,43 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from audit.tracking import loaded_values
+from inventory.models import Inventory
+from . import outbox
+from .models import (
+    EVENT_CREATED, EVENT_DELETED, EVENT_LOW_STOCK, EVENT_UPDATED, WebhookSubscription,
+)
+
+
+def _is_low(quantity, reorder_level):
+    return quantity is not None and reorder_level is not None and quantity <= reorder_level
+
+
+@receiver(pre_save, sender=Inventory)
+def remember_stock_level(sender, instance, **kwargs):
+    """Whether the item was low on stock before this save, from the values it was loaded with (no query)."""
+    loaded = loaded_values(instance) or {}
+    instance._webhook_was_low = _is_low(loaded.get('quantity'), loaded.get('reorder_level'))
+
+
+@receiver(post_save, sender=Inventory)
+def queue_item_saved(sender, instance, created, raw=False, using=None, **kwargs):
+    if raw:
+        return
+    event_types = [EVENT_CREATED if created else EVENT_UPDATED]
+    # Once per drop below the reorder level, not on every save while low
+    if instance.quantity <= instance.reorder_level and not getattr(instance, '_webhook_was_low', False):
+        event_types.append(EVENT_LOW_STOCK)
+    outbox.emit(event_types, instance, using=using)
+
+
+@receiver(post_delete, sender=Inventory)
+def queue_item_deleted(sender, instance, using=None, **kwargs):
+    payload = {'id': instance.pk, 'sku': instance.sku, 'name': instance.name}
+    outbox.emit([EVENT_DELETED], instance, payload=payload, using=using)
+
+
+@receiver(post_save, sender=WebhookSubscription)
+@receiver(post_delete, sender=WebhookSubscription)
+def forget_subscribed_events(sender, **kwargs):
+    outbox.subscriptions_changed()
@@ -0,0 +1,186 @@
+import hashlib
+import hmac
+import json
+import threading
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from inventory.models import Inventory
+from . import delivery
+from .models import EVENT_LOW_STOCK, EVENT_UPDATED, OutboxEvent, WebhookSubscription
+from .outbox import SUBSCRIBED_KEY, subscribed_events, webhook_settings
+
+
+class StubReceiver(BaseHTTPRequestHandler):
+    """Records every POST and answers with the server's ``status``."""
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        self.server.received.append((dict(self.headers), body))
+        self.send_response(self.server.status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@override_settings(WEBHOOKS={'WORKERS': 1, 'BACKOFF_BASE': 60, 'COMMIT_LAG': 0})
+class WebhookDeliveryTests(TestCase):
+    """Outbox capture and batched delivery against a stub HTTP server on localhost."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubReceiver)
+        cls.server.received = []
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.session = delivery.build_session(1)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.session.close()
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.delete(SUBSCRIBED_KEY)
+        self.server.received.clear()
+        self.server.status = 204
+        self.item = Inventory.objects.create(
+            name='Hooked item', sku='HOOK-1', quantity=50, unit_price='2.00', reorder_level=10
+        )
+        self.subscription = WebhookSubscription.objects.create(
+            name='ERP', url=f'http://127.0.0.1:{self.server.server_port}/hook', secret='s3cret'
+        )
+
+    def tearDown(self):
+        # The subscriptions are rolled back, the cached event types aren't
+        cache.delete(SUBSCRIBED_KEY)
+
+    def edit(self, *quantities):
+        item = Inventory.objects.get(pk=self.item.pk)
+        for quantity in quantities:
+            item.quantity = quantity
+            item.save()
+
+    def test_batch_is_coalesced_signed_and_advances_the_cursor(self):
+        self.edit(40, 30, 5, 8)
+
+        sent, more = delivery.deliver_pending(self.session)
+
+        self.assertEqual((sent, more), (2, False))
+        headers, body = self.server.received[0]
+        self.assertEqual(
+            headers['X-Invento-Signature'],
+            'sha256=' + hmac.new(b's3cret', body, hashlib.sha256).hexdigest(),
+        )
+        events = json.loads(body)['events']
+        # Four updates collapse into the latest; the item went low on stock once
+        self.assertEqual([event['type'] for event in events], [EVENT_LOW_STOCK, EVENT_UPDATED])
+        self.assertEqual(events[1]['data']['quantity'], 8)
+        self.subscription.refresh_from_db()
+        self.assertEqual(self.subscription.last_event_id, OutboxEvent.objects.latest('pk').pk)
+        self.assertEqual(delivery.deliver_pending(self.session), (0, False))
+
+    def test_failed_delivery_backs_off_then_resends_the_batch(self):
+        self.edit(40)
+        self.server.status = 503
+
+        self.assertEqual(delivery.deliver_pending(self.session), (0, False))
+        self.subscription.refresh_from_db()
+        self.assertEqual((self.subscription.failures, self.subscription.last_error), (1, 'HTTP 503'))
+        self.assertGreater(self.subscription.retry_at, timezone.now() + timedelta(seconds=29))
+        # Not due yet
+        self.assertEqual(delivery.deliver_pending(self.session), (0, False))
+        self.assertEqual(len(self.server.received), 1)
+
+        self.server.status = 200
+        WebhookSubscription.objects.filter(pk=self.subscription.pk).update(retry_at=timezone.now())
+        self.assertEqual(delivery.deliver_pending(self.session), (1, False))
+        self.subscription.refresh_from_db()
+        self.assertEqual((self.subscription.failures, self.subscription.retry_at), (0, None))
+
+    def test_unreachable_subscriber_is_retried_later(self):
+        self.subscription.url = 'http://127.0.0.1:9/hook'
+        self.subscription.save()
+        self.edit(40)
+
+        self.assertEqual(delivery.deliver_pending(self.session), (0, False))
+        self.subscription.refresh_from_db()
+        self.assertEqual(self.subscription.failures, 1)
+        self.assertIn('ConnectionError', self.subscription.last_error)
+
+    def test_only_subscribed_event_types_are_queued(self):
+        self.subscription.events = [EVENT_LOW_STOCK]
+        self.subscription.save()
+
+        self.edit(40, 9, 7)
+
+        self.assertEqual(list(OutboxEvent.objects.values_list('event_type', flat=True)), [EVENT_LOW_STOCK])
+
+    def test_filtered_subscription_moves_past_events_of_other_types(self):
+        low_stock = WebhookSubscription.objects.create(
+            name='Purchasing', url=self.subscription.url, events=[EVENT_LOW_STOCK],
+        )
+        self.edit(40, 30)
+
+        self.assertEqual(delivery.deliver_pending(self.session), (1, False))
+        self.assertEqual(len(self.server.received), 1)
+        low_stock.refresh_from_db()
+        self.assertEqual(low_stock.last_event_id, OutboxEvent.objects.latest('pk').pk)
+        self.assertEqual(delivery.due_subscriptions(), [])
+
+        self.edit(5)
+        self.assertEqual(delivery.deliver_pending(self.session), (3, False))
+        bodies = [json.loads(body) for _, body in self.server.received[1:]]
+        batches = {body['subscription']: body['events'] for body in bodies}
+        self.assertEqual([event['type'] for event in batches[low_stock.pk]], [EVENT_LOW_STOCK])
+
+    def test_nothing_is_queued_without_active_subscriptions(self):
+        self.subscription.is_active = False
+        self.subscription.save()
+
+        self.edit(40)
+
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_delivered_events_are_pruned(self):
+        self.edit(40)
+        delivery.deliver_pending(self.session)
+        self.edit(30)
+
+        self.assertEqual(delivery.prune_outbox(), 1)
+        self.assertEqual(OutboxEvent.objects.count(), 1)
+
+    @override_settings(WEBHOOKS={'WORKERS': 1, 'COMMIT_LAG': 60})
+    def test_events_wait_for_the_commit_lag_and_keep_id_order(self):
+        self.edit(40, 30)
+        first, second = OutboxEvent.objects.order_by('pk')
+        # The second event is old enough, the first isn't (its transaction may still be open)
+        OutboxEvent.objects.filter(pk=second.pk).update(created_at=timezone.now() - timedelta(minutes=5))
+
+        self.assertEqual(delivery.deliver_pending(self.session), (0, False))
+
+        OutboxEvent.objects.filter(pk=first.pk).update(created_at=timezone.now() - timedelta(minutes=5))
+        self.assertEqual(delivery.deliver_pending(self.session), (1, False))
+        self.subscription.refresh_from_db()
+        self.assertEqual(self.subscription.last_event_id, second.pk)
+
+    def test_subscribed_event_types_are_cached_for_a_limited_time(self):
+        subscribed_events()
+        # As if another process had added the subscription: this cache wasn't cleared
+        WebhookSubscription.objects.filter(pk=self.subscription.pk).update(events=[EVENT_LOW_STOCK])
+
+        with mock.patch.object(cache, 'set', wraps=cache.set) as cache_set:
+            cache.delete(SUBSCRIBED_KEY)
+            self.assertEqual(subscribed_events(), [EVENT_LOW_STOCK])
+
+        self.assertEqual(cache_set.call_args.kwargs['timeout'], webhook_settings()['SUBSCRIBED_TTL'])
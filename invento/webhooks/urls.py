@@ -0,0 +1,16 @@
+"""
+Webhooks API URL Configuration
+
+Endpoints:
+    GET/POST          /api/webhooks/subscriptions/              - List / create subscriptions
+    GET               /api/webhooks/subscriptions/event-types/  - Event types that can be subscribed to
+    GET/PATCH/DELETE  /api/webhooks/subscriptions/<id>/         - One subscription and its delivery state
+    POST              /api/webhooks/subscriptions/<id>/retry/   - Retry a failing subscription now
+"""
+from rest_framework.routers import DefaultRouter
+from .views import WebhookSubscriptionViewSet
+
+router = DefaultRouter()
+router.register(r'subscriptions', WebhookSubscriptionViewSet, basename='webhook-subscription')
+
+urlpatterns = router.urls
@@ -0,0 +1,42 @@
+"""
+Webhook subscriptions API. Admins only.
+"""
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from accounts.permissions import IsAdmin
+from inventory.pagination import InventoryPagination
+from .models import EVENT_TYPES, WebhookSubscription
+from .serializers import WebhookSubscriptionSerializer
+
+
+class WebhookSubscriptionViewSet(viewsets.ModelViewSet):
+    """
+    Subscriptions to inventory events, delivered in batches by
+    ``manage.py runwebhooks`` (webhooks/delivery.py).
+
+    Event types: inventory.created, inventory.updated, inventory.deleted,
+    inventory.low_stock. A new subscription receives the events from its
+    creation on.
+    """
+    queryset = WebhookSubscription.objects.all()
+    serializer_class = WebhookSubscriptionSerializer
+    permission_classes = [IsAuthenticated, IsAdmin]
+    pagination_class = InventoryPagination
+
+    def perform_create(self, serializer):
+        serializer.save(created_by=self.request.user)
+
+    @action(detail=False, methods=['get'], url_path='event-types', url_name='event-types')
+    def event_types(self, request):
+        return Response({'event_types': EVENT_TYPES})
+
+    @action(detail=True, methods=['post'], url_path='retry', url_name='retry')
+    def retry(self, request, pk=None):
+        """Make a backing-off subscription due for delivery now."""
+        subscription = self.get_object()
+        WebhookSubscription.objects.filter(pk=subscription.pk).update(retry_at=None)
+        subscription.retry_at = None
+        return Response(self.get_serializer(subscription).data)